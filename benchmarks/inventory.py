@@ -0,0 +1,99 @@
+"""Benchmark de consultas de capacidad: bucle Python frente a `InventoryQuery`.
+
+Mide, sobre `count` hoteles en memoria, "hoteles con al menos k libres",
+"total de habitaciones libres" y "top 10 por ocupación", y el costo de
+mantener las columnas con `reserve_room`.
+
+Uso:
+    python -m benchmarks.inventory --count 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Any, Callable, List, Optional
+
+from src.hotel import Hotel
+from src.inventory import InventoryData, InventoryQuery
+
+
+def synthetic_hotels(count: int, seed: int = 7) -> List[Hotel]:
+    """Genera `count` hoteles con ocupación aleatoria."""
+    rng = random.Random(seed)
+    hotels = []
+    for i in range(count):
+        total = rng.randint(10, 400)
+        hotels.append(Hotel(f"H{i:07d}", f"Hotel {i}", total, rng.randint(0, total)))
+    return hotels
+
+
+def best_of(func: Callable[[], Any], repeat: int = 5) -> float:
+    """Mejor tiempo de `repeat` ejecuciones, en milisegundos."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def time_updates(data: InventoryData, hotels: List[Hotel], updates: int = 100_000) -> float:
+    """Microsegundos por actualización incremental de una fila, como tras `reserve_room`."""
+    start = time.perf_counter()
+    for i in range(updates):
+        hotel = hotels[i % len(hotels)]
+        hotel.rooms_available = max(0, hotel.rooms_available - 1)
+        data.remove(hotel.hotel_id)
+        data.add(hotel)
+    return (time.perf_counter() - start) / updates * 1e6
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Punto de entrada de línea de comandos."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--min-free", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    hotels = synthetic_hotels(args.count)
+    start = time.perf_counter()
+    data = InventoryData(hotels)
+    print(f"build: {(time.perf_counter() - start) * 1000:.0f} ms for {args.count} hotels")
+    query = InventoryQuery(lambda: data)
+    k = args.min_free
+
+    cases = [
+        (
+            f"at least {k} free",
+            lambda: [h.hotel_id for h in hotels if h.rooms_available >= k],
+            lambda: query.where("rooms_available", minimum=k).ids(),
+        ),
+        (
+            f"count with {k} free",
+            lambda: sum(1 for h in hotels if h.rooms_available >= k),
+            lambda: query.where("rooms_available", minimum=k).count(),
+        ),
+        (
+            "total free rooms",
+            lambda: sum(h.rooms_available for h in hotels),
+            query.sum,
+        ),
+        (
+            "top 10 by occupancy",
+            lambda: sorted(
+                hotels, key=lambda h: (h.rooms_total - h.rooms_available) / h.rooms_total
+            )[-10:],
+            lambda: query.top(10, "occupancy").ids(),
+        ),
+    ]
+    for name, loop, vectorized in cases:
+        print(f"{name:>22}: loop {best_of(loop, 3):8.1f} ms   "
+              f"numpy {best_of(vectorized):7.2f} ms")
+
+    print(f"incremental update: {time_updates(data, hotels):.2f} us per reserve_room")
+
+
+if __name__ == "__main__":
+    main()
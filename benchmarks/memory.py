@@ -0,0 +1,109 @@
+"""Benchmark de memoria por reserva cargada.
+
+Escribe un archivo de reservas real y mide, por la vía de carga del
+repositorio, los bytes que quedan asignados tras `list_reservations()`:
+- "uncached": `ReservationRepository(path)` (sin caché);
+- "cached": `ReservationRepository(path, cache=True)`;
+- "columnar": `ReservationRepository(path).columns()`.
+
+Para cada variante se informa lo que retiene el repositorio una vez
+descartado el resultado y lo que ocupa junto con la lista devuelta (o las
+columnas).
+
+Uso:
+    python -m benchmarks.memory --count 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import tempfile
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.reservation import ReservationRepository
+
+
+def write_reservations(
+    path: Path, count: int, customers: int = 50_000, hotels: int = 2_000
+) -> None:
+    """Escribe en `path` un archivo JSON con `count` reservas."""
+    records = [
+        {
+            "reservation_id": f"R{i:09d}",
+            "customer_id": f"C{i % customers:07d}",
+            "hotel_id": f"H{i % hotels:05d}",
+            "active": i % 5 != 0,
+        }
+        for i in range(count)
+    ]
+    path.write_text(json.dumps(records), encoding="utf-8")
+
+
+def load_uncached(path: Path) -> Tuple[Any, Any]:
+    """Repositorio sin caché y la lista de reservas."""
+    repo = ReservationRepository(path=path)
+    return repo, repo.list_reservations()
+
+
+def load_cached(path: Path) -> Tuple[Any, Any]:
+    """Repositorio con caché y la lista de reservas."""
+    repo = ReservationRepository(path=path, cache=True)
+    return repo, repo.list_reservations()
+
+
+def load_columnar(path: Path) -> Tuple[Any, Any]:
+    """Repositorio sin caché y sus columnas."""
+    repo = ReservationRepository(path=path)
+    return repo, repo.columns()
+
+
+def measure(path: Path, load: Callable[[Path], Tuple[Any, Any]]) -> Tuple[int, int]:
+    """Bytes asignados tras `load`: con el resultado y solo con el repositorio."""
+    gc.collect()
+    tracemalloc.start()
+    repo, result = load(path)
+    gc.collect()
+    with_result, _ = tracemalloc.get_traced_memory()
+    del result
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del repo
+    return retained, with_result
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Punto de entrada de línea de comandos."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as d:
+        path = Path(d) / "reservations.json"
+        write_reservations(path, args.count)
+        for name, load in (
+            ("uncached", load_uncached),
+            ("cached", load_cached),
+            ("columnar", load_columnar),
+        ):
+            retained, with_result = measure(path, load)
+            results[name] = {
+                "retained": retained / args.count,
+                "with_result": with_result / args.count,
+            }
+
+    for name, result in results.items():
+        print(
+            f"{name:>9}: {result['retained']:8.1f} retained, "
+            f"{result['with_result']:8.1f} with result (bytes/reservation)"
+        )
+    print(json.dumps({"count": args.count, "bytes_per_record": results}))
+
+
+if __name__ == "__main__":
+    main()
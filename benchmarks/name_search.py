@@ -0,0 +1,82 @@
+"""Benchmark de la búsqueda de clientes por nombre.
+
+Construye `NameIndexData` para `count` clientes sintéticos, lo guarda y lo
+vuelve a cargar como lo haría un proceso nuevo, y mide consultas por
+prefijo, exactas de varias palabras y con errores de tipeo frente a un
+recorrido de la lista completa.
+
+Uso:
+    python -m benchmarks.name_search --count 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from src.name_index import NameIndexData, normalize, tokenize
+
+
+FIRST = [
+    "Ana", "Andrés", "Beatriz", "Carlos", "Cesar", "Daniela", "Diego", "Elena", "Emilio",
+    "Fernanda", "Gabriel", "Héctor", "Isabel", "Javier", "John", "José", "Juan", "Laura",
+    "Lucía", "Luis", "Manuel", "María", "Marta", "Miguel", "Natalia", "Óscar", "Pablo",
+    "Patricia", "Ricardo", "Rosa", "Santiago", "Sofía", "Tomás", "Valeria", "Ximena",
+]
+LAST = [
+    "Aguilar", "Álvarez", "Castillo", "Cruz", "Díaz", "Flores", "García", "Gómez",
+    "González", "Gutiérrez", "Hernández", "Iracheta", "Jiménez", "López", "Martínez",
+    "Mendoza", "Morales", "Muñoz", "Ortiz", "Pérez", "Ramírez", "Reyes", "Rodríguez",
+    "Romero", "Ruiz", "Sánchez", "Torres", "Vargas", "Vázquez",
+]
+
+
+def synthetic_names(count: int, seed: int = 11) -> Dict[str, str]:
+    """Nombres de `count` clientes, con apellidos poco comunes mezclados."""
+    rng = random.Random(seed)
+    names = {}
+    for i in range(count):
+        last = rng.choice(LAST) if rng.random() < 0.9 else f"Apellido{rng.randrange(50_000)}"
+        names[f"C{i:07d}"] = f"{rng.choice(FIRST)} {last} {rng.choice(LAST)}"
+    return names
+
+
+def best_of(func: Callable[[], Any], repeat: int = 20) -> float:
+    """Mejor tiempo de `repeat` ejecuciones, en milisegundos."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Punto de entrada de línea de comandos."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    names = synthetic_names(args.count)
+    start = time.perf_counter()
+    data = NameIndexData.from_names({cid: tokenize(name) for cid, name in names.items()})
+    print(f"build: {time.perf_counter() - start:.2f} s, {len(data.tokens)} distinct words")
+
+    payload = data.to_json(())
+    start = time.perf_counter()
+    NameIndexData.from_names(json.loads(payload)["names"])
+    print(f"restore: {time.perf_counter() - start:.2f} s from {len(payload) / 1e6:.0f} MB")
+
+    for query in ("mar", "maría garcía", "jose iracheta", "apellido4711", "gonzales ruiz",
+                  "jhon"):
+        indexed = best_of(lambda q=query: data.search(q, 10))
+        needle = normalize(query)
+        scan = best_of(lambda n=needle: [c for c, v in names.items() if n in normalize(v)], 1)
+        print(f"{query!r:>16}: index {indexed:6.3f} ms   scan {scan:8.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
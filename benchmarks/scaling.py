@@ -0,0 +1,297 @@
+"""Benchmark de escalabilidad de las operaciones de los repositorios.
+
+Para cada tamaño genera un conjunto sintético de archivos `data/*.json`
+(N reservas, N/10 clientes y N/100 hoteles), mide cada operación pública de
+los repositorios además de `save_json`/`load_json`, y reporta throughput,
+latencias p50/p99 y el pico de RSS. Cada tamaño se ejecuta en un proceso
+nuevo para que el pico de RSS sea el suyo.
+
+Uso:
+    python -m benchmarks.scaling run --sizes 1000 10000 --out base.json
+    python -m benchmarks.scaling compare base.json head.json --threshold 0.2
+
+`compare` termina con código 1 si alguna métrica empeora más que el umbral.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import multiprocessing
+import platform
+import queue as queue_module
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.customer import CustomerRepository
+from src.hotel import HotelRepository
+from src.reservation import ReservationRepository
+from src.storage import load_json, save_json
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - no disponible en Windows
+    resource = None  # type: ignore[assignment]
+
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+# Métricas en las que un valor mayor es peor.
+LOWER_IS_BETTER = ("p50_ms", "p99_ms")
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Percentil por rango más cercano de una lista no vacía."""
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Throughput y latencias de una lista de duraciones en segundos."""
+    total = sum(samples)
+    return {
+        "iterations": len(samples),
+        "throughput": len(samples) / total if total > 0 else float("inf"),
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+    }
+
+
+def peak_rss_kb() -> Optional[int]:
+    """Pico de memoria residente del proceso en KiB, si se puede medir."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def generate(directory: Path, size: int, headroom: int) -> None:
+    """Escribe clientes, hoteles y reservas sintéticos en `directory`."""
+    customers = max(1, size // 10)
+    hotels = max(1, size // 100)
+    rooms = size // hotels + headroom
+    save_json(
+        directory / "customers.json",
+        [{"customer_id": f"C{i:07d}", "name": f"Customer {i}"} for i in range(customers)],
+    )
+    save_json(
+        directory / "hotels.json",
+        [
+            {
+                "hotel_id": f"H{i:05d}",
+                "name": f"Hotel {i}",
+                "rooms_total": rooms,
+                "rooms_available": rooms,
+            }
+            for i in range(hotels)
+        ],
+    )
+    save_json(
+        directory / "reservations.json",
+        [
+            {
+                "reservation_id": f"R{i:09d}",
+                "customer_id": f"C{i % customers:07d}",
+                "hotel_id": f"H{i % hotels:05d}",
+                "active": i % 5 != 0,
+            }
+            for i in range(size)
+        ],
+    )
+
+
+def timed(calls: Iterator[Callable[[], Any]]) -> List[float]:
+    """Duración en segundos de cada llamada."""
+    samples = []
+    for call in calls:
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def run_size(size: int, ops: int, heavy_ops: int, cache: bool) -> Dict[str, Any]:
+    """Mide todas las operaciones sobre un conjunto de `size` reservas."""
+    # pylint: disable=too-many-locals
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp)
+        generate(base, size, headroom=ops)
+        customers = CustomerRepository(path=base / "customers.json", cache=cache)
+        hotels = HotelRepository(path=base / "hotels.json", cache=cache)
+        reservations = ReservationRepository(
+            path=base / "reservations.json",
+            customer_repo=customers,
+            hotel_repo=hotels,
+            cache=cache,
+        )
+        existing = [f"R{i * max(1, size // ops):09d}" for i in range(ops)]
+        hotel_ids = [f"H{i % max(1, size // 100):05d}" for i in range(ops)]
+        customer_ids = [f"C{i % max(1, size // 10):07d}" for i in range(ops)]
+        raw = load_json(base / "reservations.json", default=[])
+        scratch = base / "scratch.json"
+
+        plan: List[Tuple[str, Iterator[Callable[[], Any]]]] = [
+            ("save_json", (lambda: save_json(scratch, raw) for _ in range(heavy_ops))),
+            ("load_json", (lambda: load_json(scratch, []) for _ in range(heavy_ops))),
+            ("create_customer", (
+                lambda i=i: customers.create_customer(f"BC{i}", "Bench") for i in range(ops)
+            )),
+            ("get_customer", (lambda c=c: customers.get_customer(c) for c in customer_ids)),
+            ("list_customers", (customers.list_customers for _ in range(heavy_ops))),
+            ("create_hotel", (
+                lambda i=i: hotels.create_hotel(f"BH{i}", "Bench", 10) for i in range(ops)
+            )),
+            ("get_hotel", (lambda h=h: hotels.get_hotel(h) for h in hotel_ids)),
+            ("reserve_room", (lambda h=h: hotels.reserve_room(h) for h in hotel_ids)),
+            ("list_hotels", (hotels.list_hotels for _ in range(heavy_ops))),
+            ("create_reservation", (
+                lambda i=i: reservations.create_reservation(
+                    f"BR{i}", customer_ids[i], hotel_ids[i]
+                )
+                for i in range(ops)
+            )),
+            ("get_reservation", (lambda r=r: reservations.get_reservation(r) for r in existing)),
+            ("cancel_reservation", (
+                lambda i=i: reservations.cancel_reservation(f"BR{i}") for i in range(ops)
+            )),
+            ("list_reservations", (reservations.list_reservations for _ in range(heavy_ops))),
+        ]
+        operations = {name: summarize(timed(calls)) for name, calls in plan}
+
+    return {"peak_rss_kb": peak_rss_kb(), "operations": operations}
+
+
+def _child(size: int, ops: int, heavy_ops: int, cache: bool, queue: Any) -> None:
+    queue.put(run_size(size, ops, heavy_ops, cache))
+
+
+def run_isolated(size: int, ops: int, heavy_ops: int, cache: bool) -> Dict[str, Any]:
+    """Ejecuta `run_size` en un proceso nuevo."""
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_child, args=(size, ops, heavy_ops, cache, queue))
+    process.start()
+    try:
+        while True:
+            try:
+                return queue.get(timeout=1)
+            except queue_module.Empty:
+                if not process.is_alive():
+                    raise RuntimeError(
+                        f"benchmark for {size} records exited with code {process.exitcode}"
+                    ) from None
+    finally:
+        process.join()
+
+
+def git_commit() -> Optional[str]:
+    """Commit actual del repositorio, si se puede determinar."""
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def _ratio(worse_if_high: float, reference: float) -> float:
+    return worse_if_high / reference if reference > 0 else 1.0
+
+
+def compare(base: Dict[str, Any], head: Dict[str, Any], threshold: float) -> List[str]:
+    """Lista las métricas de `head` que empeoran más que `threshold` respecto a `base`."""
+    regressions = []
+    for size, head_run in head["results"].items():
+        base_run = base["results"].get(size)
+        if base_run is None:
+            continue
+        for name, metrics in head_run["operations"].items():
+            before = base_run["operations"].get(name)
+            if before is None:
+                continue
+            ratios = {m: _ratio(metrics[m], before[m]) for m in LOWER_IS_BETTER}
+            ratios["throughput"] = _ratio(before["throughput"], metrics["throughput"])
+            for metric, ratio in ratios.items():
+                if ratio > 1 + threshold:
+                    regressions.append(
+                        f"{size} {name} {metric}: {before[metric]:.4g} -> {metrics[metric]:.4g}"
+                    )
+        old_rss, new_rss = base_run.get("peak_rss_kb"), head_run.get("peak_rss_kb")
+        if old_rss and new_rss and _ratio(new_rss, old_rss) > 1 + threshold:
+            regressions.append(f"{size} peak_rss_kb: {old_rss} -> {new_rss}")
+    return regressions
+
+
+def print_run(report: Dict[str, Any]) -> None:
+    """Tabla legible de un reporte."""
+    for size, run in report["results"].items():
+        print(f"\n== {int(size):,} records (peak RSS {run['peak_rss_kb']} KiB)")
+        for name, m in run["operations"].items():
+            print(
+                f"  {name:<20} {m['throughput']:>12.1f} ops/s"
+                f"  p50 {m['p50_ms']:>10.3f} ms  p99 {m['p99_ms']:>10.3f} ms"
+            )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Punto de entrada de línea de comandos."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="mide y escribe un reporte JSON")
+    run.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    run.add_argument("--ops", type=int, default=20, help="iteraciones por operación")
+    run.add_argument(
+        "--heavy-ops", type=int, default=3,
+        help="iteraciones de list_* y save_json/load_json",
+    )
+    run.add_argument("--cache", action="store_true", help="repositorios con cache=True")
+    run.add_argument("--out", type=Path, help="archivo JSON de resultados")
+
+    cmp_ = commands.add_parser("compare", help="marca regresiones entre dos reportes")
+    cmp_.add_argument("base", type=Path)
+    cmp_.add_argument("head", type=Path)
+    cmp_.add_argument("--threshold", type=float, default=0.2, help="empeoramiento tolerado")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        regressions = compare(
+            load_json(args.base, default=None), load_json(args.head, default=None),
+            args.threshold,
+        )
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+        return 1 if regressions else 0
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "ops": args.ops,
+            "heavy_ops": args.heavy_ops,
+            "cache": args.cache,
+        },
+        "results": {
+            str(size): run_isolated(size, args.ops, args.heavy_ops, args.cache)
+            for size in args.sizes
+        },
+    }
+    print_run(report)
+    if args.out is not None:
+        save_json(args.out, report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
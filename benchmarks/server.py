@@ -0,0 +1,97 @@
+"""Benchmark del servidor local frente a repositorios abiertos en frío.
+
+Prepara `count` reservas y mide por solicitud: abrir los repositorios y
+consultar (lo que paga un script de corta duración), la misma consulta por
+`ReservationClient`, y altas de reservas desde varios hilos por el cliente,
+que el servidor agrupa en escrituras comunes.
+
+Uso:
+    python -m benchmarks.server --count 100000 --threads 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from src.client import ReservationClient
+from src.server import ReservationServer, open_repositories
+
+
+def populate(data_dir: Path, count: int) -> None:
+    """Crea 1000 clientes, 100 hoteles y `count` reservas."""
+    repo = open_repositories(data_dir)
+    repo.customer_repo.create_customers_bulk(
+        {"customer_id": f"C{i}", "name": f"Cliente {i}"} for i in range(1000)
+    )
+    repo.hotel_repo.create_hotels_bulk(
+        {"hotel_id": f"H{i}", "name": f"Hotel {i}", "rooms_total": 1_000_000} for i in range(100)
+    )
+    repo.create_reservations_bulk(
+        {"reservation_id": f"R{i:07d}", "customer_id": f"C{i % 1000}", "hotel_id": f"H{i % 100}"}
+        for i in range(count)
+    )
+
+
+def per_call(func: Callable[[int], object], calls: int) -> float:
+    """Milisegundos promedio por llamada."""
+    start = time.perf_counter()
+    for i in range(calls):
+        func(i)
+    return (time.perf_counter() - start) / calls * 1000
+
+
+def concurrent_creates(client: ReservationClient, threads: int, per_thread: int) -> float:
+    """Altas por segundo desde `threads` hilos."""
+    def work(worker: int) -> None:
+        for i in range(per_thread):
+            client.create_reservation(None, f"C{(worker * per_thread + i) % 1000}", f"H{worker}")
+
+    workers = [threading.Thread(target=work, args=(w,)) for w in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return threads * per_thread / (time.perf_counter() - start)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Punto de entrada de línea de comandos."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        populate(data_dir, args.count)
+
+        cold = per_call(
+            lambda i: open_repositories(data_dir).get_reservation(f"R{i:07d}"), 5
+        )
+        print(f"cold open + get_reservation: {cold:8.2f} ms")
+
+        server = ReservationServer(open_repositories(data_dir))
+        with server.running(str(data_dir / "server.sock")) as address, \
+                ReservationClient(address, pool_size=args.threads) as client:
+            client.get_reservation("R0000000")
+            warm = per_call(lambda i: client.get_reservation(f"R{i:07d}"), 2000)
+            print(f"client get_reservation:      {warm:8.3f} ms")
+            rate = concurrent_creates(client, args.threads, 50)
+            print(f"client create_reservation:   {rate:8.0f}/s with {args.threads} threads")
+
+        direct = open_repositories(data_dir)
+        start = time.perf_counter()
+        for i in range(20):
+            direct.create_reservation(None, f"C{i}", "H0")
+        rate = 20 / (time.perf_counter() - start)
+        print(f"direct create_reservation:   {rate:8.0f}/s, one write per call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Archivo en frío, de solo anexado, para registros que ya no se consultan a menudo.
+
+Cada compactación agrega un segmento (arreglo JSON comprimido con gzip) al
+directorio del archivo y reescribe `manifest.json`, que lista los segmentos.
+Los segmentos nunca se modifican; el manifiesto es el punto de confirmación
+y se escribe con `commit_files` junto con el archivo caliente del que salen
+los registros (ver `UnitOfWork.include`). Cada segmento lleva al lado un
+filtro de Bloom de sus claves, así que casi todas las consultas de una clave
+que no está archivada terminan sin descomprimir nada.
+
+La compactación de las reservas se lanza con `python -m src.compact`.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.ids import BloomFilter
+from src.storage import (
+    FileCache,
+    Record,
+    Signature,
+    StagedWrite,
+    file_signature,
+    load_json,
+    read_file,
+    recover_commits,
+)
+
+
+ARCHIVE_MANIFEST = "manifest.json"
+
+
+def archive_path(path: str | Path) -> Path:
+    """Directorio de archivo que corresponde a la colección en `path`."""
+    return Path(path).with_suffix(".archive")
+
+
+class ColdArchive:
+    """Segmentos comprimidos con los registros archivados de una colección.
+
+    Las consultas por clave solo abren los segmentos cuyo filtro de Bloom
+    admite la clave, del más reciente al más antiguo; solo el último segmento
+    leído se mantiene descomprimido. Los filtros y el índice completo clave ->
+    segmento (para `scan` y `len`) se conservan mientras el manifiesto no cambie.
+    """
+
+    def __init__(self, directory: str | Path, key_field: str) -> None:
+        self.directory = Path(directory)
+        self.key_field = key_field
+        self.manifest_path = self.directory / ARCHIVE_MANIFEST
+        self._index = FileCache(self.manifest_path)
+        self._filters = FileCache(self.manifest_path)
+        self._segment: Optional[Tuple[str, Optional[Signature], Dict[str, Record]]] = None
+
+    def segments(self) -> List[Dict[str, Any]]:
+        """Entradas del manifiesto, de la más antigua a la más reciente."""
+        manifest = load_json(self.manifest_path, default=None)
+        if not isinstance(manifest, dict):
+            return []
+        return list(manifest.get("segments", []))
+
+    def _read_segment(self, name: str) -> Dict[str, Record]:
+        path = self.directory / name
+        signature = file_signature(path)
+        cached = self._segment
+        if cached is not None and cached[:2] == (name, signature):
+            return cached[2]
+        data = read_file(path)
+        if data is None:
+            print(f"[archive] Missing segment '{path}'")
+            return {}
+        records = {r[self.key_field]: r for r in json.loads(gzip.decompress(data))}
+        self._segment = (name, signature, records)
+        return records
+
+    def _locations(self) -> Dict[str, str]:
+        """Índice clave -> segmento, vigente para el manifiesto actual."""
+        index = self._index.get()
+        if index is None:
+            index = {}
+            if self.directory.exists():
+                recover_commits(self.directory)
+                for segment in self.segments():
+                    for key in self._read_segment(segment["name"]):
+                        index[key] = segment["name"]
+            self._index.put(index)
+        return index
+
+    def _segment_filters(self) -> List[Tuple[str, Optional[BloomFilter]]]:
+        """Segmentos con su filtro (o `None` si no tiene), del más reciente al más antiguo."""
+        filters = self._filters.get()
+        if filters is None:
+            filters = []
+            if self.directory.exists():
+                recover_commits(self.directory)
+                for segment in reversed(self.segments()):
+                    filters.append((segment["name"], self._read_filter(segment.get("bloom"))))
+            self._filters.put(filters)
+        return filters
+
+    def _read_filter(self, name: Optional[str]) -> Optional[BloomFilter]:
+        data = read_file(self.directory / name) if name else None
+        if data is None:
+            return None
+        try:
+            return BloomFilter.from_bytes(data)
+        except ValueError as exc:
+            print(f"[archive] Ignoring bloom filter '{name}': {exc}")
+            return None
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._locations())
+
+    def get(self, key: str) -> Optional[Record]:
+        """Registro archivado con esa clave o `None`."""
+        for name, bloom in self._segment_filters():
+            if bloom is not None and key not in bloom:
+                continue
+            record = self._read_segment(name).get(key)
+            if record is not None:
+                return record
+        return None
+
+    def scan(self) -> Iterator[Tuple[str, Record]]:
+        """Recorre los registros archivados segmento por segmento."""
+        index = self._locations()
+        for segment in self.segments():
+            for key, record in self._read_segment(segment["name"]).items():
+                # Una clave archivada dos veces se reporta solo desde su último segmento.
+                if index.get(key) == segment["name"]:
+                    yield key, record
+
+    def stage(self, records: Dict[str, Record], archived_on: str) -> StagedWrite:
+        """Prepara un segmento nuevo con `records` y el manifiesto que lo incluye.
+
+        Devuelve los archivos a escribir con `commit_files` y la función que
+        actualiza el índice en memoria una vez confirmados.
+        """
+        if not records:
+            return {}, lambda: None
+        index = self._index.get()
+        filters = self._filters.get()
+        segments = self.segments()
+        stem = f"segment-{len(segments) + 1:06d}"
+        name = f"{stem}.json.gz"
+        body = json.dumps(list(records.values()), ensure_ascii=False, separators=(",", ":"))
+        bloom = BloomFilter.for_capacity(len(records))
+        for key in records:
+            bloom.add(key)
+        segments.append({
+            "name": name,
+            "bloom": f"{stem}.bloom",
+            "records": len(records),
+            "archived_on": archived_on,
+        })
+        manifest = {"version": 1, "segments": segments}
+        writes = {
+            self.directory / name: gzip.compress(body.encode("utf-8"), mtime=0),
+            self.directory / f"{stem}.bloom": bloom.to_bytes(),
+            self.manifest_path: json.dumps(manifest, indent=2).encode("utf-8"),
+        }
+
+        def install() -> None:
+            if index is not None:
+                index.update(dict.fromkeys(records, name))
+                self._index.put(index)
+            if filters is not None:
+                filters.insert(0, (name, bloom))
+                self._filters.put(filters)
+
+        return writes, install
@@ -0,0 +1,445 @@
+"""Fachadas asyncio de los repositorios.
+
+Cada llamada se ejecuta en un executor de hilos acotado, de modo que la
+lectura/escritura de archivos y el parseo JSON no bloquean el ciclo de
+eventos. Las escrituras de los repositorios ya son seguras entre hilos, pero
+actualizan en sitio vistas que otra lectura puede estar recorriendo; por eso
+cada archivo tiene un candado de lectores/escritor: las lecturas lo comparten
+entre sí y solo las mutaciones lo toman en exclusiva. Las altas y
+cancelaciones concurrentes se agrupan en una sola llamada masiva, es decir,
+en una sola reescritura por archivo.
+
+Uso:
+    reservations = AsyncReservationRepository(ReservationRepository(cache=True))
+    reservation = await reservations.create_reservation("R1", "C1", "H1")
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from datetime import date
+from functools import partial
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    TypeVar,
+    cast,
+)
+
+from src.customer import Customer, CustomerRepository
+from src.hotel import Hotel, HotelRepository
+from src.repository import BulkResult, Repository
+from src.reservation import Reservation, ReservationRepository
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Hilos del executor compartido por defecto.
+DEFAULT_WORKERS = 4
+
+# Executor compartido; lo crea `default_executor` en el primer uso.
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_executor_guard = threading.Lock()
+
+
+class _SharedLock:
+    """Candado de lectores/escritor: varias lecturas a la vez o una mutación.
+
+    Un escritor en espera detiene a los lectores nuevos para no quedar
+    postergado indefinidamente.
+    """
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting = 0
+
+    @contextmanager
+    def shared(self) -> Iterator[None]:
+        """Retiene el candado junto con otros lectores."""
+        with self._cond:
+            self._cond.wait_for(lambda: not self._writer and not self._waiting)
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                self._cond.notify_all()
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        """Retiene el candado en exclusiva."""
+        with self._cond:
+            self._waiting += 1
+            self._cond.wait_for(lambda: not self._writer and not self._readers)
+            self._waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+_file_locks: Dict[str, _SharedLock] = {}
+_file_locks_guard = threading.Lock()
+
+
+def default_executor() -> ThreadPoolExecutor:
+    """Devuelve el executor compartido, creándolo en el primer uso."""
+    global _EXECUTOR  # pylint: disable=global-statement
+    with _executor_guard:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(DEFAULT_WORKERS, thread_name_prefix="repo-io")
+        return _EXECUTOR
+
+
+@contextmanager
+def _holding(shared: Iterable[Path], exclusive: Iterable[Path] = ()) -> Iterator[None]:
+    """Toma los candados de los archivos en orden fijo para evitar interbloqueos.
+
+    Un archivo que aparece en ambos grupos se toma en exclusiva.
+    """
+    modes = {str(Path(p).resolve()): False for p in shared}
+    modes.update((str(Path(p).resolve()), True) for p in exclusive)
+    with ExitStack() as stack:
+        for name in sorted(modes):
+            with _file_locks_guard:
+                lock = _file_locks.setdefault(name, _SharedLock())
+            stack.enter_context(lock.exclusive() if modes[name] else lock.shared())
+        yield
+
+
+def _coalescer(
+    run: Callable[[List[Any]], Awaitable[List[BulkResult[R]]]]
+) -> Callable[[Any], Awaitable[BulkResult[R]]]:
+    """Agrupa solicitudes concurrentes en llamadas masivas a `run`.
+
+    Devuelve `submit(item)`, que encola `item` y espera su `BulkResult`.
+    Mientras un lote está en curso, las solicitudes nuevas esperan y se
+    envían juntas en el siguiente. Si `run` lanza una excepción en lugar de
+    reportarla en el resultado de un elemento, el lote se reintenta por
+    mitades, así que la excepción solo llega a quien la provocó.
+    """
+    pending: List[Tuple[Any, "asyncio.Future[BulkResult[R]]"]] = []
+    running: List["asyncio.Task[None]"] = []
+
+    async def settle(batch: List[Tuple[Any, "asyncio.Future[BulkResult[R]]"]]) -> None:
+        try:
+            results = await run([item for item, _ in batch])
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            if len(batch) == 1:
+                if not batch[0][1].done():
+                    batch[0][1].set_exception(exc)
+                return
+            # Un lote fallido no escribe nada: se reparte en mitades hasta
+            # aislar las solicitudes que fallan por sí solas.
+            middle = len(batch) // 2
+            await settle(batch[:middle])
+            await settle(batch[middle:])
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def drain() -> None:
+        try:
+            while pending:
+                batch = pending[:]
+                del pending[:]
+                await settle(batch)
+        finally:
+            running.clear()
+
+    async def submit(item: Any) -> BulkResult[R]:
+        future: "asyncio.Future[BulkResult[R]]" = asyncio.get_running_loop().create_future()
+        pending.append((item, future))
+        if not running:
+            running.append(asyncio.ensure_future(drain()))
+        return await future
+
+    return submit
+
+
+def _unwrap(result: BulkResult[R]) -> R:
+    """Devuelve la entidad de un resultado o relanza su error."""
+    if result.error is not None:
+        raise result.error
+    return cast(R, result.entity)
+
+
+class _AsyncRepository(Generic[T]):
+    """Base de las fachadas: ejecución fuera del ciclo con candados por archivo."""
+
+    def __init__(self, repo: Repository[T], executor: Optional[Executor] = None) -> None:
+        self.repo = repo
+        self._executor = executor
+
+    def _paths(self) -> List[Path]:
+        """Archivos que leen las consultas de la fachada."""
+        return list(self.repo.backend.paths())
+
+    def _write_paths(self) -> Tuple[List[Path], List[Path]]:
+        """Archivos que las mutaciones leen y los que modifican."""
+        return [], self._paths()
+
+    def _run(self, func: Callable[..., R], args: Tuple[Any, ...], mutates: bool) -> R:
+        if mutates:
+            guard = _holding(*self._write_paths())
+        else:
+            guard = _holding(self._paths())
+        with guard:
+            return func(*args)
+
+    async def _execute(self, func: Callable[..., R], args: Tuple[Any, ...], mutates: bool) -> R:
+        loop = asyncio.get_running_loop()
+        executor = self._executor or default_executor()
+        return await loop.run_in_executor(executor, partial(self._run, func, args, mutates))
+
+    async def read(self, func: Callable[..., R], *args: Any) -> R:
+        """Ejecuta la consulta `func(*args)` en el executor sin bloquear el ciclo.
+
+        Las consultas comparten los candados de sus archivos.
+        """
+        return await self._execute(func, args, mutates=False)
+
+    async def write(self, func: Callable[..., R], *args: Any) -> R:
+        """Ejecuta la mutación `func(*args)` en el executor sin bloquear el ciclo.
+
+        Excluye a las consultas de los archivos que modifica mientras dura.
+        """
+        return await self._execute(func, args, mutates=True)
+
+    async def _iter_pages(
+        self, page: Callable[[Optional[str], int], List[T]], page_size: int
+    ) -> AsyncIterator[T]:
+        """Recorre la colección pidiendo páginas al executor."""
+        after: Optional[str] = None
+        while True:
+            entities = await self.read(page, after, page_size)
+            for entity in entities:
+                yield entity
+            if len(entities) < page_size:
+                return
+            after = self.repo._key(entities[-1])  # pylint: disable=protected-access
+
+
+class AsyncCustomerRepository(_AsyncRepository[Customer]):
+    """Versión asyncio de `CustomerRepository`."""
+
+    repo: CustomerRepository
+
+    def __init__(self, repo: CustomerRepository, executor: Optional[Executor] = None) -> None:
+        super().__init__(repo, executor)
+        self._create = _coalescer(partial(self.write, repo.create_customers_bulk))
+
+    async def create_customer(self, customer_id: Optional[str], name: str) -> Customer:
+        """Crea un cliente; las altas concurrentes se escriben juntas."""
+        return _unwrap(await self._create({"customer_id": customer_id, "name": name}))
+
+    async def create_customers_bulk(
+        self, items: Iterable[Mapping[str, Any]]
+    ) -> List[BulkResult[Customer]]:
+        """Versión asyncio de `CustomerRepository.create_customers_bulk`."""
+        return await self.write(self.repo.create_customers_bulk, list(items))
+
+    async def get_customer(self, customer_id: str) -> Optional[Customer]:
+        """Obtiene un cliente por ID."""
+        return await self.read(self.repo.get_customer, customer_id)
+
+    async def update_customer(self, customer_id: str, name: str) -> Customer:
+        """Actualiza el nombre de un cliente."""
+        return await self.write(self.repo.update_customer, customer_id, name)
+
+    async def delete_customer(self, customer_id: str) -> None:
+        """Elimina un cliente."""
+        await self.write(self.repo.delete_customer, customer_id)
+
+    async def search_by_name(self, query: str, limit: int = 10) -> List[Customer]:
+        """Busca clientes por nombre."""
+        return await self.read(self.repo.search_by_name, query, limit)
+
+    async def list_customers(self) -> List[Customer]:
+        """Lista todos los clientes."""
+        return await self.read(self.repo.list_customers)
+
+    async def page_customers(
+        self, after_id: Optional[str] = None, limit: int = 100
+    ) -> List[Customer]:
+        """Devuelve una página de clientes."""
+        return await self.read(self.repo.page_customers, after_id, limit)
+
+    def iter_customers(self, page_size: int = 100) -> AsyncIterator[Customer]:
+        """Recorre los clientes por páginas."""
+        return self._iter_pages(self.repo.page_customers, page_size)
+
+
+class AsyncHotelRepository(_AsyncRepository[Hotel]):
+    """Versión asyncio de `HotelRepository`."""
+
+    repo: HotelRepository
+
+    def __init__(self, repo: HotelRepository, executor: Optional[Executor] = None) -> None:
+        super().__init__(repo, executor)
+        self._create = _coalescer(partial(self.write, repo.create_hotels_bulk))
+
+    async def create_hotel(
+        self, hotel_id: Optional[str], name: str, rooms_total: int
+    ) -> Hotel:
+        """Crea un hotel; las altas concurrentes se escriben juntas."""
+        item = {"hotel_id": hotel_id, "name": name, "rooms_total": rooms_total}
+        return _unwrap(await self._create(item))
+
+    async def create_hotels_bulk(
+        self, items: Iterable[Mapping[str, Any]]
+    ) -> List[BulkResult[Hotel]]:
+        """Versión asyncio de `HotelRepository.create_hotels_bulk`."""
+        return await self.write(self.repo.create_hotels_bulk, list(items))
+
+    async def get_hotel(self, hotel_id: str) -> Optional[Hotel]:
+        """Obtiene un hotel por ID."""
+        return await self.read(self.repo.get_hotel, hotel_id)
+
+    async def reserve_room(self, hotel_id: str) -> None:
+        """Descuenta una habitación disponible."""
+        await self.write(self.repo.reserve_room, hotel_id)
+
+    async def release_room(self, hotel_id: str) -> None:
+        """Libera una habitación."""
+        await self.write(self.repo.release_room, hotel_id)
+
+    async def max_occupancy(self, hotel_id: str, check_in: Any, check_out: Any) -> int:
+        """Ocupación máxima de un hotel en un rango de fechas."""
+        return await self.read(self.repo.max_occupancy, hotel_id, check_in, check_out)
+
+    async def search_availability(
+        self, date_range: Tuple[Any, Any], min_rooms: int = 1
+    ) -> List[Tuple[Hotel, int]]:
+        """Lista los hoteles con al menos `min_rooms` libres en el rango."""
+        return await self.read(self.repo.search_availability, date_range, min_rooms)
+
+    async def list_hotels(self) -> List[Hotel]:
+        """Lista todos los hoteles."""
+        return await self.read(self.repo.list_hotels)
+
+    async def page_hotels(self, after_id: Optional[str] = None, limit: int = 100) -> List[Hotel]:
+        """Devuelve una página de hoteles."""
+        return await self.read(self.repo.page_hotels, after_id, limit)
+
+    def iter_hotels(self, page_size: int = 100) -> AsyncIterator[Hotel]:
+        """Recorre los hoteles por páginas."""
+        return self._iter_pages(self.repo.page_hotels, page_size)
+
+
+class AsyncReservationRepository(_AsyncRepository[Reservation]):
+    """Versión asyncio de `ReservationRepository`.
+
+    Las mutaciones toman también en exclusiva los archivos de hoteles (las
+    altas y cancelaciones mueven habitaciones) y comparten los de clientes.
+    """
+
+    repo: ReservationRepository
+
+    def __init__(
+        self, repo: ReservationRepository, executor: Optional[Executor] = None
+    ) -> None:
+        super().__init__(repo, executor)
+        self._create = _coalescer(partial(self.write, repo.create_reservations_bulk))
+        self._cancel = _coalescer(partial(self.write, repo.cancel_reservations_bulk))
+
+    def _write_paths(self) -> Tuple[List[Path], List[Path]]:
+        """Las reservas consultan clientes y modifican reservas y hoteles."""
+        modified = [*self.repo.backend.paths(), *self.repo.hotel_repo.backend.paths()]
+        return list(self.repo.customer_repo.backend.paths()), modified
+
+    async def create_reservation(
+        self,
+        reservation_id: Optional[str],
+        customer_id: str,
+        hotel_id: str,
+        check_in: Any = None,
+        check_out: Any = None,
+    ) -> Reservation:
+        """Crea una reserva; las altas concurrentes se escriben juntas."""
+        item = {
+            "reservation_id": reservation_id,
+            "customer_id": customer_id,
+            "hotel_id": hotel_id,
+            "check_in": check_in,
+            "check_out": check_out,
+        }
+        return _unwrap(await self._create(item))
+
+    async def create_reservations_bulk(
+        self, items: Iterable[Mapping[str, Any]]
+    ) -> List[BulkResult[Reservation]]:
+        """Versión asyncio de `ReservationRepository.create_reservations_bulk`."""
+        return await self.write(self.repo.create_reservations_bulk, list(items))
+
+    async def get_reservation(self, reservation_id: str) -> Optional[Reservation]:
+        """Obtiene una reserva por ID."""
+        return await self.read(self.repo.get_reservation, reservation_id)
+
+    async def cancel_reservation(self, reservation_id: str) -> None:
+        """Cancela una reserva; las cancelaciones concurrentes se escriben juntas."""
+        _unwrap(await self._cancel(reservation_id))
+
+    async def cancel_reservations_bulk(
+        self, reservation_ids: Iterable[str]
+    ) -> List[BulkResult[Reservation]]:
+        """Versión asyncio de `ReservationRepository.cancel_reservations_bulk`."""
+        return await self.write(self.repo.cancel_reservations_bulk, list(reservation_ids))
+
+    async def archive_reservations(
+        self, retention_days: int = 30, today: Optional[date] = None
+    ) -> int:
+        """Versión asyncio de `ReservationRepository.archive_reservations`."""
+        return await self.write(self.repo.archive_reservations, retention_days, today)
+
+    async def list_reservations(self) -> List[Reservation]:
+        """Lista todas las reservas."""
+        return await self.read(self.repo.list_reservations)
+
+    async def page_reservations(
+        self, after_id: Optional[str] = None, limit: int = 100
+    ) -> List[Reservation]:
+        """Devuelve una página de reservas."""
+        return await self.read(self.repo.page_reservations, after_id, limit)
+
+    def iter_reservations(self, page_size: int = 100) -> AsyncIterator[Reservation]:
+        """Recorre las reservas por páginas."""
+        return self._iter_pages(self.repo.page_reservations, page_size)
+
+    async def find_by_customer(self, customer_id: str) -> List[Reservation]:
+        """Reservas de un cliente."""
+        return await self.read(self.repo.find_by_customer, customer_id)
+
+    async def find_by_hotel(self, hotel_id: str) -> List[Reservation]:
+        """Reservas de un hotel."""
+        return await self.read(self.repo.find_by_hotel, hotel_id)
+
+    async def active_for_hotel(self, hotel_id: str) -> List[Reservation]:
+        """Reservas activas de un hotel."""
+        return await self.read(self.repo.active_for_hotel, hotel_id)
+
+    async def count_active(self, hotel_id: str) -> int:
+        """Número de reservas activas de un hotel."""
+        return await self.read(self.repo.count_active, hotel_id)
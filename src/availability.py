@@ -0,0 +1,147 @@
+"""Motor de disponibilidad por fechas basado en árboles de segmentos.
+
+Cada hotel tiene un `OccupancyTree` sobre días (ordinales de `date`) que
+suma reservas en un rango y responde la ocupación máxima de un rango, ambas
+operaciones en O(log D).
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Any, Dict, List, Tuple
+
+from src.repository import IndexView
+
+
+# Potencia de dos que cubre todos los ordinales de `date` (date.max ~ 3.65M).
+DAY_SPAN = 1 << 22
+
+# Intervalo de días [inicio, fin) como ordinales.
+DayRange = Tuple[int, int]
+
+
+def parse_day(value: Any) -> int:
+    """Convierte una fecha (`date` o texto ISO) a su ordinal."""
+    if isinstance(value, date):
+        return value.toordinal()
+    if isinstance(value, str):
+        return date.fromisoformat(value).toordinal()
+    raise ValueError("dates must be ISO strings or date objects")
+
+
+def parse_range(check_in: Any, check_out: Any) -> DayRange:
+    """Valida un rango de fechas y lo devuelve como ordinales [entrada, salida)."""
+    try:
+        start, end = parse_day(check_in), parse_day(check_out)
+    except ValueError:
+        raise ValueError("check_in and check_out must be valid ISO dates") from None
+    if start >= end:
+        raise ValueError("check_out must be after check_in")
+    return start, end
+
+
+class OccupancyTree:
+    """Árbol de segmentos disperso con suma en rango y máximo en rango.
+
+    Los nodos se crean solo al reservar, así que la memoria crece con el
+    número de reservas y no con el horizonte de fechas. Cada nodo guarda la
+    suma pendiente de su rango completo (`_add`) y el máximo de su subárbol
+    incluyendo esa suma (`_max`); no hace falta propagar hacia abajo.
+    """
+
+    def __init__(self) -> None:
+        self._max: List[int] = [0]
+        self._add: List[int] = [0]
+        self._left: List[int] = [-1]
+        self._right: List[int] = [-1]
+
+    def _child(self, node: int, left: bool) -> int:
+        children = self._left if left else self._right
+        if children[node] == -1:
+            children[node] = len(self._max)
+            self._max.append(0)
+            self._add.append(0)
+            self._left.append(-1)
+            self._right.append(-1)
+        return children[node]
+
+    def add(self, start: int, end: int, delta: int) -> None:
+        """Suma `delta` a cada día de [start, end)."""
+        self._update(0, 0, DAY_SPAN, (start, end), delta)
+
+    def _update(self, node: int, lo: int, hi: int, days: DayRange, delta: int) -> None:
+        start, end = days
+        if end <= lo or hi <= start:
+            return
+        if start <= lo and hi <= end:
+            self._add[node] += delta
+            self._max[node] += delta
+            return
+        mid = (lo + hi) // 2
+        left = self._child(node, True)
+        right = self._child(node, False)
+        self._update(left, lo, mid, days, delta)
+        self._update(right, mid, hi, days, delta)
+        self._max[node] = self._add[node] + max(self._max[left], self._max[right])
+
+    def max(self, start: int, end: int) -> int:
+        """Devuelve la ocupación máxima de cualquier día en [start, end)."""
+        if start >= end:
+            return 0
+        return self._query(0, 0, DAY_SPAN, start, end)
+
+    def _query(self, node: int, lo: int, hi: int, start: int, end: int) -> int:
+        if node == -1:
+            return 0
+        if start <= lo and hi <= end:
+            return self._max[node]
+        mid = (lo + hi) // 2
+        best = 0
+        if start < mid:
+            best = self._query(self._left[node], lo, mid, start, end)
+        if end > mid:
+            right = self._query(self._right[node], mid, hi, start, end)
+            best = right if start >= mid else max(best, right)
+        return self._add[node] + best
+
+
+class AvailabilityData:
+    """Árboles de ocupación por hotel y las reservas que contienen."""
+
+    def __init__(self) -> None:
+        self.trees: Dict[str, OccupancyTree] = {}
+        self.entries: Dict[str, Tuple[str, int, int]] = {}
+
+    def add(self, reservation: Any) -> None:
+        """Cuenta una reserva activa con fechas; las demás se ignoran."""
+        if not reservation.active or reservation.check_in is None:
+            return
+        start, end = parse_range(reservation.check_in, reservation.check_out)
+        self.entries[reservation.reservation_id] = (reservation.hotel_id, start, end)
+        self.tree(reservation.hotel_id).add(start, end, 1)
+
+    def remove(self, reservation_id: str) -> None:
+        """Descuenta una reserva si estaba contada."""
+        entry = self.entries.pop(reservation_id, None)
+        if entry is not None:
+            hotel_id, start, end = entry
+            self.trees[hotel_id].add(start, end, -1)
+
+    def tree(self, hotel_id: str) -> OccupancyTree:
+        """Devuelve (creándolo si hace falta) el árbol de un hotel."""
+        tree = self.trees.get(hotel_id)
+        if tree is None:
+            tree = self.trees[hotel_id] = OccupancyTree()
+        return tree
+
+    def max_occupancy(self, hotel_id: str, start: int, end: int) -> int:
+        """Ocupación máxima de un hotel en [start, end) por reservas con fechas."""
+        tree = self.trees.get(hotel_id)
+        return tree.max(start, end) if tree is not None else 0
+
+
+class AvailabilityIndex(IndexView[Any]):
+    """Vista de `AvailabilityData` mantenida con las escrituras de reservas."""
+
+    data_type = AvailabilityData
+    key_field = "reservation_id"
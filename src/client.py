@@ -0,0 +1,145 @@
+"""Cliente de `src.server` con un grupo de conexiones reutilizables.
+
+Uso:
+    with ReservationClient("data/server.sock", pool_size=8) as client:
+        client.create_customer("C1", "Cesar")
+        reservation = client.create_reservation(None, "C1", "H1")
+
+Cada operación de `src.server.OPERATIONS` está disponible como método con
+los mismos argumentos que en los repositorios y devuelve las mismas
+entidades (`Customer`, `Hotel`, `Reservation`, `BulkResult`). Los errores
+`KeyError`, `ValueError`, `TypeError` y `ConflictError` se relanzan con su
+tipo; los demás llegan como `RemoteError`.
+
+El cliente es seguro entre hilos: cada llamada toma una conexión libre del
+grupo (o abre una nueva, hasta `pool_size`), y las llamadas de varios hilos
+llegan al servidor a la vez, que agrupa sus escrituras. Una conexión que
+falla se descarta; la llamada no se reintenta porque la operación pudo
+haberse aplicado.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import queue
+import socket
+import threading
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+from src.server import OPERATIONS, Address, decode_error, decode_result, json_default
+
+
+class _Connection:
+    """Socket con el servidor y su lector de líneas."""
+
+    def __init__(self, address: Address, timeout: Optional[float]) -> None:
+        if isinstance(address, tuple):
+            self.sock = socket.create_connection(address, timeout=timeout)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            try:
+                self.sock.connect(str(Path(address)))
+            except OSError:
+                self.sock.close()
+                raise
+        self._reader = self.sock.makefile("rb")
+
+    def request(self, line: bytes) -> bytes:
+        """Envía una solicitud y espera su respuesta."""
+        self.sock.sendall(line)
+        response = self._reader.readline()
+        if not response:
+            raise ConnectionError("server closed the connection")
+        return response
+
+    def close(self) -> None:
+        """Cierra la conexión."""
+        self._reader.close()
+        self.sock.close()
+
+
+class ConnectionPool:
+    """Hasta `size` conexiones con el servidor, reutilizadas entre llamadas."""
+
+    def __init__(self, address: Address, size: int = 4, timeout: Optional[float] = 30.0) -> None:
+        if size <= 0:
+            raise ValueError("pool size must be greater than 0")
+        self.address = address
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[_Connection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+
+    @contextmanager
+    def connection(self) -> Iterator[_Connection]:
+        """Presta una conexión; si la llamada falla, la conexión se descarta."""
+        if self._closed:
+            raise ConnectionError("connection pool is closed")
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = _Connection(self.address, self.timeout)
+            try:
+                yield conn
+            except BaseException:
+                conn.close()
+                raise
+            if self._closed:
+                conn.close()
+            else:
+                self._idle.put(conn)
+
+    def close(self) -> None:
+        """Cierra las conexiones libres; las prestadas se cierran al devolverse."""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class ReservationClient:
+    """Acceso a los repositorios de un `ReservationServer`."""
+
+    def __init__(self, address: Address, pool_size: int = 4, timeout: Optional[float] = 30.0):
+        self.pool = ConnectionPool(address, pool_size, timeout)
+        self._ids = itertools.count(1)
+
+    def call(self, op: str, *args: Any, **kwargs: Any) -> Any:
+        """Ejecuta la operación `op` del servidor y devuelve su resultado."""
+        if op not in OPERATIONS:
+            raise ValueError(f"unknown operation '{op}'")
+        request_id = next(self._ids)
+        request = {"id": request_id, "op": op, "args": list(args), "kwargs": kwargs}
+        payload = json.dumps(request, ensure_ascii=False, default=json_default)
+        line = payload.encode("utf-8") + b"\n"
+        with self.pool.connection() as conn:
+            response = json.loads(conn.request(line))
+            if response.get("id") != request_id:
+                raise ConnectionError("response does not match the request")
+        if not response.get("ok"):
+            raise decode_error(response.get("error") or {})
+        return decode_result(op, response.get("result"))
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        if name in OPERATIONS:
+            return partial(self.call, name)
+        raise AttributeError(name)
+
+    def close(self) -> None:
+        """Cierra las conexiones del grupo."""
+        self.pool.close()
+
+    def __enter__(self) -> "ReservationClient":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
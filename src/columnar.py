@@ -0,0 +1,277 @@
+"""Almacenamiento columnar compacto para hoteles y reservas.
+
+En lugar de un objeto por registro, cada campo vive en un `array` tipado y
+una tabla hash compacta traduce cada ID a su fila. Los IDs de cliente y
+hotel de las reservas se codifican como enteros contra una tabla de valores
+distintos.
+Las entidades se materializan solo al consultarlas.
+
+`HotelRepository.columns()` y `ReservationRepository.columns()` mantienen
+estas columnas como vista derivada (`ColumnarView`) de su colección.
+"""
+
+from __future__ import annotations
+
+from array import array
+from datetime import date
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.repository import DerivedView
+
+if TYPE_CHECKING:
+    from src.hotel import Hotel
+    from src.reservation import Reservation
+
+
+class _RowIndex:
+    """Mapa compacto de clave a fila sobre una lista de claves.
+
+    Tabla hash de direccionamiento abierto guardada en un `array` de enteros
+    de 32 bits (-1 = vacío): ocupa ~6-12 bytes por clave frente a los ~100
+    de un `dict` con un `int` por fila.
+    """
+
+    def __init__(self, keys: List[str]) -> None:
+        self.keys = keys
+        self._table = array("i", [-1]) * 8
+        for row in range(len(keys)):
+            self._insert(row)
+
+    def _slot(self, key: str) -> int:
+        table, keys = self._table, self.keys
+        mask = len(table) - 1
+        slot = hash(key) & mask
+        while table[slot] != -1 and keys[table[slot]] != key:
+            slot = (slot + 1) & mask
+        return slot
+
+    def _insert(self, row: int) -> None:
+        if (len(self.keys) + 1) * 3 > len(self._table) * 2:
+            self._table = array("i", [-1]) * (len(self._table) * 2)
+            for existing in range(row):
+                self._table[self._slot(self.keys[existing])] = existing
+        self._table[self._slot(self.keys[row])] = row
+
+    def get(self, key: str) -> Optional[int]:
+        """Devuelve la fila de `key` o `None`."""
+        row = self._table[self._slot(key)]
+        return row if row != -1 else None
+
+    def append(self, key: str) -> int:
+        """Agrega una clave nueva al final y devuelve su fila."""
+        self.keys.append(key)
+        row = len(self.keys) - 1
+        self._insert(row)
+        return row
+
+
+class _Codes:
+    """Tabla de valores distintos codificados como enteros."""
+
+    def __init__(self) -> None:
+        self.values: List[str] = []
+        self._index = _RowIndex(self.values)
+
+    def encode(self, value: str) -> int:
+        """Devuelve el código de `value`, registrándolo si es nuevo."""
+        code = self._index.get(value)
+        if code is None:
+            code = self._index.append(value)
+        return code
+
+    def decode(self, code: int) -> str:
+        """Devuelve el valor de `code`."""
+        return self.values[code]
+
+
+def _day(value: Optional[str]) -> int:
+    return date.fromisoformat(value).toordinal() if value is not None else 0
+
+
+def _iso(ordinal: int) -> Optional[str]:
+    return date.fromordinal(ordinal).isoformat() if ordinal else None
+
+
+class _Columns:
+    """Base de los almacenes: IDs, índice de filas y borrado por compactación.
+
+    Las subclases listan en `_columns` sus columnas con el número de valores
+    que ocupa cada fila.
+    """
+
+    def __init__(self, entity_type: Callable[..., Any]) -> None:
+        self.entity_type = entity_type
+        self.ids: List[str] = []
+        self._rows = _RowIndex(self.ids)
+
+    def _columns(self) -> List[Tuple[Any, int]]:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._rows.get(key) is not None
+
+    def row(self, key: str) -> int:
+        """Devuelve la fila de `key`; lanza `KeyError` si no existe."""
+        row = self._rows.get(key)
+        if row is None:
+            raise KeyError(key)
+        return row
+
+    def remove(self, keys: Iterable[str]) -> None:
+        """Quita las filas de `keys` que existan, compactando las columnas una vez."""
+        dropped = {row for row in map(self._rows.get, keys) if row is not None}
+        if not dropped:
+            return
+        kept = [row for row in range(len(self.ids)) if row not in dropped]
+        for column, width in self._columns():
+            values = [column[row * width + i] for row in kept for i in range(width)]
+            column[:] = array(column.typecode, values) if isinstance(column, array) else values
+        self.ids[:] = [self.ids[row] for row in kept]
+        self._rows = _RowIndex(self.ids)
+
+
+class HotelColumns(_Columns):
+    """Hoteles en columnas: nombres, capacidad total y disponible, y versión."""
+
+    def __init__(self, entity_type: Callable[..., Hotel], hotels: Iterable[Hotel] = ()) -> None:
+        super().__init__(entity_type)
+        self.names: List[str] = []
+        self.rooms_total = array("l")
+        self.rooms_available = array("l")
+        self.versions = array("l")
+        for hotel in hotels:
+            self.put(hotel)
+
+    def _columns(self) -> List[Tuple[Any, int]]:
+        return [
+            (self.names, 1), (self.rooms_total, 1), (self.rooms_available, 1), (self.versions, 1)
+        ]
+
+    def put(self, hotel: Hotel) -> None:
+        """Inserta o reemplaza un hotel."""
+        row = self._rows.get(hotel.hotel_id)
+        if row is None:
+            self._rows.append(hotel.hotel_id)
+            self.names.append(hotel.name)
+            self.rooms_total.append(hotel.rooms_total)
+            self.rooms_available.append(hotel.rooms_available)
+            self.versions.append(hotel.version)
+            return
+        self.names[row] = hotel.name
+        self.rooms_total[row] = hotel.rooms_total
+        self.rooms_available[row] = hotel.rooms_available
+        self.versions[row] = hotel.version
+
+    def get(self, hotel_id: str) -> Optional[Hotel]:
+        """Materializa un hotel o devuelve `None` si no existe."""
+        row = self._rows.get(hotel_id)
+        return self._hotel(row) if row is not None else None
+
+    def _hotel(self, row: int) -> Hotel:
+        return self.entity_type(
+            hotel_id=self.ids[row],
+            name=self.names[row],
+            rooms_total=self.rooms_total[row],
+            rooms_available=self.rooms_available[row],
+            version=self.versions[row],
+        )
+
+    def __iter__(self) -> Iterator[Hotel]:
+        for row in range(len(self.ids)):
+            yield self._hotel(row)
+
+
+class ReservationColumns(_Columns):
+    """Reservas en columnas con IDs de cliente/hotel codificados.
+
+    `codes` guarda por fila los códigos de cliente y hotel (una sola tabla
+    de valores para ambos) y `days` las fechas de entrada, salida y
+    cancelación como ordinales (0 = sin fecha), ambos en enteros de 32 bits;
+    `active` es un byte por fila.
+    """
+
+    def __init__(
+        self, entity_type: Callable[..., Reservation], reservations: Iterable[Reservation] = ()
+    ) -> None:
+        super().__init__(entity_type)
+        self._values = _Codes()
+        self.codes = array("I")
+        self.days = array("i")
+        self.active = array("b")
+        for reservation in reservations:
+            self.put(reservation)
+
+    def _columns(self) -> List[Tuple[Any, int]]:
+        return [(self.codes, 2), (self.days, 3), (self.active, 1)]
+
+    def put(self, reservation: Reservation) -> None:
+        """Inserta o reemplaza una reserva."""
+        codes = (
+            self._values.encode(reservation.customer_id),
+            self._values.encode(reservation.hotel_id),
+        )
+        days = (
+            _day(reservation.check_in),
+            _day(reservation.check_out),
+            _day(reservation.canceled_on),
+        )
+
+        row = self._rows.get(reservation.reservation_id)
+        if row is None:
+            self._rows.append(reservation.reservation_id)
+            self.codes.extend(codes)
+            self.days.extend(days)
+            self.active.append(int(reservation.active))
+            return
+        self.codes[row * 2:row * 2 + 2] = array("I", codes)
+        self.days[row * 3:row * 3 + 3] = array("i", days)
+        self.active[row] = int(reservation.active)
+
+    def set_active(self, reservation_id: str, active: bool) -> None:
+        """Actualiza el estado de una reserva sin materializarla."""
+        self.active[self.row(reservation_id)] = int(active)
+
+    def get(self, reservation_id: str) -> Optional[Reservation]:
+        """Materializa una reserva o devuelve `None` si no existe."""
+        row = self._rows.get(reservation_id)
+        return self._reservation(row) if row is not None else None
+
+    def _reservation(self, row: int) -> Reservation:
+        return self.entity_type(
+            reservation_id=self.ids[row],
+            customer_id=self._values.decode(self.codes[row * 2]),
+            hotel_id=self._values.decode(self.codes[row * 2 + 1]),
+            active=bool(self.active[row]),
+            check_in=_iso(self.days[row * 3]),
+            check_out=_iso(self.days[row * 3 + 1]),
+            canceled_on=_iso(self.days[row * 3 + 2]),
+        )
+
+    def __iter__(self) -> Iterator[Reservation]:
+        for row in range(len(self.ids)):
+            yield self._reservation(row)
+
+
+class ColumnarView(DerivedView[Any]):
+    """Vista que mantiene una colección en columnas con cada escritura.
+
+    `columns_type(entities)` construye el almacén (por ejemplo
+    `partial(HotelColumns, Hotel)`); los cambios se aplican con `put` y las
+    bajas con `remove`.
+    """
+
+    def __init__(self, columns_type: Callable[[Iterable[Any]], Any], *paths: Path) -> None:
+        super().__init__(*paths)
+        self.columns_type = columns_type
+
+    def build(self, entities: Dict[str, Any]) -> Any:
+        return self.columns_type(entities.values())
+
+    def update(self, value: Any, puts: List[Any], deletes: List[str]) -> None:
+        for entity in puts:
+            value.put(entity)
+        value.remove(deletes)
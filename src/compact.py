@@ -0,0 +1,34 @@
+"""Compactación de las reservas canceladas antiguas en el archivo en frío.
+
+Uso:
+    python -m src.compact --retention-days 30
+
+Mueve a `data/reservations.archive/` (ver `src/archive.py`) las reservas
+inactivas cuya cancelación supera la retención.
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import date
+from pathlib import Path
+from typing import List, Optional
+
+from src.reservation import DATA_PATH, ReservationRepository
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Punto de entrada de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Archiva las reservas canceladas antiguas.")
+    parser.add_argument("--path", type=Path, default=DATA_PATH)
+    parser.add_argument("--retention-days", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    repo = ReservationRepository(path=args.path)
+    moved = repo.archive_reservations(args.retention_days)
+    print(f"[archive] {moved} reservations moved to {repo.archive.directory} "
+          f"on {date.today().isoformat()}")
+
+
+if __name__ == "__main__":
+    main()
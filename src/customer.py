@@ -2,17 +2,19 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional
 
-from src.storage import load_json, save_json
+from src.name_index import NameIndex, NameIndexData, name_index_path
+from src.repository import BulkResult, Repository
+from src.storage import StorageBackend
 
 
 DATA_PATH = Path("data/customers.json")
 
 
-@dataclass
+@dataclass(slots=True)
 class Customer:
     """Entidad de cliente identificada por ID y nombre."""
 
@@ -20,41 +22,36 @@ class Customer:
     name: str
 
 
-class CustomerRepository:
+class CustomerRepository(Repository[Customer]):
     """Repositorio para operaciones CRUD de clientes."""
 
-    def __init__(self, path: Path = DATA_PATH) -> None:
+    key_field = "customer_id"
+    entity_type = Customer
+    record_schema = "customer/1"
+    id_prefix = "C"
+
+    def __init__(
+        self,
+        path: Path = DATA_PATH,
+        cache: bool = False,
+        backend: Optional[StorageBackend] = None,
+    ) -> None:
         """Inicializa el repositorio con la ruta de almacenamiento."""
-        self.path = path
+        super().__init__(path, cache=cache, backend=backend)
+        self._names = self._add_view(NameIndex(name_index_path(path), *self.backend.paths()))
 
-    def _load(self) -> Dict[str, Customer]:
-        """Carga clientes desde JSON y devuelve un diccionario por ID."""
-        raw = load_json(self.path, default=[])
-        customers: Dict[str, Customer] = {}
+    def _from_record(self, item: Dict[str, Any]) -> Optional[Customer]:
+        """Valida un registro JSON y construye el cliente correspondiente."""
+        cid = item.get("customer_id")
+        name = item.get("name")
 
-        if not isinstance(raw, list):
-            print(f"[customer] Invalid data format in '{self.path}'")
-            return customers
+        if isinstance(cid, str) and isinstance(name, str):
+            return Customer(customer_id=cid, name=name)
+        return None
 
-        for item in raw:
-            if not isinstance(item, dict):
-                continue
-
-            cid = item.get("customer_id")
-            name = item.get("name")
-
-            if isinstance(cid, str) and isinstance(name, str):
-                customers[cid] = Customer(customer_id=cid, name=name)
-
-        return customers
-
-    def _save(self, customers: Dict[str, Customer]) -> None:
-        """Guarda el diccionario de clientes en formato JSON."""
-        payload = [asdict(c) for c in customers.values()]
-        save_json(self.path, payload)
-
-    def create_customer(self, customer_id: str, name: str) -> Customer:
-        """Crea un cliente nuevo validando campos obligatorios y unicidad."""
+    @staticmethod
+    def _new_customer(customer_id: str, name: str) -> Customer:
+        """Valida los campos obligatorios y construye el cliente."""
         customer_id = (customer_id or "").strip()
         name = (name or "").strip()
 
@@ -63,20 +60,31 @@ class CustomerRepository:
         if not name:
             raise ValueError("name must not be empty")
 
-        customers = self._load()
+        return Customer(customer_id=customer_id, name=name)
+
+    def create_customer(self, customer_id: Optional[str], name: str) -> Customer:
+        """Crea un cliente nuevo validando campos obligatorios y unicidad.
+
+        Con `customer_id=None` el repositorio asigna un ID ordenado por tiempo.
+        """
+        return self._create(self._new_customer(self._resolve_id(customer_id), name))
 
-        if customer_id in customers:
-            raise ValueError("customer_id already exists")
+    def create_customers_bulk(
+        self, items: Iterable[Mapping[str, Any]]
+    ) -> List[BulkResult[Customer]]:
+        """Crea varios clientes con una sola escritura.
 
-        customer = Customer(customer_id=customer_id, name=name)
-        customers[customer_id] = customer
-        self._save(customers)
-        return customer
+        Cada elemento usa las claves de `create_customer`; sin `customer_id`
+        se asigna uno. Los elementos inválidos o duplicados se reportan en su
+        resultado sin detener el lote.
+        """
+        return self._create_bulk(
+            items, lambda customer_id, item: self._new_customer(customer_id, item.get("name"))
+        )
 
     def get_customer(self, customer_id: str) -> Optional[Customer]:
         """Obtiene un cliente por su ID o `None` si no existe."""
-        customers = self._load()
-        return customers.get(customer_id)
+        return self._get(customer_id)
 
     def update_customer(self, customer_id: str, name: str) -> Customer:
         """Actualiza el nombre de un cliente existente."""
@@ -85,26 +93,46 @@ class CustomerRepository:
         if not name:
             raise ValueError("name must not be empty")
 
-        customers = self._load()
+        customer = self._get(customer_id)
 
-        if customer_id not in customers:
+        if customer is None:
             raise KeyError("customer_id not found")
 
-        customers[customer_id].name = name
-        self._save(customers)
-        return customers[customer_id]
+        updated = replace(customer, name=name)
+        self._put(updated)
+        return updated
 
     def delete_customer(self, customer_id: str) -> None:
         """Elimina un cliente existente por su ID."""
-        customers = self._load()
-
-        if customer_id not in customers:
+        if self._get(customer_id) is None:
             raise KeyError("customer_id not found")
 
-        del customers[customer_id]
-        self._save(customers)
+        self._delete(customer_id)
+
+    def search_by_name(self, query: str, limit: int = 10) -> List[Customer]:
+        """Busca clientes cuyo nombre contenga todas las palabras de `query`.
+
+        Cada palabra coincide con una palabra del nombre igual, que empiece
+        con ella o, desde 4 letras, a una edición de distancia (sin distinguir
+        mayúsculas ni acentos). Los resultados van de mejor a peor
+        coincidencia, hasta `limit`; ver `src.name_index`.
+        """
+        index: NameIndexData = self._view(self._names)
+        return self._resolve(customer_id for _, customer_id in index.search(query, limit))
+
+    def _resolve(self, customer_ids: Iterable[str]) -> List[Customer]:
+        """Obtiene los clientes indicados por un índice."""
+        found = (self._get(cid) for cid in list(customer_ids))
+        return [c for c in found if c is not None]
 
     def list_customers(self) -> List[Customer]:
         """Lista todos los clientes almacenados."""
-        customers = self._load()
-        return list(customers.values())
+        return self._list()
+
+    def iter_customers(self) -> Iterator[Customer]:
+        """Recorre los clientes almacenados sin cargarlos todos en memoria."""
+        return self._iter()
+
+    def page_customers(self, after_id: Optional[str] = None, limit: int = 100) -> List[Customer]:
+        """Devuelve la página de clientes que sigue a `after_id`."""
+        return self._page(after_id, limit)
@@ -2,73 +2,93 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
 
-from src.storage import load_json, save_json
+from src.availability import AvailabilityData, parse_range
+from src.columnar import ColumnarView, HotelColumns
+from src.inventory import InventoryQuery, InventoryView
+from src.locking import StripedLock
+from src.repository import BulkResult, Repository
+from src.storage import StorageBackend
 
 
 DATA_PATH = Path("data/hotels.json")
 
 
-@dataclass
+@dataclass(slots=True)
 class Hotel:
-    """Entidad de hotel con capacidad total y habitaciones disponibles."""
+    """Entidad de hotel con capacidad total y habitaciones disponibles.
+
+    `version` cuenta las escrituras del hotel; permite detectar que otro hilo
+    o proceso lo cambió entre la lectura y la escritura.
+    """
 
     hotel_id: str
     name: str
     rooms_total: int
     rooms_available: int
+    version: int = 0
+
 
+class HotelRepository(Repository[Hotel]):
+    """Repositorio para operaciones sobre hoteles y sus habitaciones.
 
-class HotelRepository:
-    """Repositorio para operaciones sobre hoteles y sus habitaciones."""
+    `locks` reparte los `hotel_id` en franjas de candados: las operaciones
+    de varios pasos sobre un hotel (p. ej. una reserva) toman su franja, de
+    modo que las de hoteles distintos avanzan en paralelo.
+    """
 
-    def __init__(self, path: Path = DATA_PATH) -> None:
+    key_field = "hotel_id"
+    entity_type = Hotel
+    record_schema = "hotel/2"
+    id_prefix = "H"
+    version_field = "version"
+
+    def __init__(
+        self,
+        path: Path = DATA_PATH,
+        cache: bool = False,
+        backend: Optional[StorageBackend] = None,
+    ) -> None:
         """Inicializa el repositorio con la ruta de almacenamiento."""
-        self.path = path
-
-    def _load(self) -> Dict[str, Hotel]:
-        """Carga hoteles desde JSON y devuelve un diccionario por ID."""
-        raw = load_json(self.path, default=[])
-        hotels: Dict[str, Hotel] = {}
-
-        if not isinstance(raw, list):
-            print(f"[hotel] Invalid data format in '{self.path}'")
-            return hotels
-
-        for item in raw:
-            if not isinstance(item, dict):
-                continue
-
-            hid = item.get("hotel_id")
-            name = item.get("name")
-            total = item.get("rooms_total")
-            available = item.get("rooms_available")
-
-            if (
-                isinstance(hid, str)
-                and isinstance(name, str)
-                and isinstance(total, int)
-                and isinstance(available, int)
-            ):
-                hotels[hid] = Hotel(
-                    hotel_id=hid,
-                    name=name,
-                    rooms_total=total,
-                    rooms_available=available,
-                )
-
-        return hotels
-
-    def _save(self, hotels: Dict[str, Hotel]) -> None:
-        """Guarda el diccionario de hoteles en formato JSON."""
-        payload = [asdict(h) for h in hotels.values()]
-        save_json(self.path, payload)
-
-    def create_hotel(self, hotel_id: str, name: str, rooms_total: int) -> Hotel:
-        """Crea un hotel nuevo con todas sus habitaciones disponibles."""
+        super().__init__(path, cache=cache, backend=backend)
+        self._availability: Optional[Callable[[], AvailabilityData]] = None
+        self._inventory = self._add_view(InventoryView(*self.backend.paths()))
+        self._columns = self._add_view(
+            ColumnarView(partial(HotelColumns, Hotel), *self.backend.paths())
+        )
+        self.locks = StripedLock()
+
+    def _from_record(self, item: Dict[str, Any]) -> Optional[Hotel]:
+        """Valida un registro JSON y construye el hotel correspondiente."""
+        hid = item.get("hotel_id")
+        name = item.get("name")
+        total = item.get("rooms_total")
+        available = item.get("rooms_available")
+        version = item.get("version", 0)
+
+        if (
+            isinstance(hid, str)
+            and isinstance(name, str)
+            and isinstance(total, int)
+            and isinstance(available, int)
+            and isinstance(version, int)
+        ):
+            return Hotel(
+                hotel_id=hid,
+                name=name,
+                rooms_total=total,
+                rooms_available=available,
+                version=version,
+            )
+        return None
+
+    @staticmethod
+    def _new_hotel(hotel_id: str, name: str, rooms_total: int) -> Hotel:
+        """Valida los campos obligatorios y construye el hotel con todo disponible."""
         hotel_id = (hotel_id or "").strip()
         name = (name or "").strip()
 
@@ -76,61 +96,107 @@ class HotelRepository:
             raise ValueError("hotel_id must not be empty")
         if not name:
             raise ValueError("name must not be empty")
-        if rooms_total <= 0:
+        if not isinstance(rooms_total, int) or rooms_total <= 0:
             raise ValueError("rooms_total must be greater than 0")
 
-        hotels = self._load()
-
-        if hotel_id in hotels:
-            raise ValueError("hotel_id already exists")
-
-        hotel = Hotel(
+        return Hotel(
             hotel_id=hotel_id,
             name=name,
             rooms_total=rooms_total,
             rooms_available=rooms_total,
         )
 
-        hotels[hotel_id] = hotel
-        self._save(hotels)
-        return hotel
+    def create_hotel(self, hotel_id: Optional[str], name: str, rooms_total: int) -> Hotel:
+        """Crea un hotel nuevo con todas sus habitaciones disponibles.
+
+        Con `hotel_id=None` el repositorio asigna un ID ordenado por tiempo.
+        """
+        return self._create(self._new_hotel(self._resolve_id(hotel_id), name, rooms_total))
+
+    def create_hotels_bulk(self, items: Iterable[Mapping[str, Any]]) -> List[BulkResult[Hotel]]:
+        """Crea varios hoteles con una sola escritura.
+
+        Cada elemento usa las claves de `create_hotel`; sin `hotel_id` se
+        asigna uno. Los elementos inválidos o duplicados se reportan en su
+        resultado sin detener el lote.
+        """
+        return self._create_bulk(
+            items,
+            lambda hotel_id, item: self._new_hotel(
+                hotel_id, item.get("name"), item.get("rooms_total")
+            ),
+        )
 
     def get_hotel(self, hotel_id: str) -> Optional[Hotel]:
         """Obtiene un hotel por su ID o `None` si no existe."""
-        hotels = self._load()
-        return hotels.get(hotel_id)
+        return self._get(hotel_id)
 
     def reserve_room(self, hotel_id: str) -> None:
         """Reserva una habitación en el hotel indicado si hay disponibilidad."""
-        hotels = self._load()
-
-        if hotel_id not in hotels:
-            raise KeyError("hotel_id not found")
-
-        hotel = hotels[hotel_id]
-
-        if hotel.rooms_available <= 0:
+        if self._adjust(hotel_id, "rooms_available", -1, minimum=0) is None:
             raise ValueError("no rooms available")
 
-        hotel.rooms_available -= 1
-        self._save(hotels)
-
     def release_room(self, hotel_id: str) -> None:
         """Libera una habitación previamente reservada en el hotel indicado."""
-        hotels = self._load()
-
-        if hotel_id not in hotels:
-            raise KeyError("hotel_id not found")
-
-        hotel = hotels[hotel_id]
-
-        if hotel.rooms_available >= hotel.rooms_total:
+        hotel = self._adjust(hotel_id, "rooms_available", 1, maximum_field="rooms_total")
+        if hotel is None:
             raise ValueError("all rooms already available")
 
-        hotel.rooms_available += 1
-        self._save(hotels)
+    def attach_availability(self, provider: Callable[[], AvailabilityData]) -> None:
+        """Conecta la fuente de ocupación por fechas (la aporta el repositorio de reservas)."""
+        self._availability = provider
+
+    def max_occupancy(self, hotel_id: str, check_in: Any, check_out: Any) -> int:
+        """Devuelve la ocupación máxima del hotel entre `check_in` y `check_out`."""
+        start, end = parse_range(check_in, check_out)
+        if self._availability is None:
+            return 0
+        return self._availability().max_occupancy(hotel_id, start, end)
+
+    def search_availability(
+        self, date_range: Tuple[Any, Any], min_rooms: int = 1
+    ) -> List[Tuple[Hotel, int]]:
+        """Lista los hoteles con al menos `min_rooms` libres en todo el rango.
+
+        Devuelve pares (hotel, habitaciones libres). Las reservas sin fechas
+        ocupan su habitación indefinidamente y ya están descontadas de
+        `rooms_available`.
+        """
+        start, end = parse_range(*date_range)
+        data = self._availability() if self._availability is not None else None
+        found: List[Tuple[Hotel, int]] = []
+
+        for hotel in self._list():
+            occupied = data.max_occupancy(hotel.hotel_id, start, end) if data else 0
+            free = hotel.rooms_available - occupied
+            if free >= min_rooms:
+                found.append((hotel, free))
+        return found
+
+    def inventory(self) -> InventoryQuery:
+        """Consulta vectorizada de capacidad sobre todos los hoteles (requiere NumPy).
+
+        Las columnas se construyen en la primera consulta y después se
+        mantienen con cada escritura del repositorio; ver `src.inventory`.
+        """
+        return InventoryQuery(lambda: self._view(self._inventory))
+
+    def columns(self) -> HotelColumns:
+        """Hoteles en columnas compactas (ver `src.columnar`).
+
+        Se construyen en la primera llamada y se mantienen con cada escritura
+        del repositorio; el valor devuelto no debe modificarse.
+        """
+        return self._view(self._columns)
 
     def list_hotels(self) -> List[Hotel]:
         """Lista todos los hoteles almacenados."""
-        hotels = self._load()
-        return list(hotels.values())
+        return self._list()
+
+    def iter_hotels(self) -> Iterator[Hotel]:
+        """Recorre los hoteles almacenados sin cargarlos todos en memoria."""
+        return self._iter()
+
+    def page_hotels(self, after_id: Optional[str] = None, limit: int = 100) -> List[Hotel]:
+        """Devuelve la página de hoteles que sigue a `after_id`."""
+        return self._page(after_id, limit)
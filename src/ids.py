@@ -0,0 +1,148 @@
+"""Identificadores ordenados por tiempo y filtros de Bloom.
+
+`IdAllocator` genera IDs con el formato de ULID: 26 caracteres en base32 de
+Crockford que codifican 48 bits de milisegundos Unix y 80 bits aleatorios.
+El orden lexicográfico de los IDs es el orden de creación, de modo que un
+rango de IDs es un rango de tiempo (`id_floor`, `id_time`). Dentro de un
+mismo milisegundo la parte aleatoria se incrementa, así que un asignador
+nunca repite ni retrocede; entre procesos la unicidad la dan los 80 bits
+aleatorios, sin archivo de estado ni bloqueo compartido.
+
+`BloomFilter` responde "seguro que no está" o "quizá está" con unos pocos
+bits por clave; su hash es estable entre procesos para poder persistirlo.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import os
+import struct
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+
+
+CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_DECODE = {c: i for i, c in enumerate(CROCKFORD)}
+ID_LENGTH = 26
+_RANDOM_BITS = 80
+
+
+def _encode(value: int) -> str:
+    chars = []
+    for _ in range(ID_LENGTH):
+        chars.append(CROCKFORD[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def id_floor(moment: datetime | float, prefix: str = "") -> str:
+    """Menor ID posible para `moment` (datetime o segundos Unix).
+
+    Todos los IDs creados desde ese instante son mayores o iguales, lo que
+    permite recorrer o archivar por antigüedad comparando IDs.
+    """
+    seconds = moment.timestamp() if isinstance(moment, datetime) else moment
+    return prefix + _encode(int(seconds * 1000) << _RANDOM_BITS)
+
+
+def id_time(value: str, prefix: str = "") -> datetime:
+    """Instante (UTC) en que se generó un ID de `IdAllocator`."""
+    body = value[len(prefix):]
+    if len(body) != ID_LENGTH or any(c not in _DECODE for c in body):
+        raise ValueError(f"'{value}' is not an allocated id")
+    # Los 10 primeros caracteres son los bits 129..80: el tiempo en milisegundos.
+    millis = 0
+    for char in body[:10]:
+        millis = millis * 32 + _DECODE[char]
+    return datetime.fromtimestamp(millis / 1000, tz=timezone.utc)
+
+
+# Una sola operación (`new_id`), pero con estado: la secuencia y su candado.
+class IdAllocator:  # pylint: disable=too-few-public-methods
+    """Generador monótono de IDs ordenados por tiempo, seguro entre hilos."""
+
+    def __init__(self, prefix: str = "", clock: Callable[[], float] = time.time) -> None:
+        self.prefix = prefix
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._last_ms = -1
+        self._random = 0
+
+    def new_id(self) -> str:
+        """Devuelve un ID mayor que todos los anteriores de este asignador."""
+        with self._lock:
+            pid = os.getpid()
+            if pid != self._pid:
+                # Tras un fork el hijo no debe continuar la secuencia del padre.
+                self._pid, self._last_ms = pid, -1
+            now = int(self._clock() * 1000)
+            if now > self._last_ms:
+                self._last_ms = now
+                self._random = int.from_bytes(os.urandom(10), "big")
+            else:
+                # Mismo milisegundo o reloj que retrocedió: se sigue la secuencia.
+                self._random += 1
+                if self._random >> _RANDOM_BITS:
+                    self._last_ms += 1
+                    self._random = int.from_bytes(os.urandom(10), "big")
+            value = (self._last_ms << _RANDOM_BITS) | self._random
+        return self.prefix + _encode(value)
+
+
+_BLOOM_HEADER = struct.Struct("<4sIQ")
+BLOOM_MAGIC = b"HBLM"
+
+
+class BloomFilter:
+    """Filtro de Bloom con `bits` bits y `hashes` funciones (doble hashing BLAKE2b)."""
+
+    def __init__(self, bits: int, hashes: int, data: Optional[bytes] = None) -> None:
+        if bits < 1 or hashes < 1:
+            raise ValueError("bits and hashes must be at least 1")
+        self.bits = bits
+        self.hashes = hashes
+        self.data = bytearray(data) if data is not None else bytearray((bits + 7) // 8)
+        if len(self.data) != (bits + 7) // 8:
+            raise ValueError("bloom filter data does not match its size")
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float = 0.01) -> "BloomFilter":
+        """Filtro dimensionado para `capacity` claves con esa tasa de falsos positivos."""
+        capacity = max(1, capacity)
+        bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        hashes = max(1, round(bits / capacity * math.log(2)))
+        return cls(bits, hashes)
+
+    def _positions(self, key: str) -> List[int]:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        step = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * step) % self.bits for i in range(self.hashes)]
+
+    def add(self, key: str) -> None:
+        """Agrega una clave."""
+        for position in self._positions(key):
+            self.data[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: object) -> bool:
+        if not isinstance(key, str):
+            return False
+        return all(self.data[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def to_bytes(self) -> bytes:
+        """Serializa el filtro (cabecera más bits)."""
+        return _BLOOM_HEADER.pack(BLOOM_MAGIC, self.hashes, self.bits) + bytes(self.data)
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "BloomFilter":
+        """Reconstruye un filtro serializado con `to_bytes`."""
+        if len(payload) < _BLOOM_HEADER.size:
+            raise ValueError("truncated bloom filter")
+        magic, hashes, bits = _BLOOM_HEADER.unpack_from(payload)
+        if magic != BLOOM_MAGIC:
+            raise ValueError("not a bloom filter")
+        return cls(bits, hashes, payload[_BLOOM_HEADER.size:])
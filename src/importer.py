@@ -0,0 +1,513 @@
+"""Importación y exportación masiva de clientes, hoteles y reservas.
+
+Uso:
+    python -m src.importer import customers partner/customers.csv
+    python -m src.importer import reservations partner/bookings.jsonl --workers 8
+    python -m src.importer export hotels out/hotels.csv --db data/hotel.db
+
+La entrada (CSV con encabezado o JSONL) se lee por bloques que un grupo de
+procesos valida con las mismas reglas que `create_customer`, `create_hotel`
+y `create_reservation`. Un único escritor en el proceso principal descarta
+IDs repetidos, resuelve las referencias de las reservas contra los conjuntos
+de IDs de clientes y hoteles en memoria y escribe en el backend, con los
+candados de sus archivos tomados durante toda la importación. Las filas
+rechazadas se reportan (y opcionalmente se guardan con `--errors`) sin
+detener la importación; el código de salida es 1 si hubo alguna. Como en
+una migración, las reservas importadas no descuentan habitaciones: los
+hoteles traen su `rooms_available`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Set, TextIO, Tuple
+
+from src.customer import Customer, CustomerRepository
+from src.hotel import Hotel, HotelRepository
+from src.ids import IdAllocator
+from src.locking import locked
+from src.reservation import Reservation, ReservationRepository
+from src.storage import (
+    JsonFileBackend,
+    Record,
+    ShardedJsonBackend,
+    SqliteBackend,
+    StorageBackend,
+)
+
+
+# Colección -> repositorio y entidad; el archivo JSON es `<colección>.json`.
+KINDS: Dict[str, Tuple[Any, Any]] = {
+    "customers": (CustomerRepository, Customer),
+    "hotels": (HotelRepository, Hotel),
+    "reservations": (ReservationRepository, Reservation),
+}
+
+# Campos opcionales de las reservas que no se guardan si están vacíos.
+_OPTIONAL = ("check_in", "check_out", "canceled_on")
+_TRUE = {"true", "1", "yes"}
+_FALSE = {"false", "0", "no"}
+
+# Fila numerada de la entrada.
+Row = Tuple[int, Dict[str, Any]]
+# (registros válidos con su línea, rechazos (línea, motivo))
+Checked = Tuple[List[Tuple[int, Record]], List[Tuple[int, str]]]
+
+_allocators: Dict[str, IdAllocator] = {}
+
+
+def _as_record(entity: Any) -> Record:
+    """Registro plano de la entidad, como `Repository._to_record`."""
+    return {f.name: getattr(entity, f.name) for f in fields(entity)}
+
+
+def _id(row: Dict[str, Any], kind: str) -> Optional[str]:
+    """ID de la fila; si falta la columna se asigna uno como en los repositorios."""
+    repo_type, _ = KINDS[kind]
+    value = row.get(repo_type.key_field)
+    if value is None:
+        allocator = _allocators.setdefault(kind, IdAllocator(repo_type.id_prefix))
+        return allocator.new_id()
+    return value
+
+
+def _int(value: Any, name: str) -> int:
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lstrip("-").isdigit():
+        return int(value)
+    raise ValueError(f"{name} must be an integer")
+
+
+def _bool(value: Any, name: str) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in _TRUE | _FALSE:
+        return value.strip().lower() in _TRUE
+    raise ValueError(f"{name} must be a boolean")
+
+
+def _blank(value: Any) -> Any:
+    return None if value == "" else value
+
+
+def to_record(kind: str, row: Dict[str, Any]) -> Record:
+    """Valida una fila con las reglas de alta del repositorio y devuelve su registro.
+
+    Lanza `ValueError` con el motivo si la fila no es válida.
+    """
+    if kind == "customers":
+        customer = CustomerRepository._new_customer(  # pylint: disable=protected-access
+            _id(row, kind), row.get("name")
+        )
+        return _as_record(customer)
+
+    if kind == "hotels":
+        total = _int(row.get("rooms_total"), "rooms_total")
+        hotel = HotelRepository._new_hotel(  # pylint: disable=protected-access
+            _id(row, kind), row.get("name"), total
+        )
+        available = _blank(row.get("rooms_available"))
+        if available is not None:
+            hotel.rooms_available = _int(available, "rooms_available")
+            if not 0 <= hotel.rooms_available <= hotel.rooms_total:
+                raise ValueError("rooms_available must be between 0 and rooms_total")
+        return _as_record(hotel)
+
+    reservation = ReservationRepository._new_reservation(  # pylint: disable=protected-access
+        _id(row, kind),
+        row.get("customer_id"),
+        row.get("hotel_id"),
+        _blank(row.get("check_in")),
+        _blank(row.get("check_out")),
+    )
+    active = _blank(row.get("active"))
+    if active is not None:
+        reservation.active = _bool(active, "active")
+    canceled_on = _blank(row.get("canceled_on"))
+    if canceled_on is not None:
+        if reservation.active:
+            raise ValueError("canceled_on requires active to be false")
+        reservation.canceled_on = str(canceled_on)
+    record = _as_record(reservation)
+    for name in _OPTIONAL:
+        if record[name] is None:
+            del record[name]
+    return record
+
+
+def check_rows(kind: str, rows: List[Row]) -> Checked:
+    """Valida un bloque de filas; se ejecuta en los procesos del grupo."""
+    records: List[Tuple[int, Record]] = []
+    errors: List[Tuple[int, str]] = []
+    for line, row in rows:
+        try:
+            records.append((line, to_record(kind, row)))
+        except (KeyError, ValueError) as exc:
+            errors.append((line, str(exc).strip("'\"")))
+    return records, errors
+
+
+def detect_format(path: Path, fmt: Optional[str]) -> str:
+    """Formato explícito o deducido de la extensión ("csv" o "jsonl")."""
+    if fmt is not None:
+        return fmt
+    return "csv" if path.suffix.lower() == ".csv" else "jsonl"
+
+
+def read_rows(stream: TextIO, fmt: str) -> Iterator[Row]:
+    """Recorre las filas de la entrada con su número de línea."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line, text in enumerate(stream, start=1):
+        if not text.strip():
+            continue
+        try:
+            item = json.loads(text)
+        except json.JSONDecodeError as exc:
+            item = {"__error__": f"invalid JSON: {exc.msg}"}
+        yield line, item if isinstance(item, dict) else {"__error__": "row must be an object"}
+
+
+def _chunks(rows: Iterator[Row], size: int) -> Iterator[List[Row]]:
+    chunk: List[Row] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Progress:
+    """Reporta filas procesadas y throughput como mucho una vez por intervalo."""
+
+    def __init__(self, label: str, every: float = 1.0, stream: Optional[TextIO] = None) -> None:
+        self.label = label
+        self.every = every
+        self.stream = stream if stream is not None else sys.stderr
+        self.count = 0
+        self.start = time.perf_counter()
+        self._last = self.start
+
+    def add(self, count: int) -> None:
+        """Suma filas y reporta si pasó el intervalo."""
+        self.count += count
+        now = time.perf_counter()
+        if now - self._last >= self.every:
+            self._last = now
+            self.report()
+
+    def rate(self) -> float:
+        """Filas por segundo desde el inicio."""
+        elapsed = time.perf_counter() - self.start
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+    def report(self, final: bool = False) -> None:
+        """Escribe una línea de progreso."""
+        state = "done" if final else "running"
+        print(
+            f"[{self.label}] {state}: {self.count:,} rows, {self.rate():,.0f} rows/s",
+            file=self.stream,
+            flush=True,
+        )
+
+
+@dataclass
+class ImportReport:
+    """Resultado de una importación."""
+
+    rows: int = 0
+    imported: int = 0
+    rejected: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class BulkOptions:
+    """Opciones de `import_rows` y `export_records`.
+
+    `references` son los IDs válidos de "customers" y "hotels" para las
+    reservas. Con `workers` <= 1 la validación corre en este proceso. Un
+    archivo JSON se escribe una sola vez, en streaming, al final de la
+    importación; `flush_every` es cuántos registros acumula un backend
+    fragmentado (`ShardedJsonBackend`) por escritura.
+    """
+
+    references: Optional[Dict[str, Set[str]]] = None
+    workers: int = 0
+    chunk_size: int = 10_000
+    flush_every: int = 100_000
+    on_error: Optional[Callable[[int, str], None]] = None
+    progress: Optional[Progress] = None
+
+
+def open_backend(kind: str, data_dir: Path, db: Optional[Path]) -> StorageBackend:
+    """Backend de la colección: tabla SQLite con `db`, si no el archivo JSON."""
+    repo_type, _ = KINDS[kind]
+    if db is not None:
+        return SqliteBackend(db, kind, repo_type.key_field)
+    path = data_dir / f"{kind}.json"
+    return JsonFileBackend(path, repo_type.key_field, schema=repo_type.record_schema)
+
+
+def _keys(backend: StorageBackend) -> Set[str]:
+    return {key for key, _ in backend.scan()}
+
+
+def _close(backend: StorageBackend) -> None:
+    close = getattr(backend, "close", None)
+    if close is not None:
+        close()
+
+
+def _checked(kind: str, chunks: Iterator[List[Row]], workers: int) -> Iterator[Checked]:
+    """Resultados de `check_rows` en el orden de la entrada.
+
+    Con `workers` > 1 los bloques se validan en un grupo de procesos, con a
+    lo sumo el doble de bloques que procesos en vuelo.
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield check_rows(kind, chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: Deque["Future[Checked]"] = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(check_rows, kind, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _rejection(
+    kind: str, record: Record, seen: Set[str], references: Optional[Dict[str, Set[str]]]
+) -> Optional[str]:
+    """Motivo para rechazar un registro ya validado, o `None` si se acepta."""
+    key_field = KINDS[kind][0].key_field
+    key = record[key_field]
+    if key in seen:
+        return f"{key_field} '{key}' already exists"
+    if references is not None:
+        missing = [
+            f"{field} '{record[field]}'"
+            for field, ids in (
+                ("customer_id", references["customers"]),
+                ("hotel_id", references["hotels"]),
+            )
+            if record[field] not in ids
+        ]
+        if missing:
+            return f"{', '.join(missing)} not found"
+    return None
+
+
+def _write(
+    backend: StorageBackend,
+    key_field: str,
+    chunks: Iterator[List[Record]],
+    flush_every: int,
+) -> int:
+    """Escribe los bloques de registros aceptados y devuelve cuántos se guardaron.
+
+    Un `JsonFileBackend` se reescribe una sola vez (`extend`): el archivo
+    actual y lo aceptado se vuelcan registro a registro a un temporal que
+    se renombra al terminar, así que el costo es lineal y la memoria no
+    crece con la importación. Un `ShardedJsonBackend` acumula hasta
+    `flush_every` registros por escritura, y cada una reescribe los shards
+    que toca; los demás backends escriben bloque a bloque.
+    """
+    if isinstance(backend, JsonFileBackend):
+        return backend.extend(record for chunk in chunks for record in chunk)
+
+    limit = max(1, flush_every) if isinstance(backend, ShardedJsonBackend) else 1
+    written = 0
+    pending: Dict[str, Record] = {}
+    for chunk in chunks:
+        pending.update((record[key_field], record) for record in chunk)
+        if pending and len(pending) >= limit:
+            backend.apply(pending, ())
+            written += len(pending)
+            pending = {}
+    if pending:
+        backend.apply(pending, ())
+        written += len(pending)
+    return written
+
+
+def import_rows(
+    kind: str,
+    rows: Iterator[Row],
+    backend: StorageBackend,
+    options: Optional[BulkOptions] = None,
+) -> ImportReport:
+    """Valida `rows` en paralelo y las escribe en `backend` con un único escritor.
+
+    Los candados de los archivos del backend se toman durante toda la
+    importación, así que los IDs existentes leídos al empezar no cambian
+    mientras tanto; ver `_write` para cómo se escribe cada backend.
+    """
+    options = options or BulkOptions()
+    report = ImportReport()
+    started = time.perf_counter()
+
+    def reject(line: int, reason: str) -> None:
+        report.rejected += 1
+        if options.on_error is not None:
+            options.on_error(line, reason)
+
+    def numbered(source: Iterator[Row]) -> Iterator[Row]:
+        for line, row in source:
+            report.rows += 1
+            if "__error__" in row:
+                reject(line, row["__error__"])
+            else:
+                yield line, row
+
+    key_field = KINDS[kind][0].key_field
+
+    with locked(backend.paths()):
+        seen = _keys(backend)
+
+        def accepted() -> Iterator[List[Record]]:
+            for records, errors in _checked(
+                kind, _chunks(numbered(rows), options.chunk_size), options.workers
+            ):
+                for line, reason in errors:
+                    reject(line, reason)
+                chunk: List[Record] = []
+                for line, record in records:
+                    reason = _rejection(kind, record, seen, options.references)
+                    if reason is not None:
+                        reject(line, reason)
+                    else:
+                        seen.add(record[key_field])
+                        chunk.append(record)
+                yield chunk
+                if options.progress is not None:
+                    options.progress.add(len(records) + len(errors))
+
+        report.imported = _write(backend, key_field, accepted(), options.flush_every)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def export_records(
+    kind: str,
+    backend: StorageBackend,
+    stream: TextIO,
+    fmt: str,
+    options: Optional[BulkOptions] = None,
+) -> int:
+    """Escribe la colección en `stream` por bloques y devuelve cuántos registros salieron.
+
+    Usa `chunk_size` y `progress` de `options`.
+    """
+    options = options or BulkOptions()
+    progress = options.progress
+    _, entity_type = KINDS[kind]
+    columns = [f.name for f in fields(entity_type)]
+    writer: Any = None
+    if fmt == "csv":
+        writer = csv.DictWriter(stream, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+
+    count = 0
+    chunk: List[Record] = []
+
+    def write(records: List[Record]) -> None:
+        if writer is not None:
+            writer.writerows(records)
+        else:
+            stream.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+        if progress is not None:
+            progress.add(len(records))
+
+    for _, record in backend.scan():
+        chunk.append(record)
+        if len(chunk) >= options.chunk_size:
+            write(chunk)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        write(chunk)
+        count += len(chunk)
+    return count
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Punto de entrada de línea de comandos."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("direction", choices=("import", "export"))
+    parser.add_argument("kind", choices=tuple(KINDS))
+    parser.add_argument("path", type=Path, help="archivo de entrada o de salida")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default=None)
+    parser.add_argument("--data-dir", type=Path, default=Path("data"))
+    parser.add_argument("--db", type=Path, default=None, help="usar SQLite en lugar de JSON")
+    parser.add_argument("--workers", type=int, default=4, help="procesos de validación")
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument(
+        "--flush-every", type=int, default=100_000,
+        help="registros por escritura en las colecciones fragmentadas",
+    )
+    parser.add_argument("--errors", type=Path, default=None, help="JSONL con filas rechazadas")
+    args = parser.parse_args(argv)
+
+    fmt = detect_format(args.path, args.format)
+    backend = open_backend(args.kind, args.data_dir, args.db)
+    progress = Progress(args.direction)
+    options = BulkOptions(
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        flush_every=args.flush_every,
+        progress=progress,
+    )
+    try:
+        if args.direction == "export":
+            with open(args.path, "w", encoding="utf-8", newline="") as out:
+                count = export_records(args.kind, backend, out, fmt, options)
+            progress.report(final=True)
+            print(f"[export] {args.kind}: {count} records -> {args.path}")
+            return 0
+
+        if args.kind == "reservations":
+            options.references = {}
+            for kind in ("customers", "hotels"):
+                source = open_backend(kind, args.data_dir, args.db)
+                options.references[kind] = _keys(source)
+                _close(source)
+
+        with ExitStack() as stack:
+            if args.errors:
+                errors_file = stack.enter_context(open(args.errors, "w", encoding="utf-8"))
+                options.on_error = lambda line, reason: errors_file.write(
+                    json.dumps({"line": line, "reason": reason}) + "\n"
+                )
+            source_file = stack.enter_context(open(args.path, encoding="utf-8", newline=""))
+            report = import_rows(args.kind, read_rows(source_file, fmt), backend, options)
+        progress.report(final=True)
+        print(
+            f"[import] {args.kind}: {report.imported} imported, {report.rejected} rejected "
+            f"of {report.rows} rows in {report.seconds:.1f}s"
+        )
+        return 1 if report.rejected else 0
+    finally:
+        _close(backend)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
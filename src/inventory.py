@@ -0,0 +1,276 @@
+"""Motor de consultas vectorizadas de capacidad hotelera (requiere NumPy).
+
+`InventoryData` guarda `rooms_total` y `rooms_available` en arreglos de
+NumPy alineados con un índice de IDs de hotel. `InventoryView` lo mantiene
+como vista derivada de `HotelRepository`: se construye en la primera
+consulta y cada escritura del repositorio (incluidos `reserve_room` y
+`release_room`) actualiza solo las filas afectadas.
+
+Las consultas (`InventoryQuery`) describen filtros, orden y límite, y se
+evalúan sobre las columnas vigentes en cada operación final, así que nunca
+devuelven datos de antes de una escritura:
+
+    query = hotel_repo.inventory()
+    query.where("rooms_available", minimum=3).count()
+    query.sum("rooms_available")
+    query.top(10, "occupancy").ids()
+
+NumPy es una dependencia opcional: sin ella el resto del sistema funciona y
+solo `inventory()` lanza `ImportError`.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.repository import IndexView
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - dependencia opcional
+    np = None  # type: ignore[assignment]
+
+
+# Columnas consultables: las dos almacenadas y dos derivadas.
+COLUMNS = ("rooms_total", "rooms_available", "rooms_occupied", "occupancy")
+
+# Filtro sobre una columna: (columna, mínimo, máximo), ambos inclusivos.
+Filter = Tuple[str, Optional[float], Optional[float]]
+
+
+def require_numpy() -> None:
+    """Lanza `ImportError` si NumPy no está instalado."""
+    if np is None:
+        raise ImportError("the inventory query engine requires numpy (pip install numpy)")
+
+
+class InventoryData:
+    """Columnas de capacidad de los hoteles, una fila por hotel.
+
+    Las filas se agregan al final y una baja mueve la última fila al hueco,
+    así que las columnas siempre son densas; el orden de las filas no tiene
+    significado.
+    """
+
+    def __init__(self, hotels: Iterable[Any] = ()) -> None:
+        require_numpy()
+        hotels = list(hotels)
+        size = len(hotels)
+        capacity = max(size, 16)
+        self.rows: Dict[str, int] = {hotel.hotel_id: row for row, hotel in enumerate(hotels)}
+        self._size = size
+        # Los IDs también van en un arreglo (de objetos) para seleccionarlos
+        # con los mismos índices que las columnas.
+        self._ids = np.empty(capacity, dtype=object)
+        self._ids[:size] = [hotel.hotel_id for hotel in hotels]
+        self._total = np.zeros(capacity, dtype=np.int64)
+        self._available = np.zeros(capacity, dtype=np.int64)
+        self._total[:size] = np.fromiter((h.rooms_total for h in hotels), np.int64, size)
+        self._available[:size] = np.fromiter((h.rooms_available for h in hotels), np.int64, size)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def ids(self) -> List[str]:
+        """IDs de hotel por fila."""
+        return self._ids[:self._size].tolist()
+
+    def ids_at(self, rows: Any) -> List[str]:
+        """IDs de hotel de las filas indicadas, en ese orden."""
+        return self._ids[rows].tolist()
+
+    def add(self, hotel: Any) -> None:
+        """Inserta o actualiza la fila de un hotel."""
+        row = self.rows.get(hotel.hotel_id)
+        if row is None:
+            row = self._size
+            if row == len(self._total):
+                self._ids = np.concatenate([self._ids, np.empty_like(self._ids)])
+                self._total = np.concatenate([self._total, np.zeros_like(self._total)])
+                self._available = np.concatenate(
+                    [self._available, np.zeros_like(self._available)]
+                )
+            self._ids[row] = hotel.hotel_id
+            self.rows[hotel.hotel_id] = row
+            self._size += 1
+        self._total[row] = hotel.rooms_total
+        self._available[row] = hotel.rooms_available
+
+    def remove(self, hotel_id: str) -> None:
+        """Elimina la fila de un hotel, si existe."""
+        row = self.rows.pop(hotel_id, None)
+        if row is None:
+            return
+        last = self._size - 1
+        if row != last:
+            moved = self._ids[last]
+            self._ids[row] = moved
+            self.rows[moved] = row
+            self._total[row] = self._total[last]
+            self._available[row] = self._available[last]
+        self._ids[last] = None
+        self._size = last
+
+    def column(self, name: str) -> Any:
+        """Arreglo de la columna `name` (ver `COLUMNS`) con una posición por fila."""
+        size = self._size
+        total = self._total[:size]
+        available = self._available[:size]
+        if name == "rooms_total":
+            return total
+        if name == "rooms_available":
+            return available
+        if name == "rooms_occupied":
+            return total - available
+        if name == "occupancy":
+            occupied = (total - available).astype(np.float64)
+            return np.divide(occupied, total, out=np.zeros(size), where=total > 0)
+        raise ValueError(f"unknown column '{name}'; expected one of {', '.join(COLUMNS)}")
+
+
+class InventoryView(IndexView[Any]):
+    """Vista de `InventoryData` mantenida con las escrituras de hoteles.
+
+    La construcción inicial carga las columnas de una vez en lugar de
+    agregar los hoteles fila por fila.
+    """
+
+    data_type = InventoryData
+    key_field = "hotel_id"
+
+    def build(self, entities: Dict[str, Any]) -> InventoryData:
+        return InventoryData(entities.values())
+
+
+class InventoryQuery:
+    """Consulta inmutable sobre las columnas de capacidad.
+
+    `where`, `order_by`, `top` y `limit` devuelven una consulta nueva; las
+    operaciones finales (`ids`, `values`, `count` y los agregados) la evalúan
+    sobre las columnas vigentes. Sin orden, las filas salen en un orden
+    arbitrario; con orden, los empates también.
+    """
+
+    def __init__(
+        self,
+        source: Callable[[], InventoryData],
+        filters: Tuple[Filter, ...] = (),
+        order: Optional[Tuple[str, bool]] = None,
+        limit: Optional[int] = None,
+    ) -> None:
+        require_numpy()
+        self._source = source
+        self._filters = filters
+        self._order = order
+        self._limit = limit
+
+    def _with(self, **changes: Any) -> "InventoryQuery":
+        state = {"filters": self._filters, "order": self._order, "limit": self._limit}
+        state.update(changes)
+        return InventoryQuery(self._source, **state)
+
+    def where(
+        self, column: str, minimum: Optional[float] = None, maximum: Optional[float] = None
+    ) -> "InventoryQuery":
+        """Conserva las filas con `minimum <= column <= maximum` (límites opcionales)."""
+        if column not in COLUMNS:
+            raise ValueError(f"unknown column '{column}'; expected one of {', '.join(COLUMNS)}")
+        return self._with(filters=self._filters + ((column, minimum, maximum),))
+
+    def order_by(self, column: str, descending: bool = False) -> "InventoryQuery":
+        """Ordena por `column`."""
+        if column not in COLUMNS:
+            raise ValueError(f"unknown column '{column}'; expected one of {', '.join(COLUMNS)}")
+        return self._with(order=(column, descending))
+
+    def limit(self, count: int) -> "InventoryQuery":
+        """Conserva solo las primeras `count` filas."""
+        if count < 0:
+            raise ValueError("limit must not be negative")
+        return self._with(limit=count)
+
+    def top(self, count: int, column: str = "rooms_available") -> "InventoryQuery":
+        """Las `count` filas con mayor `column`, de mayor a menor."""
+        return self.order_by(column, descending=True).limit(count)
+
+    def _mask(self, data: InventoryData) -> Any:
+        """Máscara booleana de los filtros, o `None` si no hay filtros."""
+        mask = None
+        for column, minimum, maximum in self._filters:
+            values = data.column(column)
+            if minimum is not None:
+                mask = values >= minimum if mask is None else mask & (values >= minimum)
+            if maximum is not None:
+                mask = values <= maximum if mask is None else mask & (values <= maximum)
+        return mask
+
+    def _rows(self, data: InventoryData) -> Any:
+        """Filas del resultado, ya ordenadas y limitadas."""
+        mask = self._mask(data)
+        rows = np.arange(len(data)) if mask is None else np.flatnonzero(mask)
+        if self._order is None:
+            return rows if self._limit is None else rows[:self._limit]
+
+        column, descending = self._order
+        keys = data.column(column)[rows]
+        if descending:
+            keys = -keys
+        limit = self._limit
+        if limit == 0:
+            return rows[:0]
+        if limit is not None and limit < len(rows):
+            # Selección parcial O(n) y orden solo de los `limit` elegidos.
+            chosen = np.argpartition(keys, limit - 1)[:limit]
+            return rows[chosen[np.argsort(keys[chosen], kind="stable")]]
+        return rows[np.argsort(keys, kind="stable")]
+
+    def _selected(self, column: str) -> Any:
+        """Valores de `column` en las filas del resultado."""
+        data = self._source()
+        values = data.column(column)
+        if self._order is None and self._limit is None:
+            mask = self._mask(data)
+            return values if mask is None else values[mask]
+        return values[self._rows(data)]
+
+    def ids(self) -> List[str]:
+        """IDs de hotel del resultado."""
+        data = self._source()
+        return data.ids_at(self._rows(data))
+
+    def values(self, column: str) -> List[Any]:
+        """Valores de `column` en el resultado, en su orden."""
+        return self._selected(column).tolist()
+
+    def count(self) -> int:
+        """Número de hoteles del resultado."""
+        data = self._source()
+        if self._order is None and self._limit is None:
+            mask = self._mask(data)
+            return len(data) if mask is None else int(np.count_nonzero(mask))
+        return int(self._rows(data).size)
+
+    def sum(self, column: str = "rooms_available") -> Any:
+        """Suma de `column` en el resultado."""
+        data = self._source()
+        if self._order is None and self._limit is None:
+            # Suma con máscara, sin copiar las filas seleccionadas.
+            mask = self._mask(data)
+            return data.column(column).sum(where=True if mask is None else mask).item()
+        return data.column(column)[self._rows(data)].sum().item()
+
+    def mean(self, column: str = "occupancy") -> Optional[float]:
+        """Promedio de `column` en el resultado, o `None` si está vacío."""
+        values = self._selected(column)
+        return float(values.mean()) if values.size else None
+
+    def min(self, column: str = "rooms_available") -> Optional[Any]:
+        """Mínimo de `column` en el resultado, o `None` si está vacío."""
+        values = self._selected(column)
+        return values.min().item() if values.size else None
+
+    def max(self, column: str = "rooms_available") -> Optional[Any]:
+        """Máximo de `column` en el resultado, o `None` si está vacío."""
+        values = self._selected(column)
+        return values.max().item() if values.size else None
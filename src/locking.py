@@ -0,0 +1,133 @@
+"""Candados entre hilos y entre procesos para los repositorios.
+
+`FileLock` protege la lectura-modificación-escritura de un archivo de
+datos: un `RLock` ordena a los hilos del proceso y un candado consultivo
+`fcntl.flock` sobre `<archivo>.lock` ordena a los procesos. Hay un solo
+`FileLock` por archivo y proceso (`file_lock`), así que todos los
+repositorios que comparten un archivo comparten su candado; `locked` toma
+los de varios archivos siempre en el mismo orden para evitar interbloqueos.
+
+`StripedLock` reparte claves (p. ej. `hotel_id`) entre un número fijo de
+candados: operaciones sobre claves distintas casi nunca se esperan entre sí
+y la memoria no crece con el número de claves.
+
+Sin `fcntl` (Windows) los candados solo ordenan a los hilos del proceso.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import zlib
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - no disponible en Windows
+    fcntl = None  # type: ignore[assignment]
+
+
+# Candados por defecto de un `StripedLock`.
+DEFAULT_STRIPES = 64
+
+
+def lock_path(path: str | Path) -> Path:
+    """Archivo de candado que acompaña a un archivo de datos."""
+    path = Path(path)
+    return path.with_name(path.name + ".lock")
+
+
+class FileLock:
+    """Candado exclusivo y reentrante sobre un archivo, entre hilos y procesos."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = lock_path(path)
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._fd: Optional[int] = None
+        self._pid = os.getpid()
+
+    def _check_fork(self) -> None:
+        if os.getpid() != self._pid:
+            # El hijo hereda el descriptor (y con él el candado del padre) y
+            # el estado del RLock; empieza de cero con los suyos.
+            self._pid = os.getpid()
+            self._lock = threading.RLock()
+            self._depth = 0
+            self._fd = None
+
+    def acquire(self) -> None:
+        """Toma el candado, esperando a otros hilos y procesos."""
+        self._check_fork()
+        self._lock.acquire()  # pylint: disable=consider-using-with
+        try:
+            if self._depth == 0 and fcntl is not None:
+                if self._fd is None:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+        except BaseException:
+            self._lock.release()
+            raise
+        self._depth += 1
+
+    def release(self) -> None:
+        """Suelta el candado tomado por este hilo."""
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None and fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._lock.release()
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.release()
+
+
+_file_locks: Dict[str, FileLock] = {}
+_file_locks_guard = threading.Lock()
+
+
+def file_lock(path: str | Path) -> FileLock:
+    """Candado del proceso para `path` (el mismo objeto en cada llamada)."""
+    name = str(Path(path).resolve())
+    with _file_locks_guard:
+        lock = _file_locks.get(name)
+        if lock is None:
+            lock = _file_locks[name] = FileLock(name)
+        return lock
+
+
+@contextmanager
+def locked(paths: Iterable[str | Path]) -> Iterator[None]:
+    """Toma los candados de todos los archivos, en orden fijo."""
+    with ExitStack() as stack:
+        for name in sorted({str(Path(p).resolve()) for p in paths}):
+            stack.enter_context(file_lock(name))
+        yield
+
+
+class StripedLock:
+    """Candados de hilos repartidos por clave en `stripes` franjas."""
+
+    def __init__(self, stripes: int = DEFAULT_STRIPES) -> None:
+        if stripes < 1:
+            raise ValueError("stripes must be at least 1")
+        self._locks = [threading.RLock() for _ in range(stripes)]
+
+    def stripe(self, key: str) -> int:
+        """Franja de `key` (CRC32, estable entre procesos)."""
+        return zlib.crc32(key.encode("utf-8")) % len(self._locks)
+
+    @contextmanager
+    def hold(self, keys: Iterable[str]) -> Iterator[None]:
+        """Toma las franjas de todas las claves, en orden fijo."""
+        stripes: List[int] = sorted({self.stripe(k) for k in keys})
+        with ExitStack() as stack:
+            for index in stripes:
+                stack.enter_context(self._locks[index])
+            yield
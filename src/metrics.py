@@ -0,0 +1,326 @@
+"""Registro ligero de métricas para las rutas críticas de almacenamiento.
+
+`storage` y los repositorios reportan contadores (llamadas, bytes leídos y
+escritos) e histogramas de latencia por fase (lectura, `json.loads`,
+validación, serialización, `json.dumps`, escritura). Mientras no se llame a
+`enable()` todas las funciones de este módulo son no-ops baratos: `timer`
+devuelve un contexto vacío compartido y `timed` devuelve la función original.
+
+Uso:
+    registry = metrics.enable(PrometheusFileSink("metrics.prom"))
+    ...
+    registry.flush()
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Etiquetas normalizadas: pares (nombre, valor) ordenados.
+Labels = Tuple[Tuple[str, str], ...]
+MetricKey = Tuple[str, Labels]
+
+# Límites superiores (segundos) de los histogramas de latencia.
+DEFAULT_BUCKETS = (
+    0.00001, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0,
+)
+
+# Prefijo de los nombres exportados.
+PREFIX = "hotel"
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Histogram:
+    """Histograma de buckets fijos con suma y conteo."""
+
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Registra una observación."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[int]:
+        """Conteos acumulados por bucket, el último es `+Inf`."""
+        total, out = 0, []
+        for count in self.counts:
+            total += count
+            out.append(total)
+        return out
+
+
+class MetricsSink:
+    """Destino de métricas; las subclases redefinen lo que necesiten."""
+
+    def record(self, kind: str, name: str, value: float, labels: Labels) -> None:
+        """Recibe cada evento (`kind` es "counter" o "histogram")."""
+
+    def flush(self, registry: "MetricsRegistry") -> None:
+        """Recibe el estado agregado cuando se llama a `MetricsRegistry.flush`."""
+
+
+class MemorySink(MetricsSink):
+    """Guarda en memoria una instantánea por cada `flush`."""
+
+    def __init__(self) -> None:
+        self.snapshots: List[Dict[str, Any]] = []
+
+    def flush(self, registry: "MetricsRegistry") -> None:
+        self.snapshots.append(registry.snapshot())
+
+
+class CallbackSink(MetricsSink):
+    """Llama a `callback(kind, name, value, labels)` con cada evento."""
+
+    def __init__(self, callback: Callable[[str, str, float, Dict[str, str]], None]) -> None:
+        self.callback = callback
+
+    def record(self, kind: str, name: str, value: float, labels: Labels) -> None:
+        self.callback(kind, name, value, dict(labels))
+
+
+class PrometheusFileSink(MetricsSink):
+    """Escribe el formato de texto de Prometheus en un archivo en cada `flush`.
+
+    Pensado para el recolector de archivos de texto de node_exporter.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+
+    def flush(self, registry: "MetricsRegistry") -> None:
+        # Escritura atómica propia: `storage` reporta a este módulo y usar su
+        # `write_atomic` crearía un import circular.
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            tmp.write_bytes(registry.prometheus_text().encode("utf-8"))
+            os.replace(tmp, self.path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
+
+class _Timer:
+    """Contexto que observa su duración en un histograma de fase."""
+
+    __slots__ = ("registry", "labels", "start")
+
+    def __init__(self, registry: "MetricsRegistry", labels: Labels) -> None:
+        self.registry = registry
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.registry.observe_key("phase_seconds", time.perf_counter() - self.start, self.labels)
+
+
+class _NullTimer:
+    """Contexto vacío usado mientras las métricas están desactivadas."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """Contadores e histogramas en memoria, seguros entre hilos."""
+
+    def __init__(
+        self, *sinks: MetricsSink, buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> None:
+        self.sinks = list(sinks)
+        self.buckets = buckets
+        self.counters: Dict[MetricKey, float] = {}
+        self.histograms: Dict[MetricKey, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Suma `value` a un contador."""
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+        for sink in self.sinks:
+            sink.record("counter", name, value, key[1])
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Registra una observación en un histograma."""
+        self.observe_key(name, value, _labels(labels))
+
+    def observe_key(self, name: str, value: float, labels: Labels) -> None:
+        """Como `observe`, con etiquetas ya normalizadas."""
+        key = (name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+        for sink in self.sinks:
+            sink.record("histogram", name, value, labels)
+
+    def timer(self, phase: str, **labels: Any) -> _Timer:
+        """Contexto que mide la duración de una fase."""
+        return _Timer(self, _labels({"phase": phase, **labels}))
+
+    def counter(self, name: str, **labels: Any) -> float:
+        """Valor actual de un contador (0 si no existe)."""
+        return self.counters.get((name, _labels(labels)), 0)
+
+    def histogram(self, name: str, **labels: Any) -> Optional[Histogram]:
+        """Histograma con esas etiquetas o `None`."""
+        return self.histograms.get((name, _labels(labels)))
+
+    def phase(self, phase: str, **labels: Any) -> Optional[Histogram]:
+        """Histograma de latencia de una fase o `None`."""
+        return self.histogram("phase_seconds", phase=phase, **labels)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Copia serializable del estado actual."""
+        with self._lock:
+            return {
+                "counters": [
+                    {"name": n, "labels": dict(lb), "value": v}
+                    for (n, lb), v in self.counters.items()
+                ],
+                "histograms": [
+                    {
+                        "name": n,
+                        "labels": dict(lb),
+                        "buckets": list(self.buckets),
+                        "counts": list(h.counts),
+                        "sum": h.sum,
+                        "count": h.count,
+                    }
+                    for (n, lb), h in self.histograms.items()
+                ],
+            }
+
+    def prometheus_text(self) -> str:
+        """Estado actual en el formato de texto de Prometheus."""
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted({n for n, _ in self.counters}):
+                metric = f"{PREFIX}_{name}"
+                lines.append(f"# TYPE {metric} counter")
+                for (n, labels), value in sorted(self.counters.items()):
+                    if n == name:
+                        lines.append(f"{metric}{_format(labels)} {value:g}")
+            for name in sorted({n for n, _ in self.histograms}):
+                metric = f"{PREFIX}_{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                for (n, labels), histogram in sorted(
+                    self.histograms.items(), key=lambda item: item[0]
+                ):
+                    if n != name:
+                        continue
+                    bounds = [f"{b:g}" for b in self.buckets] + ["+Inf"]
+                    for bound, count in zip(bounds, histogram.cumulative()):
+                        lines.append(
+                            f"{metric}_bucket{_format(labels + (('le', bound),))} {count}"
+                        )
+                    lines.append(f"{metric}_sum{_format(labels)} {histogram.sum:.9g}")
+                    lines.append(f"{metric}_count{_format(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def flush(self) -> None:
+        """Entrega el estado agregado a todos los destinos."""
+        for sink in self.sinks:
+            sink.flush(self)
+
+    def reset(self) -> None:
+        """Descarta todos los valores registrados."""
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+def _format(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in labels
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+# Registro activo; lo reemplazan `enable` y `disable`.
+_REGISTRY: Optional[MetricsRegistry] = None
+
+
+def enable(*sinks: MetricsSink, registry: Optional[MetricsRegistry] = None) -> MetricsRegistry:
+    """Activa la recolección y devuelve el registro en uso."""
+    global _REGISTRY  # pylint: disable=global-statement
+    _REGISTRY = registry if registry is not None else MetricsRegistry(*sinks)
+    return _REGISTRY
+
+
+def disable() -> None:
+    """Desactiva la recolección."""
+    global _REGISTRY  # pylint: disable=global-statement
+    _REGISTRY = None
+
+
+def active() -> Optional[MetricsRegistry]:
+    """Registro activo o `None` si las métricas están desactivadas."""
+    return _REGISTRY
+
+
+def timer(phase: str, **labels: Any) -> Any:
+    """Contexto que mide una fase; no hace nada si las métricas están desactivadas."""
+    registry = _REGISTRY
+    if registry is None:
+        return _NULL_TIMER
+    return registry.timer(phase, **labels)
+
+
+def inc(name: str, value: float = 1, **labels: Any) -> None:
+    """Suma a un contador si las métricas están activas."""
+    registry = _REGISTRY
+    if registry is not None:
+        registry.inc(name, value, **labels)
+
+
+def timed(func: F, phase: str, **labels: Any) -> F:
+    """Envuelve `func` para medir cada llamada; sin métricas devuelve `func`."""
+    registry = _REGISTRY
+    if registry is None:
+        return func
+    key = _labels({"phase": phase, **labels})
+
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            registry.observe_key("phase_seconds", time.perf_counter() - start, key)
+
+    return wrapper  # type: ignore[return-value]
@@ -0,0 +1,46 @@
+"""Migración de los archivos `data/*.json` a una base de datos SQLite.
+
+Uso:
+    python -m src.migrate --data-dir data --db data/hotel.db
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.storage import migrate_json_to_sqlite
+
+
+# (tabla, campo clave); el archivo de origen es `<tabla>.json`.
+COLLECTIONS = (
+    ("customers", "customer_id"),
+    ("hotels", "hotel_id"),
+    ("reservations", "reservation_id"),
+)
+
+
+def migrate_data_dir(data_dir: Path, db_path: Path) -> Dict[str, int]:
+    """Copia cada colección JSON existente a su tabla y devuelve los conteos."""
+    counts: Dict[str, int] = {}
+    for table, key_field in COLLECTIONS:
+        json_path = data_dir / f"{table}.json"
+        if json_path.exists():
+            counts[table] = migrate_json_to_sqlite(json_path, db_path, table, key_field)
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Punto de entrada de línea de comandos."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", type=Path, default=Path("data"))
+    parser.add_argument("--db", type=Path, default=Path("data/hotel.db"))
+    args = parser.parse_args(argv)
+
+    for table, count in migrate_data_dir(args.data_dir, args.db).items():
+        print(f"[migrate] {table}: {count} records -> {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""Índice de búsqueda de clientes por nombre, por prefijo y tolerante a errores.
+
+Los nombres se normalizan (minúsculas, sin acentos) y se parten en palabras.
+El índice guarda, por palabra distinta, los clientes que la contienen; las
+palabras distintas se mantienen ordenadas para encontrar prefijos con
+búsqueda binaria, y cada una se indexa por las variantes que resultan de
+borrarle una letra. Dos palabras a una edición (inserción, borrado,
+sustitución o transposición) comparten una variante o una es variante de
+la otra, así que las aproximadas salen de unas pocas consultas a ese
+diccionario en lugar de comparar contra todas las palabras.
+
+Una consulta de varias palabras exige que todas coincidan con alguna
+palabra del nombre. Los candidatos salen de la palabra más selectiva y las
+demás se verifican sobre cada candidato; la búsqueda termina en cuanto hay
+`limit` resultados, así que su costo depende del resultado y no del número
+de clientes.
+
+El índice se guarda junto a la colección (`name_index_path`) sellado con la
+firma de sus archivos, de modo que un proceso nuevo lo carga sin
+reconstruirlo mientras la colección no haya cambiado. Se guarda completo al
+construirlo; cada escritura que lo actualiza solo agrega una línea con los
+nombres que cambió a un registro de cambios (`name_log_path`), encadenada
+con la firma anterior y la nueva de la colección. Al cargarlo se aplican
+esas líneas en orden; cuando el registro supera el tamaño del índice se
+vuelve a guardar completo. Solo las escrituras de otra instancia que no
+tenía el índice cargado rompen la cadena, y entonces se reconstruye.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import unicodedata
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from src.repository import DerivedView
+from src.storage import Signature, load_json, write_atomic
+
+
+NAME_INDEX_VERSION = 1
+
+# Puntajes por palabra: menor es mejor.
+EXACT, PREFIX, FUZZY = 0, 1, 2
+
+
+def name_index_path(path: str | Path) -> Path:
+    """Archivo del índice de nombres que acompaña a la colección en `path`."""
+    return Path(path).with_suffix(".names")
+
+
+def name_log_path(path: str | Path) -> Path:
+    """Registro de cambios del índice de nombres de la colección en `path`."""
+    return Path(path).with_suffix(".names-log")
+
+
+def normalize(text: str) -> str:
+    """Minúsculas sin acentos ni espacios repetidos."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Palabras distintas de `text` normalizado, en orden de aparición."""
+    return list(dict.fromkeys(normalize(text).split()))
+
+
+# Largo mínimo de una palabra buscada para tolerar una edición.
+FUZZY_MIN_LENGTH = 4
+
+
+def deletions(token: str) -> Set[str]:
+    """Variantes de la palabra sin una de sus letras."""
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def edit_distance(a: str, b: str, limit: int) -> Optional[int]:
+    """Distancia de edición con transposiciones, o `None` si supera `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return None
+    previous: List[int] = []
+    current = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, before[j - 2] + 1)
+            current[j] = value
+        if min(current) > limit:
+            return None
+    return current[-1] if current[-1] <= limit else None
+
+
+def _stamp(signature: Tuple[Optional[Signature], ...]) -> List[Optional[List[int]]]:
+    """Firma de la colección tal como se guarda en JSON."""
+    return [list(s) if s is not None else None for s in signature]
+
+
+# Conjunto de clientes que conserva el orden de alta (claves de un dict).
+Posting = Dict[str, None]
+
+
+class NameIndexData:
+    """Contenido de `NameIndex`.
+
+    `source` es la firma de la colección con que se guardó por última vez y
+    `changes` los nombres cambiados desde entonces (`None` = baja).
+    """
+
+    def __init__(self) -> None:
+        self.names: Dict[str, List[str]] = {}
+        self.postings: Dict[str, Posting] = {}
+        self.tokens: List[str] = []
+        self.by_deletion: Dict[str, Set[str]] = {}
+        self.source: Optional[Tuple[Optional[Signature], ...]] = None
+        self.changes: Dict[str, Optional[List[str]]] = {}
+
+    @classmethod
+    def from_names(cls, names: Dict[str, List[str]]) -> "NameIndexData":
+        """Construye el índice a partir de las palabras de cada cliente."""
+        data = cls()
+        data.names = names
+        for customer_id, tokens in names.items():
+            for token in tokens:
+                data.postings.setdefault(token, {})[customer_id] = None
+        data.tokens = sorted(data.postings)
+        for token in data.tokens:
+            data._index_deletions(token)
+        return data
+
+    def _index_deletions(self, token: str) -> None:
+        if len(token) >= FUZZY_MIN_LENGTH - 1:
+            for variant in deletions(token):
+                self.by_deletion.setdefault(variant, set()).add(token)
+
+    def add(self, customer_id: str, name: str) -> None:
+        """Indexa el nombre de un cliente, reemplazando el anterior."""
+        self.add_tokens(customer_id, tokenize(name))
+
+    def add_tokens(self, customer_id: str, tokens: List[str]) -> None:
+        """Indexa las palabras ya normalizadas de un cliente."""
+        self.remove(customer_id)
+        self.names[customer_id] = tokens
+        self.changes[customer_id] = tokens
+        for token in tokens:
+            posting = self.postings.get(token)
+            if posting is None:
+                posting = self.postings[token] = {}
+                bisect.insort(self.tokens, token)
+                self._index_deletions(token)
+            posting[customer_id] = None
+
+    def remove(self, customer_id: str) -> None:
+        """Quita a un cliente del índice, si está."""
+        self.changes[customer_id] = None
+        for token in self.names.pop(customer_id, ()):
+            posting = self.postings[token]
+            del posting[customer_id]
+            if not posting:
+                del self.postings[token]
+                del self.tokens[bisect.bisect_left(self.tokens, token)]
+                if len(token) >= FUZZY_MIN_LENGTH - 1:
+                    for variant in deletions(token):
+                        tokens = self.by_deletion[variant]
+                        tokens.discard(token)
+                        if not tokens:
+                            del self.by_deletion[variant]
+
+    def prefixed(self, term: str) -> Iterator[str]:
+        """Palabras indexadas que empiezan con `term`, en orden alfabético."""
+        tokens = self.tokens
+        for index in range(bisect.bisect_left(tokens, term), len(tokens)):
+            if not tokens[index].startswith(term):
+                break
+            yield tokens[index]
+
+    def _prefix_count(self, term: str) -> int:
+        start = bisect.bisect_left(self.tokens, term)
+        end = bisect.bisect_left(self.tokens, term + "\U0010ffff")
+        return end - start
+
+    def similar(self, term: str) -> Set[str]:
+        """Palabras indexadas a una edición de `term` (desde `FUZZY_MIN_LENGTH` letras)."""
+        if len(term) < FUZZY_MIN_LENGTH:
+            return set()
+        # Inserción: `term` es variante de la palabra. Borrado: una variante
+        # de `term` es la palabra. Sustitución o transposición: comparten variante.
+        candidates = set(self.by_deletion.get(term, ()))
+        for variant in deletions(term):
+            if variant in self.postings:
+                candidates.add(variant)
+            candidates.update(self.by_deletion.get(variant, ()))
+        candidates.discard(term)
+        return {token for token in candidates if edit_distance(term, token, 1) is not None}
+
+    def search(self, query: str, limit: int) -> List[Tuple[int, str]]:
+        """Clientes cuyo nombre coincide con todas las palabras de `query`.
+
+        Devuelve hasta `limit` pares (puntaje, customer_id), de mejor a peor
+        puntaje: por palabra, 0 si es igual, 1 si es prefijo y 2 si está a
+        una edición.
+        """
+        terms = tokenize(query)
+        if not terms or limit <= 0:
+            return []
+        # La palabra con menos completaciones genera los candidatos.
+        terms.sort(key=lambda t: (self._prefix_count(t), -len(t)))
+        first, rest = terms[0], [_scorer(self, t) for t in terms[1:]]
+
+        found: Dict[str, int] = {}
+        for token, score in self._expand(first):
+            if len(found) >= limit:
+                break
+            for customer_id in self.postings.get(token, ()):
+                if len(found) >= limit:
+                    break
+                if customer_id in found:
+                    continue
+                total = score
+                for term_score in rest:
+                    matched = term_score(self.names[customer_id])
+                    if matched is None:
+                        break
+                    total += matched
+                else:
+                    found[customer_id] = total
+        ranked = sorted((score, cid) for cid, score in found.items())
+        return ranked[:limit]
+
+    def _expand(self, term: str) -> Iterator[Tuple[str, int]]:
+        """Palabras que coinciden con `term`, de mejor a peor puntaje."""
+        if term in self.postings:
+            yield term, EXACT
+        for token in self.prefixed(term):
+            if token != term:
+                yield token, PREFIX
+        for token in sorted(self.similar(term)):
+            if not token.startswith(term):
+                yield token, FUZZY
+
+    def apply_changes(self, changes: Dict[str, Optional[List[str]]]) -> None:
+        """Aplica una línea del registro de cambios."""
+        for customer_id, tokens in changes.items():
+            if tokens is None:
+                self.remove(customer_id)
+            else:
+                self.add_tokens(customer_id, tokens)
+
+    def to_json(self, source: Tuple[Optional[Signature], ...]) -> bytes:
+        """Serializa el índice sellado con la firma `source` de la colección."""
+        payload = {"version": NAME_INDEX_VERSION, "source": _stamp(source), "names": self.names}
+        return _dumps(payload)
+
+    def change_entry(self, source: Tuple[Optional[Signature], ...]) -> bytes:
+        """Línea del registro que lleva el índice de `self.source` a `source`."""
+        entry = {
+            "from": _stamp(self.source) if self.source is not None else None,
+            "to": _stamp(source),
+            "names": self.changes,
+        }
+        return _dumps(entry) + b"\n"
+
+
+def _dumps(payload: Any) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _scorer(data: NameIndexData, term: str) -> Callable[[List[str]], Optional[int]]:
+    """Función que da el mejor puntaje de `term` contra las palabras de un candidato.
+
+    Las palabras a una edición de `term` se calculan la primera vez que hacen falta.
+    """
+    similar: Optional[Set[str]] = None
+
+    def score(tokens: List[str]) -> Optional[int]:
+        nonlocal similar
+        best: Optional[int] = None
+        for token in tokens:
+            if token == term:
+                return EXACT
+            if token.startswith(term):
+                best = PREFIX
+            elif best is None:
+                if similar is None:
+                    similar = data.similar(term)
+                if token in similar:
+                    best = FUZZY
+        return best
+
+    return score
+
+
+class NameIndex(DerivedView[Any]):
+    """Vista de `NameIndexData` mantenida con las escrituras de clientes.
+
+    Se guarda completa en `path` al construirla y, tras cada escritura que
+    la actualiza, agrega los cambios a `log_path`.
+    """
+
+    def __init__(self, path: Path, *paths: Path) -> None:
+        super().__init__(*paths)
+        self.path = path
+        self.log_path = name_log_path(path)
+
+    def build(self, entities: Dict[str, Any]) -> NameIndexData:
+        return NameIndexData.from_names(
+            {customer_id: tokenize(c.name) for customer_id, c in entities.items()}
+        )
+
+    def update(self, value: NameIndexData, puts: List[Any], deletes: List[str]) -> None:
+        for customer in puts:
+            value.add(customer.customer_id, customer.name)
+        for customer_id in deletes:
+            value.remove(customer_id)
+
+    def restore(self, signature: Tuple[Optional[Signature], ...]) -> Optional[NameIndexData]:
+        """Carga el índice guardado y sus cambios si llegan hasta `signature`."""
+        payload = load_json(self.path, default=None)
+        if (
+            not isinstance(payload, dict)
+            or payload.get("version") != NAME_INDEX_VERSION
+            or not isinstance(payload.get("names"), dict)
+        ):
+            return None
+        data = NameIndexData.from_names(payload["names"])
+        source = payload.get("source")
+        for entry in self._entries():
+            if entry.get("from") != source or not isinstance(entry.get("names"), dict):
+                break
+            data.apply_changes(entry["names"])
+            source = entry.get("to")
+        if source != _stamp(signature):
+            return None
+        data.source = signature
+        data.changes = {}
+        return data
+
+    def _entries(self) -> Iterator[Dict[str, Any]]:
+        """Líneas del registro de cambios; se detiene en la primera ilegible."""
+        try:
+            with open(self.log_path, "rb") as fh:
+                for line in fh:
+                    entry = json.loads(line)
+                    if not isinstance(entry, dict):
+                        return
+                    yield entry
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as exc:
+            print(f"[name_index] Ignoring the rest of '{self.log_path}': {exc}")
+
+    def persist(self, value: NameIndexData, signature: Tuple[Optional[Signature], ...]) -> None:
+        """Guarda los cambios de `value` hasta `signature`; un fallo solo se reporta.
+
+        La primera vez, o cuando el registro ya pesa más que el índice, lo
+        guarda completo y vacía el registro.
+        """
+        if value.source == signature:
+            return
+        try:
+            if value.source is None or self._log_outgrown():
+                write_atomic(self.path, value.to_json(signature))
+                self.log_path.unlink(missing_ok=True)
+            else:
+                with open(self.log_path, "ab") as fh:
+                    fh.write(value.change_entry(signature))
+        except OSError as exc:
+            print(f"[name_index] Error writing '{self.path}': {exc}")
+            value.source = None
+        else:
+            value.source = signature
+        value.changes = {}
+
+    def _log_outgrown(self) -> bool:
+        try:
+            base = self.path.stat().st_size
+        except OSError:
+            return True
+        try:
+            return self.log_path.stat().st_size > base
+        except OSError:
+            return False
@@ -0,0 +1,285 @@
+"""Estadísticas de ocupación y reservas mantenidas de forma incremental.
+
+`ReportingService` registra dos vistas derivadas: una sobre los hoteles
+(habitaciones totales y disponibles por hotel y de toda la cadena) y otra
+sobre las reservas (activas por hotel y por cliente). Cada escritura de los
+repositorios, incluidos `create_reservation`, `cancel_reservation`,
+`reserve_room` y `release_room`, las actualiza en O(1) por entidad, así que
+los reportes no recorren las colecciones ni cruzan reservas con hoteles:
+
+    reports = ReportingService(reservation_repo)
+    reports.hotel_occupancy("H1").occupancy_rate
+    reports.active_bookings("C1")
+    reports.chain_totals()
+
+Las vistas se construyen con la primera consulta y se reconstruyen solas
+si otro proceso cambia los archivos. `verify` recalcula todo desde los
+archivos y reporta las diferencias con lo mantenido; `rebuild` descarta lo
+mantenido y lo vuelve a calcular.
+"""
+
+from __future__ import annotations
+
+# pylint: disable=protected-access
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.locking import locked
+from src.repository import IndexView, Repository
+
+
+@dataclass(frozen=True)
+class HotelOccupancy:
+    """Ocupación de un hotel.
+
+    `rooms_occupied` cuenta las habitaciones descontadas del hotel (reservas
+    sin fechas y `reserve_room`); `active_reservations` incluye además las
+    reservas activas con fechas.
+    """
+
+    hotel_id: str
+    rooms_total: int
+    rooms_available: int
+    active_reservations: int
+
+    @property
+    def rooms_occupied(self) -> int:
+        """Habitaciones ocupadas."""
+        return self.rooms_total - self.rooms_available
+
+    @property
+    def occupancy_rate(self) -> float:
+        """Fracción de habitaciones ocupadas (0 si el hotel no tiene habitaciones)."""
+        return self.rooms_occupied / self.rooms_total if self.rooms_total else 0.0
+
+
+@dataclass(frozen=True)
+class ChainTotals:
+    """Totales de toda la cadena."""
+
+    hotels: int
+    rooms_total: int
+    rooms_available: int
+    reservations: int
+    active_reservations: int
+
+    @property
+    def rooms_occupied(self) -> int:
+        """Habitaciones ocupadas en la cadena."""
+        return self.rooms_total - self.rooms_available
+
+    @property
+    def occupancy_rate(self) -> float:
+        """Fracción de habitaciones ocupadas en la cadena."""
+        return self.rooms_occupied / self.rooms_total if self.rooms_total else 0.0
+
+
+@dataclass
+class DriftReport:
+    """Diferencias entre las estadísticas mantenidas y las recalculadas.
+
+    Cada elemento de `mismatches` describe un valor que no coincide.
+    """
+
+    mismatches: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        """Indica si lo mantenido coincide con los archivos."""
+        return not self.mismatches
+
+
+class HotelStatsData:
+    """Habitaciones totales y disponibles por hotel, con los totales de la cadena."""
+
+    def __init__(self) -> None:
+        self.rooms: Dict[str, Tuple[int, int]] = {}
+        self.rooms_total = 0
+        self.rooms_available = 0
+
+    def add(self, hotel: Any) -> None:
+        """Registra un hotel que no está en las estadísticas."""
+        self.rooms[hotel.hotel_id] = (hotel.rooms_total, hotel.rooms_available)
+        self.rooms_total += hotel.rooms_total
+        self.rooms_available += hotel.rooms_available
+
+    def remove(self, hotel_id: str) -> None:
+        """Quita un hotel de las estadísticas, si estaba."""
+        previous = self.rooms.pop(hotel_id, None)
+        if previous is not None:
+            self.rooms_total -= previous[0]
+            self.rooms_available -= previous[1]
+
+
+class BookingStatsData:
+    """Reservas activas por hotel y por cliente, con los totales de la cadena."""
+
+    def __init__(self) -> None:
+        # reservation_id -> (customer_id, hotel_id, activa)
+        self.entries: Dict[str, Tuple[str, str, bool]] = {}
+        self.active_by_hotel: Dict[str, int] = {}
+        self.active_by_customer: Dict[str, int] = {}
+        self.active = 0
+
+    def add(self, reservation: Any) -> None:
+        """Registra una reserva que no está en las estadísticas."""
+        entry = (reservation.customer_id, reservation.hotel_id, reservation.active)
+        self.entries[reservation.reservation_id] = entry
+        if reservation.active:
+            self._count(entry, 1)
+
+    def remove(self, reservation_id: str) -> None:
+        """Quita una reserva de las estadísticas, si estaba."""
+        entry = self.entries.pop(reservation_id, None)
+        if entry is not None and entry[2]:
+            self._count(entry, -1)
+
+    def _count(self, entry: Tuple[str, str, bool], delta: int) -> None:
+        customer_id, hotel_id, _ = entry
+        self.active += delta
+        for counts, key in (
+            (self.active_by_hotel, hotel_id),
+            (self.active_by_customer, customer_id),
+        ):
+            value = counts.get(key, 0) + delta
+            if value:
+                counts[key] = value
+            else:
+                del counts[key]
+
+
+class HotelStats(IndexView[Any]):
+    """Vista de `HotelStatsData` mantenida con las escrituras de hoteles."""
+
+    data_type = HotelStatsData
+    key_field = "hotel_id"
+
+
+class BookingStats(IndexView[Any]):
+    """Vista de `BookingStatsData` mantenida con las escrituras de reservas."""
+
+    data_type = BookingStatsData
+    key_field = "reservation_id"
+
+
+def _scan(repo: Repository[Any]) -> Dict[str, Any]:
+    """Lee la colección desde el backend, sin pasar por la caché de entidades."""
+    entities = {}
+    for key, item in repo.backend.scan():
+        entity = repo._from_record(item)
+        if entity is not None:
+            entities[key] = entity
+    return entities
+
+
+def _compare(report: DriftReport, name: str, kept: Dict[str, Any], fresh: Dict[str, Any]) -> None:
+    """Agrega a `report` las claves de `name` cuyo valor difiere."""
+    for key in sorted(kept.keys() | fresh.keys()):
+        if kept.get(key) != fresh.get(key):
+            report.mismatches.append(
+                f"{name}[{key!r}]: maintained {kept.get(key)!r}, files {fresh.get(key)!r}"
+            )
+
+
+def _totals(hotels: HotelStatsData, bookings: BookingStatsData) -> Dict[str, int]:
+    """Contadores globales de las estadísticas, para compararlos."""
+    return {
+        "hotels": len(hotels.rooms),
+        "rooms_total": hotels.rooms_total,
+        "rooms_available": hotels.rooms_available,
+        "reservations": len(bookings.entries),
+        "active_reservations": bookings.active,
+    }
+
+
+class ReportingService:
+    """Reportes de ocupación y reservas sobre estadísticas materializadas.
+
+    Usa el `hotel_repo` del repositorio de reservas, de modo que las
+    escrituras hechas por cualquiera de los dos mantienen las estadísticas.
+    """
+
+    def __init__(self, reservation_repo: Any) -> None:
+        self.reservation_repo: Repository[Any] = reservation_repo
+        self.hotel_repo: Repository[Any] = reservation_repo.hotel_repo
+        self._hotels = self.hotel_repo._add_view(HotelStats(*self.hotel_repo.backend.paths()))
+        self._bookings = self.reservation_repo._add_view(
+            BookingStats(*self.reservation_repo.backend.paths())
+        )
+
+    def _hotel_stats(self) -> HotelStatsData:
+        return self.hotel_repo._view(self._hotels)
+
+    def _booking_stats(self) -> BookingStatsData:
+        return self.reservation_repo._view(self._bookings)
+
+    def hotel_occupancy(self, hotel_id: str) -> Optional[HotelOccupancy]:
+        """Ocupación de un hotel, o `None` si no existe."""
+        rooms = self._hotel_stats().rooms.get(hotel_id)
+        if rooms is None:
+            return None
+        active = self._booking_stats().active_by_hotel.get(hotel_id, 0)
+        return HotelOccupancy(hotel_id, rooms[0], rooms[1], active)
+
+    def occupancy_by_hotel(self) -> List[HotelOccupancy]:
+        """Ocupación de todos los hoteles, ordenada por `hotel_id`."""
+        active = self._booking_stats().active_by_hotel
+        return [
+            HotelOccupancy(hotel_id, total, available, active.get(hotel_id, 0))
+            for hotel_id, (total, available) in sorted(self._hotel_stats().rooms.items())
+        ]
+
+    def active_bookings(self, customer_id: str) -> int:
+        """Número de reservas activas de un cliente."""
+        return self._booking_stats().active_by_customer.get(customer_id, 0)
+
+    def active_bookings_by_customer(self) -> Dict[str, int]:
+        """Reservas activas por cliente (solo los que tienen alguna)."""
+        return dict(self._booking_stats().active_by_customer)
+
+    def chain_totals(self) -> ChainTotals:
+        """Totales de hoteles, habitaciones y reservas de la cadena."""
+        hotels = self._hotel_stats()
+        bookings = self._booking_stats()
+        return ChainTotals(
+            hotels=len(hotels.rooms),
+            rooms_total=hotels.rooms_total,
+            rooms_available=hotels.rooms_available,
+            reservations=len(bookings.entries),
+            active_reservations=bookings.active,
+        )
+
+    def rebuild(self) -> None:
+        """Descarta las estadísticas mantenidas y las recalcula desde los archivos."""
+        self._hotels.invalidate()
+        self._bookings.invalidate()
+        self._hotel_stats()
+        self._booking_stats()
+
+    def verify(self, repair: bool = False) -> DriftReport:
+        """Compara las estadísticas mantenidas con las recalculadas desde los archivos.
+
+        Toma los candados de ambas colecciones para comparar el mismo estado.
+        Con `repair=True`, si hay diferencias se reemplazan por las recalculadas.
+        """
+        report = DriftReport()
+        repos = (self.hotel_repo, self.reservation_repo)
+        with locked(p for repo in repos for p in repo.backend.paths()):
+            hotels, bookings = self._hotel_stats(), self._booking_stats()
+            signatures = (self._hotels.signature(), self._bookings.signature())
+            fresh_hotels = self._hotels.build(_scan(self.hotel_repo))
+            fresh_bookings = self._bookings.build(_scan(self.reservation_repo))
+
+            _compare(report, "rooms", hotels.rooms, fresh_hotels.rooms)
+            _compare(report, "active_by_hotel", bookings.active_by_hotel,
+                     fresh_bookings.active_by_hotel)
+            _compare(report, "active_by_customer", bookings.active_by_customer,
+                     fresh_bookings.active_by_customer)
+            _compare(report, "chain", _totals(hotels, bookings),
+                     _totals(fresh_hotels, fresh_bookings))
+
+            if repair and not report.ok:
+                self._hotels.store(fresh_hotels, signatures[0])
+                self._bookings.store(fresh_bookings, signatures[1])
+        return report
@@ -0,0 +1,678 @@
+"""Base común de los repositorios respaldados por un backend de almacenamiento."""
+
+from __future__ import annotations
+
+import json
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import MISSING, dataclass, field, fields, replace
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from src import metrics
+from src.ids import BloomFilter, IdAllocator
+from src.locking import locked
+from src.storage import (
+    Bounds,
+    FileCache,
+    JsonFileBackend,
+    RejectedRecord,
+    Signature,
+    StorageBackend,
+    read_file,
+    write_atomic,
+)
+
+
+T = TypeVar("T")
+V = TypeVar("V", bound="DerivedView[Any]")
+
+
+@dataclass
+class BulkResult(Generic[T]):
+    """Resultado de un elemento dentro de una operación masiva."""
+
+    key: str
+    entity: Optional[T] = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        """Indica si el elemento se aplicó correctamente."""
+        return self.error is None
+
+
+class ConflictError(ValueError):
+    """Otra escritura cambió la entidad desde que se leyó; se puede reintentar."""
+
+
+@dataclass
+class LoadReport:
+    """Resumen de la última carga completa de una colección.
+
+    `trusted` indica si se usó la vía rápida (archivo sellado por este
+    código, sin revalidar registros); `rejected` lista los registros
+    omitidos y el motivo.
+    """
+
+    trusted: bool
+    loaded: int = 0
+    rejected: List[RejectedRecord] = field(default_factory=list)
+
+
+# Tipos de campo que `_rejection_reason` sabe verificar.
+_FIELD_TYPES = {"str": str, "int": int, "bool": bool, "Optional[str]": str}
+
+
+class DerivedView(ABC, Generic[T]):
+    """Estructura en memoria derivada de una colección.
+
+    Se construye de forma perezosa en la primera consulta, se actualiza de
+    forma incremental con las escrituras del propio repositorio y se descarta
+    cuando los archivos del backend cambian por otra vía.
+    """
+
+    def __init__(self, *paths: Path) -> None:
+        self._cache = FileCache(*paths)
+
+    @abstractmethod
+    def build(self, entities: Dict[str, T]) -> Any:
+        """Construye el valor de la vista a partir de la colección completa."""
+
+    @abstractmethod
+    def update(self, value: Any, puts: List[T], deletes: List[str]) -> None:
+        """Aplica en sitio un lote ya persistido sobre el valor de la vista."""
+
+    def peek(self) -> Any:
+        """Devuelve el valor vigente o `None` si está frío o desactualizado."""
+        return self._cache.get()
+
+    def signature(self) -> Tuple[Optional[Signature], ...]:
+        """Estado actual de los archivos, a tomar antes de leerlos para `store`."""
+        return self._cache.signature()
+
+    def store(
+        self, value: Any, signature: Optional[Tuple[Optional[Signature], ...]] = None
+    ) -> None:
+        """Registra `value` como vigente para el estado de los archivos.
+
+        Con `signature` (tomada antes de leer) una escritura concurrente
+        durante la lectura deja el valor desactualizado en vez de vigente.
+        """
+        self._cache.put(value, signature)
+
+    def invalidate(self) -> None:
+        """Descarta el valor en memoria."""
+        self._cache.invalidate()
+
+    def restore(self, signature: Tuple[Optional[Signature], ...]) -> Any:
+        """Valor guardado en disco para el estado `signature`, o `None`.
+
+        Las vistas que se persisten lo redefinen junto con `persist`, que se
+        llama tras construir la vista y tras cada escritura que la actualiza.
+        """
+
+    def persist(self, value: Any, signature: Tuple[Optional[Signature], ...]) -> None:
+        """Guarda `value` como vigente para `signature`; por defecto no hace nada."""
+
+
+class EntityCache(DerivedView[T]):
+    """Diccionario de entidades por ID conservado entre llamadas.
+
+    Guarda copias de lo que se escribe, así que quien escribió la entidad
+    puede seguir modificándola sin alterar la caché.
+    """
+
+    def __init__(self, key_field: str, *paths: Path) -> None:
+        super().__init__(*paths)
+        self.key_field = key_field
+
+    def build(self, entities: Dict[str, T]) -> Dict[str, T]:
+        return entities
+
+    def update(self, value: Dict[str, T], puts: List[T], deletes: List[str]) -> None:
+        for entity in puts:
+            value[getattr(entity, self.key_field)] = replace(entity)
+        for key in deletes:
+            value.pop(key, None)
+
+
+class IndexView(DerivedView[T]):
+    """Vista cuyo valor indexa las entidades una por una.
+
+    `data_type` crea el valor vacío, que debe ofrecer `add(entity)` y
+    `remove(key)`; una entidad reescrita se quita y se vuelve a indexar.
+    """
+
+    data_type: Callable[[], Any]
+    key_field: str
+
+    def build(self, entities: Dict[str, T]) -> Any:
+        data = self.data_type()
+        for entity in entities.values():
+            data.add(entity)
+        return data
+
+    def update(self, value: Any, puts: List[T], deletes: List[str]) -> None:
+        for entity in puts:
+            value.remove(getattr(entity, self.key_field))
+            value.add(entity)
+        for key in deletes:
+            value.remove(key)
+
+
+def _stamp(signature: Tuple[Optional[Signature], ...]) -> List[Optional[List[int]]]:
+    """Firma de la colección tal como se guarda en JSON."""
+    return [list(s) if s is not None else None for s in signature]
+
+
+def key_filter_path(path: str | Path) -> Path:
+    """Archivo del filtro de claves que acompaña a la colección en `path`."""
+    return Path(path).with_suffix(".keys")
+
+
+@dataclass
+class KeyFilterData:
+    """Filtro de Bloom de las claves y cuántas admite antes de reconstruirse."""
+
+    bloom: BloomFilter
+    capacity: int
+    count: int = 0
+
+    @property
+    def full(self) -> bool:
+        """Indica si ya tiene más claves que su capacidad y pierde precisión."""
+        return self.count > self.capacity
+
+    def add(self, key: str) -> None:
+        """Agrega una clave."""
+        self.bloom.add(key)
+        self.count += 1
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.bloom
+
+
+class KeyFilter(DerivedView[T]):
+    """Vista con un filtro de Bloom de las claves, guardada junto a la colección.
+
+    Responde "seguro que no existe" sin leer la colección. Se dimensiona para
+    el doble de las claves que había al construirla y se reconstruye al
+    superar esa capacidad; las bajas no se quitan (solo agregan falsos
+    positivos, que se resuelven con el backend). Se guarda en `path` sellada
+    con la firma de los archivos, al construirla y tras cada escritura.
+    """
+
+    # Capacidad mínima, para que una colección chica no se reconstruya seguido.
+    MIN_CAPACITY = 1024
+
+    def __init__(self, path: Path, key_field: str, *paths: Path) -> None:
+        super().__init__(*paths)
+        self.path = path
+        self.key_field = key_field
+
+    def build(self, entities: Dict[str, T]) -> KeyFilterData:
+        capacity = max(self.MIN_CAPACITY, 2 * len(entities))
+        data = KeyFilterData(BloomFilter.for_capacity(capacity), capacity)
+        for key in entities:
+            data.add(key)
+        return data
+
+    def update(self, value: KeyFilterData, puts: List[T], deletes: List[str]) -> None:
+        for entity in puts:
+            value.add(getattr(entity, self.key_field))
+
+    def restore(self, signature: Tuple[Optional[Signature], ...]) -> Optional[KeyFilterData]:
+        """Carga el filtro guardado si fue sellado con `signature` y no está lleno."""
+        try:
+            payload = read_file(self.path)
+            if payload is None:
+                return None
+            header, _, bloom = payload.partition(b"\n")
+            meta = json.loads(header)
+            data = KeyFilterData(BloomFilter.from_bytes(bloom), meta["capacity"], meta["count"])
+            source = meta["source"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if source != _stamp(signature) or data.full:
+            return None
+        return data
+
+    def persist(self, value: KeyFilterData, signature: Tuple[Optional[Signature], ...]) -> None:
+        """Guarda el filtro sellado con `signature`; un fallo solo se reporta."""
+        meta = {"source": _stamp(signature), "capacity": value.capacity, "count": value.count}
+        payload = json.dumps(meta).encode("utf-8") + b"\n" + value.bloom.to_bytes()
+        try:
+            write_atomic(self.path, payload)
+        except OSError as exc:
+            print(f"[repository] Error writing '{self.path}': {exc}")
+
+
+# Valores de las vistas capturados antes de una escritura.
+ViewState = List[Tuple[DerivedView[Any], Any]]
+
+
+# Base abstracta: la API pública la definen las subclases sobre estos helpers.
+class Repository(Generic[T]):  # pylint: disable=too-few-public-methods
+    """Acceso por clave a entidades persistidas en un backend intercambiable.
+
+    Las subclases definen `key_field`, `entity_type`, `record_schema`,
+    `id_prefix` y `_from_record`; el backend por defecto es el archivo JSON
+    original en `path`, sellado con `record_schema` para permitir la carga
+    confiable.
+
+    Las escrituras toman el candado de los archivos del backend (ver
+    `src.locking`), así que son seguras entre hilos y procesos; las lecturas
+    no lo toman porque los archivos se reemplazan de forma atómica. Con
+    `version_field` cada escritura completa verifica que la entidad no
+    cambió desde que se leyó y avanza su versión.
+    """
+
+    key_field = ""
+    # Prefijo de los IDs asignados por el repositorio (ver `src.ids`).
+    id_prefix = ""
+    entity_type: Callable[..., T]
+    # Identificador y versión del formato de registro; cambiarlo invalida los sellos.
+    record_schema: Optional[str] = None
+    # Campo entero con la versión de la entidad para el control optimista de
+    # concurrencia (ver `_check_versions`); `None` lo desactiva.
+    version_field: Optional[str] = None
+    _field_names: Optional[Tuple[str, ...]] = None
+
+    def __init__(
+        self,
+        path: Path,
+        cache: bool = False,
+        backend: Optional[StorageBackend] = None,
+    ) -> None:
+        """Inicializa el repositorio con la ruta y el backend de almacenamiento.
+
+        Con `cache=True` el diccionario de entidades se conserva en memoria y
+        solo se reconstruye cuando cambian los archivos del backend; sin ella
+        el backend por defecto tampoco conserva los registros que parsea
+        más allá de cada operación.
+        """
+        self.path = path
+        self._views: List[DerivedView[T]] = []
+        self._cache: Optional[EntityCache[T]] = None
+        self._keys: Optional[KeyFilter[T]] = None
+        if backend is None:
+            backend = JsonFileBackend(
+                path, self.key_field, schema=self.record_schema, cache=cache
+            )
+            self._keys = self._add_view(
+                KeyFilter(key_filter_path(path), self.key_field, *backend.paths())
+            )
+        self.backend: StorageBackend = backend
+        self.load_report: Optional[LoadReport] = None
+        self.ids = IdAllocator(self.id_prefix)
+        if cache:
+            self._cache = self._add_view(EntityCache(self.key_field, *backend.paths()))
+
+    def _add_view(self, view: V) -> V:
+        """Registra una vista derivada que se mantendrá con cada escritura."""
+        self._views.append(view)
+        return view
+
+    def _view(self, view: DerivedView[T]) -> Any:
+        """Devuelve el valor vigente de `view`, construyéndolo si hace falta."""
+        value = view.peek()
+        if value is None:
+            signature = view.signature()
+            value = view.restore(signature)
+            if value is None:
+                value = view.build(self._load())
+                view.persist(value, signature)
+            view.store(value, signature)
+        return value
+
+    def _from_record(self, item: Dict[str, Any]) -> Optional[T]:
+        """Construye la entidad a partir de un registro o `None` si es inválido."""
+        raise NotImplementedError
+
+    def _from_trusted_record(self, item: Dict[str, Any]) -> T:
+        """Construye la entidad sin validar; solo para registros sellados."""
+        return self.entity_type(**item)
+
+    def _rejection_reason(self, item: Dict[str, Any]) -> str:
+        """Explica por qué `_from_record` rechazó un registro."""
+        for f in fields(self.entity_type):
+            if f.name not in item:
+                if f.default is MISSING:
+                    return f"missing field '{f.name}'"
+                continue
+            expected = _FIELD_TYPES.get(str(f.type))
+            value = item[f.name]
+            if expected is None or (value is None and f.default is None):
+                continue
+            if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+                return f"field '{f.name}' must be {f.type}"
+        return "invalid field values"
+
+    def _to_record(self, entity: T) -> Dict[str, Any]:
+        """Serializa la entidad a un registro JSON.
+
+        Equivale a `asdict` para entidades planas, sin su copia recursiva.
+        """
+        names = self._field_names
+        if names is None:
+            names = tuple(f.name for f in fields(entity))
+            type(self)._field_names = names
+        return {name: getattr(entity, name) for name in names}
+
+    def _key(self, entity: T) -> str:
+        return getattr(entity, self.key_field)
+
+    def _load(self) -> Dict[str, T]:
+        """Carga todas las entidades válidas y devuelve un diccionario por ID."""
+        if self._cache is not None:
+            cached = self._cache.peek()
+            if cached is not None:
+                return cached
+
+        name = type(self).__name__
+        metrics.inc("calls_total", op="load", repo=name)
+        trusted = self.backend.trusted()
+        if trusted:
+            from_record = metrics.timed(self._from_trusted_record, "repository.build", repo=name)
+        else:
+            from_record = metrics.timed(self._from_record, "repository.validate", repo=name)
+
+        signature = self._cache.signature() if self._cache is not None else None
+        entities: Dict[str, T] = {}
+        rejected: List[RejectedRecord] = []
+        with metrics.timer("repository.load", repo=name):
+            for key, item in self.backend.scan():
+                entity = from_record(item)
+                if entity is not None:
+                    entities[key] = entity
+                else:
+                    rejected.append(RejectedRecord(self._rejection_reason(item), item, key=key))
+
+        rejected = self.backend.rejected() + rejected
+        self.load_report = LoadReport(trusted, len(entities), rejected)
+        if rejected:
+            metrics.inc("rejected_records_total", len(rejected), repo=name)
+        elif not trusted:
+            self.backend.mark_valid()
+
+        if self._cache is not None:
+            self._cache.store(entities, signature)
+        return entities
+
+    def _iter(self) -> Iterator[T]:
+        """Recorre las entidades válidas sin materializar la colección.
+
+        Con la caché activa y vigente se recorren copias de la caché; si no,
+        se leen los registros del backend uno a uno.
+        """
+        if self._cache is not None:
+            cached = self._cache.peek()
+            if cached is not None:
+                yield from (replace(e) for e in list(cached.values()))
+                return
+
+        for _, item in self.backend.scan():
+            entity = self._from_record(item)
+            if entity is not None:
+                yield entity
+
+    def _page(self, after_id: Optional[str], limit: int) -> List[T]:
+        """Devuelve hasta `limit` entidades posteriores a `after_id`.
+
+        Para pedir la página siguiente se pasa el ID de la última entidad
+        recibida; una página más corta que `limit` indica el final.
+        """
+        if limit <= 0:
+            raise ValueError("limit must be greater than 0")
+
+        entities: List[T] = []
+        cursor = after_id
+        while len(entities) < limit:
+            batch = self.backend.page(cursor, limit - len(entities))
+            if not batch:
+                break
+            for _, item in batch:
+                entity = self._from_record(item)
+                if entity is not None:
+                    entities.append(entity)
+            cursor = batch[-1][0]
+        return entities
+
+    def _list(self) -> List[T]:
+        """Lista las entidades válidas; con caché, copias que se pueden modificar."""
+        entities = self._load().values()
+        if self._cache is not None:
+            return [replace(e) for e in entities]
+        return list(entities)
+
+    def _get(self, key: str) -> Optional[T]:
+        """Obtiene una entidad por ID sin cargar la colección completa.
+
+        Con caché se devuelve una copia: modificarla no altera la caché.
+        """
+        if self._cache is not None:
+            entity = self._load().get(key)
+            return replace(entity) if entity is not None else None
+
+        item = self.backend.get(key)
+        return self._from_record(item) if item is not None else None
+
+    def _exists(self, key: str) -> bool:
+        """Indica si existe una entidad con ese ID sin construirla.
+
+        Con el backend JSON por defecto, el filtro de claves guardado junto
+        al archivo descarta sin leerlo los IDs que no existen.
+        """
+        if self._cache is not None:
+            cached = self._cache.peek()
+            if cached is not None:
+                return key in cached
+        if self._keys is not None:
+            keys: KeyFilterData = self._view(self._keys)
+            if keys.full:
+                self._keys.invalidate()
+                keys = self._view(self._keys)
+            if key not in keys:
+                return False
+        return self.backend.exists(key)
+
+    def _resolve_id(self, key: Optional[str]) -> Optional[str]:
+        """Devuelve `key` o, si se omitió (`None`), un ID nuevo ordenado por tiempo."""
+        return self.ids.new_id() if key is None else key
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Candado de los archivos del backend, entre hilos y procesos.
+
+        Mientras se tiene, el backend conserva lo que parsea (`hold`), así
+        que las verificaciones y la escritura de un lote leen el archivo
+        una sola vez.
+        """
+        with locked(self.backend.paths()), self.backend.hold():
+            yield
+
+    def _check_versions(self, records: Dict[str, Dict[str, Any]]) -> None:
+        """Verifica y avanza la versión de los registros a escribir.
+
+        Se llama con `_locked()` tomado. Cada registro lleva la versión con
+        que se leyó su entidad (0 si es nueva); si la almacenada es otra,
+        alguien la cambió entretanto y se lanza `ConflictError`. Si no, el
+        registro se escribirá con la versión siguiente.
+        """
+        field_name = self.version_field
+        if field_name is None:
+            return
+        for key, record in records.items():
+            stored = self.backend.get(key)
+            current = stored.get(field_name, 0) if stored is not None else 0
+            if record.get(field_name, 0) != current:
+                metrics.inc("conflicts_total", repo=type(self).__name__)
+                raise ConflictError(f"concurrent update conflict on '{key}'")
+            record[field_name] = current + 1
+
+    def _check_new(self, keys: Iterable[str]) -> None:
+        """Verifica que las entidades que se van a crear sigan sin existir.
+
+        Se llama con `_locked()` tomado. Sin `version_field` es la única forma
+        de notar que otro hilo o proceso creó la misma clave entretanto; se
+        lanza `ConflictError` para que la operación se reintente y lo vea.
+        """
+        for key in keys:
+            if self.backend.exists(key):
+                metrics.inc("conflicts_total", repo=type(self).__name__)
+                raise ConflictError(f"concurrent create conflict on '{key}'")
+
+    def _advance_versions(self, puts: Iterable[T], records: Dict[str, Dict[str, Any]]) -> None:
+        """Copia a las entidades la versión con que se escribieron sus registros."""
+        field_name = self.version_field
+        if field_name is not None:
+            for entity in puts:
+                setattr(entity, field_name, records[self._key(entity)][field_name])
+
+    def _capture_views(self) -> ViewState:
+        """Captura el valor vigente de cada vista antes de escribir."""
+        return [(view, view.peek()) for view in self._views]
+
+    def _invalidate_views(self) -> None:
+        """Descarta todas las vistas tras una escritura fallida."""
+        for view in self._views:
+            view.invalidate()
+
+    def _update_views(
+        self, before: ViewState, puts: Iterable[T], deletes: Iterable[str]
+    ) -> None:
+        """Aplica a las vistas un lote ya persistido.
+
+        Se llama con los candados del backend tomados, así que las vistas
+        persistidas se guardan selladas con los archivos recién escritos.
+        Las vistas que estaban frías o desactualizadas antes de escribir se
+        descartan y se reconstruirán en la siguiente consulta.
+        """
+        puts = list(puts)
+        deletes = list(deletes)
+        for view, value in before:
+            if value is None:
+                view.invalidate()
+            else:
+                view.update(value, puts, deletes)
+                view.store(value)
+                view.persist(value, view.signature())
+
+    def _apply(self, puts: Iterable[T] = (), deletes: Iterable[str] = ()) -> None:
+        """Persiste un lote de altas/cambios y bajas manteniendo las vistas."""
+        puts = list(puts)
+        deletes = list(deletes)
+        if not puts and not deletes:
+            return
+        name = type(self).__name__
+        metrics.inc("calls_total", op="apply", repo=name)
+        with metrics.timer("repository.serialize", repo=name):
+            records = {self._key(e): self._to_record(e) for e in puts}
+
+        with self._locked():
+            self._check_versions(records)
+            before = self._capture_views()
+            try:
+                with metrics.timer("repository.apply", repo=name):
+                    self.backend.apply(records, deletes)
+            except BaseException:
+                self._invalidate_views()
+                raise
+
+            self._advance_versions(puts, records)
+            self._update_views(before, puts, deletes)
+
+    def _put(self, entity: T) -> None:
+        """Inserta o reemplaza una entidad."""
+        self._apply(puts=(entity,))
+
+    def _delete(self, key: str) -> None:
+        """Elimina una entidad por ID."""
+        self._apply(deletes=(key,))
+
+    def _create(self, entity: T) -> T:
+        """Inserta una entidad nueva; `ValueError` si su ID ya existe."""
+        if self._exists(self._key(entity)):
+            raise ValueError(f"{self.key_field} already exists")
+        self._put(entity)
+        return entity
+
+    def _create_bulk(
+        self,
+        items: Iterable[Mapping[str, Any]],
+        build: Callable[[Optional[str], Mapping[str, Any]], T],
+    ) -> List[BulkResult[T]]:
+        """Crea varias entidades con una sola escritura.
+
+        `build(key, item)` valida cada elemento y construye su entidad; sin
+        ID en el elemento se asigna uno. Los elementos inválidos o duplicados
+        se reportan en su resultado sin detener el lote.
+        """
+        results: List[BulkResult[T]] = []
+        created: Dict[str, T] = {}
+
+        for item in items:
+            key = self._resolve_id(item.get(self.key_field))
+            result: BulkResult[T] = BulkResult(key=str(key))
+            try:
+                entity = build(key, item)
+                if self._key(entity) in created or self._exists(self._key(entity)):
+                    raise ValueError(f"{self.key_field} already exists")
+                created[self._key(entity)] = entity
+                result.entity = entity
+            except (KeyError, ValueError) as exc:
+                result.error = exc
+            results.append(result)
+
+        self._apply(puts=created.values())
+        return results
+
+    def _adjust(
+        self,
+        key: str,
+        field_name: str,
+        delta: int,
+        minimum: Optional[int] = None,
+        maximum_field: Optional[str] = None,
+    ) -> Optional[T]:
+        """Suma `delta` a un campo entero respetando los límites indicados.
+
+        Devuelve la entidad actualizada o `None` si se violaría un límite;
+        lanza `KeyError` si la entidad no existe.
+        """
+        metrics.inc("calls_total", op="adjust", repo=type(self).__name__)
+
+        with self._locked():
+            before = self._capture_views()
+            try:
+                record = self.backend.adjust(
+                    key, field_name, delta, Bounds(minimum, maximum_field), self.version_field
+                )
+            except KeyError:
+                raise KeyError(f"{self.key_field} not found") from None
+            except BaseException:
+                self._invalidate_views()
+                raise
+
+            if record is None:
+                return None
+
+            entity = self._from_record(record)
+            if entity is None:
+                self._update_views(before, (), (key,))
+            else:
+                self._update_views(before, (entity,), ())
+            return entity
@@ -2,82 +2,211 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass, asdict
+from contextlib import contextmanager
+import sys
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Optional
-
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from src import metrics
+from src.archive import ColdArchive, archive_path
+from src.availability import DAY_SPAN, AvailabilityData, AvailabilityIndex, parse_range
+from src.columnar import ColumnarView, ReservationColumns
 from src.customer import CustomerRepository
 from src.hotel import HotelRepository
-from src.storage import load_json, save_json
+from src.repository import BulkResult, ConflictError, IndexView, Repository
+from src.storage import Bounds, StorageBackend
+from src.unit_of_work import UnitOfWork
 
 
 DATA_PATH = Path("data/reservations.json")
 
+# Intentos de una transacción ante conflictos de versión con otros procesos.
+CONFLICT_RETRIES = 5
+
+R = TypeVar("R")
 
-@dataclass
+
+@dataclass(slots=True)
 class Reservation:
-    """Entidad de reserva entre cliente y hotel."""
+    """Entidad de reserva entre cliente y hotel.
+
+    Las fechas son opcionales (texto ISO, salida exclusiva); una reserva sin
+    fechas ocupa su habitación hasta que se cancela. `canceled_on` es el día
+    de la cancelación y determina cuándo se archiva.
+    """
 
     reservation_id: str
     customer_id: str
     hotel_id: str
     active: bool = True
-
-
-class ReservationRepository:
+    check_in: Optional[str] = None
+    check_out: Optional[str] = None
+    canceled_on: Optional[str] = None
+
+
+class ReservationIndexData:
+    """Contenido de `ReservationIndex`."""
+
+    def __init__(self) -> None:
+        self.entries: Dict[str, Tuple[str, str, bool]] = {}
+        self.by_customer: Dict[str, Dict[str, None]] = {}
+        self.by_hotel: Dict[str, Dict[str, None]] = {}
+        self.active_by_hotel: Dict[str, Dict[str, None]] = {}
+
+    def add(self, reservation: Reservation) -> None:
+        """Indexa una reserva."""
+        rid = reservation.reservation_id
+        self.entries[rid] = (reservation.customer_id, reservation.hotel_id, reservation.active)
+        self.by_customer.setdefault(reservation.customer_id, {})[rid] = None
+        self.by_hotel.setdefault(reservation.hotel_id, {})[rid] = None
+        if reservation.active:
+            self.active_by_hotel.setdefault(reservation.hotel_id, {})[rid] = None
+
+    def remove(self, reservation_id: str) -> None:
+        """Quita una reserva de todos los índices si estaba indexada."""
+        entry = self.entries.pop(reservation_id, None)
+        if entry is None:
+            return
+        customer_id, hotel_id, _ = entry
+        for index, value in (
+            (self.by_customer, customer_id),
+            (self.by_hotel, hotel_id),
+            (self.active_by_hotel, hotel_id),
+        ):
+            bucket = index.get(value)
+            if bucket is not None:
+                bucket.pop(reservation_id, None)
+                if not bucket:
+                    del index[value]
+
+
+class ReservationIndex(IndexView[Reservation]):
+    """Índices secundarios de reservas por cliente, por hotel y activas por hotel.
+
+    El valor de la vista es un `ReservationIndexData`; las reservas se
+    guardan como claves en diccionarios para conservar el orden de alta.
+    """
+
+    data_type = ReservationIndexData
+    key_field = "reservation_id"
+
+
+class ReservationRepository(Repository[Reservation]):
     """Gestiona la persistencia y ciclo de vida de reservas."""
 
+    key_field = "reservation_id"
+    entity_type = Reservation
+    record_schema = "reservation/2"
+    id_prefix = "R"
+
     def __init__(
         self,
         path: Path = DATA_PATH,
         customer_repo: Optional[CustomerRepository] = None,
         hotel_repo: Optional[HotelRepository] = None,
+        cache: bool = False,
+        backend: Optional[StorageBackend] = None,
     ) -> None:
-        self.path = path
-        self.customer_repo = customer_repo or CustomerRepository()
-        self.hotel_repo = hotel_repo or HotelRepository()
-
-    def _load(self) -> Dict[str, Reservation]:
-        raw = load_json(self.path, default=[])
-        reservations: Dict[str, Reservation] = {}
-
-        if not isinstance(raw, list):
-            print(f"[reservation] Invalid data format in '{self.path}'")
-            return reservations
-
-        for item in raw:
-            if not isinstance(item, dict):
-                continue
-
-            rid = item.get("reservation_id")
-            cid = item.get("customer_id")
-            hid = item.get("hotel_id")
-            active = item.get("active", True)
-
-            if (
-                isinstance(rid, str)
-                and isinstance(cid, str)
-                and isinstance(hid, str)
-                and isinstance(active, bool)
-            ):
-                reservations[rid] = Reservation(
-                    reservation_id=rid,
-                    customer_id=cid,
-                    hotel_id=hid,
-                    active=active,
-                )
-
-        return reservations
-
-    def _save(self, reservations: Dict[str, Reservation]) -> None:
-        payload = [asdict(r) for r in reservations.values()]
-        save_json(self.path, payload)
+        super().__init__(path, cache=cache, backend=backend)
+        self.archive = ColdArchive(archive_path(path), self.key_field)
+        self._index = self._add_view(ReservationIndex(*self.backend.paths()))
+        self._availability = self._add_view(AvailabilityIndex(*self.backend.paths()))
+        self._columns = self._add_view(
+            ColumnarView(partial(ReservationColumns, Reservation), *self.backend.paths())
+        )
+        self.customer_repo = customer_repo or CustomerRepository(cache=cache)
+        self.hotel_repo = hotel_repo or HotelRepository(cache=cache)
+        self.hotel_repo.attach_availability(self._occupancy)
+
+    def _from_record(self, item: Dict[str, Any]) -> Optional[Reservation]:
+        rid = item.get("reservation_id")
+        cid = item.get("customer_id")
+        hid = item.get("hotel_id")
+        active = item.get("active", True)
+        check_in = item.get("check_in")
+        check_out = item.get("check_out")
+        canceled_on = item.get("canceled_on")
+
+        if (check_in is None) != (check_out is None):
+            return None
+        if canceled_on is not None and not isinstance(canceled_on, str):
+            return None
+        if check_in is not None:
+            try:
+                parse_range(check_in, check_out)
+            except ValueError:
+                return None
+
+        if (
+            isinstance(rid, str)
+            and isinstance(cid, str)
+            and isinstance(hid, str)
+            and isinstance(active, bool)
+        ):
+            # Customer/hotel IDs and dates repeat across reservations;
+            # interning keeps a single string object per distinct value.
+            return Reservation(
+                reservation_id=rid,
+                customer_id=sys.intern(cid),
+                hotel_id=sys.intern(hid),
+                active=active,
+                check_in=sys.intern(check_in) if check_in is not None else None,
+                check_out=sys.intern(check_out) if check_out is not None else None,
+                canceled_on=sys.intern(canceled_on) if canceled_on is not None else None,
+            )
+        return None
+
+    def _from_trusted_record(self, item: Dict[str, Any]) -> Reservation:
+        check_in = item.get("check_in")
+        check_out = item.get("check_out")
+        canceled_on = item.get("canceled_on")
+        return Reservation(
+            reservation_id=item["reservation_id"],
+            customer_id=sys.intern(item["customer_id"]),
+            hotel_id=sys.intern(item["hotel_id"]),
+            active=item["active"],
+            check_in=sys.intern(check_in) if check_in is not None else None,
+            check_out=sys.intern(check_out) if check_out is not None else None,
+            canceled_on=sys.intern(canceled_on) if canceled_on is not None else None,
+        )
 
-    def create_reservation(
-        self, reservation_id: str, customer_id: str, hotel_id: str
+    def _to_record(self, entity: Reservation) -> Dict[str, Any]:
+        """Serializa la reserva omitiendo las fechas que no tiene."""
+        record = super()._to_record(entity)
+        if entity.check_in is None:
+            del record["check_in"]
+            del record["check_out"]
+        if entity.canceled_on is None:
+            del record["canceled_on"]
+        return record
+
+    def _occupancy(self) -> AvailabilityData:
+        """Devuelve los árboles de ocupación vigentes."""
+        return self._view(self._availability)
+
+    @staticmethod
+    def _new_reservation(
+        reservation_id: str,
+        customer_id: str,
+        hotel_id: str,
+        check_in: Any = None,
+        check_out: Any = None,
     ) -> Reservation:
-        """Crea una reserva válida y descuenta una habitación disponible."""
-
+        """Valida los campos obligatorios y construye la reserva activa."""
         reservation_id = (reservation_id or "").strip()
         customer_id = (customer_id or "").strip()
         hotel_id = (hotel_id or "").strip()
@@ -89,57 +218,315 @@ class ReservationRepository:
         if not hotel_id:
             raise ValueError("hotel_id must not be empty")
 
-        reservations = self._load()
-        if reservation_id in reservations:
+        if check_in is None and check_out is None:
+            return Reservation(
+                reservation_id=reservation_id,
+                customer_id=customer_id,
+                hotel_id=hotel_id,
+                active=True,
+            )
+
+        start, end = parse_range(check_in, check_out)
+        return Reservation(
+            reservation_id=reservation_id,
+            customer_id=customer_id,
+            hotel_id=hotel_id,
+            active=True,
+            check_in=date.fromordinal(start).isoformat(),
+            check_out=date.fromordinal(end).isoformat(),
+        )
+
+    @contextmanager
+    def _transaction(self, *repos: Repository[Any]) -> Iterator[UnitOfWork]:
+        """Abre una `UnitOfWork` y descarta la vista de ocupación si falla.
+
+        Las reservas con fechas se cuentan en la vista al validarlas, para
+        que las siguientes del mismo lote las vean antes de confirmar.
+        """
+        try:
+            with UnitOfWork(self, *repos) as uow:
+                yield uow
+        except BaseException:
+            self._availability.invalidate()
+            raise
+
+    def _retrying(self, keys: Iterable[Any], operation: Callable[[], R]) -> R:
+        """Ejecuta `operation` con los candados de esas claves y reintenta conflictos.
+
+        `keys` reúne los hoteles y las reservas que toca la operación. Las
+        franjas de `hotel_repo.locks` ordenan las transacciones de este
+        proceso sobre un mismo hotel o un mismo `reservation_id`, así que un
+        `ConflictError` solo llega de otro proceso (u otra instancia del
+        repositorio); se reintenta con los datos releídos hasta
+        `CONFLICT_RETRIES` veces.
+        """
+        keys = [k for k in keys if isinstance(k, str)]
+        with self.hotel_repo.locks.hold(keys):
+            for _ in range(CONFLICT_RETRIES - 1):
+                try:
+                    return operation()
+                except ConflictError:
+                    metrics.inc("conflict_retries_total", repo=type(self).__name__)
+            return operation()
+
+    def _book(self, uow: UnitOfWork, reservation: Reservation) -> None:
+        """Verifica referencias y registra la reserva y su habitación en `uow`."""
+        if (
+            uow.get(self, reservation.reservation_id) is not None
+            or reservation.reservation_id in self.archive
+        ):
             raise ValueError("reservation_id already exists")
 
-        if self.customer_repo.get_customer(customer_id) is None:
+        if uow.get(self.customer_repo, reservation.customer_id) is None:
             raise KeyError("customer_id not found")
 
-        if self.hotel_repo.get_hotel(hotel_id) is None:
+        hotel = uow.get(self.hotel_repo, reservation.hotel_id)
+        if hotel is None:
             raise KeyError("hotel_id not found")
 
-        # Will raise if no rooms available
-        self.hotel_repo.reserve_room(hotel_id)
+        occupancy = self._occupancy()
+
+        if reservation.check_in is None:
+            # An undated booking holds a room indefinitely, so it must also
+            # leave room for every dated booking from today on.
+            today = date.today().toordinal()
+            future = occupancy.max_occupancy(reservation.hotel_id, today, DAY_SPAN)
+            if hotel.rooms_available - 1 < future:
+                raise ValueError("no rooms available")
+            adjusted = uow.adjust(
+                self.hotel_repo, reservation.hotel_id, "rooms_available", -1, Bounds(minimum=0)
+            )
+            if adjusted is None:
+                raise ValueError("no rooms available")
+        else:
+            start, end = parse_range(reservation.check_in, reservation.check_out)
+            occupied = occupancy.max_occupancy(reservation.hotel_id, start, end)
+            if occupied >= hotel.rooms_available:
+                raise ValueError("no rooms available")
+            occupancy.add(reservation)
+            # Avanzar la versión del hotel hace que dos reservas con fechas
+            # decididas a la vez (en otro proceso) choquen al confirmar.
+            uow.put(self.hotel_repo, hotel)
+
+        uow.put(self, reservation)
+
+    def _cancel(self, uow: UnitOfWork, reservation_id: str) -> Reservation:
+        """Marca la reserva como cancelada y libera su habitación en `uow`."""
+        reservation = uow.get(self, reservation_id)
+
+        if reservation is None:
+            if reservation_id in self.archive:
+                raise ValueError("reservation already canceled")
+            raise KeyError("reservation_id not found")
 
-        reservation = Reservation(
-            reservation_id=reservation_id,
-            customer_id=customer_id,
-            hotel_id=hotel_id,
-            active=True,
+        if not reservation.active:
+            raise ValueError("reservation already canceled")
+
+        if reservation.check_in is None:
+            # Release room back
+            released = uow.adjust(
+                self.hotel_repo,
+                reservation.hotel_id,
+                "rooms_available",
+                1,
+                Bounds(maximum_field="rooms_total"),
+            )
+            if released is None:
+                raise ValueError("all rooms already available")
+
+        reservation.active = False
+        reservation.canceled_on = date.today().isoformat()
+        uow.put(self, reservation)
+        return reservation
+
+    def create_reservation(
+        self,
+        reservation_id: Optional[str],
+        customer_id: str,
+        hotel_id: str,
+        check_in: Any = None,
+        check_out: Any = None,
+    ) -> Reservation:
+        """Crea una reserva válida y descuenta una habitación disponible.
+
+        Con `check_in`/`check_out` (fechas o texto ISO) la habitación solo se
+        ocupa en ese rango y la disponibilidad se verifica en O(log D). Con
+        `reservation_id=None` el repositorio asigna un ID ordenado por tiempo.
+        """
+
+        reservation = self._new_reservation(
+            self._resolve_id(reservation_id), customer_id, hotel_id, check_in, check_out
         )
-        reservations[reservation_id] = reservation
-        self._save(reservations)
+
+        def book() -> None:
+            with self._transaction(self.customer_repo, self.hotel_repo) as uow:
+                self._book(uow, reservation)
+
+        self._retrying([reservation.hotel_id, reservation.reservation_id], book)
         return reservation
 
+    def create_reservations_bulk(
+        self, items: Iterable[Mapping[str, Any]]
+    ) -> List[BulkResult[Reservation]]:
+        """Crea varias reservas con una sola escritura por archivo.
+
+        Cada elemento usa las claves de `create_reservation`; sin
+        `reservation_id` se asigna uno. Los descuentos
+        de habitaciones se acumulan por hotel, de modo que cada hotel se
+        actualiza una sola vez. Los elementos inválidos se reportan en su
+        resultado sin detener el lote.
+        """
+        batch = [(self._resolve_id(item.get("reservation_id")), item) for item in items]
+
+        def book() -> List[BulkResult[Reservation]]:
+            results: List[BulkResult[Reservation]] = []
+            with self._transaction(self.customer_repo, self.hotel_repo) as uow:
+                for reservation_id, item in batch:
+                    result: BulkResult[Reservation] = BulkResult(key=str(reservation_id))
+                    try:
+                        reservation = self._new_reservation(
+                            reservation_id,
+                            item.get("customer_id"),
+                            item.get("hotel_id"),
+                            item.get("check_in"),
+                            item.get("check_out"),
+                        )
+                        self._book(uow, reservation)
+                        result.entity = reservation
+                    except (KeyError, ValueError) as exc:
+                        result.error = exc
+                    results.append(result)
+            return results
+
+        keys = [item.get("hotel_id") for _, item in batch] + [rid for rid, _ in batch]
+        return self._retrying(keys, book)
+
     def get_reservation(self, reservation_id: str) -> Optional[Reservation]:
-        """Obtiene una reserva por identificador o `None` si no existe."""
+        """Obtiene una reserva por identificador o `None` si no existe.
 
-        reservations = self._load()
-        return reservations.get(reservation_id)
+        Si no está en la colección se busca en el archivo de canceladas.
+        """
+
+        reservation = self._get(reservation_id)
+        if reservation is None:
+            item = self.archive.get(reservation_id)
+            if item is not None:
+                reservation = self._from_record(item)
+        return reservation
 
     def cancel_reservation(self, reservation_id: str) -> None:
         """Cancela una reserva activa y libera la habitación asociada."""
 
-        reservations = self._load()
+        def cancel() -> None:
+            with self._transaction(self.hotel_repo) as uow:
+                self._cancel(uow, reservation_id)
+
+        self._retrying([reservation_id], cancel)
+
+    def cancel_reservations_bulk(
+        self, reservation_ids: Iterable[str]
+    ) -> List[BulkResult[Reservation]]:
+        """Cancela varias reservas con una sola escritura por archivo.
+
+        Las liberaciones de habitaciones se acumulan por hotel. Los
+        identificadores inválidos se reportan en su resultado sin detener el lote.
+        """
+        reservation_ids = list(reservation_ids)
+
+        def cancel() -> List[BulkResult[Reservation]]:
+            results: List[BulkResult[Reservation]] = []
+            with self._transaction(self.hotel_repo) as uow:
+                for reservation_id in reservation_ids:
+                    result: BulkResult[Reservation] = BulkResult(key=reservation_id)
+                    try:
+                        result.entity = self._cancel(uow, reservation_id)
+                    except (KeyError, ValueError) as exc:
+                        result.error = exc
+                    results.append(result)
+            return results
+
+        return self._retrying(reservation_ids, cancel)
+
+    def archive_reservations(
+        self, retention_days: int = 30, today: Optional[date] = None
+    ) -> int:
+        """Mueve al archivo las reservas canceladas hace más de `retention_days` días.
+
+        La antigüedad se cuenta desde `canceled_on`, o desde `check_out` en las
+        reservas canceladas antes de que se registrara esa fecha; las que no
+        tienen ninguna de las dos se archivan sin esperar. El segmento nuevo y
+        la colección sin esas reservas se confirman juntos. Devuelve cuántas
+        reservas se movieron.
+        """
+        if retention_days < 0:
+            raise ValueError("retention_days must not be negative")
+        today = today or date.today()
+        cutoff = (today - timedelta(days=retention_days)).isoformat()
+
+        expired = {
+            r.reservation_id: self._to_record(r)
+            for r in self._iter()
+            if not r.active and (r.canceled_on or r.check_out or "") <= cutoff
+        }
+        if not expired:
+            return 0
+
+        with self._transaction() as uow:
+            for reservation_id in expired:
+                uow.delete(self, reservation_id)
+            uow.include(*self.archive.stage(expired, today.isoformat()))
+        return len(expired)
+
+    def columns(self) -> ReservationColumns:
+        """Reservas en columnas compactas (ver `src.columnar`).
+
+        Se construyen en la primera llamada y se mantienen con cada escritura
+        del repositorio; el valor devuelto no debe modificarse.
+        """
+        return self._view(self._columns)
 
-        if reservation_id not in reservations:
-            raise KeyError("reservation_id not found")
+    def list_reservations(self) -> List[Reservation]:
+        """Lista todas las reservas almacenadas."""
 
-        reservation = reservations[reservation_id]
+        return self._list()
 
-        if not reservation.active:
-            raise ValueError("reservation already canceled")
+    def iter_reservations(self) -> Iterator[Reservation]:
+        """Recorre las reservas almacenadas sin cargarlas todas en memoria."""
 
-        reservation.active = False
-        reservations[reservation_id] = reservation
-        self._save(reservations)
+        return self._iter()
 
-        # Release room back
-        self.hotel_repo.release_room(reservation.hotel_id)
+    def page_reservations(
+        self, after_id: Optional[str] = None, limit: int = 100
+    ) -> List[Reservation]:
+        """Devuelve la página de reservas que sigue a `after_id`."""
 
-    def list_reservations(self) -> List[Reservation]:
-        """Lista todas las reservas almacenadas."""
+        return self._page(after_id, limit)
+
+    def _resolve(self, reservation_ids: Iterable[str]) -> List[Reservation]:
+        """Obtiene las reservas indicadas por un índice."""
+        found = (self._get(rid) for rid in list(reservation_ids))
+        return [r for r in found if r is not None]
+
+    def find_by_customer(self, customer_id: str) -> List[Reservation]:
+        """Lista las reservas de un cliente en orden de alta."""
+
+        index: ReservationIndexData = self._view(self._index)
+        return self._resolve(index.by_customer.get(customer_id, ()))
+
+    def find_by_hotel(self, hotel_id: str) -> List[Reservation]:
+        """Lista las reservas de un hotel en orden de alta."""
+
+        index: ReservationIndexData = self._view(self._index)
+        return self._resolve(index.by_hotel.get(hotel_id, ()))
+
+    def active_for_hotel(self, hotel_id: str) -> List[Reservation]:
+        """Lista las reservas activas de un hotel."""
+
+        index: ReservationIndexData = self._view(self._index)
+        return self._resolve(index.active_by_hotel.get(hotel_id, ()))
+
+    def count_active(self, hotel_id: str) -> int:
+        """Cuenta las reservas activas de un hotel sin leer las reservas."""
 
-        reservations = self._load()
-        return list(reservations.values())
+        index: ReservationIndexData = self._view(self._index)
+        return len(index.active_by_hotel.get(hotel_id, ()))
@@ -0,0 +1,55 @@
+"""Particionado por hash de las reservas y cambio del número de particiones.
+
+Uso:
+    python -m src.reshard --dir data/reservations --shards 16 --from data/reservations.json
+    python -m src.reshard --dir data/reservations --shards 32 [--shard-field hotel_id]
+
+Con `--from` se crea la colección particionada a partir del archivo JSON
+original; sin él se redistribuye una colección existente. Debe ejecutarse
+sin servicios que tengan abierto el directorio.
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import List, Optional
+
+from src.reservation import ReservationRepository
+from src.storage import JsonFileBackend, ShardedJsonBackend, reshard
+
+
+KEY_FIELD = ReservationRepository.key_field
+SCHEMA = ReservationRepository.record_schema
+
+
+def shard_json_file(
+    json_path: Path, directory: Path, shards: int, shard_field: Optional[str] = None
+) -> int:
+    """Crea una colección particionada con los registros de `json_path`."""
+    target = ShardedJsonBackend(directory, KEY_FIELD, shards, shard_field, schema=SCHEMA)
+    if target.manifest_path.exists():
+        raise ValueError(f"'{directory}' already holds a sharded collection")
+    records = dict(JsonFileBackend(json_path, KEY_FIELD).scan())
+    target.apply(records, ())
+    return len(records)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Punto de entrada de línea de comandos."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dir", type=Path, required=True)
+    parser.add_argument("--shards", type=int, required=True)
+    parser.add_argument("--shard-field", default=None, help="campo de hash (por defecto el ID)")
+    parser.add_argument("--from", dest="source", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    if args.source is not None:
+        count = shard_json_file(args.source, args.dir, args.shards, args.shard_field)
+    else:
+        count = reshard(args.dir, KEY_FIELD, args.shards, args.shard_field, schema=SCHEMA)
+    print(f"[reshard] {count} records -> {args.shards} shards in {args.dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+"""Servidor local de larga duración para clientes, hoteles y reservas.
+
+Un proceso carga una vez las colecciones (repositorios con caché) y atiende
+las operaciones de los repositorios por un socket Unix o TCP, así que cada
+solicitud cuesta un despacho en memoria en lugar de leer y parsear los
+archivos JSON. Las operaciones corren sobre las fachadas de
+`src.async_repository`: las altas y cancelaciones concurrentes, vengan de
+la misma conexión o de varias, se agrupan en una sola escritura por archivo.
+
+Uso:
+    python -m src.server --socket data/server.sock
+    python -m src.server --port 8765 --data-dir data
+
+Protocolo: una línea JSON por mensaje. La solicitud es
+`{"id": 1, "op": "create_reservation", "args": [...], "kwargs": {...}}` y la
+respuesta `{"id": 1, "ok": true, "result": ...}` o
+`{"id": 1, "ok": false, "error": {"type": "ValueError", "message": "..."}}`.
+Una conexión puede enviar varias solicitudes sin esperar; las respuestas
+llevan el `id` de su solicitud y pueden llegar en otro orden. El cliente con
+grupo de conexiones está en `src.client`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import threading
+from concurrent.futures import Executor
+from contextlib import contextmanager, suppress
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from src.async_repository import (
+    AsyncCustomerRepository,
+    AsyncHotelRepository,
+    AsyncReservationRepository,
+)
+from src.customer import Customer, CustomerRepository
+from src.hotel import Hotel, HotelRepository
+from src.importer import open_backend
+from src.repository import BulkResult, ConflictError
+from src.reservation import Reservation, ReservationRepository
+
+
+# Ruta de socket Unix o (host, puerto) TCP.
+Address = Union[str, Path, Tuple[str, int]]
+
+# Tamaño máximo de una línea del protocolo (lotes grandes incluidos).
+MAX_MESSAGE = 64 * 1024 * 1024
+
+# Operación -> (fachada, forma del resultado, tipo de entidad).
+OPERATIONS: Dict[str, Tuple[str, str, Any]] = {
+    "create_customer": ("customers", "entity", Customer),
+    "create_customers_bulk": ("customers", "bulk", Customer),
+    "get_customer": ("customers", "entity", Customer),
+    "update_customer": ("customers", "entity", Customer),
+    "delete_customer": ("customers", "value", None),
+    "search_by_name": ("customers", "entities", Customer),
+    "list_customers": ("customers", "entities", Customer),
+    "page_customers": ("customers", "entities", Customer),
+    "create_hotel": ("hotels", "entity", Hotel),
+    "create_hotels_bulk": ("hotels", "bulk", Hotel),
+    "get_hotel": ("hotels", "entity", Hotel),
+    "reserve_room": ("hotels", "value", None),
+    "release_room": ("hotels", "value", None),
+    "max_occupancy": ("hotels", "value", None),
+    "search_availability": ("hotels", "availability", Hotel),
+    "list_hotels": ("hotels", "entities", Hotel),
+    "page_hotels": ("hotels", "entities", Hotel),
+    "create_reservation": ("reservations", "entity", Reservation),
+    "create_reservations_bulk": ("reservations", "bulk", Reservation),
+    "get_reservation": ("reservations", "entity", Reservation),
+    "cancel_reservation": ("reservations", "value", None),
+    "cancel_reservations_bulk": ("reservations", "bulk", Reservation),
+    "list_reservations": ("reservations", "entities", Reservation),
+    "page_reservations": ("reservations", "entities", Reservation),
+    "find_by_customer": ("reservations", "entities", Reservation),
+    "find_by_hotel": ("reservations", "entities", Reservation),
+    "active_for_hotel": ("reservations", "entities", Reservation),
+    "count_active": ("reservations", "value", None),
+}
+
+# Errores que viajan con su tipo; los demás llegan como `RemoteError`.
+ERRORS: Dict[str, Any] = {
+    "KeyError": KeyError,
+    "ValueError": ValueError,
+    "TypeError": TypeError,
+    "ConflictError": ConflictError,
+}
+
+
+class RemoteError(RuntimeError):
+    """Error inesperado del servidor al ejecutar una operación."""
+
+
+def json_default(value: Any) -> Any:
+    """Codifica argumentos no JSON: fechas como texto ISO e iterables como listas."""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    try:
+        return list(value)
+    except TypeError:
+        raise TypeError(f"{type(value).__name__} is not JSON serializable") from None
+
+
+def encode_error(exc: BaseException) -> Dict[str, str]:
+    """Representación JSON de una excepción."""
+    message = exc.args[0] if len(exc.args) == 1 else str(exc)
+    return {"type": type(exc).__name__, "message": str(message)}
+
+
+def decode_error(error: Dict[str, str]) -> Exception:
+    """Excepción local equivalente a un error recibido."""
+    kind = ERRORS.get(error.get("type", ""))
+    if kind is None:
+        return RemoteError(f"{error.get('type')}: {error.get('message')}")
+    return kind(error.get("message", ""))
+
+
+def encode_result(op: str, result: Any) -> Any:
+    """Representación JSON del resultado de `op`."""
+    shape = OPERATIONS[op][1]
+    if shape == "entity":
+        return None if result is None else asdict(result)
+    if shape == "entities":
+        return [asdict(e) for e in result]
+    if shape == "bulk":
+        return [
+            {
+                "key": r.key,
+                "entity": None if r.entity is None else asdict(r.entity),
+                "error": None if r.error is None else encode_error(r.error),
+            }
+            for r in result
+        ]
+    if shape == "availability":
+        return [[asdict(hotel), free] for hotel, free in result]
+    return result
+
+
+def decode_result(op: str, payload: Any) -> Any:
+    """Reconstruye el resultado de `op` (entidades, `BulkResult`) desde JSON."""
+    _, shape, entity_type = OPERATIONS[op]
+    if shape == "entity":
+        return None if payload is None else entity_type(**payload)
+    if shape == "entities":
+        return [entity_type(**item) for item in payload]
+    if shape == "bulk":
+        return [
+            BulkResult(
+                key=item["key"],
+                entity=None if item["entity"] is None else entity_type(**item["entity"]),
+                error=None if item["error"] is None else decode_error(item["error"]),
+            )
+            for item in payload
+        ]
+    if shape == "availability":
+        return [(entity_type(**hotel), free) for hotel, free in payload]
+    return payload
+
+
+class ReservationServer:
+    """Atiende las operaciones de los repositorios sobre el estado en memoria.
+
+    Usa el repositorio de reservas y sus `customer_repo`/`hotel_repo`; para
+    que el estado quede en memoria conviene crearlos con `cache=True`.
+    """
+
+    def __init__(
+        self, reservation_repo: ReservationRepository, executor: Optional[Executor] = None
+    ) -> None:
+        self.facades: Dict[str, Any] = {
+            "customers": AsyncCustomerRepository(reservation_repo.customer_repo, executor),
+            "hotels": AsyncHotelRepository(reservation_repo.hotel_repo, executor),
+            "reservations": AsyncReservationRepository(reservation_repo, executor),
+        }
+        self.address: Optional[Address] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: Set[asyncio.StreamWriter] = set()
+
+    async def call(self, op: str, args: List[Any], kwargs: Dict[str, Any]) -> Any:
+        """Ejecuta la operación `op` y devuelve su resultado sin codificar."""
+        if op not in OPERATIONS:
+            raise ValueError(f"unknown operation '{op}'")
+        method = getattr(self.facades[OPERATIONS[op][0]], op)
+        return await method(*args, **kwargs)
+
+    async def dispatch(self, line: bytes) -> bytes:
+        """Atiende una línea de solicitud y devuelve la línea de respuesta."""
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+            request_id = request.get("id")
+            op = request.get("op")
+            args = request.get("args") or []
+            kwargs = request.get("kwargs") or {}
+            if not isinstance(op, str) or not isinstance(args, list) or not isinstance(
+                kwargs, dict
+            ):
+                raise ValueError("request needs 'op' and optional 'args' list/'kwargs' object")
+            result = encode_result(op, await self.call(op, args, kwargs))
+            response = {"id": request_id, "ok": True, "result": result}
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            response = {"id": request_id, "ok": False, "error": encode_error(exc)}
+        return json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n"
+
+    async def _respond(
+        self, line: bytes, writer: asyncio.StreamWriter, lock: asyncio.Lock
+    ) -> None:
+        response = await self.dispatch(line)
+        async with lock:
+            writer.write(response)
+            await writer.drain()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Atiende una conexión; cada solicitud corre como tarea propia."""
+        self._writers.add(writer)
+        lock = asyncio.Lock()
+        tasks: Set["asyncio.Task[None]"] = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.ensure_future(self._respond(line, writer, lock))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except (ConnectionError, ValueError):
+            # ValueError: línea mayor que MAX_MESSAGE.
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def start(self, address: Address) -> None:
+        """Empieza a escuchar en `address`; `self.address` queda con la dirección real."""
+        if isinstance(address, tuple):
+            host, port = address
+            self._server = await asyncio.start_server(
+                self._handle, host, port, limit=MAX_MESSAGE
+            )
+            self.address = self._server.sockets[0].getsockname()[:2]
+        else:
+            path = Path(address)
+            path.unlink(missing_ok=True)
+            self._server = await asyncio.start_unix_server(
+                self._handle, str(path), limit=MAX_MESSAGE
+            )
+            self.address = str(path)
+
+    async def close(self) -> None:
+        """Deja de escuchar y cierra las conexiones abiertas."""
+        if self._server is None:
+            return
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        await self._server.wait_closed()
+        self._server = None
+        if isinstance(self.address, str):
+            Path(self.address).unlink(missing_ok=True)
+
+    async def serve_forever(self, address: Address) -> None:
+        """Escucha en `address` hasta que se cancele la tarea."""
+        await self.start(address)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await self.close()
+
+    @contextmanager
+    def running(self, address: Address) -> Iterator[Address]:
+        """Ejecuta el servidor en un hilo con su propio ciclo de eventos.
+
+        Devuelve la dirección real (p. ej. el puerto asignado con el puerto 0).
+        """
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, name="reservation-server", daemon=True)
+        thread.start()
+        try:
+            asyncio.run_coroutine_threadsafe(self.start(address), loop).result()
+            assert self.address is not None
+            yield self.address
+        finally:
+            asyncio.run_coroutine_threadsafe(self.close(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+
+def open_repositories(
+    data_dir: Path, db: Optional[Path] = None, cache: bool = True
+) -> ReservationRepository:
+    """Repositorios sobre `data_dir` (o sobre la base SQLite `db`), con caché por defecto."""
+    customers = CustomerRepository(
+        path=data_dir / "customers.json",
+        cache=cache,
+        backend=open_backend("customers", data_dir, db),
+    )
+    hotels = HotelRepository(
+        path=data_dir / "hotels.json", cache=cache, backend=open_backend("hotels", data_dir, db)
+    )
+    return ReservationRepository(
+        path=data_dir / "reservations.json",
+        customer_repo=customers,
+        hotel_repo=hotels,
+        cache=cache,
+        backend=open_backend("reservations", data_dir, db),
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Punto de entrada de línea de comandos."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--socket", type=Path, default=None, help="ruta del socket Unix")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None, help="escuchar por TCP")
+    parser.add_argument("--data-dir", type=Path, default=Path("data"))
+    parser.add_argument("--db", type=Path, default=None, help="usar SQLite en lugar de JSON")
+    args = parser.parse_args(argv)
+
+    address: Address
+    if args.port is not None:
+        address = (args.host, args.port)
+    else:
+        address = args.socket or args.data_dir / "server.sock"
+
+    repo = open_repositories(args.data_dir, args.db)
+    # Carga inicial: las primeras solicitudes ya encuentran todo en memoria.
+    for loaded in (repo.customer_repo, repo.hotel_repo, repo):
+        loaded._load()  # pylint: disable=protected-access
+    server = ReservationServer(repo)
+    print(f"[server] listening on {address}")
+    try:
+        asyncio.run(server.serve_forever(address))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Storage helpers for JSON persistence.
+
+Design goals:
+- Simple JSON read/write, plus streaming of large top-level arrays.
+- If file is missing -> return default.
+- If file is invalid/corrupted -> print an error and return default (do not crash).
+- Writes go to a temporary file that is renamed over the target, so a crash
+  never leaves a half-written file behind.
+- Optional in-memory caching of parsed content, revalidated against the
+  file's mtime, size and inode so external changes are always picked up.
+- Keyed storage backends (whole-file JSON, an append-only journal and
+  SQLite) that repositories can switch between without changing their
+  public API.
+- A binary snapshot next to a JSON file, opened with mmap so a single
+  record can be looked up by key without parsing the rest.
+- A stamp next to each JSON file written through a schema-aware backend
+  (schema id + checksum), so loads of files this code wrote can skip
+  per-record validation.
+- Hash-sharded JSON collections, so a write rewrites only the shards it
+  touches.
+
+The backends live in their own modules (json_file, sharded, journal,
+sqlite, snapshot) on top of the file primitives in `files`; this package
+re-exports their public API.
+"""
+
+from src.storage.files import (
+    COMMIT_INTENT_PREFIX,
+    FileCache,
+    Record,
+    Signature,
+    StagedWrite,
+    commit_files,
+    decode_json,
+    file_crc32,
+    file_signature,
+    iter_json_array,
+    load_json,
+    read_file,
+    recover_commits,
+    save_json,
+    write_atomic,
+    write_atomic_chunks,
+)
+from src.storage.snapshot import (
+    SNAPSHOT_MAGIC,
+    SNAPSHOT_VERSION,
+    SnapshotReader,
+    encode_snapshot,
+    snapshot_path,
+)
+from src.storage.base import Bounds, RejectedRecord, StorageBackend
+from src.storage.json_file import JsonFileBackend, make_stamp, stamp_path
+from src.storage.sharded import (
+    SHARD_MANIFEST,
+    ShardedJsonBackend,
+    reshard,
+    shard_index,
+    shard_path,
+)
+from src.storage.journal import JournalBackend
+from src.storage.sqlite import SqliteBackend, copy_records, migrate_json_to_sqlite
+
+__all__ = [
+    "COMMIT_INTENT_PREFIX",
+    "FileCache",
+    "Record",
+    "Signature",
+    "StagedWrite",
+    "commit_files",
+    "decode_json",
+    "file_crc32",
+    "file_signature",
+    "iter_json_array",
+    "load_json",
+    "read_file",
+    "recover_commits",
+    "save_json",
+    "write_atomic",
+    "write_atomic_chunks",
+    "SNAPSHOT_MAGIC",
+    "SNAPSHOT_VERSION",
+    "SnapshotReader",
+    "encode_snapshot",
+    "snapshot_path",
+    "Bounds",
+    "RejectedRecord",
+    "StorageBackend",
+    "JsonFileBackend",
+    "make_stamp",
+    "stamp_path",
+    "SHARD_MANIFEST",
+    "ShardedJsonBackend",
+    "reshard",
+    "shard_index",
+    "shard_path",
+    "JournalBackend",
+    "SqliteBackend",
+    "copy_records",
+    "migrate_json_to_sqlite",
+]
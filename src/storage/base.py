@@ -0,0 +1,179 @@
+"""
+The StorageBackend interface shared by every keyed backend.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Any, ContextManager, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.storage.files import Record
+
+
+@dataclass
+class RejectedRecord:
+    """
+    An item skipped while loading a collection, and why.
+
+    'index' is the position in the file when known; 'key' is the record
+    key when it could be read.
+    """
+
+    reason: str
+    record: Any
+    key: Optional[str] = None
+    index: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class Bounds:
+    """
+    Limits checked by StorageBackend.adjust: the adjusted value must stay
+    >= 'minimum' and <= the record's 'maximum_field'. None disables a limit.
+    """
+
+    minimum: Optional[int] = None
+    maximum_field: Optional[str] = None
+
+    def allows(self, record: Record, value: int) -> bool:
+        """
+        True if 'value' respects both limits for 'record'.
+        """
+        if self.minimum is not None and value < self.minimum:
+            return False
+        return self.maximum_field is None or value <= record[self.maximum_field]
+
+
+def is_integer(value: Any) -> bool:
+    """
+    True for integer field values that `adjust` can change (not bools).
+    """
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+class StorageBackend(ABC):
+    """
+    Keyed record storage used by the repositories.
+
+    Implementations provide scan/get/apply; put, delete and adjust have
+    generic defaults built on top of them that backends may override with
+    something cheaper (e.g. a single-row UPDATE).
+    """
+
+    key_field: str
+
+    @abstractmethod
+    def paths(self) -> List[Path]:
+        """
+        Files whose signatures identify the current state of the backend.
+        """
+
+    @abstractmethod
+    def scan(self) -> Iterator[Tuple[str, Record]]:
+        """
+        Iterate over all (key, record) pairs.
+        """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Record]:
+        """
+        Return the record stored under 'key', or None.
+        """
+
+    @abstractmethod
+    def apply(self, puts: Dict[str, Record], deletes: Iterable[str]) -> None:
+        """
+        Apply a batch of puts and deletes as one write.
+        """
+
+    def exists(self, key: str) -> bool:
+        """
+        True if a record is stored under 'key'. Backends override this when
+        they can answer without decoding the record.
+        """
+        return self.get(key) is not None
+
+    def hold(self) -> ContextManager[None]:
+        """
+        Keep parsed state between the calls of one operation (such as the
+        checks and the write of a batch). Backends that only cache on
+        request drop that state when the outermost hold ends.
+        """
+        return nullcontext()
+
+    def trusted(self) -> bool:
+        """
+        True if every stored record is known to be valid for the schema,
+        so callers may build entities without revalidating them.
+        """
+        return False
+
+    def mark_valid(self) -> None:
+        """
+        Record that the caller validated every stored record; backends that
+        track trust keep it until the data changes by another route.
+        """
+
+    def rejected(self) -> List[RejectedRecord]:
+        """
+        Items the last full pass over the storage skipped as malformed.
+        """
+        return []
+
+    def page(self, after: Optional[str], limit: int) -> List[Tuple[str, Record]]:
+        """
+        Return up to 'limit' records that follow the key 'after' in scan
+        order (from the start if 'after' is None). An unknown 'after' key
+        yields an empty page.
+        """
+        records = self.scan()
+        if after is not None:
+            for key, _ in records:
+                if key == after:
+                    break
+        return list(islice(records, limit))
+
+    def put(self, key: str, record: Record) -> None:
+        """
+        Insert or replace the record stored under 'key'.
+        """
+        self.apply({key: record}, ())
+
+    def delete(self, key: str) -> None:
+        """
+        Remove the record stored under 'key' if present.
+        """
+        self.apply({}, (key,))
+
+    def adjust(
+        self,
+        key: str,
+        field: str,
+        delta: int,
+        bounds: Bounds = Bounds(),
+        version_field: Optional[str] = None,
+    ) -> Optional[Record]:
+        """
+        Add 'delta' to the integer 'field' of a record if the result stays
+        within 'bounds'. With 'version_field', that counter (0 when absent)
+        is incremented too.
+
+        Return the updated record, None if a bound would be violated, and
+        raise KeyError if 'key' does not exist or 'field' is not an integer.
+        """
+        record = self.get(key)
+        if record is None or not is_integer(record.get(field)):
+            raise KeyError(key)
+        value = record[field] + delta
+        if not bounds.allows(record, value):
+            return None
+        updated = dict(record)
+        updated[field] = value
+        if version_field is not None:
+            updated[version_field] = record.get(version_field, 0) + 1
+        self.put(key, updated)
+        return updated
@@ -0,0 +1,396 @@
+"""
+File primitives: JSON reads and writes, atomic multi-file commits and
+signature-checked in-memory caches.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import uuid
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src import metrics
+
+
+Signature = Tuple[int, int, int]
+Record = Dict[str, Any]
+# File writes of a staged batch and the callback that installs it once committed.
+StagedWrite = Tuple[Dict[Path, bytes], Callable[[], None]]
+
+
+def load_json(path: str | Path, default: Any) -> Any:
+    """
+    Load JSON content from a file. If file doesn't exist or is invalid,
+    return 'default' and print an error for invalid content.
+    """
+    p = Path(path)
+    try:
+        data = read_file(p)
+    except OSError as exc:
+        print(f"[storage] Error reading JSON file '{p}': {exc}")
+        return default
+    if data is None:
+        return default
+    return decode_json(p, data, default)
+
+
+def read_file(path: str | Path) -> Optional[bytes]:
+    """
+    Read a whole file, or return None if it does not exist.
+    """
+    p = Path(path)
+    if not p.exists():
+        return None
+    with metrics.timer("storage.read", file=p.name):
+        data = p.read_bytes()
+    metrics.inc("bytes_read_total", len(data), file=p.name)
+    return data
+
+
+def file_crc32(path: str | Path, chunk_size: int = 1 << 16) -> Optional[Tuple[int, int]]:
+    """
+    Return (size, CRC-32) of a file, reading it in chunks so memory stays
+    bounded by 'chunk_size'; None if it does not exist.
+    """
+    p = Path(path)
+    size = crc = 0
+    try:
+        with metrics.timer("storage.read", file=p.name), open(p, "rb") as fh:
+            while chunk := fh.read(chunk_size):
+                size += len(chunk)
+                crc = zlib.crc32(chunk, crc)
+    except FileNotFoundError:
+        return None
+    metrics.inc("bytes_read_total", size, file=p.name)
+    return size, crc
+
+
+def decode_json(path: str | Path, data: bytes, default: Any) -> Any:
+    """
+    Parse the JSON content 'data' read from 'path'. Empty content gives
+    'default'; invalid content prints an error and gives 'default'.
+    """
+    p = Path(path)
+    try:
+        text = data.decode("utf-8").strip()
+        if not text:
+            return default
+        with metrics.timer("storage.json_decode", file=p.name):
+            return json.loads(text)
+    except json.JSONDecodeError as exc:
+        print(f"[storage] Error reading JSON file '{p}': {exc}")
+        return default
+
+
+def iter_json_array(path: str | Path, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """
+    Stream the items of a top-level JSON array, reading the file in chunks
+    so memory stays bounded by the largest item rather than the file size.
+
+    Missing or empty files yield nothing. Invalid content prints an error
+    and ends the iteration (items already yielded stay valid).
+    """
+    p = Path(path)
+    if not p.exists():
+        return
+
+    decoder = json.JSONDecoder()
+    try:
+        with open(p, encoding="utf-8") as fh:
+            reader = _ChunkReader(fh, chunk_size)
+            first = reader.next_char()
+            if first is None:
+                return
+            if first != "[":
+                print(f"[storage] Invalid data format in '{p}'")
+                return
+            reader.pos += 1
+
+            expect_value = True
+            while True:
+                char = reader.next_char()
+                if char is None:
+                    raise json.JSONDecodeError("unterminated array", reader.buf, reader.pos)
+                if char == "]":
+                    return
+                if not expect_value:
+                    if char != ",":
+                        raise json.JSONDecodeError("expected ','", reader.buf, reader.pos)
+                    reader.pos += 1
+                    expect_value = True
+                    continue
+                yield reader.decode(decoder)
+                expect_value = False
+    except (json.JSONDecodeError, OSError) as exc:
+        print(f"[storage] Error reading JSON file '{p}': {exc}")
+
+
+class _ChunkReader:
+    """
+    Sliding text buffer over a file for iter_json_array.
+    """
+
+    def __init__(self, fh: Any, chunk_size: int) -> None:
+        self.fh = fh
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """
+        Append the next chunk, dropping consumed text. False at end of file.
+        """
+        chunk = self.fh.read(self.chunk_size)
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        if not chunk:
+            self.eof = True
+        return bool(chunk)
+
+    def next_char(self) -> Optional[str]:
+        """
+        Skip whitespace and return the next character without consuming it.
+        """
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return None
+
+    def decode(self, decoder: json.JSONDecoder) -> Any:
+        """
+        Decode one value at the current position, reading more as needed.
+        A value not followed by a delimiter may be a truncated prefix (e.g.
+        "0" of "0.5"), so it is only accepted once a delimiter or EOF
+        confirms it.
+        """
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buf, self.pos)
+                if (end < len(self.buf) and self.buf[end] in " \t\r\n,]") or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+
+def save_json(path: str | Path, data: Any) -> None:
+    """
+    Save data to JSON file, creating parent directories if needed.
+    """
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    with metrics.timer("storage.json_encode", file=p.name):
+        payload = json.dumps(data, ensure_ascii=False, indent=2)
+    write_atomic(p, payload.encode("utf-8"))
+
+
+def write_atomic(path: str | Path, payload: bytes, fsync: bool = False) -> None:
+    """
+    Write 'payload' to a sibling temporary file and rename it over 'path'.
+    Readers see either the old or the new content, never a partial write.
+    """
+    p = Path(path)
+    tmp = p.with_name(f".{p.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        _write_file(tmp, payload, fsync, _metric_label(p))
+        os.replace(tmp, p)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def write_atomic_chunks(
+    path: str | Path, chunks: Iterable[bytes], fsync: bool = False
+) -> Tuple[int, int]:
+    """
+    Like write_atomic, but stream 'chunks' into the temporary file so the
+    payload is never in memory at once. Return (size, CRC-32) of what was
+    written.
+    """
+    p = Path(path)
+    tmp = p.with_name(f".{p.name}.{uuid.uuid4().hex}.tmp")
+    label = _metric_label(p)
+    size = crc = 0
+    try:
+        with metrics.timer("storage.write", file=label), open(tmp, "wb") as fh:
+            for chunk in chunks:
+                fh.write(chunk)
+                size += len(chunk)
+                crc = zlib.crc32(chunk, crc)
+            if fsync:
+                fh.flush()
+                os.fsync(fh.fileno())
+        os.replace(tmp, p)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    metrics.inc("bytes_written_total", size, file=label)
+    return size, crc
+
+
+def _write_file(path: Path, payload: bytes, fsync: bool, label: str) -> None:
+    with metrics.timer("storage.write", file=label):
+        with open(path, "wb") as fh:
+            fh.write(payload)
+            if fsync:
+                fh.flush()
+                os.fsync(fh.fileno())
+    metrics.inc("bytes_written_total", len(payload), file=label)
+
+
+def _metric_label(path: Path) -> str:
+    """
+    File label for metrics; commit intents share one label.
+    """
+    return "commit-intent" if path.name.startswith(COMMIT_INTENT_PREFIX) else path.name
+
+
+COMMIT_INTENT_PREFIX = ".commit-"
+
+
+def commit_files(writes: Dict[Path, bytes], fsync: bool = False) -> None:
+    """
+    Replace several files as one step.
+
+    Every payload is first written to a temporary sibling; then an intent
+    record listing the pending renames is written atomically next to the
+    first file, the renames are performed and the intent is removed. If the
+    process dies after the intent exists, `recover_commits` finishes the
+    renames, so readers never observe only part of the commit.
+    """
+    if not writes:
+        return
+    if len(writes) == 1:
+        (target, payload), = writes.items()
+        write_atomic(target, payload, fsync=fsync)
+        return
+    token = uuid.uuid4().hex
+    staged: List[Tuple[Path, Path]] = []
+    try:
+        for target, payload in writes.items():
+            target = Path(target)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp = target.with_name(f".{target.name}.{token}.tmp")
+            staged.append((tmp, target))
+            _write_file(tmp, payload, fsync, target.name)
+        intent = staged[0][1].parent / f"{COMMIT_INTENT_PREFIX}{token}.json"
+        pairs = [[str(tmp), str(target)] for tmp, target in staged]
+        write_atomic(intent, json.dumps(pairs).encode("utf-8"), fsync=fsync)
+    except BaseException:
+        for tmp, _ in staged:
+            tmp.unlink(missing_ok=True)
+        raise
+    _finish_commit(intent, staged)
+
+
+def _finish_commit(intent: Path, staged: List[Tuple[Path, Path]]) -> None:
+    for tmp, target in staged:
+        try:
+            os.replace(tmp, target)
+        except FileNotFoundError:
+            # Already renamed by a concurrent recovery.
+            pass
+    intent.unlink(missing_ok=True)
+
+
+def recover_commits(directory: str | Path) -> int:
+    """
+    Complete any multi-file commit interrupted after its intent record was
+    written. Return the number of commits recovered.
+    """
+    recovered = 0
+    for intent in Path(directory).glob(f"{COMMIT_INTENT_PREFIX}*.json"):
+        try:
+            pairs = json.loads(intent.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as exc:
+            print(f"[storage] Ignoring unreadable commit intent '{intent}': {exc}")
+            continue
+        _finish_commit(intent, [(Path(tmp), Path(target)) for tmp, target in pairs])
+        recovered += 1
+    return recovered
+
+
+def file_signature(path: str | Path) -> Optional[Signature]:
+    """
+    Return a cheap fingerprint of a file as (mtime_ns, size, inode),
+    or None if the file does not exist.
+    """
+    try:
+        st = Path(path).stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class FileCache:
+    """
+    Keep a value derived from one or more files in memory until they change.
+
+    The cached value is only returned while the files' signatures
+    (mtime, size, inode) match the ones recorded by the last `put`.
+    Callers own the cached value: mutating it in place and then calling
+    `put` again after writing the file keeps the cache warm.
+    """
+
+    def __init__(self, *paths: str | Path) -> None:
+        self.paths = [Path(p) for p in paths]
+        self._signature: Optional[Tuple[Optional[Signature], ...]] = None
+        self._value: Any = None
+
+    @property
+    def path(self) -> Path:
+        """
+        Primary file backing the cache.
+        """
+        return self.paths[0]
+
+    def _current_signature(self) -> Tuple[Optional[Signature], ...]:
+        return tuple(file_signature(p) for p in self.paths)
+
+    def get(self) -> Any:
+        """
+        Return the cached value, or None if nothing is cached or the file
+        changed since it was stored.
+        """
+        if self._signature is None:
+            return None
+        if self._current_signature() != self._signature:
+            self.invalidate()
+            return None
+        return self._value
+
+    def signature(self) -> Tuple[Optional[Signature], ...]:
+        """
+        Current signature of the files, to pass to `put` when the value is
+        built from a read that another thread or process may overtake.
+        """
+        return self._current_signature()
+
+    def put(
+        self, value: Any, signature: Optional[Tuple[Optional[Signature], ...]] = None
+    ) -> None:
+        """
+        Store 'value' as the current content of the files. Missing files are
+        part of the signature, so creating one invalidates the value.
+
+        With 'signature' taken before reading the files, a write that lands
+        during the read leaves the value stale instead of wrongly current.
+        """
+        self._signature = self._current_signature() if signature is None else signature
+        self._value = value
+
+    def invalidate(self) -> None:
+        """
+        Drop the cached value.
+        """
+        self._signature = None
+        self._value = None
@@ -0,0 +1,171 @@
+"""
+Snapshot plus append-only journal backend.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src import metrics
+from src.storage.base import StorageBackend
+from src.storage.files import Record, Signature, file_signature, load_json, save_json
+
+
+class JournalBackend(StorageBackend):
+    """
+    Snapshot plus append-only journal of mutations.
+
+    The snapshot uses the same JSON list layout as JsonFileBackend, so an
+    existing data file can be opened directly. Each put/delete appends one
+    JSON line to '<snapshot>.journal'; on open the journal is replayed over
+    the snapshot. Once the journal grows past 'checkpoint_bytes' it is
+    folded into a fresh snapshot and truncated.
+
+    Replaying is idempotent, so a crash between writing the snapshot and
+    truncating the journal is harmless. A torn last line (crash while
+    appending) is ignored and cut off on the next append.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        key_field: str,
+        checkpoint_bytes: int = 1 << 20,
+        fsync: bool = False,
+    ) -> None:
+        self.path = Path(path)
+        self.key_field = key_field
+        self.checkpoint_bytes = checkpoint_bytes
+        self.fsync = fsync
+        # None until the snapshot is first loaded.
+        self._records: Optional[Dict[str, Record]] = None
+        self._snapshot_signature: Optional[Signature] = None
+        self._log_offset = 0
+
+    @property
+    def log_path(self) -> Path:
+        """
+        The journal file next to the snapshot.
+        """
+        return self.path.with_name(self.path.name + ".journal")
+
+    def paths(self) -> List[Path]:
+        """
+        Files whose signatures identify the current state of the backend.
+        """
+        return [self.path, self.log_path]
+
+    def _load_snapshot(self) -> Dict[str, Record]:
+        records: Dict[str, Record] = {}
+        raw = load_json(self.path, default=[])
+        if not isinstance(raw, list):
+            print(f"[storage] Invalid data format in '{self.path}'")
+            raw = []
+        for item in raw:
+            if isinstance(item, dict) and isinstance(item.get(self.key_field), str):
+                records[item[self.key_field]] = item
+        self._snapshot_signature = file_signature(self.path)
+        self._log_offset = 0
+        return records
+
+    def _replay(self, records: Dict[str, Record]) -> None:
+        try:
+            with metrics.timer("storage.read", file=self.log_path.name):
+                with open(self.log_path, "rb") as fh:
+                    fh.seek(self._log_offset)
+                    chunk = fh.read()
+        except FileNotFoundError:
+            return
+        metrics.inc("bytes_read_total", len(chunk), file=self.log_path.name)
+
+        end = chunk.rfind(b"\n") + 1
+        for line in chunk[:end].splitlines():
+            if line.strip():
+                self._apply_entry(records, line)
+        self._log_offset += end
+
+    def _apply_entry(self, records: Dict[str, Record], line: bytes) -> None:
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError as exc:
+            print(f"[storage] Skipping corrupt journal entry in '{self.log_path}': {exc}")
+            return
+        if not isinstance(entry, dict) or not isinstance(entry.get("key"), str):
+            return
+        if entry.get("op") == "put" and isinstance(entry.get("record"), dict):
+            records[entry["key"]] = entry["record"]
+        elif entry.get("op") == "delete":
+            records.pop(entry["key"], None)
+
+    def _refresh(self) -> Dict[str, Record]:
+        log_signature = file_signature(self.log_path)
+        log_size = log_signature[1] if log_signature else 0
+        records = self._records
+        if (
+            records is None
+            or file_signature(self.path) != self._snapshot_signature
+            or log_size < self._log_offset
+        ):
+            records = self._records = self._load_snapshot()
+        self._replay(records)
+        return records
+
+    def scan(self) -> Iterator[Tuple[str, Record]]:
+        """
+        Iterate over (key, record) pairs in insertion order.
+        """
+        yield from list(self._refresh().items())
+
+    def get(self, key: str) -> Optional[Record]:
+        """
+        Return the record stored under 'key', or None.
+        """
+        return self._refresh().get(key)
+
+    def apply(self, puts: Dict[str, Record], deletes: Iterable[str]) -> None:
+        """
+        Append a batch of entries with a single write.
+        """
+        records = self._refresh()
+        entries = [{"op": "put", "key": k, "record": r} for k, r in puts.items()]
+        entries += [{"op": "delete", "key": k} for k in deletes]
+        if not entries:
+            return
+        payload = "".join(
+            json.dumps(e, ensure_ascii=False, separators=(",", ":")) + "\n" for e in entries
+        ).encode("utf-8")
+
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        with metrics.timer("storage.write", file=self.log_path.name):
+            with open(self.log_path, "ab") as fh:
+                if fh.tell() > self._log_offset:
+                    # Drop a torn entry left behind by a crashed writer.
+                    fh.truncate(self._log_offset)
+                fh.write(payload)
+                fh.flush()
+                if self.fsync:
+                    os.fsync(fh.fileno())
+        metrics.inc("bytes_written_total", len(payload), file=self.log_path.name)
+        self._log_offset += len(payload)
+
+        records.update(puts)
+        for key in deletes:
+            records.pop(key, None)
+
+        if self._log_offset >= self.checkpoint_bytes:
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        """
+        Fold the journal into a new snapshot and truncate the journal.
+        """
+        records = self._refresh()
+        save_json(self.path, list(records.values()))
+        with open(self.log_path, "wb") as fh:
+            if self.fsync:
+                os.fsync(fh.fileno())
+        self._snapshot_signature = file_signature(self.path)
+        self._log_offset = 0
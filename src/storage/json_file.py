@@ -0,0 +1,434 @@
+"""
+Whole-file JSON backend, with its optional snapshot and schema stamp.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src import metrics
+from src.storage.base import RejectedRecord, StorageBackend
+from src.storage.files import (
+    FileCache,
+    Record,
+    StagedWrite,
+    decode_json,
+    file_crc32,
+    file_signature,
+    iter_json_array,
+    read_file,
+    recover_commits,
+    write_atomic,
+    write_atomic_chunks,
+)
+from src.storage.snapshot import SnapshotReader, encode_snapshot, snapshot_path
+
+
+def stamp_path(path: str | Path) -> Path:
+    """
+    Location of the schema/checksum stamp that accompanies a JSON file.
+    """
+    return Path(path).with_suffix(".stamp")
+
+
+def make_stamp(schema: str, payload: bytes) -> Dict[str, Any]:
+    """
+    Stamp asserting that 'payload' holds only valid records of 'schema'.
+    """
+    return _stamp(schema, len(payload), zlib.crc32(payload))
+
+
+def _stamp(schema: str, size: int, crc: int) -> Dict[str, Any]:
+    return {"schema": schema, "size": size, "crc32": crc}
+
+
+def _encode_array(records: Iterable[Record]) -> Iterator[bytes]:
+    """
+    Encode 'records' one at a time into the same bytes as
+    json.dumps(list(records), ensure_ascii=False, indent=2).
+    """
+    separator = b"[\n  "
+    for record in records:
+        text = json.dumps(record, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+        yield separator + text.encode("utf-8")
+        separator = b",\n  "
+    yield b"[]" if separator == b"[\n  " else b"\n]"
+
+
+# Each of the three side files (data, snapshot, stamp) needs its path and
+# its own FileCache, next to the backend's settings.
+class JsonFileBackend(StorageBackend):  # pylint: disable=too-many-instance-attributes
+    """
+    Keyed view over a JSON file holding a list of records (the original
+    layout of data/*.json). Every mutation rewrites the whole file.
+
+    With `cache=True` parsed records are kept in a FileCache, so repeated
+    reads only pay for a stat() until the file is changed by someone else.
+    With `cache=False` they are only kept during a `hold()`, so nothing
+    outlives the operation that parsed them.
+
+    While that cache is cold, reads prefer a binary snapshot next to the
+    file (see `snapshot_path`) as long as it was stamped with the file's
+    current signature. With `snapshot=True`, or once a snapshot exists,
+    every write refreshes it; the JSON file stays the source of truth.
+
+    With a `schema` id, writes whose records are all known to be valid also
+    write a stamp (see `stamp_path`) with the schema and a checksum of the
+    file; `trusted()` is True while the file still matches it.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        key_field: str,
+        snapshot: bool = False,
+        schema: Optional[str] = None,
+        cache: bool = True,
+    ) -> None:
+        self.path = Path(path)
+        self.key_field = key_field
+        self.snapshot = snapshot
+        self.snapshot_path = snapshot_path(self.path)
+        self.schema = schema
+        self.stamp_path = stamp_path(self.path)
+        self._cache = FileCache(self.path)
+        self._reader = FileCache(self.snapshot_path)
+        self._trust = FileCache(self.path, self.stamp_path)
+        self._rejected: List[RejectedRecord] = []
+        self.cache = cache
+        self._holds = 0
+        self._holds_lock = threading.Lock()
+
+    def paths(self) -> List[Path]:
+        """
+        Files whose signatures identify the current state of the backend.
+        """
+        return [self.path]
+
+    def _records(self) -> Dict[str, Record]:
+        cached = self._cache.get()
+        if cached is not None:
+            return cached
+
+        recover_commits(self.path.parent)
+        signature = self._cache.signature()
+        try:
+            data = read_file(self.path)
+        except OSError as exc:
+            print(f"[storage] Error reading JSON file '{self.path}': {exc}")
+            data = None
+        raw = decode_json(self.path, data, default=[]) if data is not None else []
+        if self.schema is not None and self._trust.get() is None:
+            matches = data is not None and self._stamp_matches(len(data), zlib.crc32(data))
+            self._trust.put(matches)
+        records: Dict[str, Record] = {}
+
+        if not isinstance(raw, list):
+            print(f"[storage] Invalid data format in '{self.path}'")
+            return records
+
+        rejected: List[RejectedRecord] = []
+        with metrics.timer("storage.validate", file=self.path.name):
+            for index, item in enumerate(raw):
+                reason = self._malformed(item)
+                if reason is None:
+                    records[item[self.key_field]] = item
+                else:
+                    rejected.append(RejectedRecord(reason, item, index=index))
+        self._rejected = rejected
+
+        if self._retain:
+            self._cache.put(records, signature)
+        return records
+
+    @property
+    def _retain(self) -> bool:
+        return self.cache or self._holds > 0
+
+    @contextmanager
+    def hold(self) -> Iterator[None]:
+        """
+        Keep the parsed records until the outermost hold ends, even with
+        `cache=False`.
+        """
+        with self._holds_lock:
+            self._holds += 1
+        try:
+            yield
+        finally:
+            with self._holds_lock:
+                self._holds -= 1
+                if not self._retain:
+                    self._cache.invalidate()
+
+    def _malformed(self, item: Any) -> Optional[str]:
+        """
+        Why 'item' cannot be stored under a key, or None if it can.
+        """
+        if not isinstance(item, dict):
+            return "not an object"
+        if not isinstance(item.get(self.key_field), str):
+            return f"missing or non-string '{self.key_field}'"
+        return None
+
+    def trusted(self) -> bool:
+        """
+        True if the stamp matches the schema and the file's checksum, or the
+        caller validated the current file with `mark_valid`.
+        """
+        if self.schema is None:
+            return False
+        cached = self._trust.get()
+        if cached is None:
+            cached = self._check_stamp()
+            self._trust.put(cached)
+        return cached
+
+    def _check_stamp(self) -> bool:
+        """
+        Compare the stamp with the file without loading it: the size is
+        checked against stat() first and the checksum is computed in chunks.
+        """
+        stamp = self._read_stamp()
+        try:
+            if stamp is None or stamp.get("size") != self.path.stat().st_size:
+                return False
+            checksum = file_crc32(self.path)
+        except OSError:
+            return False
+        return checksum is not None and self._stamp_matches(*checksum, stamp=stamp)
+
+    def _read_stamp(self) -> Optional[Dict[str, Any]]:
+        try:
+            stamp = json.loads(self.stamp_path.read_bytes())
+        except (OSError, ValueError):
+            return None
+        return stamp if isinstance(stamp, dict) else None
+
+    def _stamp_matches(
+        self, size: int, crc: int, stamp: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        if self.schema is None:
+            return False
+        if stamp is None:
+            stamp = self._read_stamp()
+        return stamp == _stamp(self.schema, size, crc)
+
+    def mark_valid(self) -> None:
+        """
+        Trust the current file content until it changes.
+        """
+        if self.schema is not None:
+            self._trust.put(True)
+
+    def rejected(self) -> List[RejectedRecord]:
+        """
+        Items the last full read of the file skipped as malformed.
+        """
+        return list(self._rejected)
+
+    def _fresh_snapshot(self) -> Optional[SnapshotReader]:
+        """
+        Return a reader over the snapshot if it matches the JSON file.
+        """
+        reader = self._reader.get()
+        if reader is None:
+            try:
+                reader = SnapshotReader(self.snapshot_path)
+            except (OSError, ValueError):
+                return None
+            self._reader.put(reader)
+
+        recover_commits(self.path.parent)
+        if reader.source != file_signature(self.path):
+            return None
+        return reader
+
+    def write_snapshot(self, records: Optional[Dict[str, Record]] = None) -> None:
+        """
+        Write the binary snapshot for 'records' (default: the current file
+        content). Failures only print an error, since reads fall back to
+        the JSON file.
+        """
+        if records is None:
+            records = self._records()
+        source = file_signature(self.path)
+        if source is None:
+            return
+        try:
+            write_atomic(self.snapshot_path, encode_snapshot(records, source))
+        except OSError as exc:
+            print(f"[storage] Error writing snapshot '{self.snapshot_path}': {exc}")
+
+    def scan(self) -> Iterator[Tuple[str, Record]]:
+        """
+        Iterate over (key, record) pairs in storage order.
+
+        With a warm cache this walks the parsed records; otherwise the file
+        is streamed with iter_json_array and nothing is retained.
+        """
+        cached = self._cache.get()
+        if cached is not None:
+            yield from list(cached.items())
+            return
+
+        reader = self._fresh_snapshot()
+        if reader is not None:
+            yield from reader
+            return
+
+        recover_commits(self.path.parent)
+        if self.trusted():
+            for item in iter_json_array(self.path):
+                yield item[self.key_field], item
+            self._rejected = []
+            return
+
+        rejected: List[RejectedRecord] = []
+        for index, item in enumerate(iter_json_array(self.path)):
+            reason = self._malformed(item)
+            if reason is None:
+                yield item[self.key_field], item
+            else:
+                rejected.append(RejectedRecord(reason, item, index=index))
+        self._rejected = rejected
+
+    def get(self, key: str) -> Optional[Record]:
+        """
+        Return the record stored under 'key', or None.
+        """
+        cached = self._cache.get()
+        if cached is None:
+            reader = self._fresh_snapshot()
+            if reader is not None:
+                metrics.inc("snapshot_reads_total", file=self.path.name)
+                return reader.get(key)
+        return self._records().get(key)
+
+    def exists(self, key: str) -> bool:
+        """
+        True if a record is stored under 'key'. With a cold cache this is a
+        binary search over the snapshot's sorted key index when one is fresh.
+        """
+        cached = self._cache.get()
+        if cached is None:
+            reader = self._fresh_snapshot()
+            if reader is not None:
+                return key in reader
+            cached = self._records()
+        return key in cached
+
+    def apply(self, puts: Dict[str, Record], deletes: Iterable[str]) -> None:
+        """
+        Apply a batch of puts and deletes with a single file rewrite.
+        """
+        payload, records, trusted = self.prepare(puts, deletes)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            write_atomic(self.path, payload)
+        except BaseException:
+            self._cache.invalidate()
+            raise
+        self.install(records, payload, trusted)
+
+    def extend(self, records: Iterable[Record]) -> int:
+        """
+        Append 'records', whose keys must not be stored yet, with a single
+        streamed rewrite: the current file and then 'records' are encoded
+        one record at a time into the temporary file renamed over it, so
+        memory does not grow with either. Return how many were appended.
+
+        As with `prepare`, malformed items of the current file are dropped
+        and the result stays trusted if the current content was.
+        """
+        trusted = self.trusted() or file_signature(self.path) is None
+        appended = 0
+
+        def items() -> Iterator[Record]:
+            nonlocal appended
+            for _, record in self.scan():
+                yield record
+            for record in records:
+                appended += 1
+                yield record
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            size, crc = write_atomic_chunks(self.path, _encode_array(items()))
+        finally:
+            self._cache.invalidate()
+        if self.schema is not None:
+            self._restamp(_stamp(self.schema, size, crc) if trusted else None)
+        if self.snapshot or self.snapshot_path.exists():
+            self.write_snapshot()
+        return appended
+
+    def stage(self, puts: Dict[str, Record], deletes: Iterable[str]) -> StagedWrite:
+        """
+        Prepare a batch for a multi-file `commit_files`: return the file
+        writes and a callback that installs the result after the commit.
+        """
+        payload, records, trusted = self.prepare(puts, deletes)
+        return {self.path: payload}, lambda: self.install(records, payload, trusted)
+
+    def invalidate(self) -> None:
+        """
+        Drop in-memory state after a failed commit.
+        """
+        self._cache.invalidate()
+        self._trust.invalidate()
+
+    def prepare(
+        self, puts: Dict[str, Record], deletes: Iterable[str]
+    ) -> Tuple[bytes, Dict[str, Record], bool]:
+        """
+        Compute the file content after a batch without writing it. Return
+        the serialized payload, the resulting records and whether they can
+        be stamped as trusted, for `install`.
+
+        Puts are assumed to be valid records; the result is trusted if the
+        existing content was (or there was none).
+        """
+        records = dict(self._records())
+        trusted = self.trusted() or file_signature(self.path) is None
+        records.update(puts)
+        for key in deletes:
+            records.pop(key, None)
+        with metrics.timer("storage.json_encode", file=self.path.name):
+            payload = json.dumps(list(records.values()), ensure_ascii=False, indent=2)
+        return payload.encode("utf-8"), records, trusted
+
+    def install(
+        self, records: Dict[str, Record], payload: bytes = b"", trusted: bool = False
+    ) -> None:
+        """
+        Record 'records' as the current file content after 'payload' from
+        `prepare` was written by an external commit, and refresh the stamp.
+        """
+        if self._retain:
+            self._cache.put(records)
+        else:
+            self._cache.invalidate()
+        if self.schema is not None:
+            self._restamp(make_stamp(self.schema, payload) if trusted else None)
+        if self.snapshot or self.snapshot_path.exists():
+            self.write_snapshot(records)
+
+    def _restamp(self, stamp: Optional[Dict[str, Any]]) -> None:
+        """
+        Write 'stamp' for the content just written, or remove the stamp if
+        it is None because the content is not known to be valid.
+        """
+        try:
+            if stamp is not None:
+                write_atomic(self.stamp_path, json.dumps(stamp).encode("utf-8"))
+            else:
+                self.stamp_path.unlink(missing_ok=True)
+        except OSError as exc:
+            print(f"[storage] Error writing stamp '{self.stamp_path}': {exc}")
+        self._trust.put(stamp is not None)
@@ -0,0 +1,344 @@
+"""
+Hash-sharded JSON collections: a write rewrites only the shards it touches.
+"""
+
+from __future__ import annotations
+
+import json
+import zlib
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from src.storage.base import RejectedRecord, StorageBackend
+from src.storage.files import (
+    FileCache,
+    Record,
+    StagedWrite,
+    commit_files,
+    load_json,
+    recover_commits,
+)
+from src.storage.json_file import JsonFileBackend, make_stamp
+
+
+SHARD_MANIFEST = "manifest.json"
+
+
+def shard_index(value: str, count: int) -> int:
+    """
+    Shard number of 'value' among 'count' shards. Uses CRC32 rather than
+    hash(), which is randomized per process.
+    """
+    return zlib.crc32(value.encode("utf-8")) % count
+
+
+def shard_path(directory: str | Path, index: int, count: int) -> Path:
+    """
+    File of shard 'index' in a layout of 'count' shards.
+    """
+    return Path(directory) / f"shard-{index:04d}-of-{count:04d}.json"
+
+
+# Puts and deletes of one shard within a batch.
+ShardBatch = Tuple[Dict[str, Record], List[str]]
+
+
+class _ShardLayout:
+    """
+    Shard count, sharding field and one JsonFileBackend per shard, plus
+    the key -> shard map for layouts not sharded by the key itself.
+    """
+
+    def __init__(self, backend: "ShardedJsonBackend", count: int, field: str) -> None:
+        self.count = count
+        self.field = field
+        self.by_key = field == backend.key_field
+        self.shards = [
+            JsonFileBackend(
+                shard_path(backend.directory, i, count), backend.key_field, schema=backend.schema
+            )
+            for i in range(count)
+        ]
+        self._locations = FileCache(*(shard.path for shard in self.shards))
+
+    def shard_of(self, key: str, record: Record) -> int:
+        """
+        Shard that 'record' belongs to.
+        """
+        value = key if self.by_key else record.get(self.field)
+        if not isinstance(value, str):
+            raise ValueError(f"record '{key}' has no string '{self.field}' to shard by")
+        return shard_index(value, self.count)
+
+    def locations(self) -> Dict[str, int]:
+        """
+        Shard of every key, for layouts not sharded by the key itself.
+        """
+        locations = self._locations.get()
+        if locations is None:
+            signature = self._locations.signature()
+            locations = {
+                key: i for i, shard in enumerate(self.shards) for key, _ in shard.scan()
+            }
+            self._locations.put(locations, signature)
+        return locations
+
+    def locate(self, key: str) -> Optional[int]:
+        """
+        Shard currently holding 'key', or None if it is not stored.
+        """
+        if self.by_key:
+            return shard_index(key, self.count)
+        return self.locations().get(key)
+
+    def plan(
+        self, puts: Dict[str, Record], deletes: Iterable[str]
+    ) -> Tuple[Dict[int, ShardBatch], Dict[str, int], List[str]]:
+        """
+        Split a batch by shard. Return the per-shard batches, the new shard
+        of every put key and the deleted keys that were stored.
+        """
+        batches: Dict[int, ShardBatch] = {}
+        moved: Dict[str, int] = {}
+        for key, record in puts.items():
+            target = self.shard_of(key, record)
+            current = self.locate(key)
+            if current is not None and current != target:
+                batches.setdefault(current, ({}, []))[1].append(key)
+            batches.setdefault(target, ({}, []))[0][key] = record
+            moved[key] = target
+        removed = []
+        for key in deletes:
+            current = self.locate(key)
+            if current is not None:
+                batches.setdefault(current, ({}, []))[1].append(key)
+                removed.append(key)
+        return batches, moved, removed
+
+    def relocate(
+        self, locations: Dict[str, int], moved: Dict[str, int], removed: List[str]
+    ) -> None:
+        """
+        Update the key -> shard map taken before a batch once it committed.
+        """
+        for key in removed:
+            locations.pop(key, None)
+        locations.update(moved)
+        self._locations.put(locations)
+
+
+class ShardedJsonBackend(StorageBackend):
+    """
+    Records partitioned into N JSON shard files by a CRC32 hash of one
+    field: the key by default, or another field such as hotel_id.
+
+    `manifest.json` in the directory records N and the field, and takes
+    precedence over the constructor arguments, which only describe a new
+    collection. A batch rewrites only the shards it touches, committed
+    together with commit_files. Every shard is a JsonFileBackend, so it
+    keeps its own cache and stamp. Change N with `reshard` while no
+    repository has the directory open.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        key_field: str,
+        shards: int = 8,
+        shard_field: Optional[str] = None,
+        schema: Optional[str] = None,
+    ) -> None:
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        self.directory = Path(directory)
+        self.key_field = key_field
+        self.schema = schema
+        self.manifest_path = self.directory / SHARD_MANIFEST
+        self._default = (shards, shard_field or key_field)
+        self._layout = FileCache(self.manifest_path)
+
+    def layout(self) -> _ShardLayout:
+        """
+        Current layout, re-read whenever the manifest changes.
+        """
+        layout = self._layout.get()
+        if layout is None:
+            recover_commits(self.directory)
+            count, field = self._default
+            manifest = load_json(self.manifest_path, default=None)
+            if isinstance(manifest, dict):
+                count = manifest.get("shards", count)
+                field = manifest.get("shard_field", field)
+            layout = _ShardLayout(self, count, field)
+            self._layout.put(layout)
+        return layout
+
+    def manifest(self, layout: _ShardLayout) -> bytes:
+        """
+        Serialized manifest describing 'layout'.
+        """
+        manifest = {"version": 1, "shards": layout.count, "shard_field": layout.field}
+        return json.dumps(manifest, indent=2).encode("utf-8")
+
+    def paths(self) -> List[Path]:
+        """
+        The manifest and every shard file of the current layout.
+        """
+        return [self.manifest_path, *(shard.path for shard in self.layout().shards)]
+
+    def scan(self) -> Iterator[Tuple[str, Record]]:
+        """
+        Iterate over (key, record) pairs shard by shard.
+        """
+        for shard in self.layout().shards:
+            yield from shard.scan()
+
+    def get(self, key: str) -> Optional[Record]:
+        """
+        Return the record stored under 'key', reading only its shard.
+        """
+        layout = self.layout()
+        index = layout.locate(key)
+        return layout.shards[index].get(key) if index is not None else None
+
+    def exists(self, key: str) -> bool:
+        """
+        True if a record is stored under 'key', asking only its shard.
+        """
+        layout = self.layout()
+        index = layout.locate(key)
+        return index is not None and layout.shards[index].exists(key)
+
+    def trusted(self) -> bool:
+        """
+        True if every shard is trusted.
+        """
+        return all(shard.trusted() for shard in self.layout().shards)
+
+    def mark_valid(self) -> None:
+        """
+        Trust every shard until it changes.
+        """
+        for shard in self.layout().shards:
+            shard.mark_valid()
+
+    def rejected(self) -> List[RejectedRecord]:
+        """
+        Items skipped as malformed by the last read of each shard.
+        """
+        return [item for shard in self.layout().shards for item in shard.rejected()]
+
+    def apply(self, puts: Dict[str, Record], deletes: Iterable[str]) -> None:
+        """
+        Apply a batch, rewriting only the shards it touches as one commit.
+        """
+        writes, install = self.stage(puts, deletes)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            commit_files(writes)
+        except BaseException:
+            self.invalidate()
+            raise
+        install()
+
+    def stage(self, puts: Dict[str, Record], deletes: Iterable[str]) -> StagedWrite:
+        """
+        Prepare a batch for a multi-file `commit_files` (see
+        JsonFileBackend.stage). The manifest is written with the first batch.
+        """
+        layout = self.layout()
+        locations = None if layout.by_key else layout.locations()
+        batches, moved, removed = layout.plan(puts, deletes)
+        writes, installs = self._stage_shards(layout, batches)
+        if writes and not self.manifest_path.exists():
+            writes[self.manifest_path] = self.manifest(layout)
+
+        def install() -> None:
+            for shard_install in installs:
+                shard_install()
+            self._layout.put(layout)
+            if locations is not None:
+                layout.relocate(locations, moved, removed)
+
+        return writes, install
+
+    @staticmethod
+    def _stage_shards(
+        layout: _ShardLayout, batches: Dict[int, ShardBatch]
+    ) -> Tuple[Dict[Path, bytes], List[Callable[[], None]]]:
+        """
+        Stage every touched shard; return their writes and install callbacks.
+        """
+        writes: Dict[Path, bytes] = {}
+        installs: List[Callable[[], None]] = []
+        for index, (shard_puts, shard_deletes) in sorted(batches.items()):
+            shard_writes, shard_install = layout.shards[index].stage(shard_puts, shard_deletes)
+            writes.update(shard_writes)
+            installs.append(shard_install)
+        return writes, installs
+
+    def invalidate(self) -> None:
+        """
+        Drop in-memory state after a failed commit.
+        """
+        self._layout.invalidate()
+
+
+def reshard(
+    directory: str | Path,
+    key_field: str,
+    shards: int,
+    shard_field: Optional[str] = None,
+    schema: Optional[str] = None,
+) -> int:
+    """
+    Offline: redistribute a sharded collection over 'shards' files (and
+    optionally a new sharding field) and return the number of records.
+    The new shards and manifest are committed together, then the files of
+    the old layout are removed. No repository may have the directory open.
+    """
+    if shards < 1:
+        raise ValueError("shards must be at least 1")
+    source = ShardedJsonBackend(directory, key_field, schema=schema)
+    if not source.manifest_path.exists():
+        raise ValueError(f"no sharded collection in '{directory}'")
+    old = source.layout()
+    stamp_schema = schema if schema is not None and source.trusted() else None
+    target = ShardedJsonBackend(directory, key_field, shards, shard_field or old.field, schema)
+    new = _ShardLayout(target, shards, shard_field or old.field)
+
+    buckets: List[Dict[str, Record]] = [{} for _ in range(shards)]
+    for key, record in source.scan():
+        buckets[new.shard_of(key, record)][key] = record
+
+    writes = _bucket_writes(new, buckets, stamp_schema)
+    writes[source.manifest_path] = target.manifest(new)
+    commit_files(writes)
+    _remove_stale(old, set(writes))
+    return sum(len(bucket) for bucket in buckets)
+
+
+def _bucket_writes(
+    layout: _ShardLayout, buckets: List[Dict[str, Record]], schema: Optional[str]
+) -> Dict[Path, bytes]:
+    """
+    File writes holding each bucket in its shard of 'layout', stamped for
+    'schema' unless it is None.
+    """
+    writes: Dict[Path, bytes] = {}
+    for shard, bucket in zip(layout.shards, buckets):
+        payload = json.dumps(list(bucket.values()), ensure_ascii=False, indent=2).encode("utf-8")
+        writes[shard.path] = payload
+        if schema is not None:
+            writes[shard.stamp_path] = json.dumps(make_stamp(schema, payload)).encode("utf-8")
+    return writes
+
+
+def _remove_stale(layout: _ShardLayout, keep: Set[Path]) -> None:
+    """
+    Delete the shard, stamp and snapshot files of 'layout' not in 'keep'.
+    """
+    for shard in layout.shards:
+        for path in (shard.path, shard.stamp_path, shard.snapshot_path):
+            if path not in keep:
+                path.unlink(missing_ok=True)
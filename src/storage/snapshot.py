@@ -0,0 +1,156 @@
+"""
+Binary snapshot of a JSON collection, read through mmap so one record can
+be looked up by key without parsing the rest.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.storage.files import Record, Signature
+
+
+# Binary snapshot layout (all integers little-endian):
+#   header   magic, version, flags, record count, signature of the source
+#            JSON file (mtime_ns, size, inode) and the offset of the index
+#   records  [u16 key length][key][u32 data length][compact JSON], in the
+#            same order as the JSON file
+#   index    u64 record offsets sorted by the UTF-8 bytes of their keys
+SNAPSHOT_MAGIC = b"HSNP"
+SNAPSHOT_VERSION = 1
+_SNAPSHOT_HEADER = struct.Struct("<4sHHIqqQQ")
+_KEY_LEN = struct.Struct("<H")
+_DATA_LEN = struct.Struct("<I")
+_OFFSET = struct.Struct("<Q")
+
+
+def snapshot_path(path: str | Path) -> Path:
+    """
+    Location of the binary snapshot that accompanies a JSON file.
+    """
+    return Path(path).with_suffix(".snap")
+
+
+def encode_snapshot(records: Dict[str, Record], source: Signature) -> bytes:
+    """
+    Serialize 'records' (in iteration order) to the binary snapshot format,
+    stamped with the signature of the JSON file they were read from.
+    """
+    chunks: List[bytes] = []
+    entries: List[Tuple[bytes, int]] = []
+    offset = _SNAPSHOT_HEADER.size
+    for key, record in records.items():
+        key_bytes = key.encode("utf-8")
+        data = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        chunk = b"".join(
+            (_KEY_LEN.pack(len(key_bytes)), key_bytes, _DATA_LEN.pack(len(data)), data)
+        )
+        entries.append((key_bytes, offset))
+        chunks.append(chunk)
+        offset += len(chunk)
+
+    entries.sort()
+    header = _SNAPSHOT_HEADER.pack(
+        SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0, len(entries), *source, offset
+    )
+    index = b"".join(_OFFSET.pack(record_offset) for _, record_offset in entries)
+    return b"".join([header, *chunks, index])
+
+
+class SnapshotReader:
+    """
+    Read-only view of a binary snapshot through mmap.
+
+    Lookups binary-search the sorted offset index and decode only the
+    matching record. Raises ValueError if the file is not a valid snapshot.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as fh:
+            if os.fstat(fh.fileno()).st_size < _SNAPSHOT_HEADER.size:
+                raise ValueError(f"'{self.path}' is not a snapshot file")
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, count, mtime_ns, size, inode, index_offset = (
+            _SNAPSHOT_HEADER.unpack_from(self._map, 0)
+        )
+        if magic != SNAPSHOT_MAGIC:
+            self.close()
+            raise ValueError(f"'{self.path}' is not a snapshot file")
+        if version != SNAPSHOT_VERSION:
+            self.close()
+            raise ValueError(f"unsupported snapshot version {version} in '{self.path}'")
+        if index_offset + count * _OFFSET.size != len(self._map):
+            self.close()
+            raise ValueError(f"truncated snapshot '{self.path}'")
+
+        self.source: Signature = (mtime_ns, size, inode)
+        self._count = count
+        self._index_offset = index_offset
+
+    def close(self) -> None:
+        """
+        Unmap the file.
+        """
+        self._map.close()
+
+    def __enter__(self) -> "SnapshotReader":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _key_at(self, offset: int) -> bytes:
+        (length,) = _KEY_LEN.unpack_from(self._map, offset)
+        start = offset + _KEY_LEN.size
+        return self._map[start:start + length]
+
+    def _read(self, offset: int) -> Tuple[str, Record, int]:
+        key = self._key_at(offset)
+        start = offset + _KEY_LEN.size + len(key)
+        (length,) = _DATA_LEN.unpack_from(self._map, start)
+        start += _DATA_LEN.size
+        return key.decode("utf-8"), json.loads(self._map[start:start + length]), start + length
+
+    def _find(self, key: str) -> Optional[int]:
+        target = key.encode("utf-8")
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            (offset,) = _OFFSET.unpack_from(self._map, self._index_offset + mid * _OFFSET.size)
+            if self._key_at(offset) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self._count:
+            return None
+        (offset,) = _OFFSET.unpack_from(self._map, self._index_offset + lo * _OFFSET.size)
+        return offset if self._key_at(offset) == target else None
+
+    def get(self, key: str) -> Optional[Record]:
+        """
+        Return the record stored under 'key', or None.
+        """
+        offset = self._find(key)
+        return self._read(offset)[1] if offset is not None else None
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._find(key) is not None
+
+    def __iter__(self) -> Iterator[Tuple[str, Record]]:
+        """
+        Iterate over (key, record) pairs in the order of the JSON file.
+        """
+        offset = _SNAPSHOT_HEADER.size
+        while offset < self._index_offset:
+            key, record, offset = self._read(offset)
+            yield key, record
@@ -0,0 +1,202 @@
+"""
+SQLite backend and the JSON to SQLite migration.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.storage.base import Bounds, StorageBackend, is_integer
+from src.storage.files import Record
+from src.storage.json_file import JsonFileBackend
+
+
+class SqliteBackend(StorageBackend):
+    """
+    One table per collection in an SQLite database running in WAL mode.
+
+    Records are stored as JSON text under an indexed primary key, so point
+    lookups and single-record writes no longer depend on collection size.
+
+    Each thread gets its own connection, so a reader never runs inside
+    another thread's open transaction.
+    """
+
+    def __init__(self, path: str | Path, table: str, key_field: str) -> None:
+        if not table.isidentifier():
+            raise ValueError("table must be a valid identifier")
+        self.path = Path(path)
+        self.table = table
+        self.key_field = key_field
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} "
+            "(key TEXT PRIMARY KEY, data TEXT NOT NULL) WITHOUT ROWID"
+        )
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """
+        The calling thread's connection, opened on first use.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Only this thread uses it; other threads may still close() it.
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def paths(self) -> List[Path]:
+        """
+        Files whose signatures identify the current state of the backend.
+        """
+        return [self.path, self.path.with_name(self.path.name + "-wal")]
+
+    def close(self) -> None:
+        """
+        Close the connections of every thread.
+        """
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+
+    def scan(self) -> Iterator[Tuple[str, Record]]:
+        """
+        Iterate over (key, record) pairs ordered by key.
+        """
+        cursor = self._conn.execute(f"SELECT key, data FROM {self.table} ORDER BY key")
+        for key, data in cursor:
+            yield key, json.loads(data)
+
+    def page(self, after: Optional[str], limit: int) -> List[Tuple[str, Record]]:
+        """
+        Keyset pagination over the primary key index.
+        """
+        if after is None:
+            rows = self._conn.execute(
+                f"SELECT key, data FROM {self.table} ORDER BY key LIMIT ?", (limit,)
+            )
+        else:
+            rows = self._conn.execute(
+                f"SELECT key, data FROM {self.table} WHERE key > ? ORDER BY key LIMIT ?",
+                (after, limit),
+            )
+        return [(key, json.loads(data)) for key, data in rows]
+
+    def get(self, key: str) -> Optional[Record]:
+        """
+        Return the record stored under 'key', or None.
+        """
+        row = self._conn.execute(
+            f"SELECT data FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def apply(self, puts: Dict[str, Record], deletes: Iterable[str]) -> None:
+        """
+        Apply a batch of upserts and deletes in one transaction.
+        """
+        with self._transaction() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, data) VALUES (?, ?)",
+                [(k, json.dumps(r, ensure_ascii=False)) for k, r in puts.items()],
+            )
+            conn.executemany(
+                f"DELETE FROM {self.table} WHERE key = ?", [(k,) for k in deletes]
+            )
+
+    def adjust(
+        self,
+        key: str,
+        field: str,
+        delta: int,
+        bounds: Bounds = Bounds(),
+        version_field: Optional[str] = None,
+    ) -> Optional[Record]:
+        """
+        Single-row conditional UPDATE; see StorageBackend.adjust.
+        """
+        path = f"$.{field}"
+        assignments = "?, json_extract(data, ?) + ?"
+        params: List[Any] = [path, path, delta]
+        if version_field is not None:
+            version = f"$.{version_field}"
+            assignments += ", ?, coalesce(json_extract(data, ?), 0) + 1"
+            params += [version, version]
+        sql = (
+            f"UPDATE {self.table} SET data = json_set(data, {assignments}) "
+            "WHERE key = ? AND json_type(data, ?) = 'integer'"
+        )
+        params += [key, path]
+        if bounds.minimum is not None:
+            sql += " AND json_extract(data, ?) + ? >= ?"
+            params += [path, delta, bounds.minimum]
+        if bounds.maximum_field is not None:
+            sql += " AND json_extract(data, ?) + ? <= json_extract(data, ?)"
+            params += [path, delta, f"$.{bounds.maximum_field}"]
+
+        with self._transaction() as conn:
+            updated = conn.execute(sql, params).rowcount
+            record = self.get(key)
+        if record is None or not is_integer(record.get(field)):
+            raise KeyError(key)
+        return record if updated else None
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+def copy_records(
+    source: StorageBackend, target: StorageBackend, batch_size: int = 10_000
+) -> int:
+    """
+    Copy every record from 'source' into 'target' in batches and return
+    the number of records copied.
+    """
+    count = 0
+    batch: Dict[str, Record] = {}
+    for key, record in source.scan():
+        batch[key] = record
+        if len(batch) >= batch_size:
+            target.apply(batch, ())
+            count += len(batch)
+            batch = {}
+    if batch:
+        target.apply(batch, ())
+        count += len(batch)
+    return count
+
+
+def migrate_json_to_sqlite(
+    json_path: str | Path, db_path: str | Path, table: str, key_field: str
+) -> int:
+    """
+    Import a data/*.json list file into an SQLite table. Existing rows with
+    the same key are replaced, so the migration can be re-run safely.
+    """
+    target = SqliteBackend(db_path, table, key_field)
+    try:
+        return copy_records(JsonFileBackend(json_path, key_field), target)
+    finally:
+        target.close()
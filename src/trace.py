@@ -0,0 +1,418 @@
+"""Grabación de cargas de trabajo reales y reproducción determinista.
+
+`TraceRecorder` envuelve los repositorios (de forma opcional: el código que
+no lo usa no cambia) y registra cada operación de `src.server.OPERATIONS`
+con sus argumentos, el instante, la duración y el resultado (`"ok"` o el
+tipo de la excepción) en un archivo JSONL comprimido con gzip:
+
+    with TraceRecorder("traffic.trace.gz") as recorder:
+        hotels = recorder.wrap(hotel_repo)
+        reservations = recorder.wrap(reservation_repo)
+        hotels.get_hotel("H1")
+        reservations.create_reservation(None, "C1", "H1")
+
+Las altas con ID asignado por el repositorio se graban con el ID que
+recibieron, así que al reproducir se crean las mismas entidades y las
+operaciones posteriores sobre ellas encuentran lo mismo.
+
+`replay` ejecuta la traza contra un directorio de datos nuevo (copiando
+opcionalmente un estado inicial) a la velocidad original o lo más rápido
+posible, y reporta la latencia por operación junto a la grabada y las
+operaciones cuyo resultado cambió. Con `--db` se reproduce sobre SQLite, en
+una copia de esa base dentro del directorio nuevo; la original no cambia:
+
+    python -m src.trace replay traffic.trace.gz --seed snapshot/ --speed 1
+    python -m src.trace replay traffic.trace.gz --db snapshot.db --json report.json
+
+La reproducción es secuencial: conserva el orden y, con `--speed`, los
+intervalos de la traza, pero no la concurrencia original.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import math
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from contextlib import closing
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from src.customer import CustomerRepository
+from src.hotel import HotelRepository
+from src.reservation import ReservationRepository
+from src.server import OPERATIONS, json_default, open_repositories
+
+
+TRACE_VERSION = 1
+
+# Argumentos posicionales y por nombre de una llamada grabada.
+Call = Tuple[List[Any], Dict[str, Any]]
+
+# Colección de cada tipo de repositorio, como en `OPERATIONS`.
+REPOSITORY_KINDS: Tuple[Tuple[Any, str], ...] = (
+    (CustomerRepository, "customers"),
+    (HotelRepository, "hotels"),
+    (ReservationRepository, "reservations"),
+)
+
+
+def _kind(repo: Any) -> str:
+    for repo_type, kind in REPOSITORY_KINDS:
+        if isinstance(repo, repo_type):
+            return kind
+    raise TypeError(f"cannot record {type(repo).__name__}")
+
+
+def _status(result: Any, error: Optional[BaseException]) -> Tuple[str, int]:
+    """Estado de una llamada y, en las masivas, cuántos elementos fallaron."""
+    if error is not None:
+        return type(error).__name__, 0
+    if isinstance(result, list):
+        return "ok", sum(1 for r in result if getattr(r, "error", None) is not None)
+    return "ok", 0
+
+
+def _with_keys(key_field: str, items: Sequence[Any], results: List[Any]) -> List[Any]:
+    """Elementos de un alta masiva con el ID asignado a los que no lo traían."""
+    return [
+        {**item, key_field: r.key} if isinstance(item, Mapping) and item.get(key_field) is None
+        else item
+        for item, r in zip(items, results)
+    ]
+
+
+def _assigned_ids(key_field: str, args: List[Any], kwargs: Dict[str, Any], result: Any) -> Call:
+    """Argumentos de un alta con el ID que asignó el repositorio en lugar de `None`.
+
+    En las altas masivas los elementos (posicionales o `items=`) llegan como
+    cualquier secuencia y se graban como lista.
+    """
+    if hasattr(result, key_field):
+        if args and args[0] is None:
+            args = [getattr(result, key_field), *args[1:]]
+        elif key_field in kwargs and kwargs[key_field] is None:
+            kwargs = {**kwargs, key_field: getattr(result, key_field)}
+    elif isinstance(result, list):
+        if args and isinstance(args[0], Sequence) and not isinstance(args[0], str):
+            args = [_with_keys(key_field, args[0], result), *args[1:]]
+        elif isinstance(kwargs.get("items"), Sequence):
+            kwargs = {**kwargs, "items": _with_keys(key_field, kwargs["items"], result)}
+    return args, kwargs
+
+
+class TraceRecorder:
+    """Graba las operaciones de los repositorios envueltos con `wrap`.
+
+    Es seguro entre hilos; el archivo se completa con `close()` (o al salir
+    del bloque `with`).
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._file = gzip.open(self.path, "wt", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        header = {"trace": TRACE_VERSION, "started": datetime.now(timezone.utc).isoformat()}
+        self._file.write(json.dumps(header) + "\n")
+
+    def wrap(self, repo: Any) -> "RecordedRepository":
+        """Devuelve `repo` con sus operaciones grabadas."""
+        return RecordedRepository(repo, self)
+
+    def record(
+        self,
+        op: str,
+        started: float,
+        seconds: float,
+        call: Call,
+        status: Tuple[str, int],
+    ) -> None:
+        """Agrega una llamada a la traza."""
+        args, kwargs = call
+        entry: Dict[str, Any] = {
+            "t": round(started - self._start, 6),
+            "op": op,
+            "us": round(seconds * 1e6),
+            "s": status[0],
+        }
+        if args:
+            entry["a"] = args
+        if kwargs:
+            entry["k"] = kwargs
+        if status[1]:
+            entry["f"] = status[1]
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=json_default)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self) -> None:
+        """Termina de escribir la traza."""
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self) -> "TraceRecorder":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+# Es un proxy: su interfaz pública es la del repositorio envuelto.
+class RecordedRepository:  # pylint: disable=too-few-public-methods
+    """Repositorio envuelto: las operaciones grabables se registran, lo demás pasa igual."""
+
+    def __init__(self, repo: Any, recorder: TraceRecorder) -> None:
+        self.repo = repo
+        self._recorder = recorder
+        self._ops = {op for op, (kind, _, _) in OPERATIONS.items() if kind == _kind(repo)}
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.repo, name)
+        if name not in self._ops:
+            return attr
+        return self._recorded(name, attr)
+
+    def _recorded(self, op: str, method: Callable[..., Any]) -> Callable[..., Any]:
+        key_field = self.repo.key_field
+
+        @wraps(method)
+        def call(*args: Any, **kwargs: Any) -> Any:
+            # Los iteradores de un solo uso se materializan para grabarlos.
+            args_list = [list(a) if isinstance(a, Iterator) else a for a in args]
+            kwargs = {k: list(v) if isinstance(v, Iterator) else v for k, v in kwargs.items()}
+            result, error = None, None
+            started = time.perf_counter()
+            try:
+                result = method(*args_list, **kwargs)
+                return result
+            except BaseException as exc:
+                # También `KeyboardInterrupt` y similares quedan grabados como error.
+                error = exc
+                raise
+            finally:
+                seconds = time.perf_counter() - started
+                logged = _assigned_ids(key_field, args_list, kwargs, result)
+                self._recorder.record(op, started, seconds, logged, _status(result, error))
+
+        return call
+
+
+def read_trace(path: str | Path) -> Iterator[Dict[str, Any]]:
+    """Recorre las llamadas de una traza (sin el encabezado)."""
+    with gzip.open(path, "rt", encoding="utf-8") as trace:
+        header = json.loads(trace.readline() or "{}")
+        if header.get("trace") != TRACE_VERSION:
+            raise ValueError(f"'{path}' is not a version {TRACE_VERSION} trace")
+        for line in trace:
+            if line.strip():
+                yield json.loads(line)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Percentil por rango más cercano de una lista no vacía."""
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+@dataclass
+class OperationStats:
+    """Latencias (en segundos) y resultados de una operación reproducida."""
+
+    replayed: List[float] = field(default_factory=list)
+    recorded: List[float] = field(default_factory=list)
+    errors: int = 0
+    mismatches: int = 0
+
+    def summary(self) -> Dict[str, Any]:
+        """Conteos y percentiles en milisegundos."""
+        return {
+            "count": len(self.replayed),
+            "errors": self.errors,
+            "mismatches": self.mismatches,
+            "p50_ms": percentile(self.replayed, 50) * 1000,
+            "p95_ms": percentile(self.replayed, 95) * 1000,
+            "p99_ms": percentile(self.replayed, 99) * 1000,
+            "max_ms": max(self.replayed) * 1000,
+            "recorded_p50_ms": percentile(self.recorded, 50) * 1000,
+            "recorded_p99_ms": percentile(self.recorded, 99) * 1000,
+        }
+
+
+@dataclass
+class ReplayReport:
+    """Resultado de `replay` por operación.
+
+    `mismatches` cuenta las llamadas cuyo estado (o número de elementos
+    fallidos) difiere del grabado.
+    """
+
+    operations: Dict[str, OperationStats] = field(default_factory=dict)
+    seconds: float = 0.0
+
+    @property
+    def calls(self) -> int:
+        """Llamadas reproducidas."""
+        return sum(len(s.replayed) for s in self.operations.values())
+
+    @property
+    def mismatches(self) -> int:
+        """Llamadas con un resultado distinto del grabado."""
+        return sum(s.mismatches for s in self.operations.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Reporte completo como diccionario JSON."""
+        return {
+            "calls": self.calls,
+            "seconds": self.seconds,
+            "mismatches": self.mismatches,
+            "operations": {op: s.summary() for op, s in sorted(self.operations.items())},
+        }
+
+    def format(self) -> str:
+        """Tabla de texto con una fila por operación."""
+        lines = [
+            f"{'operation':<26}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}"
+            f"{'p99 ms':>10}{'max ms':>10}{'rec p50':>10}"
+        ]
+        for op, stats in sorted(self.operations.items()):
+            s = stats.summary()
+            lines.append(
+                f"{op:<26}{s['count']:>8}{s['errors']:>8}{s['p50_ms']:>10.3f}"
+                f"{s['p95_ms']:>10.3f}{s['p99_ms']:>10.3f}{s['max_ms']:>10.3f}"
+                f"{s['recorded_p50_ms']:>10.3f}"
+            )
+        lines.append(
+            f"{self.calls} calls in {self.seconds:.2f}s, {self.mismatches} with a different result"
+        )
+        return "\n".join(lines)
+
+
+@dataclass
+class ReplayOptions:
+    """Opciones de `replay`.
+
+    `seed` es un directorio con el estado inicial a copiar y `db` una base
+    SQLite de partida: se reproduce sobre una copia suya en el directorio de
+    datos. Con `speed > 0` se respetan los intervalos grabados divididos por
+    `speed` (1 es la velocidad original); con 0 las llamadas no esperan.
+    """
+
+    seed: Optional[Path] = None
+    db: Optional[Path] = None
+    speed: float = 0.0
+    cache: bool = True
+
+
+REPLAY_DB = "replay.db"
+
+
+def prepare_data_dir(data_dir: Path, seed: Optional[Path] = None) -> None:
+    """Crea el directorio de datos, que debe estar vacío, con el contenido de `seed`."""
+    if data_dir.exists() and any(data_dir.iterdir()):
+        raise ValueError(f"data directory '{data_dir}' must be empty")
+    if seed is None:
+        data_dir.mkdir(parents=True, exist_ok=True)
+    else:
+        shutil.copytree(seed, data_dir, dirs_exist_ok=True,
+                        ignore=shutil.ignore_patterns("*.lock", "*.sock"))
+
+
+def copy_database(source: Path, target: Path) -> None:
+    """Copia la base SQLite `source` (incluido lo que aún está en su WAL) a `target`."""
+    if not source.exists():
+        raise ValueError(f"database '{source}' does not exist")
+    with closing(sqlite3.connect(f"file:{source}?mode=ro", uri=True)) as src, \
+            closing(sqlite3.connect(target)) as dst:
+        src.backup(dst)
+
+
+def _run(method: Callable[..., Any], entry: Dict[str, Any]) -> Tuple[float, Tuple[str, int]]:
+    """Ejecuta una llamada grabada; devuelve su duración y su estado."""
+    result, error = None, None
+    started = time.perf_counter()
+    try:
+        result = method(*entry.get("a", []), **entry.get("k", {}))
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        error = exc
+    return time.perf_counter() - started, _status(result, error)
+
+
+def replay(
+    trace: str | Path, data_dir: Path, options: Optional[ReplayOptions] = None
+) -> ReplayReport:
+    """Reproduce `trace` contra repositorios nuevos sobre `data_dir` (ver `ReplayOptions`)."""
+    options = options or ReplayOptions()
+    speed = options.speed
+    if speed < 0:
+        raise ValueError("speed must not be negative")
+    prepare_data_dir(data_dir, options.seed)
+    db = None
+    if options.db is not None:
+        db = data_dir / REPLAY_DB
+        copy_database(options.db, db)
+    repo = open_repositories(data_dir, db, cache=options.cache)
+    targets = {"customers": repo.customer_repo, "hotels": repo.hotel_repo, "reservations": repo}
+
+    report = ReplayReport()
+    begin = time.perf_counter()
+    for entry in read_trace(trace):
+        op = entry["op"]
+        if op not in OPERATIONS:
+            raise ValueError(f"unknown operation '{op}' in trace")
+        if speed > 0:
+            delay = entry["t"] / speed - (time.perf_counter() - begin)
+            if delay > 0:
+                time.sleep(delay)
+
+        seconds, status = _run(getattr(targets[OPERATIONS[op][0]], op), entry)
+        stats = report.operations.setdefault(op, OperationStats())
+        stats.replayed.append(seconds)
+        stats.recorded.append(entry["us"] / 1e6)
+        if status[0] != "ok":
+            stats.errors += 1
+        if status != (entry["s"], entry.get("f", 0)):
+            stats.mismatches += 1
+    report.seconds = time.perf_counter() - begin
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Punto de entrada de línea de comandos."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("replay", help="reproducir una traza")
+    run.add_argument("trace", type=Path)
+    run.add_argument("--data-dir", type=Path, default=None,
+                     help="directorio vacío para los datos (por defecto uno temporal)")
+    run.add_argument("--seed", type=Path, default=None, help="estado inicial a copiar")
+    run.add_argument("--speed", type=float, default=0.0,
+                     help="1 = velocidad original, 0 = lo más rápido posible")
+    run.add_argument("--db", type=Path, default=None,
+                     help="reproducir sobre una copia de esta base SQLite")
+    run.add_argument("--no-cache", action="store_true", help="repositorios sin caché")
+    run.add_argument("--json", type=Path, default=None, help="guardar el reporte en JSON")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or Path(tmp) / "data"
+        options = ReplayOptions(args.seed, args.db, args.speed, cache=not args.no_cache)
+        report = replay(args.trace, data_dir, options)
+    print(report.format())
+    if args.json is not None:
+        args.json.write_text(json.dumps(report.to_dict(), indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+"""Unidad de trabajo que agrupa cambios sobre varios repositorios.
+
+Uso:
+    with UnitOfWork(hotel_repo, reservation_repo) as uow:
+        hotel = uow.get(hotel_repo, "H1")
+        ...
+        uow.put(reservation_repo, reservation)
+
+Cada registro se lee como máximo una vez, los cambios quedan en memoria y
+se confirman al salir del bloque sin excepción. Los repositorios con
+`JsonFileBackend` o `ShardedJsonBackend` se escriben juntos con
+`commit_files` (archivos temporales más renombrado, recuperable tras una
+caída); los demás backends aplican su lote por separado: sus ajustes
+condicionales antes de esos archivos (y se revierten si su escritura
+falla) y el resto después. `include` agrega a ese mismo
+commit archivos ajenos a los repositorios, como los segmentos de archivo.
+
+La confirmación toma los candados de los archivos de todos los
+repositorios modificados. Las entidades con versión (`version_field`) se
+verifican contra lo almacenado: si otro hilo o proceso las cambió desde
+que se leyeron se lanza `ConflictError` sin escribir nada y la operación
+completa puede reintentarse. Lo mismo ocurre si una entidad que se leyó
+como inexistente y se va a crear ya existe al confirmar.
+"""
+
+from __future__ import annotations
+
+# pylint: disable=protected-access
+
+from contextlib import ExitStack
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from src import metrics
+from src.locking import locked
+from src.repository import ConflictError, Repository
+from src.storage import Bounds, JsonFileBackend, ShardedJsonBackend, StagedWrite, commit_files
+
+
+# (clave, campo, delta, límites)
+Adjustment = Tuple[str, str, int, Bounds]
+
+
+class _Staged:
+    """Cambios pendientes de un repositorio dentro de la unidad de trabajo."""
+
+    def __init__(self, repo: Repository[Any]) -> None:
+        self.repo = repo
+        self.view: Dict[str, Optional[Any]] = {}
+        # Claves leídas como inexistentes: escribirlas es un alta.
+        self.absent: Set[str] = set()
+        self.puts: Dict[str, Any] = {}
+        self.deletes: Set[str] = set()
+        self.adjustments: List[Adjustment] = []
+        # Si el backend ya conserva lo que parsea hasta el final de la unidad.
+        self.held = False
+
+    @property
+    def file_backed(self) -> bool:
+        """Indica si el repositorio se confirma reescribiendo su archivo."""
+        return isinstance(self.repo.backend, (JsonFileBackend, ShardedJsonBackend))
+
+    def drop_adjustments(self, key: str) -> None:
+        """Descarta ajustes pendientes de `key`, sustituidos por una escritura completa."""
+        self.adjustments = [a for a in self.adjustments if a[0] != key]
+
+    def add_adjustment(self, adjustment: Adjustment) -> None:
+        """Registra un ajuste, acumulándolo con uno previo compatible.
+
+        Dos ajustes del mismo campo, con los mismos límites y del mismo signo
+        se combinan: respetar el límite con la suma equivale a respetarlo en
+        cada paso, y el registro se actualiza una sola vez al confirmar.
+        """
+        key, field, delta, bounds = adjustment
+        for i, (k, f, d, b) in enumerate(self.adjustments):
+            if (k, f, b) == (key, field, bounds) and (d > 0) == (delta > 0):
+                self.adjustments[i] = (k, f, d + delta, b)
+                return
+        self.adjustments.append(adjustment)
+
+    @property
+    def created(self) -> List[str]:
+        """Claves pendientes de escribir que no existían al leerlas."""
+        return [key for key in self.puts if key in self.absent]
+
+    @property
+    def dirty(self) -> bool:
+        """Indica si hay cambios pendientes."""
+        return bool(self.puts or self.deletes or self.adjustments)
+
+
+class UnitOfWork:
+    """Contexto transaccional sobre uno o más repositorios."""
+
+    def __init__(self, *repos: Repository[Any], fsync: bool = False) -> None:
+        self.fsync = fsync
+        self._staged: Dict[int, _Staged] = {id(r): _Staged(r) for r in repos}
+        self._extra: List[StagedWrite] = []
+        self._held = ExitStack()
+
+    def __enter__(self) -> "UnitOfWork":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+    def _stage(self, repo: Repository[Any]) -> _Staged:
+        staged = self._staged.get(id(repo))
+        if staged is None:
+            staged = self._staged[id(repo)] = _Staged(repo)
+        if not staged.held:
+            # Lo leído se conserva hasta confirmar o descartar, aun sin caché.
+            self._held.enter_context(repo.backend.hold())
+            staged.held = True
+        return staged
+
+    def get(self, repo: Repository[Any], key: str) -> Optional[Any]:
+        """Devuelve una copia de la entidad, leyendo el backend solo una vez."""
+        staged = self._stage(repo)
+        if key not in staged.view:
+            entity = repo._get(key)
+            staged.view[key] = replace(entity) if entity is not None else None
+            if entity is None:
+                staged.absent.add(key)
+        return staged.view[key]
+
+    def put(self, repo: Repository[Any], entity: Any) -> None:
+        """Registra un alta o modificación."""
+        staged = self._stage(repo)
+        key = repo._key(entity)
+        staged.view[key] = entity
+        staged.puts[key] = entity
+        staged.deletes.discard(key)
+        staged.drop_adjustments(key)
+
+    def delete(self, repo: Repository[Any], key: str) -> None:
+        """Registra una baja."""
+        staged = self._stage(repo)
+        staged.view[key] = None
+        staged.puts.pop(key, None)
+        staged.deletes.add(key)
+        staged.drop_adjustments(key)
+
+    def adjust(
+        self,
+        repo: Repository[Any],
+        key: str,
+        field: str,
+        delta: int,
+        bounds: Bounds = Bounds(),
+    ) -> Optional[Any]:
+        """Ajusta un campo entero dentro de `bounds`, como `Repository._adjust`, en diferido.
+
+        Devuelve la entidad ajustada o `None` si se violaría un límite; lanza
+        `KeyError` si la entidad no existe. En backends que no son archivos
+        el ajuste se vuelve a verificar de forma atómica al confirmar.
+        """
+        entity = self.get(repo, key)
+        if entity is None:
+            raise KeyError(f"{repo.key_field} not found")
+
+        value = getattr(entity, field) + delta
+        if bounds.minimum is not None and value < bounds.minimum:
+            return None
+        if bounds.maximum_field is not None and value > getattr(entity, bounds.maximum_field):
+            return None
+        setattr(entity, field, value)
+
+        staged = self._stage(repo)
+        if staged.file_backed or key in staged.puts:
+            staged.puts[key] = entity
+        else:
+            staged.add_adjustment((key, field, delta, bounds))
+        return entity
+
+    def include(self, writes: Dict[Path, bytes], install: Callable[[], None]) -> None:
+        """Agrega archivos que se confirman junto con los repositorios de archivo.
+
+        `install` se llama después de confirmar, como el de `StorageBackend.stage`.
+        """
+        self._extra.append((writes, install))
+
+    def rollback(self) -> None:
+        """Descarta todos los cambios pendientes."""
+        self._extra.clear()
+        self._held.close()
+        for staged in self._staged.values():
+            staged.held = False
+            staged.view.clear()
+            staged.absent.clear()
+            staged.puts.clear()
+            staged.deletes.clear()
+            staged.adjustments.clear()
+
+    def commit(self) -> None:
+        """Persiste los cambios pendientes de todos los repositorios.
+
+        Todas las verificaciones (altas, versiones y límites de los ajustes)
+        se hacen antes de escribir nada. Si la escritura de los archivos
+        falla, los ajustes ya aplicados en otros backends se revierten.
+        """
+        dirty = [s for s in self._staged.values() if s.dirty]
+        files = [s for s in dirty if s.file_backed]
+        others = [s for s in dirty if not s.file_backed]
+
+        try:
+            with locked(p for s in dirty for p in s.repo.backend.paths()):
+                for staged in dirty:
+                    staged.repo._check_new(staged.created)
+                for staged in others:
+                    self._check_adjustments(staged)
+                    staged.repo._check_versions(self._records(staged))
+                writes, prepared = self._stage_files(files)
+
+                applied: List[Tuple[_Staged, Adjustment]] = []
+                try:
+                    for staged in others:
+                        self._commit_adjustments(staged, applied)
+                    self._commit_files(writes, prepared)
+                except BaseException:
+                    self._undo_adjustments(applied)
+                    raise
+
+                for staged in others:
+                    staged.repo._apply(staged.puts.values(), staged.deletes)
+        finally:
+            self.rollback()
+
+    @staticmethod
+    def _records(staged: _Staged) -> Dict[str, Dict[str, Any]]:
+        repo = staged.repo
+        with metrics.timer("repository.serialize", repo=type(repo).__name__):
+            return {k: repo._to_record(e) for k, e in staged.puts.items()}
+
+    @staticmethod
+    def _check_adjustments(staged: _Staged) -> None:
+        """Verifica que los ajustes, en orden, sigan dentro de sus límites, sin aplicarlos."""
+        records: Dict[str, Dict[str, Any]] = {}
+        for key, field, delta, bounds in staged.adjustments:
+            if key not in records:
+                stored = staged.repo.backend.get(key)
+                if stored is None:
+                    raise KeyError(f"{staged.repo.key_field} not found")
+                records[key] = dict(stored)
+            record = records[key]
+            record[field] += delta
+            if not bounds.allows(record, record[field]):
+                raise ConflictError(f"concurrent update conflict on {field} of '{key}'")
+
+    @staticmethod
+    def _commit_adjustments(
+        staged: _Staged, applied: List[Tuple[_Staged, Adjustment]]
+    ) -> None:
+        """Aplica los ajustes de `staged`, anotando en `applied` los que se escribieron."""
+        for adjustment in staged.adjustments:
+            key, field, delta, bounds = adjustment
+            adjusted = staged.repo._adjust(
+                key, field, delta, bounds.minimum, bounds.maximum_field
+            )
+            if adjusted is None:
+                raise ConflictError(f"concurrent update conflict on {field} of '{key}'")
+            applied.append((staged, adjustment))
+
+    @staticmethod
+    def _undo_adjustments(applied: List[Tuple[_Staged, Adjustment]]) -> None:
+        """Revierte, del último al primero, ajustes ya escritos."""
+        for staged, (key, field, delta, _) in reversed(applied):
+            staged.repo._adjust(key, field, -delta)
+
+    def _stage_files(self, files: List[_Staged]) -> Tuple[Dict[Path, bytes], List[Any]]:
+        """Verifica versiones y prepara la escritura de los repositorios de archivo."""
+        writes: Dict[Path, bytes] = {}
+        prepared = []
+        for staged in files:
+            repo = staged.repo
+            before = repo._capture_views()
+            puts = self._records(staged)
+            repo._check_versions(puts)
+            repo_writes, install = repo.backend.stage(puts, staged.deletes)
+            writes.update(repo_writes)
+            prepared.append((staged, before, install, puts))
+        # Los archivos extra van al final: el registro de intención del
+        # commit queda junto al primer archivo de repositorio.
+        for extra_writes, _ in self._extra:
+            writes.update(extra_writes)
+        return writes, prepared
+
+    def _commit_files(self, writes: Dict[Path, bytes], prepared: List[Any]) -> None:
+        try:
+            commit_files(writes, fsync=self.fsync)
+        except BaseException:
+            for staged, _, _, _ in prepared:
+                staged.repo.backend.invalidate()
+                staged.repo._invalidate_views()
+            raise
+
+        for staged, before, install, puts in prepared:
+            install()
+            staged.repo._advance_versions(staged.puts.values(), puts)
+            staged.repo._update_views(before, staged.puts.values(), staged.deletes)
+        for _, install in self._extra:
+            install()
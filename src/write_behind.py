@@ -0,0 +1,360 @@
+"""Escritura diferida (write-behind) con commit en grupo.
+
+Las mutaciones de los repositorios adjuntos se aplican a un estado en
+memoria y se escriben juntas cuando se acumulan `max_pending` o pasan
+`max_delay` segundos desde la primera pendiente. Los backends de archivo
+JSON de un mismo grupo se confirman en un solo `commit_files`, así que
+hoteles y reservas nunca quedan a medias entre sí.
+
+Uso:
+    with WriteBehind(max_pending=500, max_delay=0.05, fsync="flush") as wb:
+        wb.attach(hotel_repo, reservation_repo)
+        ...
+
+Políticas de `fsync`:
+    "none"    no fuerza los datos al disco; una caída del sistema puede
+              perder la última escritura además de lo pendiente.
+    "flush"   cada escritura de grupo se sincroniza con fsync.
+    "always"  cada mutación se escribe y sincroniza al momento, sin ventana
+              de durabilidad (equivale a no diferir).
+
+Lo pendiente se escribe con `flush()`, `close()` o al terminar el intérprete.
+
+Las mutaciones y la escritura de grupo toman, en ese orden, los candados de
+archivo (`src.locking`) de todos los backends del grupo y luego el del
+grupo, así que no se intercalan con otras escrituras. Aun así el grupo debe
+ser el único que escribe esos archivos: lo pendiente se calculó sobre lo
+que había al diferir la primera mutación, y si otro proceso (u otra
+instancia sin el grupo) los cambió entretanto, `flush()` lanza
+`ConflictError` y descarta lo pendiente en lugar de sobrescribir ese cambio.
+Si eso ocurre en una escritura de fondo (por tiempo o por umbral), el error
+se guarda y se lanza en la siguiente mutación, `flush()` o `close()`, así
+que quien escribe se entera de que se perdieron cambios ya aceptados.
+"""
+
+from __future__ import annotations
+
+import atexit
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src import metrics
+from src.locking import locked
+from src.repository import ConflictError
+from src.storage import (
+    Bounds,
+    JsonFileBackend,
+    Record,
+    RejectedRecord,
+    ShardedJsonBackend,
+    Signature,
+    StorageBackend,
+    commit_files,
+    file_signature,
+)
+
+
+FSYNC_POLICIES = ("none", "flush", "always")
+
+# Cambios pendientes por clave; `None` marca una baja.
+Pending = Dict[str, Optional[Record]]
+
+
+class WriteBehindBackend(StorageBackend):
+    """Backend que difiere las escrituras de otro dentro de un `WriteBehind`."""
+
+    def __init__(self, inner: StorageBackend, group: "WriteBehind") -> None:
+        self.inner = inner
+        self.group = group
+        self.key_field = inner.key_field
+        self._pending: Pending = {}
+        # Firma de los archivos de `inner` sobre la que se calculó lo pendiente.
+        self._base: Optional[Tuple[Optional[Signature], ...]] = None
+
+    def paths(self) -> List[Path]:
+        """Archivos de todo el grupo, para que sus candados se tomen juntos."""
+        return self.group.paths()
+
+    def _signature(self) -> Tuple[Optional[Signature], ...]:
+        return tuple(file_signature(p) for p in self.inner.paths())
+
+    def trusted(self) -> bool:
+        return self.inner.trusted()
+
+    def mark_valid(self) -> None:
+        self.inner.mark_valid()
+
+    def rejected(self) -> List[RejectedRecord]:
+        return self.inner.rejected()
+
+    def scan(self) -> Iterator[Tuple[str, Record]]:
+        with self.group.lock:
+            pending = dict(self._pending)
+        if not pending:
+            yield from self.inner.scan()
+            return
+        for key, record in self.inner.scan():
+            if key in pending:
+                record = pending.pop(key)
+                if record is None:
+                    continue
+            yield key, record
+        for key, record in pending.items():
+            if record is not None:
+                yield key, record
+
+    def get(self, key: str) -> Optional[Record]:
+        with self.group.lock:
+            if key in self._pending:
+                return self._pending[key]
+            return self.inner.get(key)
+
+    def page(self, after: Optional[str], limit: int) -> List[Tuple[str, Record]]:
+        with self.group.lock:
+            if not self._pending:
+                return self.inner.page(after, limit)
+        return super().page(after, limit)
+
+    def apply(self, puts: Dict[str, Record], deletes: Iterable[str]) -> None:
+        with locked(self.paths()), self.group.lock:
+            if self.group.closed:
+                raise ValueError("write-behind group is closed")
+            self.group.raise_failure()
+            if self._base is None:
+                self._base = self._signature()
+            self._pending.update(puts)
+            count = len(puts)
+            for key in deletes:
+                self._pending[key] = None
+                count += 1
+            self.group.added(count)
+
+    def adjust(
+        self,
+        key: str,
+        field: str,
+        delta: int,
+        bounds: Bounds = Bounds(),
+        version_field: Optional[str] = None,
+    ) -> Optional[Record]:
+        with locked(self.paths()), self.group.lock:
+            self.group.raise_failure()
+            return super().adjust(key, field, delta, bounds, version_field)
+
+    def take(self) -> Pending:
+        """Entrega y vacía los cambios pendientes (con el lock del grupo tomado)."""
+        pending, self._pending = self._pending, {}
+        return pending
+
+    def restore(self, pending: Pending) -> None:
+        """Devuelve cambios que no se pudieron escribir, debajo de los más nuevos."""
+        pending.update(self._pending)
+        self._pending = pending
+
+    def check_current(self) -> None:
+        """Lanza `ConflictError` si otro escritor cambió los archivos desde que se difirió.
+
+        Se llama con los candados de archivo tomados, antes de preparar la
+        escritura sobre el estado en memoria de `inner`.
+        """
+        if self._base is not None and self._signature() != self._base:
+            raise ConflictError(f"files of {self.inner.paths()[0]} changed outside the group")
+
+    def committed(self) -> None:
+        """Olvida la firma base tras escribir o descartar lo pendiente."""
+        if not self._pending:
+            self._base = None
+
+    def flush(self) -> None:
+        """Escribe lo pendiente de todo el grupo."""
+        self.group.flush()
+
+    def close(self) -> None:
+        """Escribe lo pendiente y cierra el grupo."""
+        self.group.close()
+
+
+class WriteBehind:  # pylint: disable=too-many-instance-attributes
+    """Grupo de backends diferidos que se escriben juntos.
+
+    Guarda su configuración (umbrales y `fsync`) junto al estado del grupo
+    (backends, pendientes, temporizador, cierre, error de fondo y su lock).
+    """
+
+    def __init__(
+        self, max_pending: int = 1000, max_delay: float = 0.05, fsync: str = "flush"
+    ) -> None:
+        if max_pending < 1:
+            raise ValueError("max_pending must be at least 1")
+        if max_delay < 0:
+            raise ValueError("max_delay must not be negative")
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {', '.join(FSYNC_POLICIES)}")
+        self.max_pending = max_pending
+        self.max_delay = max_delay
+        self.fsync = fsync
+        self.lock = threading.RLock()
+        self.backends: List[WriteBehindBackend] = []
+        self.pending = 0
+        self.closed = False
+        # Error de una escritura de fondo que descartó cambios, aún sin informar.
+        self.failure: Optional[ConflictError] = None
+        self._timer: Optional[threading.Timer] = None
+        atexit.register(self.close)
+
+    def __enter__(self) -> "WriteBehind":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def wrap(self, backend: StorageBackend) -> WriteBehindBackend:
+        """Devuelve `backend` envuelto para escribirse con este grupo."""
+        if self.closed:
+            raise ValueError("write-behind group is closed")
+        wrapped = WriteBehindBackend(backend, self)
+        with self.lock:
+            self.backends.append(wrapped)
+        return wrapped
+
+    def paths(self) -> List[Path]:
+        """Archivos de todos los backends del grupo."""
+        return [p for backend in list(self.backends) for p in backend.inner.paths()]
+
+    def attach(self, *repos: Any) -> None:
+        """Hace que los repositorios escriban a través de este grupo."""
+        for repo in repos:
+            if not isinstance(repo.backend, WriteBehindBackend):
+                repo.backend = self.wrap(repo.backend)
+
+    def added(self, count: int) -> None:
+        """Registra mutaciones nuevas (con el lock tomado) y escribe si toca.
+
+        Con `fsync="always"` la mutación se escribe ya y un fallo se propaga
+        como en un backend sin diferir. Si no, un fallo al alcanzar el umbral
+        se reporta y se reintenta tras `max_delay`, salvo un `ConflictError`,
+        que descarta lo pendiente y se lanza aquí mismo.
+        """
+        self.pending += count
+        if self.fsync == "always":
+            self.flush(keep_on_error=False)
+        elif self.pending >= self.max_pending:
+            self._try_flush()
+            self.raise_failure()
+        else:
+            self._schedule()
+
+    def raise_failure(self) -> None:
+        """Lanza, una sola vez, el `ConflictError` de una escritura de fondo."""
+        failure, self.failure = self.failure, None
+        if failure is not None:
+            raise failure
+
+    def _schedule(self) -> None:
+        if self._timer is None:
+            self._timer = threading.Timer(self.max_delay, self._try_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _try_flush(self) -> None:
+        try:
+            self.flush()
+        except ConflictError as exc:
+            print(f"[write_behind] Pending changes discarded: {exc}")
+            with self.lock:
+                self.failure = exc
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            print(f"[write_behind] Flush failed, will retry: {exc}")
+            with self.lock:
+                if not self.closed:
+                    self._schedule()
+
+    def flush(self, keep_on_error: bool = True) -> None:
+        """Escribe ahora todo lo pendiente del grupo.
+
+        Si la escritura falla se relanza la excepción; los cambios siguen
+        pendientes salvo con `keep_on_error=False` o si es un `ConflictError`
+        (otro escritor cambió los archivos), que descarta lo pendiente de
+        todo el grupo para no escribirlo a medias. Después de escribir se
+        lanza el `ConflictError` de una escritura de fondo anterior, si lo hay.
+        """
+        with locked(self.paths()), self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            batches = [(b, p) for b in self.backends for p in (b.take(),) if p]
+            if not batches:
+                self.pending = 0
+                self.raise_failure()
+                return
+            try:
+                with metrics.timer("write_behind.flush"):
+                    self._commit(batches)
+            except ConflictError:
+                self.pending = 0
+                for backend in self.backends:
+                    backend.committed()
+                raise
+            except BaseException:
+                if keep_on_error:
+                    for backend, pending in batches:
+                        backend.restore(pending)
+                else:
+                    self.pending = 0
+                raise
+            for backend, _ in batches:
+                backend.committed()
+            metrics.inc("write_behind_flushes_total")
+            metrics.inc("write_behind_records_total", sum(len(p) for _, p in batches))
+            self.pending = 0
+            self.raise_failure()
+
+    def _commit(self, batches: List[Tuple[WriteBehindBackend, Pending]]) -> None:
+        writes: Dict[Path, bytes] = {}
+        installs: List[Callable[[], None]] = []
+        staged: List[StorageBackend] = []
+        others: List[Tuple[StorageBackend, Dict[str, Record], List[str]]] = []
+        file_backed = [
+            b for b, _ in batches if isinstance(b.inner, (JsonFileBackend, ShardedJsonBackend))
+        ]
+        for backend in file_backed:
+            try:
+                backend.check_current()
+            except ConflictError:
+                for stale in file_backed:
+                    stale.inner.invalidate()
+                raise
+        for backend, pending in batches:
+            puts = {k: r for k, r in pending.items() if r is not None}
+            deletes = [k for k, r in pending.items() if r is None]
+            inner = backend.inner
+            if isinstance(inner, (JsonFileBackend, ShardedJsonBackend)):
+                inner_writes, install = inner.stage(puts, deletes)
+                writes.update(inner_writes)
+                installs.append(install)
+                staged.append(inner)
+            else:
+                others.append((inner, puts, deletes))
+
+        try:
+            commit_files(writes, fsync=self.fsync != "none")
+        except BaseException:
+            for inner in staged:
+                inner.invalidate()
+            raise
+        for install in installs:
+            install()
+        for inner, puts, deletes in others:
+            inner.apply(puts, deletes)
+
+    def close(self) -> None:
+        """Escribe lo pendiente y deja de aceptar mutaciones, aunque la escritura falle."""
+        with locked(self.paths()), self.lock:
+            if self.closed:
+                return
+            try:
+                self.flush()
+            finally:
+                self.closed = True
+                atexit.unregister(self.close)
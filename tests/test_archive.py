@@ -0,0 +1,156 @@
+import gzip
+import json
+import unittest
+from datetime import date
+from pathlib import Path
+import tempfile
+from unittest import mock
+
+from src.archive import ColdArchive
+from src.compact import main
+from src.customer import CustomerRepository
+from src.hotel import HotelRepository
+from src.reservation import ReservationRepository
+from src.storage import SqliteBackend, commit_files, load_json
+
+
+class TestColdArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self.tmp.name) / "reservations.archive"
+        self.archive = ColdArchive(self.directory, "reservation_id")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def append(self, archive, *keys):
+        writes, install = archive.stage(
+            {k: {"reservation_id": k, "active": False} for k in keys}, "2026-01-01"
+        )
+        commit_files(writes)
+        install()
+
+    def test_segments_are_compressed_and_append_only(self):
+        self.assertIsNone(self.archive.get("R1"))
+        self.append(self.archive, "R1", "R2")
+        first = (self.directory / "segment-000001.json.gz").read_bytes()
+        self.append(self.archive, "R3")
+
+        self.assertEqual((self.directory / "segment-000001.json.gz").read_bytes(), first)
+        self.assertEqual(json.loads(gzip.decompress(first))[1]["reservation_id"], "R2")
+        manifest = load_json(self.directory / "manifest.json", None)
+        self.assertEqual([s["records"] for s in manifest["segments"]], [2, 1])
+
+        fresh = ColdArchive(self.directory, "reservation_id")
+        self.assertEqual(fresh.get("R3")["reservation_id"], "R3")
+        self.assertIn("R1", fresh)
+        self.assertEqual(len(fresh), 3)
+        self.assertEqual([k for k, _ in fresh.scan()], ["R1", "R2", "R3"])
+
+    def test_misses_skip_segments_by_bloom_filter(self):
+        self.append(self.archive, *(f"R{i}" for i in range(200)))
+        fresh = ColdArchive(self.directory, "reservation_id")
+        with mock.patch("src.archive.gzip.decompress", wraps=gzip.decompress) as decompress:
+            misses = sum(f"X{i}" in fresh for i in range(100))
+            self.assertEqual(misses, 0)
+            self.assertLessEqual(decompress.call_count, 5)
+            self.assertIn("R7", fresh)
+
+    def test_index_follows_other_writers(self):
+        self.assertNotIn("R1", self.archive)
+        self.append(ColdArchive(self.directory, "reservation_id"), "R1")
+        self.assertIn("R1", self.archive)
+
+
+class TestArchiveReservations(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name)
+        self.customer_repo = CustomerRepository(path=self.base / "customers.json")
+        self.hotel_repo = HotelRepository(path=self.base / "hotels.json")
+        self.customer_repo.create_customer("C1", "Cesar")
+        self.hotel_repo.create_hotel("H1", "Hotel WYNY", 5)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def repo(self, **kwargs):
+        return ReservationRepository(
+            path=self.base / "reservations.json",
+            customer_repo=self.customer_repo,
+            hotel_repo=self.hotel_repo,
+            **kwargs,
+        )
+
+    def test_compaction_moves_old_cancellations(self):
+        repo = self.repo(cache=True)
+        for rid in ("R1", "R2", "R3"):
+            repo.create_reservation(rid, "C1", "H1")
+        repo.cancel_reservation("R1")
+        repo.cancel_reservation("R2")
+        today = date.today()
+        self.assertEqual(repo.get_reservation("R1").canceled_on, today.isoformat())
+
+        self.assertEqual(repo.archive_reservations(retention_days=1, today=today), 0)
+        moved = repo.archive_reservations(retention_days=1, today=date.fromordinal(
+            today.toordinal() + 2
+        ))
+        self.assertEqual(moved, 2)
+
+        hot = load_json(self.base / "reservations.json", [])
+        self.assertEqual([r["reservation_id"] for r in hot], ["R3"])
+        self.assertEqual([r.reservation_id for r in repo.list_reservations()], ["R3"])
+
+        reopened = self.repo()
+        archived = reopened.get_reservation("R1")
+        self.assertFalse(archived.active)
+        self.assertEqual(archived.canceled_on, today.isoformat())
+        with self.assertRaises(ValueError):
+            reopened.create_reservation("R2", "C1", "H1")
+        with self.assertRaises(ValueError):
+            reopened.cancel_reservation("R2")
+        with self.assertRaises(KeyError):
+            reopened.cancel_reservation("R9")
+
+    def test_legacy_cancellations_are_archived(self):
+        repo = self.repo()
+        (self.base / "reservations.json").write_text(json.dumps([
+            {"reservation_id": "R1", "customer_id": "C1", "hotel_id": "H1", "active": False},
+            {"reservation_id": "R2", "customer_id": "C1", "hotel_id": "H1", "active": False,
+             "check_in": "2099-01-01", "check_out": "2099-01-03"},
+        ]), encoding="utf-8")
+        self.assertEqual(repo.archive_reservations(retention_days=30), 1)
+        self.assertEqual(repo.get_reservation("R1").reservation_id, "R1")
+        self.assertEqual(len(repo.list_reservations()), 1)
+
+    def test_segment_and_hot_file_commit_together(self):
+        repo = self.repo()
+        repo.create_reservation("R1", "C1", "H1")
+        repo.cancel_reservation("R1")
+        with mock.patch("src.unit_of_work.commit_files") as commit:
+            repo.archive_reservations(retention_days=0)
+        names = sorted(p.name for p in commit.call_args.args[0])
+        self.assertEqual(names, [
+            "manifest.json", "reservations.json", "segment-000001.bloom", "segment-000001.json.gz",
+        ])
+
+    def test_other_backends_and_cli(self):
+        backend = SqliteBackend(self.base / "reservations.db", "reservations", "reservation_id")
+        repo = self.repo(backend=backend)
+        repo.create_reservation("R1", "C1", "H1")
+        repo.cancel_reservation("R1")
+        self.assertEqual(repo.archive_reservations(retention_days=0), 1)
+        self.assertIsNone(backend.get("R1"))
+        self.assertFalse(repo.get_reservation("R1").active)
+        backend.close()
+
+        legacy = self.repo()
+        legacy.create_reservation("R2", "C1", "H1")
+        legacy.cancel_reservation("R2")
+        with mock.patch("builtins.print"):
+            main(["--path", str(self.base / "reservations.json"), "--retention-days", "0"])
+        self.assertIn("R2", self.repo().archive)
+
+
+if __name__ == "__main__":
+    unittest.main()
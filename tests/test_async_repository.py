@@ -0,0 +1,146 @@
+import asyncio
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src.async_repository import (
+    AsyncCustomerRepository,
+    AsyncHotelRepository,
+    AsyncReservationRepository,
+)
+from src.customer import CustomerRepository
+from src.hotel import HotelRepository
+from src.reservation import ReservationRepository
+from src.storage import commit_files
+
+
+class TestAsyncRepositories(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        base = Path(self.tmp.name)
+        self.customer_repo = CustomerRepository(path=base / "customers.json", cache=True)
+        self.hotel_repo = HotelRepository(path=base / "hotels.json", cache=True)
+        self.reservation_repo = ReservationRepository(
+            path=base / "reservations.json",
+            customer_repo=self.customer_repo,
+            hotel_repo=self.hotel_repo,
+            cache=True,
+        )
+        self.customers = AsyncCustomerRepository(self.customer_repo)
+        self.hotels = AsyncHotelRepository(self.hotel_repo)
+        self.reservations = AsyncReservationRepository(self.reservation_repo)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    async def test_round_trip(self):
+        await self.customers.create_customer("C1", "Ana")
+        await self.hotels.create_hotel("H1", "Hotel", 2)
+        reservation = await self.reservations.create_reservation("R1", "C1", "H1")
+
+        self.assertEqual(await self.reservations.get_reservation("R1"), reservation)
+        self.assertEqual((await self.hotels.get_hotel("H1")).rooms_available, 1)
+        await self.reservations.cancel_reservation("R1")
+        self.assertFalse((await self.reservations.get_reservation("R1")).active)
+        self.assertEqual((await self.hotels.get_hotel("H1")).rooms_available, 2)
+        self.assertEqual(
+            [c.customer_id async for c in self.customers.iter_customers(page_size=1)], ["C1"]
+        )
+
+    async def test_errors_are_raised_per_call(self):
+        await self.customers.create_customer("C1", "Ana")
+        with self.assertRaises(ValueError):
+            await self.customers.create_customer("C1", "Otra")
+        with self.assertRaises(KeyError):
+            await self.reservations.create_reservation("R1", "C1", "H404")
+        with self.assertRaises(KeyError):
+            await self.reservations.cancel_reservation("R404")
+
+    async def test_failing_request_does_not_fail_its_batch(self):
+        with mock.patch.object(
+            self.customer_repo, "create_customers_bulk",
+            wraps=self.customer_repo.create_customers_bulk,
+        ) as bulk:
+            results = await asyncio.gather(
+                self.customers.create_customer("C1", "Ana"),
+                self.customers.create_customer("C2", 123),
+                self.customers.create_customer("C3", "Luis"),
+                self.customers.create_customer("C4", "Eva"),
+                return_exceptions=True,
+            )
+
+        self.assertIsInstance(results[1], AttributeError)
+        self.assertEqual([r.name for i, r in enumerate(results) if i != 1],
+                         ["Ana", "Luis", "Eva"])
+        self.assertIsNone(await self.customers.get_customer("C2"))
+        self.assertEqual(len(await self.customers.list_customers()), 3)
+        self.assertLess(bulk.call_count, 6)
+
+    async def test_reads_do_not_wait_for_each_other(self):
+        await self.customers.create_customer("C1", "Ana")
+        release = threading.Event()
+        get_customer = self.customer_repo.get_customer
+
+        def slow_get(customer_id):
+            release.wait(5)
+            return get_customer(customer_id)
+
+        with mock.patch.object(self.customer_repo, "get_customer", side_effect=slow_get):
+            slow = asyncio.ensure_future(self.customers.get_customer("C1"))
+            await asyncio.sleep(0.05)
+            listed = await asyncio.wait_for(self.customers.list_customers(), 2)
+            release.set()
+            self.assertEqual((await slow).name, "Ana")
+        self.assertEqual([c.name for c in listed], ["Ana"])
+
+    async def test_archive_reservations(self):
+        await self.customers.create_customer("C1", "Ana")
+        await self.hotels.create_hotel("H1", "Hotel", 2)
+        await self.reservations.create_reservation("R1", "C1", "H1")
+        await self.reservations.cancel_reservation("R1")
+        self.assertEqual(await self.reservations.archive_reservations(retention_days=0), 1)
+        self.assertEqual(await self.reservations.list_reservations(), [])
+        self.assertFalse((await self.reservations.get_reservation("R1")).active)
+
+    async def test_concurrent_bookings_are_coalesced(self):
+        await self.customers.create_customer("C1", "Ana")
+        await self.hotels.create_hotel("H1", "Hotel", 250)
+
+        ticks = 0
+        stop = asyncio.Event()
+
+        async def ticker():
+            nonlocal ticks
+            while not stop.is_set():
+                ticks += 1
+                await asyncio.sleep(0)
+
+        with mock.patch("src.unit_of_work.commit_files", wraps=commit_files) as commit:
+            ticking = asyncio.create_task(ticker())
+            started = time.perf_counter()
+            results = await asyncio.gather(
+                *(
+                    self.reservations.create_reservation(f"R{i}", "C1", "H1")
+                    for i in range(300)
+                ),
+                return_exceptions=True,
+            )
+            stop.set()
+            await ticking
+
+        errors = [r for r in results if isinstance(r, Exception)]
+        self.assertEqual(len(errors), 50)
+        self.assertTrue(all(isinstance(e, ValueError) for e in errors))
+        self.assertEqual((await self.hotels.get_hotel("H1")).rooms_available, 0)
+        self.assertEqual(await self.reservations.count_active("H1"), 250)
+        self.assertGreater(commit.call_count, 0)
+        self.assertLess(commit.call_count, 300)
+        self.assertLess(time.perf_counter() - started, 30)
+        self.assertGreater(ticks, commit.call_count)
+
+
+if __name__ == "__main__":
+    unittest.main()
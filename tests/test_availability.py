@@ -0,0 +1,46 @@
+import random
+import unittest
+from datetime import date
+
+from src.availability import OccupancyTree, parse_range
+
+
+class TestOccupancyTree(unittest.TestCase):
+    def test_matches_brute_force(self):
+        rng = random.Random(7)
+        tree = OccupancyTree()
+        base = date(2026, 1, 1).toordinal()
+        days = [0] * 400
+
+        for _ in range(300):
+            start = rng.randrange(0, 399)
+            end = rng.randrange(start + 1, 400)
+            delta = rng.choice([1, 1, 1, -1])
+            tree.add(base + start, base + end, delta)
+            for d in range(start, end):
+                days[d] += delta
+
+            q_start = rng.randrange(0, 399)
+            q_end = rng.randrange(q_start + 1, 400)
+            self.assertEqual(
+                tree.max(base + q_start, base + q_end), max(days[q_start:q_end])
+            )
+
+    def test_empty_tree_is_zero(self):
+        self.assertEqual(OccupancyTree().max(10, 20), 0)
+
+
+class TestParseRange(unittest.TestCase):
+    def test_accepts_dates_and_iso_strings(self):
+        start, end = parse_range("2026-03-01", date(2026, 3, 4))
+        self.assertEqual(end - start, 3)
+
+    def test_rejects_empty_or_invalid_ranges(self):
+        with self.assertRaises(ValueError):
+            parse_range("2026-03-04", "2026-03-04")
+        with self.assertRaises(ValueError):
+            parse_range("2026-13-01", "2026-13-05")
+
+
+if __name__ == "__main__":
+    unittest.main()
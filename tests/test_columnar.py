@@ -0,0 +1,96 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.columnar import HotelColumns, ReservationColumns
+from src.customer import CustomerRepository
+from src.hotel import Hotel, HotelRepository
+from src.reservation import Reservation, ReservationRepository
+
+
+class TestHotelColumns(unittest.TestCase):
+    def test_put_get_and_replace(self):
+        columns = HotelColumns(Hotel, [Hotel("H1", "Hotel 1", 5, 5), Hotel("H2", "Hotel 2", 3, 1)])
+        columns.put(Hotel("H1", "Renamed", 5, 2))
+
+        self.assertEqual(len(columns), 2)
+        self.assertEqual(columns.get("H1"), Hotel("H1", "Renamed", 5, 2))
+        self.assertEqual(columns.row("H2"), 1)
+        self.assertIsNone(columns.get("H3"))
+        self.assertNotIn("H3", columns)
+        with self.assertRaises(KeyError):
+            columns.row("H3")
+
+
+class TestReservationColumns(unittest.TestCase):
+    def test_round_trip_many(self):
+        reservations = [
+            Reservation(
+                f"R{i}",
+                f"C{i % 37}",
+                f"H{i % 5}",
+                active=i % 3 != 0,
+                check_in="2026-03-01" if i % 2 else None,
+                check_out="2026-03-04" if i % 2 else None,
+            )
+            for i in range(500)
+        ]
+        columns = ReservationColumns(Reservation, reservations)
+
+        self.assertEqual(len(columns), 500)
+        self.assertEqual(list(columns), reservations)
+        for reservation in reservations:
+            self.assertIn(reservation.reservation_id, columns)
+            self.assertEqual(columns.get(reservation.reservation_id), reservation)
+        self.assertIsNone(columns.get("R500"))
+
+    def test_replace_and_set_active(self):
+        columns = ReservationColumns(Reservation, [Reservation("R1", "C1", "H1")])
+        columns.put(Reservation("R1", "C2", "H1", check_in="2026-01-01", check_out="2026-01-02"))
+        columns.set_active("R1", False)
+
+        self.assertEqual(len(columns), 1)
+        self.assertEqual(
+            columns.get("R1"),
+            Reservation("R1", "C2", "H1", False, "2026-01-01", "2026-01-02"),
+        )
+        with self.assertRaises(KeyError):
+            columns.set_active("R2", True)
+
+    def test_remove_compacts_rows(self):
+        reservations = [Reservation(f"R{i}", "C1", f"H{i}", check_in="2026-01-01",
+                                    check_out="2026-01-02") for i in range(5)]
+        columns = ReservationColumns(Reservation, reservations)
+        columns.remove(["R1", "R3", "R9"])
+
+        self.assertEqual(list(columns), [reservations[0], reservations[2], reservations[4]])
+        self.assertEqual(columns.row("R4"), 2)
+        self.assertNotIn("R1", columns)
+
+
+class TestRepositoryColumns(unittest.TestCase):
+    def test_columns_follow_repository_writes(self):
+        with tempfile.TemporaryDirectory() as d:
+            base = Path(d)
+            customers = CustomerRepository(path=base / "customers.json")
+            hotels = HotelRepository(path=base / "hotels.json")
+            repo = ReservationRepository(
+                path=base / "reservations.json", customer_repo=customers, hotel_repo=hotels
+            )
+            customers.create_customer("C1", "Ana")
+            hotels.create_hotel("H1", "Hotel", 3)
+            repo.create_reservation("R1", "C1", "H1")
+            columns, hotel_columns = repo.columns(), hotels.columns()
+
+            repo.create_reservation("R2", "C1", "H1")
+            repo.cancel_reservation("R1")
+            self.assertIs(repo.columns(), columns)
+            self.assertEqual(list(columns), repo.list_reservations())
+            self.assertEqual(hotel_columns.get("H1"), hotels.get_hotel("H1"))
+
+            repo.archive_reservations(retention_days=0)
+            self.assertEqual([r.reservation_id for r in repo.columns()], ["R2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,11 @@
 import unittest
+from dataclasses import asdict
 from pathlib import Path
 import tempfile
+from unittest import mock
 
 from src.customer import CustomerRepository
+from src.storage import JournalBackend, SqliteBackend, save_json
 
 
 class TestCustomerRepository(unittest.TestCase):
@@ -55,5 +58,198 @@ class TestCustomerRepository(unittest.TestCase):
         self.assertEqual(len(customers), 2)
 
 
+class TestCachedCustomerRepository(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "customers.json"
+        self.repo = CustomerRepository(path=self.path, cache=True)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_lookups_reuse_loaded_customers(self):
+        self.repo.create_customer("C1", "Cesar")
+        first = self.repo.get_customer("C1")
+        with mock.patch.object(self.repo.backend, "scan") as scan:
+            self.assertEqual(self.repo.get_customer("C1"), first)
+        scan.assert_not_called()
+
+    def test_returned_customers_do_not_alias_the_cache(self):
+        self.repo.create_customer("C1", "Cesar")
+        self.repo.get_customer("C1").name = "Cambiado"
+        self.repo.list_customers()[0].name = "Cambiado"
+        next(self.repo.iter_customers()).name = "Cambiado"
+        self.assertEqual(self.repo.get_customer("C1").name, "Cesar")
+
+        updated = self.repo.update_customer("C1", "Ana")
+        updated.name = "Cambiado"
+        self.assertEqual(self.repo.get_customer("C1").name, "Ana")
+
+    def test_external_write_is_detected(self):
+        self.repo.create_customer("C1", "Cesar")
+        other = CustomerRepository(path=self.path)
+        other.update_customer("C1", "Cesar Iracheta Largo")
+        self.assertEqual(self.repo.get_customer("C1").name, "Cesar Iracheta Largo")
+
+    def test_writes_update_cache(self):
+        self.repo.create_customer("C1", "Cesar")
+        self.repo.update_customer("C1", "Ana")
+        self.repo.delete_customer("C1")
+        self.assertEqual(self.repo.list_customers(), [])
+        self.assertEqual(CustomerRepository(path=self.path).list_customers(), [])
+
+
+class TestJournaledCustomerRepository(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "customers.json"
+        self.repo = CustomerRepository(
+            path=self.path, backend=JournalBackend(self.path, "customer_id")
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_crud_survives_reopen(self):
+        self.repo.create_customer("C1", "Cesar")
+        self.repo.create_customer("C2", "Ana")
+        self.repo.update_customer("C1", "Cesar Iracheta")
+        self.repo.delete_customer("C2")
+
+        reopened = CustomerRepository(
+            path=self.path, backend=JournalBackend(self.path, "customer_id")
+        )
+        self.assertEqual(
+            [c.name for c in reopened.list_customers()], ["Cesar Iracheta"]
+        )
+
+
+class TestCustomerBulk(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "customers.json"
+        self.repo = CustomerRepository(path=self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_bulk_reports_per_item_errors(self):
+        self.repo.create_customer("C1", "Cesar")
+        results = self.repo.create_customers_bulk([
+            {"customer_id": "C2", "name": "Ana"},
+            {"customer_id": "C1", "name": "Duplicado"},
+            {"customer_id": "C3", "name": ""},
+            {"customer_id": "C2", "name": "Repetido"},
+            {"customer_id": "C4", "name": "Luis"},
+        ])
+        self.assertEqual([r.ok for r in results], [True, False, False, False, True])
+        self.assertIsInstance(results[2].error, ValueError)
+        self.assertEqual(len(self.repo.list_customers()), 3)
+
+    def test_bulk_writes_file_once(self):
+        with mock.patch.object(
+            self.repo.backend, "apply", wraps=self.repo.backend.apply
+        ) as apply:
+            self.repo.create_customers_bulk(
+                {"customer_id": f"C{i}", "name": f"N{i}"} for i in range(50)
+            )
+        self.assertEqual(apply.call_count, 1)
+
+
+class TestCustomerPagination(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "customers.json"
+        self.repo = CustomerRepository(path=self.path)
+        self.repo.create_customers_bulk(
+            {"customer_id": f"C{i:02d}", "name": f"N{i}"} for i in range(25)
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _all_pages(self, repo, limit):
+        ids, after = [], None
+        while True:
+            page = repo.page_customers(after_id=after, limit=limit)
+            ids.extend(c.customer_id for c in page)
+            if len(page) < limit:
+                return ids
+            after = page[-1].customer_id
+
+    def test_iter_streams_all_customers(self):
+        fresh = CustomerRepository(path=self.path)
+        self.assertEqual(len(list(fresh.iter_customers())), 25)
+
+    def test_pages_cover_collection_once(self):
+        expected = [f"C{i:02d}" for i in range(25)]
+        self.assertEqual(self._all_pages(CustomerRepository(path=self.path), 10), expected)
+
+    def test_sqlite_pages_use_key_order(self):
+        backend = SqliteBackend(Path(self.tmp.name) / "db.sqlite", "customers", "customer_id")
+        repo = CustomerRepository(path=self.path, backend=backend)
+        repo.create_customers_bulk(asdict(c) for c in reversed(self.repo.list_customers()))
+        self.assertEqual(self._all_pages(repo, 7), [f"C{i:02d}" for i in range(25)])
+        backend.close()
+
+    def test_invalid_limit_raises(self):
+        with self.assertRaises(ValueError):
+            self.repo.page_customers(limit=0)
+
+
+class TestTrustedLoad(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "customers.json"
+        self.repo = CustomerRepository(path=self.path)
+        self.repo.create_customer("C1", "Ana")
+        self.repo.create_customer("C2", "Luis")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_own_file_skips_validation(self):
+        repo = CustomerRepository(path=self.path)
+        with mock.patch.object(repo, "_from_record") as validate:
+            self.assertEqual(len(repo.list_customers()), 2)
+        validate.assert_not_called()
+        self.assertTrue(repo.load_report.trusted)
+        self.assertEqual(repo.load_report.loaded, 2)
+
+    def test_edited_file_is_validated_and_rejections_reported(self):
+        save_json(self.path, [
+            {"customer_id": "C1", "name": "Ana"},
+            "junk",
+            {"name": "Sin ID"},
+            {"customer_id": "C3"},
+            {"customer_id": "C4", "name": 5},
+        ])
+        repo = CustomerRepository(path=self.path)
+
+        self.assertEqual([c.customer_id for c in repo.list_customers()], ["C1"])
+        report = repo.load_report
+        self.assertFalse(report.trusted)
+        self.assertEqual(
+            [(r.index, r.key, r.reason) for r in report.rejected],
+            [
+                (1, None, "not an object"),
+                (2, None, "missing or non-string 'customer_id'"),
+                (None, "C3", "missing field 'name'"),
+                (None, "C4", "field 'name' must be str"),
+            ],
+        )
+
+    def test_validated_file_is_stamped_again_on_write(self):
+        save_json(self.path, [{"customer_id": "C1", "name": "Ana"}])
+        repo = CustomerRepository(path=self.path)
+        repo.list_customers()
+        self.assertFalse(repo.load_report.trusted)
+
+        repo.create_customer("C2", "Luis")
+        fresh = CustomerRepository(path=self.path)
+        fresh.list_customers()
+        self.assertTrue(fresh.load_report.trusted)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -3,6 +3,7 @@ from pathlib import Path
 import tempfile
 
 from src.hotel import HotelRepository
+from src.storage import SqliteBackend
 
 
 class TestHotelRepository(unittest.TestCase):
@@ -43,5 +44,83 @@ class TestHotelRepository(unittest.TestCase):
         self.assertEqual(hotel.rooms_available, 2)
 
 
+class TestSqliteHotelRepository(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "hotel.db"
+        self.backend = SqliteBackend(self.path, "hotels", "hotel_id")
+        self.repo = HotelRepository(path=self.path, backend=self.backend)
+
+    def tearDown(self):
+        self.backend.close()
+        self.tmp.cleanup()
+
+    def test_reserve_and_release(self):
+        self.repo.create_hotel("H1", "Hotel WYNY", 1)
+        self.repo.reserve_room("H1")
+        with self.assertRaises(ValueError):
+            self.repo.reserve_room("H1")
+        self.repo.release_room("H1")
+        with self.assertRaises(ValueError):
+            self.repo.release_room("H1")
+        self.assertEqual(self.repo.get_hotel("H1").rooms_available, 1)
+
+    def test_reserve_unknown_hotel_raises(self):
+        with self.assertRaises(KeyError):
+            self.repo.reserve_room("X")
+
+
+class TestHotelBulk(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo = HotelRepository(path=Path(self.tmp.name) / "hotels.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_bulk_creates_valid_hotels(self):
+        results = self.repo.create_hotels_bulk([
+            {"hotel_id": "H1", "name": "Hotel WYNY", "rooms_total": 3},
+            {"hotel_id": "H2", "name": "Hotel Centro", "rooms_total": 0},
+            {"hotel_id": "H3", "name": "Hotel Sur", "rooms_total": "x"},
+        ])
+        self.assertEqual([r.ok for r in results], [True, False, False])
+        self.assertEqual([h.hotel_id for h in self.repo.list_hotels()], ["H1"])
+
+
+class TestHotelVersions(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "hotels.json"
+        self.repo = HotelRepository(path=self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_every_write_advances_version(self):
+        hotel = self.repo.create_hotel("H1", "Hotel WYNY", 2)
+        self.assertEqual(hotel.version, 1)
+        self.repo.reserve_room("H1")
+        self.repo.release_room("H1")
+        self.assertEqual(self.repo.get_hotel("H1").version, 3)
+
+    def test_records_without_version_load_as_zero(self):
+        self.path.write_text(
+            '[{"hotel_id": "H1", "name": "Hotel", "rooms_total": 2, "rooms_available": 2}]'
+        )
+        self.assertEqual(self.repo.get_hotel("H1").version, 0)
+        self.repo.reserve_room("H1")
+        self.assertEqual(self.repo.get_hotel("H1").version, 1)
+
+    def test_sqlite_adjust_advances_version(self):
+        repo = HotelRepository(
+            path=self.path,
+            backend=SqliteBackend(Path(self.tmp.name) / "hotels.db", "hotels", "hotel_id"),
+        )
+        repo.create_hotel("H1", "Hotel WYNY", 2)
+        repo.reserve_room("H1")
+        self.assertEqual(repo.get_hotel("H1").version, 2)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,128 @@
+import os
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+import tempfile
+from unittest import mock
+
+from src.customer import CustomerRepository
+from src.hotel import HotelRepository
+from src.ids import BloomFilter, IdAllocator, id_floor, id_time
+from src.repository import key_filter_path
+from src.reservation import ReservationRepository
+from src.storage import JsonFileBackend
+
+
+class TestIdAllocator(unittest.TestCase):
+    def test_ids_are_monotonic_and_time_ordered(self):
+        now = [1_700_000_000.0]
+        allocator = IdAllocator("R", clock=lambda: now[0])
+        first = [allocator.new_id() for _ in range(100)]
+        now[0] -= 5  # clock going backwards must not break the order
+        later = allocator.new_id()
+        now[0] += 10
+        latest = allocator.new_id()
+
+        ids = first + [later, latest]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertTrue(all(i.startswith("R") and len(i) == 27 for i in ids))
+        self.assertEqual(
+            id_time(first[0], "R"), datetime.fromtimestamp(1_700_000_000, tz=timezone.utc)
+        )
+        self.assertLess(id_floor(1_700_000_004.0, "R"), latest)
+        self.assertGreater(id_floor(1_700_000_004.0, "R"), later)
+        with self.assertRaises(ValueError):
+            id_time("R1", "R")
+
+    def test_child_process_restarts_the_sequence(self):
+        allocator = IdAllocator(clock=lambda: 1_700_000_000.0)
+        allocator.new_id()
+        with mock.patch("src.ids.os.getpid", return_value=os.getpid() + 1), \
+                mock.patch("src.ids.os.urandom", return_value=bytes(10)):
+            self.assertTrue(allocator.new_id().endswith("0" * 16))
+
+
+class TestBloomFilter(unittest.TestCase):
+    def test_no_false_negatives_and_bounded_false_positives(self):
+        bloom = BloomFilter.for_capacity(2000, error_rate=0.01)
+        for i in range(2000):
+            bloom.add(f"K{i}")
+        restored = BloomFilter.from_bytes(bloom.to_bytes())
+        self.assertTrue(all(f"K{i}" in restored for i in range(2000)))
+        false_positives = sum(f"X{i}" in restored for i in range(10000))
+        self.assertLess(false_positives, 300)
+        with self.assertRaises(ValueError):
+            BloomFilter.from_bytes(b"nope")
+
+
+class TestAllocatedIds(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_repositories_allocate_omitted_ids(self):
+        customers = CustomerRepository(path=self.base / "customers.json")
+        hotels = HotelRepository(path=self.base / "hotels.json")
+        reservations = ReservationRepository(
+            path=self.base / "reservations.json", customer_repo=customers, hotel_repo=hotels
+        )
+        customer = customers.create_customer(None, "Cesar")
+        hotel = hotels.create_hotel(None, "Hotel WYNY", 3)
+        first = reservations.create_reservation(None, customer.customer_id, hotel.hotel_id)
+        bulk = reservations.create_reservations_bulk([
+            {"customer_id": customer.customer_id, "hotel_id": hotel.hotel_id},
+        ])
+
+        self.assertTrue(customer.customer_id.startswith("C"))
+        self.assertTrue(hotel.hotel_id.startswith("H"))
+        self.assertLess(first.reservation_id, bulk[0].key)
+        self.assertEqual(bulk[0].entity.reservation_id, bulk[0].key)
+        self.assertEqual(
+            sorted(r.reservation_id for r in reservations.list_reservations()),
+            [first.reservation_id, bulk[0].key],
+        )
+        with self.assertRaises(ValueError):
+            customers.create_customer("", "Cesar")
+
+    def test_existence_check_uses_snapshot_index(self):
+        path = self.base / "customers.json"
+        writer = CustomerRepository(
+            path=path,
+            backend=JsonFileBackend(path, "customer_id", snapshot=True, schema="customer/1"),
+        )
+        writer.create_customers_bulk([{"customer_id": f"C{i}", "name": "x"} for i in range(50)])
+
+        repo = CustomerRepository(path=path)
+        with mock.patch("src.storage.json_file.read_file") as read:
+            with self.assertRaises(ValueError):
+                repo.create_customer("C7", "Dup")
+        read.assert_not_called()
+
+    def test_existence_check_uses_persisted_key_filter(self):
+        path = self.base / "customers.json"
+        writer = CustomerRepository(path=path)
+        writer.create_customers_bulk([{"customer_id": f"C{i}", "name": "x"} for i in range(50)])
+        writer.create_customer("C50", "y")
+        self.assertTrue(key_filter_path(path).exists())
+
+        repo = CustomerRepository(path=path)
+        with mock.patch("src.storage.json_file.read_file") as read, \
+                mock.patch("src.storage.json_file.iter_json_array") as scan:
+            self.assertFalse(repo._exists("C-new"))  # pylint: disable=protected-access
+        read.assert_not_called()
+        scan.assert_not_called()
+        self.assertTrue(repo._exists("C50"))  # pylint: disable=protected-access
+
+        # Una escritura de otra instancia sin el filtro lo deja desactualizado.
+        CustomerRepository(
+            path=path, backend=JsonFileBackend(path, "customer_id")
+        ).create_customer("C-new", "z")
+        self.assertTrue(repo._exists("C-new"))  # pylint: disable=protected-access
+
+
+if __name__ == "__main__":
+    unittest.main()
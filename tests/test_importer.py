@@ -0,0 +1,143 @@
+import io
+import json
+import unittest
+from pathlib import Path
+import tempfile
+from unittest import mock
+
+from src import storage
+from src.customer import CustomerRepository
+from src.hotel import HotelRepository
+from src.importer import (
+    BulkOptions, Progress, export_records, import_rows, main, open_backend, read_rows
+)
+from src.reservation import ReservationRepository
+
+
+class TestImporter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = self.base / name
+        path.write_text(text, encoding="utf-8")
+        return path
+
+    def run_cli(self, *args):
+        with mock.patch("builtins.print"):
+            return main([*args, "--data-dir", str(self.base)])
+
+    def test_csv_and_jsonl_round_trip_with_references(self):
+        customers = self.write(
+            "customers.csv", "customer_id,name\nC1,Cesar\nC2, Ana \n,Empty\nC1,Dup\n"
+        )
+        hotels = self.write(
+            "hotels.jsonl",
+            '{"hotel_id": "H1", "name": "WYNY", "rooms_total": 3, "rooms_available": 2}\n'
+            '{"hotel_id": "H2", "name": "Bad", "rooms_total": "x"}\n'
+            "not json\n",
+        )
+        bookings = self.write(
+            "bookings.csv",
+            "reservation_id,customer_id,hotel_id,active,check_in,check_out,canceled_on\n"
+            "R1,C1,H1,true,,,\n"
+            "R2,C2,H1,false,2030-01-01,2030-01-03,2029-12-01\n"
+            "R3,C9,H1,true,,,\n"
+            "R4,C1,H1,true,2030-01-05,2030-01-01,\n",
+        )
+        errors = self.base / "errors.jsonl"
+
+        self.assertEqual(self.run_cli("import", "customers", str(customers), "--workers", "0",
+                                      "--errors", str(errors)), 1)
+        rejected = [json.loads(line) for line in errors.read_text().splitlines()]
+        self.assertEqual([e["line"] for e in rejected], [4, 5])
+        self.assertIn("already exists", rejected[1]["reason"])
+        self.assertEqual(self.run_cli("import", "hotels", str(hotels), "--workers", "0"), 1)
+        self.assertEqual(
+            self.run_cli("import", "reservations", str(bookings), "--workers", "0"), 1
+        )
+
+        customer_repo = CustomerRepository(path=self.base / "customers.json")
+        hotel_repo = HotelRepository(path=self.base / "hotels.json")
+        repo = ReservationRepository(
+            path=self.base / "reservations.json", customer_repo=customer_repo,
+            hotel_repo=hotel_repo,
+        )
+        self.assertEqual(customer_repo.get_customer("C2").name, "Ana")
+        self.assertEqual(hotel_repo.get_hotel("H1").rooms_available, 2)
+        self.assertEqual([r.reservation_id for r in repo.list_reservations()], ["R1", "R2"])
+        self.assertEqual(repo.get_reservation("R2").canceled_on, "2029-12-01")
+        self.assertIsNotNone(repo.load_report)
+        self.assertEqual(repo.load_report.rejected, [])
+
+        out = self.base / "out.csv"
+        self.assertEqual(self.run_cli("export", "reservations", str(out)), 0)
+        lines = out.read_text(encoding="utf-8").splitlines()
+        self.assertEqual(lines[0], "reservation_id,customer_id,hotel_id,active,check_in,"
+                                   "check_out,canceled_on")
+        self.assertEqual(lines[2], "R2,C2,H1,False,2030-01-01,2030-01-03,2029-12-01")
+
+    def test_process_pool_and_sqlite(self):
+        rows = ((i + 1, {"name": f"Customer {i}"}) for i in range(250))
+        db = self.base / "hotel.db"
+        backend = open_backend("customers", self.base, db)
+        progress = Progress("import", every=0, stream=io.StringIO())
+        try:
+            options = BulkOptions(workers=2, chunk_size=40, progress=progress)
+            report = import_rows("customers", rows, backend, options)
+            self.assertEqual((report.rows, report.imported, report.rejected), (250, 250, 0))
+            self.assertIn("rows/s", progress.stream.getvalue())
+
+            out = io.StringIO()
+            options = BulkOptions(chunk_size=100)
+            self.assertEqual(export_records("customers", backend, out, "jsonl", options), 250)
+        finally:
+            backend.close()
+        exported = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertTrue(all(r["customer_id"].startswith("C") for r in exported))
+        self.assertEqual(len({r["customer_id"] for r in exported}), 250)
+
+    def test_json_file_is_rewritten_once_by_streaming(self):
+        CustomerRepository(path=self.base / "customers.json").create_customer("C0", "Ana")
+        rows = ((i + 1, {"customer_id": f"C{i}", "name": "x"}) for i in range(8))
+        backend = open_backend("customers", self.base, None)
+        options = BulkOptions(chunk_size=2, flush_every=3)
+        with mock.patch.object(backend, "apply") as apply, mock.patch(
+            "src.storage.json_file.write_atomic_chunks",
+            wraps=storage.json_file.write_atomic_chunks,
+        ) as write:
+            report = import_rows("customers", rows, backend, options)
+        apply.assert_not_called()
+        self.assertEqual(write.call_count, 1)
+        self.assertEqual((report.imported, report.rejected), (7, 1))
+
+        path = self.base / "customers.json"
+        records = json.loads(path.read_text(encoding="utf-8"))
+        self.assertEqual([r["customer_id"] for r in records], [f"C{i}" for i in range(8)])
+        self.assertEqual(
+            path.read_text(encoding="utf-8"), json.dumps(records, ensure_ascii=False, indent=2)
+        )
+        self.assertTrue(open_backend("customers", self.base, None).trusted())
+
+    def test_sharded_collections_are_written_in_bounded_batches(self):
+        rows = ((i + 1, {"customer_id": f"C{i}", "name": "x"}) for i in range(7))
+        backend = storage.ShardedJsonBackend(self.base / "customers", "customer_id", shards=2)
+        options = BulkOptions(chunk_size=2, flush_every=3)
+        with mock.patch.object(backend, "apply", wraps=backend.apply) as apply:
+            report = import_rows("customers", rows, backend, options)
+        self.assertEqual([len(c.args[0]) for c in apply.call_args_list], [4, 3])
+        self.assertEqual(report.imported, 7)
+        self.assertEqual(len(list(backend.scan())), 7)
+
+    def test_read_rows_numbers_lines(self):
+        rows = list(read_rows(io.StringIO('{"a": 1}\n\n[1]\n'), "jsonl"))
+        self.assertEqual([line for line, _ in rows], [1, 3])
+        self.assertIn("__error__", rows[1][1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+from pathlib import Path
+import tempfile
+
+from src.hotel import HotelRepository
+from src.inventory import InventoryData, np
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestInventoryQuery(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "hotels.json"
+        self.repo = HotelRepository(path=self.path)
+        self.repo.create_hotels_bulk([
+            {"hotel_id": "H1", "name": "Uno", "rooms_total": 10},
+            {"hotel_id": "H2", "name": "Dos", "rooms_total": 4},
+            {"hotel_id": "H3", "name": "Tres", "rooms_total": 6},
+        ])
+        for _ in range(3):
+            self.repo.reserve_room("H2")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_filter_and_aggregate(self):
+        query = self.repo.inventory()
+        self.assertEqual(query.sum(), 17)
+        self.assertEqual(query.sum("rooms_total"), 20)
+        self.assertEqual(sorted(query.where("rooms_available", minimum=6).ids()), ["H1", "H3"])
+        self.assertEqual(query.where("rooms_available", maximum=0).count(), 0)
+        self.assertEqual(query.where("occupancy", minimum=0.5).ids(), ["H2"])
+        self.assertIsNone(query.where("rooms_total", minimum=99).mean())
+
+    def test_sort_and_top_k(self):
+        query = self.repo.inventory()
+        self.assertEqual(query.order_by("rooms_available").ids(), ["H2", "H3", "H1"])
+        self.assertEqual(query.top(2).ids(), ["H1", "H3"])
+        self.assertEqual(query.top(1, "rooms_occupied").values("rooms_occupied"), [3])
+        self.assertEqual(query.top(0).ids(), [])
+        with self.assertRaises(ValueError):
+            query.order_by("name")
+
+    def test_columns_follow_writes(self):
+        query = self.repo.inventory().where("rooms_available", minimum=1)
+        self.assertEqual(query.count(), 3)
+        self.repo.reserve_room("H2")
+        self.assertEqual(query.count(), 2)
+        self.repo.release_room("H2")
+        self.repo.create_hotel("H4", "Cuatro", 2)
+        self.assertEqual(query.count(), 4)
+        self.assertEqual(self.repo.inventory().sum(), 19)
+
+        # Un cambio hecho por otro proceso invalida las columnas.
+        HotelRepository(path=self.path).reserve_room("H1")
+        self.assertEqual(self.repo.inventory().sum(), 18)
+
+    def test_remove_keeps_rows_aligned(self):
+        data = InventoryData(self.repo.list_hotels())
+        data.remove("H1")
+        data.remove("missing")
+        self.assertEqual(sorted(data.ids), ["H2", "H3"])
+        self.assertEqual(data.column("rooms_available")[data.rows["H3"]], 6)
+        self.assertEqual(data.column("rooms_available")[data.rows["H2"]], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,208 @@
+import multiprocessing
+import threading
+import unittest
+from pathlib import Path
+import tempfile
+
+from src.customer import CustomerRepository
+from src.hotel import HotelRepository
+from src.locking import StripedLock, file_lock, lock_path
+from src.repository import ConflictError
+from src.reservation import ReservationRepository
+from src.storage import load_json
+from src.unit_of_work import UnitOfWork
+
+
+def _reserve_many(path, attempts, queue):
+    repo = HotelRepository(path=Path(path))
+    booked = 0
+    for _ in range(attempts):
+        try:
+            repo.reserve_room("H1")
+            booked += 1
+        except ValueError:
+            pass
+    queue.put(booked)
+
+
+def _run_threads(count, target):
+    start = threading.Barrier(count)
+
+    def run(index):
+        start.wait()
+        target(index)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+class TestLocks(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "hotels.json"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_file_lock_is_shared_and_reentrant(self):
+        lock = file_lock(self.path)
+        self.assertIs(lock, file_lock(str(self.path)))
+        with lock:
+            with lock:
+                self.assertTrue(lock_path(self.path).exists())
+
+    def test_file_lock_excludes_other_threads(self):
+        lock = file_lock(self.path)
+        inside = []
+
+        def worker(index):
+            for _ in range(50):
+                with lock:
+                    inside.append(index)
+                    self.assertEqual(inside, [index])
+                    inside.pop()
+
+        _run_threads(8, worker)
+
+    def test_striped_lock_is_stable(self):
+        locks = StripedLock(16)
+        self.assertEqual(locks.stripe("H1"), locks.stripe("H1"))
+        self.assertTrue(0 <= locks.stripe("H2") < 16)
+        with locks.hold(["H1", "H2", "H1"]):
+            pass
+        with self.assertRaises(ValueError):
+            StripedLock(0)
+
+
+class TestConcurrentBookings(unittest.TestCase):
+    ROOMS = 5
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        base = Path(self.tmp.name)
+        self.paths = (base / "customers.json", base / "hotels.json", base / "reservations.json")
+        customers, hotels = self.repos()[:2]
+        customers.create_customer("C1", "Cesar")
+        for hotel_id in ("H1", "H2", "H3"):
+            hotels.create_hotel(hotel_id, f"Hotel {hotel_id}", self.ROOMS)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def repos(self):
+        customers = CustomerRepository(path=self.paths[0], cache=True)
+        hotels = HotelRepository(path=self.paths[1], cache=True)
+        reservations = ReservationRepository(
+            path=self.paths[2], customer_repo=customers, hotel_repo=hotels, cache=True
+        )
+        return customers, hotels, reservations
+
+    def book_concurrently(self, repos, threads, dated=False):
+        booked = {"H1": 0, "H2": 0, "H3": 0}
+        counter = threading.Lock()
+
+        def worker(index):
+            repo = repos[index % len(repos)]
+            for attempt in range(4):
+                hotel_id = ("H1", "H2", "H3")[(index + attempt) % 3]
+                dates = ("2026-05-01", "2026-05-04") if dated else (None, None)
+                try:
+                    repo.create_reservation(None, "C1", hotel_id, *dates)
+                except (ConflictError, ValueError) as exc:
+                    if not isinstance(exc, ConflictError):
+                        self.assertEqual(str(exc), "no rooms available")
+                    continue
+                with counter:
+                    booked[hotel_id] += 1
+
+        _run_threads(threads, worker)
+        return booked
+
+    def assert_not_overbooked(self, booked):
+        _, hotels, reservations = self.repos()
+        for hotel_id, count in booked.items():
+            self.assertEqual(count, self.ROOMS)
+            self.assertEqual(len(reservations.active_for_hotel(hotel_id)), count)
+        self.assertEqual(len(load_json(self.paths[2], [])), sum(booked.values()))
+        return hotels
+
+    def test_threads_never_overbook(self):
+        repo = self.repos()[2]
+        hotels = self.assert_not_overbooked(self.book_concurrently([repo], 24))
+        for hotel in hotels.list_hotels():
+            self.assertEqual(hotel.rooms_available, 0)
+            self.assertEqual(hotel.version, self.ROOMS + 1)
+
+    def test_threads_never_overbook_dated_rooms(self):
+        repo = self.repos()[2]
+        self.assert_not_overbooked(self.book_concurrently([repo], 24, dated=True))
+
+    def test_separate_instances_never_overbook(self):
+        # Cada instancia tiene sus propias cachés y franjas: solo las versiones
+        # y el candado de archivo las coordinan, como entre procesos.
+        repos = [self.repos()[2] for _ in range(3)]
+        booked = self.book_concurrently(repos, 12)
+        _, hotels, _ = self.repos()
+        for hotel in hotels.list_hotels():
+            self.assertEqual(hotel.rooms_available, self.ROOMS - booked[hotel.hotel_id])
+            self.assertGreaterEqual(hotel.rooms_available, 0)
+        self.assertEqual(len(load_json(self.paths[2], [])), sum(booked.values()))
+
+    def create_same_id(self, repos):
+        errors = []
+
+        def worker(index):
+            try:
+                repos[index % len(repos)].create_reservation("R1", "C1", ("H1", "H2", "H3")[index])
+            except ValueError as exc:
+                errors.append(str(exc))
+
+        _run_threads(3, worker)
+        self.assertEqual(errors, ["reservation_id already exists"] * 2)
+        _, hotels, reservations = self.repos()
+        [reservation] = reservations.list_reservations()
+        for hotel in hotels.list_hotels():
+            booked = hotel.hotel_id == reservation.hotel_id
+            self.assertEqual(hotel.rooms_available, self.ROOMS - booked)
+
+    def test_threads_never_duplicate_reservation_ids(self):
+        self.create_same_id([self.repos()[2]])
+
+    def test_separate_instances_never_duplicate_reservation_ids(self):
+        self.create_same_id([self.repos()[2] for _ in range(3)])
+
+    def test_stale_write_raises_conflict(self):
+        _, hotels, _ = self.repos()
+        with self.assertRaises(ConflictError):
+            with UnitOfWork(hotels) as uow:
+                hotel = uow.get(hotels, "H1")
+                HotelRepository(path=self.paths[1]).reserve_room("H1")
+                hotel.name = "Renamed"
+                uow.put(hotels, hotel)
+        hotel = HotelRepository(path=self.paths[1]).get_hotel("H1")
+        self.assertEqual((hotel.name, hotel.rooms_available), ("Hotel H1", self.ROOMS - 1))
+
+    @unittest.skipUnless(
+        "fork" in multiprocessing.get_all_start_methods(), "requires fork"
+    )
+    def test_processes_never_overbook(self):
+        context = multiprocessing.get_context("fork")
+        queue = context.Queue()
+        workers = [
+            context.Process(target=_reserve_many, args=(str(self.paths[1]), 4, queue))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(sum(queue.get() for _ in workers), self.ROOMS)
+        hotel = HotelRepository(path=self.paths[1]).get_hotel("H1")
+        self.assertEqual(hotel.rooms_available, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
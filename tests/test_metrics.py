@@ -0,0 +1,88 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from src import metrics
+from src.customer import CustomerRepository
+from src.metrics import CallbackSink, MemorySink, MetricsRegistry, PrometheusFileSink
+
+
+class TestMetricsDisabled(unittest.TestCase):
+    def test_hooks_are_no_ops(self):
+        metrics.disable()
+
+        def func():
+            return 1
+
+        self.assertIs(metrics.timed(func, "phase"), func)
+        self.assertIs(metrics.timer("a"), metrics.timer("b"))
+        metrics.inc("calls_total", op="x")
+        self.assertIsNone(metrics.active())
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name)
+
+    def tearDown(self):
+        metrics.disable()
+        self.tmp.cleanup()
+
+    def test_repository_phases_and_bytes(self):
+        registry = metrics.enable()
+        path = self.base / "customers.json"
+        repo = CustomerRepository(path=path)
+        repo.create_customer("C1", "Ana")
+        written = path.stat().st_size
+        repo.list_customers()
+        CustomerRepository(path=path).get_customer("C1")
+
+        for phase in ("storage.read", "storage.json_decode", "storage.validate",
+                      "storage.json_encode", "storage.write"):
+            self.assertGreater(registry.phase(phase, file="customers.json").count, 0, phase)
+        build = registry.phase("repository.build", repo="CustomerRepository")
+        self.assertEqual(build.count, 1)
+        self.assertEqual(registry.counter("bytes_written_total", file="customers.json"), written)
+        self.assertEqual(
+            registry.counter("bytes_read_total", file="customers.json"),
+            registry.phase("storage.read", file="customers.json").count * written,
+        )
+        self.assertEqual(
+            registry.counter("calls_total", op="apply", repo="CustomerRepository"), 1
+        )
+
+    def test_sinks(self):
+        events = []
+        memory = MemorySink()
+        prom = self.base / "metrics.prom"
+        registry = MetricsRegistry(
+            memory,
+            PrometheusFileSink(prom),
+            CallbackSink(lambda *event: events.append(event)),
+            buckets=(0.1, 1.0),
+        )
+        registry.inc("calls_total", op="get", repo='Quote"d')
+        registry.observe("phase_seconds", 0.5, phase="storage.read")
+        registry.observe("phase_seconds", 2.0, phase="storage.read")
+        registry.flush()
+
+        self.assertEqual(
+            events,
+            [
+                ("counter", "calls_total", 1, {"op": "get", "repo": 'Quote"d'}),
+                ("histogram", "phase_seconds", 0.5, {"phase": "storage.read"}),
+                ("histogram", "phase_seconds", 2.0, {"phase": "storage.read"}),
+            ],
+        )
+        self.assertEqual(memory.snapshots[0]["histograms"][0]["counts"], [0, 1, 1])
+        text = prom.read_text(encoding="utf-8")
+        self.assertIn("# TYPE hotel_calls_total counter", text)
+        self.assertIn('hotel_calls_total{op="get",repo="Quote\\"d"} 1', text)
+        self.assertIn('hotel_phase_seconds_bucket{phase="storage.read",le="1"} 1', text)
+        self.assertIn('hotel_phase_seconds_bucket{phase="storage.read",le="+Inf"} 2', text)
+        self.assertIn('hotel_phase_seconds_count{phase="storage.read"} 2', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
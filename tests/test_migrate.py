@@ -0,0 +1,46 @@
+import unittest
+from pathlib import Path
+import tempfile
+
+from src.customer import CustomerRepository
+from src.hotel import HotelRepository
+from src.migrate import migrate_data_dir
+from src.storage import SqliteBackend
+
+
+class TestMigrate(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_migrates_existing_json_collections(self):
+        CustomerRepository(path=self.base / "customers.json").create_customer("C1", "Cesar")
+        hotels = HotelRepository(path=self.base / "hotels.json")
+        hotels.create_hotel("H1", "Hotel WYNY", 2)
+        hotels.create_hotel("H2", "Hotel Centro", 3)
+
+        db = self.base / "hotel.db"
+        counts = migrate_data_dir(self.base, db)
+        self.assertEqual(counts, {"customers": 1, "hotels": 2})
+
+        backend = SqliteBackend(db, "hotels", "hotel_id")
+        repo = HotelRepository(path=db, backend=backend)
+        self.assertEqual(repo.get_hotel("H2").rooms_total, 3)
+        backend.close()
+
+    def test_migration_is_repeatable(self):
+        CustomerRepository(path=self.base / "customers.json").create_customer("C1", "Cesar")
+        db = self.base / "hotel.db"
+        migrate_data_dir(self.base, db)
+        migrate_data_dir(self.base, db)
+
+        backend = SqliteBackend(db, "customers", "customer_id")
+        self.assertEqual(len(list(backend.scan())), 1)
+        backend.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
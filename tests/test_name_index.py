@@ -0,0 +1,147 @@
+import unittest
+from pathlib import Path
+import tempfile
+from unittest import mock
+
+from src.customer import CustomerRepository
+from src.name_index import (
+    NameIndexData,
+    edit_distance,
+    name_index_path,
+    name_log_path,
+    tokenize,
+)
+
+
+def ids(customers):
+    return [c.customer_id for c in customers]
+
+
+class TestNameIndexData(unittest.TestCase):
+    def test_tokenize_ignores_case_and_accents(self):
+        self.assertEqual(tokenize("  María  JOSÉ maría "), ["maria", "jose"])
+
+    def test_edit_distance(self):
+        self.assertEqual(edit_distance("jhon", "john", 1), 1)
+        self.assertEqual(edit_distance("garcia", "garzia", 1), 1)
+        self.assertIsNone(edit_distance("garcia", "gracie", 1))
+        self.assertIsNone(edit_distance("ana", "anabel", 1))
+
+    def test_add_and_remove_keep_tokens_sorted(self):
+        data = NameIndexData()
+        data.add("C1", "Zoe Ruiz")
+        data.add("C2", "Ana Ruiz")
+        self.assertEqual(data.tokens, ["ana", "ruiz", "zoe"])
+        data.add("C1", "Zoe Diaz")
+        data.remove("C2")
+        data.remove("missing")
+        self.assertEqual(data.tokens, ["diaz", "zoe"])
+        self.assertEqual(data.similar("ruiz"), set())
+        self.assertEqual(data.similar("dias"), {"diaz"})
+
+
+class TestSearchByName(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "customers.json"
+        self.repo = CustomerRepository(path=self.path)
+        self.repo.create_customers_bulk([
+            {"customer_id": "C1", "name": "John Smith"},
+            {"customer_id": "C2", "name": "Johnny Walker"},
+            {"customer_id": "C3", "name": "María García"},
+            {"customer_id": "C4", "name": "Mario Garza"},
+            {"customer_id": "C5", "name": "José Iracheta"},
+        ])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_exact_before_prefix(self):
+        self.assertEqual(ids(self.repo.search_by_name("john")), ["C1", "C2"])
+        self.assertEqual(ids(self.repo.search_by_name("JOHNN")), ["C2", "C1"])
+
+    def test_accents_and_multiple_words(self):
+        self.assertEqual(ids(self.repo.search_by_name("maria garcia")), ["C3"])
+        self.assertEqual(ids(self.repo.search_by_name("gar mar")), ["C3", "C4"])
+        self.assertEqual(ids(self.repo.search_by_name("jose smith")), [])
+
+    def test_typos(self):
+        self.assertEqual(ids(self.repo.search_by_name("jhon")), ["C1"])
+        self.assertEqual(ids(self.repo.search_by_name("iracheda")), ["C5"])
+        self.assertEqual(ids(self.repo.search_by_name("garsia maria")), ["C3"])
+        # Palabras cortas solo por prefijo.
+        self.assertEqual(ids(self.repo.search_by_name("jse")), [])
+
+    def test_limit(self):
+        self.assertEqual(len(self.repo.search_by_name("j", limit=2)), 2)
+        self.assertEqual(self.repo.search_by_name("j", limit=0), [])
+        self.assertEqual(self.repo.search_by_name("   "), [])
+
+    def test_index_follows_writes(self):
+        self.assertEqual(ids(self.repo.search_by_name("walker")), ["C2"])
+        self.repo.update_customer("C2", "Johnny Cash")
+        self.repo.create_customer("C6", "Ana Walker")
+        self.repo.delete_customer("C1")
+        self.assertEqual(ids(self.repo.search_by_name("walker")), ["C6"])
+        self.assertEqual(ids(self.repo.search_by_name("john")), ["C2"])
+
+        # Un cambio hecho por otro proceso obliga a reconstruir el índice.
+        CustomerRepository(path=self.path).create_customer("C7", "Ana Walker")
+        self.assertEqual(ids(self.repo.search_by_name("ana walker")), ["C6", "C7"])
+
+    def test_index_is_restored_from_disk(self):
+        self.repo.search_by_name("john")
+        self.assertTrue(name_index_path(self.path).exists())
+
+        fresh = CustomerRepository(path=self.path)
+        with mock.patch("src.name_index.tokenize", wraps=tokenize) as tokens:
+            self.assertEqual(ids(fresh.search_by_name("garcia")), ["C3"])
+        # Al cargarlo no se vuelve a normalizar ningún nombre guardado.
+        self.assertEqual(tokens.call_count, 1)
+
+    def test_index_is_persisted_after_writes(self):
+        self.repo.search_by_name("john")
+        with mock.patch("src.name_index.write_atomic") as rewrite:
+            self.repo.create_customer("C6", "Johan Sebastian")
+            self.repo.delete_customer("C2")
+        # Cada escritura solo agrega sus cambios al registro.
+        rewrite.assert_not_called()
+        self.assertEqual(len(name_log_path(self.path).read_bytes().splitlines()), 2)
+
+        fresh = CustomerRepository(path=self.path)
+        with mock.patch("src.name_index.tokenize", wraps=tokenize) as tokens:
+            self.assertEqual(ids(fresh.search_by_name("johan")), ["C6", "C1"])
+        self.assertEqual(tokens.call_count, 1)
+
+    def test_stale_or_corrupt_index_is_rebuilt(self):
+        self.repo.search_by_name("john")
+        # Otra instancia sin el índice cargado escribe sin actualizarlo.
+        CustomerRepository(path=self.path).create_customer("C6", "Johan Sebastian")
+        fresh = CustomerRepository(path=self.path)
+        self.assertEqual(ids(fresh.search_by_name("johan")), ["C6", "C1"])
+
+        self.repo.search_by_name("johan")
+        self.repo.create_customer("C7", "Ana Walker")
+        name_log_path(self.path).write_text("{not json", encoding="utf-8")
+        self.assertEqual(ids(CustomerRepository(path=self.path).search_by_name("walker")),
+                         ["C2", "C7"])
+
+        name_index_path(self.path).write_text("{not json", encoding="utf-8")
+        self.assertEqual(ids(CustomerRepository(path=self.path).search_by_name("sebastian")),
+                         ["C6"])
+
+    def test_log_is_folded_into_the_index_once_it_outgrows_it(self):
+        self.repo.search_by_name("john")
+        for i in range(20):
+            self.repo.update_customer("C1", f"John Smith {i}")
+        self.assertLess(
+            name_log_path(self.path).stat().st_size
+            if name_log_path(self.path).exists() else 0,
+            name_index_path(self.path).stat().st_size + 200,
+        )
+        fresh = CustomerRepository(path=self.path)
+        self.assertEqual(ids(fresh.search_by_name("smith 19")), ["C1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
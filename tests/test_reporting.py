@@ -0,0 +1,113 @@
+import unittest
+from pathlib import Path
+import tempfile
+from unittest import mock
+
+from src.customer import CustomerRepository
+from src.hotel import HotelRepository
+from src.reporting import ReportingService
+from src.reservation import ReservationRepository
+from src.storage import JsonFileBackend
+
+
+class TestReportingService(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name)
+        self.customer_repo = CustomerRepository(path=self.base / "customers.json")
+        self.hotel_repo = HotelRepository(path=self.base / "hotels.json")
+        self.repo = self._reservations()
+        self.reports = ReportingService(self.repo)
+
+        self.customer_repo.create_customer("C1", "Cesar")
+        self.customer_repo.create_customer("C2", "Ana")
+        self.hotel_repo.create_hotel("H1", "Uno", 4)
+        self.hotel_repo.create_hotel("H2", "Dos", 2)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _reservations(self):
+        return ReservationRepository(
+            path=self.base / "reservations.json",
+            customer_repo=self.customer_repo,
+            hotel_repo=self.hotel_repo,
+        )
+
+    def test_reports_follow_reservations(self):
+        self.assertEqual(self.reports.chain_totals().rooms_occupied, 0)
+        self.repo.create_reservation("R1", "C1", "H1")
+        self.repo.create_reservation("R2", "C1", "H2")
+        self.repo.create_reservation("R3", "C2", "H1", "2030-01-01", "2030-01-03")
+        self.hotel_repo.reserve_room("H2")
+
+        h1 = self.reports.hotel_occupancy("H1")
+        self.assertEqual((h1.rooms_occupied, h1.active_reservations), (1, 2))
+        self.assertEqual(h1.occupancy_rate, 0.25)
+        self.assertEqual(self.reports.hotel_occupancy("H2").occupancy_rate, 1.0)
+        self.assertIsNone(self.reports.hotel_occupancy("missing"))
+        self.assertEqual(self.reports.active_bookings_by_customer(), {"C1": 2, "C2": 1})
+
+        self.repo.cancel_reservation("R1")
+        self.hotel_repo.release_room("H2")
+        totals = self.reports.chain_totals()
+        self.assertEqual(
+            (totals.hotels, totals.rooms_total, totals.rooms_available), (2, 6, 5)
+        )
+        self.assertEqual((totals.reservations, totals.active_reservations), (3, 2))
+        self.assertEqual(self.reports.active_bookings("C1"), 1)
+        self.assertEqual(self.reports.active_bookings("C3"), 0)
+        self.assertEqual(
+            [(o.hotel_id, o.rooms_occupied) for o in self.reports.occupancy_by_hotel()],
+            [("H1", 0), ("H2", 1)],
+        )
+
+        self.repo.archive_reservations(retention_days=0)
+        self.assertEqual(self.reports.chain_totals().reservations, 2)
+        self.assertTrue(self.reports.verify().ok)
+
+    def test_reports_do_not_scan_after_first_query(self):
+        self.repo.create_reservation("R1", "C1", "H1")
+        self.reports.chain_totals()
+        with mock.patch.object(JsonFileBackend, "scan") as scan:
+            self.repo.create_reservation("R2", "C2", "H1")
+            self.repo.cancel_reservation("R1")
+            self.hotel_repo.reserve_room("H2")
+            self.assertEqual(self.reports.hotel_occupancy("H1").active_reservations, 1)
+            self.assertEqual(self.reports.chain_totals().rooms_available, 4)
+            self.assertEqual(self.reports.active_bookings("C2"), 1)
+        scan.assert_not_called()
+
+    def test_changes_from_another_process_trigger_rebuild(self):
+        self.repo.create_reservation("R1", "C1", "H1")
+        self.assertEqual(self.reports.active_bookings("C1"), 1)
+
+        self._reservations().create_reservation("R2", "C1", "H2")
+        self.assertEqual(self.reports.active_bookings("C1"), 2)
+        self.assertEqual(self.reports.chain_totals().rooms_available, 4)
+
+    def test_verify_detects_and_repairs_drift(self):
+        self.repo.create_reservation("R1", "C1", "H1")
+        self.assertTrue(self.reports.verify().ok)
+
+        # Simula una actualización incremental perdida.
+        self.reports._booking_stats().active_by_customer["C1"] = 5
+        self.reports._hotel_stats().rooms_available += 1
+
+        report = self.reports.verify()
+        self.assertFalse(report.ok)
+        self.assertEqual(len(report.mismatches), 2)
+        self.assertIn("active_by_customer['C1']: maintained 5, files 1", report.mismatches)
+        self.assertEqual(self.reports.active_bookings("C1"), 5)
+
+        self.assertFalse(self.reports.verify(repair=True).ok)
+        self.assertEqual(self.reports.active_bookings("C1"), 1)
+        self.assertTrue(self.reports.verify().ok)
+
+        self.reports._booking_stats().active = 9
+        self.reports.rebuild()
+        self.assertEqual(self.reports.chain_totals().active_reservations, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
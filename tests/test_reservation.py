@@ -1,10 +1,13 @@
 import unittest
 from pathlib import Path
 import tempfile
+from unittest import mock
 
 from src.customer import CustomerRepository
 from src.hotel import HotelRepository
-from src.reservation import ReservationRepository
+from src.reservation import ReservationIndex, ReservationRepository
+from src.reshard import main as reshard_main
+from src.storage import ShardedJsonBackend, SqliteBackend
 
 
 class TestReservationRepository(unittest.TestCase):
@@ -71,5 +74,237 @@ class TestReservationRepository(unittest.TestCase):
             self.repo.cancel_reservation("R1")
 
 
+class TestReservationBulk(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        base = Path(self.tmp.name)
+        self.backend = SqliteBackend(base / "hotel.db", "hotels", "hotel_id")
+        self.customer_repo = CustomerRepository(path=base / "customers.json")
+        self.hotel_repo = HotelRepository(path=base / "hotel.db", backend=self.backend)
+        self.repo = ReservationRepository(
+            path=base / "reservations.json",
+            customer_repo=self.customer_repo,
+            hotel_repo=self.hotel_repo,
+        )
+        self.customer_repo.create_customer("C1", "Cesar")
+        self.hotel_repo.create_hotel("H1", "Hotel WYNY", 2)
+        self.hotel_repo.create_hotel("H2", "Hotel Centro", 5)
+
+    def tearDown(self):
+        self.backend.close()
+        self.tmp.cleanup()
+
+    def test_bulk_create_aggregates_room_updates(self):
+        items = [
+            {"reservation_id": f"R{i}", "customer_id": "C1", "hotel_id": hid}
+            for i, hid in enumerate(["H1", "H2", "H1", "H1", "H2", "X"])
+        ]
+        with mock.patch.object(self.backend, "adjust", wraps=self.backend.adjust) as adjust:
+            results = self.repo.create_reservations_bulk(items)
+
+        self.assertEqual([r.ok for r in results], [True, True, True, False, True, False])
+        self.assertEqual(adjust.call_count, 2)
+        self.assertEqual(self.hotel_repo.get_hotel("H1").rooms_available, 0)
+        self.assertEqual(self.hotel_repo.get_hotel("H2").rooms_available, 3)
+
+    def test_bulk_cancel(self):
+        self.repo.create_reservation("R1", "C1", "H1")
+        self.repo.create_reservation("R2", "C1", "H1")
+        results = self.repo.cancel_reservations_bulk(["R1", "R1", "R2", "X"])
+        self.assertEqual([r.ok for r in results], [True, False, True, False])
+        self.assertEqual(self.hotel_repo.get_hotel("H1").rooms_available, 2)
+        self.assertFalse(any(r.active for r in self.repo.list_reservations()))
+
+
+class TestReservationIndexes(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        base = Path(self.tmp.name)
+        self.reservations_path = base / "reservations.json"
+        self.customer_repo = CustomerRepository(path=base / "customers.json")
+        self.hotel_repo = HotelRepository(path=base / "hotels.json")
+        self.repo = ReservationRepository(
+            path=self.reservations_path,
+            customer_repo=self.customer_repo,
+            hotel_repo=self.hotel_repo,
+        )
+        self.customer_repo.create_customer("C1", "Cesar")
+        self.customer_repo.create_customer("C2", "Ana")
+        self.hotel_repo.create_hotel("H1", "Hotel WYNY", 5)
+        self.hotel_repo.create_hotel("H2", "Hotel Centro", 5)
+        self.repo.create_reservation("R1", "C1", "H1")
+        self.repo.create_reservation("R2", "C2", "H1")
+        self.repo.create_reservation("R3", "C1", "H2")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_queries(self):
+        ids = [r.reservation_id for r in self.repo.find_by_customer("C1")]
+        self.assertEqual(ids, ["R1", "R3"])
+        ids = [r.reservation_id for r in self.repo.find_by_hotel("H1")]
+        self.assertEqual(ids, ["R1", "R2"])
+        self.assertEqual(self.repo.count_active("H1"), 2)
+        self.assertEqual(self.repo.find_by_customer("X"), [])
+
+    def test_index_is_updated_incrementally(self):
+        self.assertEqual(self.repo.count_active("H1"), 2)
+        with mock.patch.object(
+            ReservationIndex, "build", wraps=self.repo._index.build
+        ) as build:
+            self.repo.cancel_reservation("R1")
+            self.repo.create_reservation("R4", "C2", "H1")
+            active = [r.reservation_id for r in self.repo.active_for_hotel("H1")]
+        self.assertEqual(active, ["R2", "R4"])
+        self.assertEqual(self.repo.count_active("H1"), 2)
+        build.assert_not_called()
+
+    def test_external_change_rebuilds_index(self):
+        self.assertEqual(self.repo.count_active("H2"), 1)
+        other = ReservationRepository(
+            path=self.reservations_path,
+            customer_repo=self.customer_repo,
+            hotel_repo=self.hotel_repo,
+        )
+        other.cancel_reservation("R3")
+        self.assertEqual(self.repo.count_active("H2"), 0)
+
+
+class TestDatedReservations(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        base = Path(self.tmp.name)
+        self.customer_repo = CustomerRepository(path=base / "customers.json")
+        self.hotel_repo = HotelRepository(path=base / "hotels.json")
+        self.repo = ReservationRepository(
+            path=base / "reservations.json",
+            customer_repo=self.customer_repo,
+            hotel_repo=self.hotel_repo,
+        )
+        self.customer_repo.create_customer("C1", "Cesar")
+        self.hotel_repo.create_hotel("H1", "Hotel WYNY", 1)
+        self.hotel_repo.create_hotel("H2", "Hotel Centro", 2)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_non_overlapping_ranges_share_a_room(self):
+        self.repo.create_reservation("R1", "C1", "H1", "2030-01-01", "2030-01-05")
+        self.repo.create_reservation("R2", "C1", "H1", "2030-01-05", "2030-01-07")
+        with self.assertRaises(ValueError):
+            self.repo.create_reservation("R3", "C1", "H1", "2030-01-04", "2030-01-06")
+        self.assertEqual(self.hotel_repo.get_hotel("H1").rooms_available, 1)
+
+    def test_cancel_frees_the_range(self):
+        self.repo.create_reservation("R1", "C1", "H1", "2030-01-01", "2030-01-05")
+        self.repo.cancel_reservation("R1")
+        self.repo.create_reservation("R2", "C1", "H1", "2030-01-02", "2030-01-03")
+        self.assertEqual(self.repo.get_reservation("R2").check_in, "2030-01-02")
+
+    def test_undated_booking_respects_future_dated_ones(self):
+        self.repo.create_reservation("R1", "C1", "H1", "2030-01-01", "2030-01-05")
+        with self.assertRaises(ValueError):
+            self.repo.create_reservation("R2", "C1", "H1")
+
+    def test_search_availability(self):
+        self.repo.create_reservation("R1", "C1", "H2", "2030-02-01", "2030-02-10")
+        self.repo.create_reservation("R2", "C1", "H1")
+        found = self.hotel_repo.search_availability(("2030-02-05", "2030-02-06"))
+        self.assertEqual([(h.hotel_id, free) for h, free in found], [("H2", 1)])
+        self.assertEqual(
+            self.hotel_repo.search_availability(("2030-02-05", "2030-02-06"), min_rooms=2),
+            [],
+        )
+
+    def test_dates_persist_and_are_validated(self):
+        with self.assertRaises(ValueError):
+            self.repo.create_reservation("R1", "C1", "H1", "2030-01-05", "2030-01-01")
+        self.repo.create_reservation("R1", "C1", "H1", "2030-01-01", "2030-01-05")
+        self.repo.create_reservation("R2", "C1", "H2")
+
+        reopened = ReservationRepository(
+            path=self.repo.path,
+            customer_repo=self.customer_repo,
+            hotel_repo=HotelRepository(path=self.hotel_repo.path),
+        )
+        self.assertEqual(reopened.get_reservation("R1").check_out, "2030-01-05")
+        self.assertIsNone(reopened.get_reservation("R2").check_in)
+        self.assertEqual(reopened.hotel_repo.max_occupancy("H1", "2030-01-03", "2030-01-04"), 1)
+
+    def test_bulk_sees_earlier_items_of_the_batch(self):
+        results = self.repo.create_reservations_bulk([
+            {"reservation_id": "R1", "customer_id": "C1", "hotel_id": "H1",
+             "check_in": "2030-03-01", "check_out": "2030-03-03"},
+            {"reservation_id": "R2", "customer_id": "C1", "hotel_id": "H1",
+             "check_in": "2030-03-02", "check_out": "2030-03-04"},
+        ])
+        self.assertEqual([r.ok for r in results], [True, False])
+
+
+class TestShardedReservations(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name)
+        self.customer_repo = CustomerRepository(path=self.base / "customers.json")
+        self.hotel_repo = HotelRepository(path=self.base / "hotels.json")
+        self.customer_repo.create_customer("C1", "Cesar")
+        self.hotel_repo.create_hotel("H1", "Hotel WYNY", 10)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def repo(self, **kwargs):
+        backend = ShardedJsonBackend(
+            self.base / "reservations",
+            "reservation_id",
+            schema=ReservationRepository.record_schema,
+            **kwargs,
+        )
+        return ReservationRepository(
+            path=self.base / "reservations",
+            customer_repo=self.customer_repo,
+            hotel_repo=self.hotel_repo,
+            backend=backend,
+        )
+
+    def test_create_and_cancel_write_one_shard(self):
+        repo = self.repo(shards=4)
+        for i in range(6):
+            repo.create_reservation(f"R{i}", "C1", "H1")
+
+        repo.cancel_reservation("R3")
+        self.assertEqual(len(repo.list_reservations()), 6)
+        self.assertFalse(self.repo().get_reservation("R3").active)
+        self.assertEqual(self.hotel_repo.get_hotel("H1").rooms_available, 5)
+
+        with mock.patch("src.unit_of_work.commit_files") as commit:
+            repo.cancel_reservation("R2")
+        names = sorted(p.name for p in commit.call_args.args[0])
+        self.assertEqual(len(names), 2)
+        self.assertIn("hotels.json", names)
+
+    def test_cli_shards_and_reshards(self):
+        legacy = ReservationRepository(
+            path=self.base / "reservations.json",
+            customer_repo=self.customer_repo,
+            hotel_repo=self.hotel_repo,
+        )
+        legacy.create_reservation("R1", "C1", "H1")
+        legacy.create_reservation("R2", "C1", "H1")
+        target = str(self.base / "reservations")
+
+        with mock.patch("builtins.print"):
+            reshard_main(["--dir", target, "--shards", "4",
+                          "--from", str(self.base / "reservations.json")])
+            reshard_main(["--dir", target, "--shards", "2", "--shard-field", "hotel_id"])
+
+        repo = self.repo()
+        self.assertEqual(repo.backend.layout().count, 2)
+        self.assertEqual(
+            sorted(r.reservation_id for r in repo.list_reservations()), ["R1", "R2"]
+        )
+        self.assertTrue(repo.backend.trusted())
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import socket
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src.client import ReservationClient, _Connection
+from src.customer import Customer
+from src.repository import ConflictError
+from src.reservation import Reservation, ReservationRepository
+from src.server import (
+    RemoteError, ReservationServer, decode_error, encode_error, open_repositories
+)
+
+
+class TestProtocol(unittest.TestCase):
+    def test_errors_keep_their_type(self):
+        for exc in (KeyError("customer_id not found"), ValueError("x"), ConflictError("y")):
+            decoded = decode_error(encode_error(exc))
+            self.assertIs(type(decoded), type(exc))
+            self.assertEqual(decoded.args, exc.args)
+        self.assertIsInstance(decode_error(encode_error(OSError("disk"))), RemoteError)
+
+
+class TestReservationServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data = Path(self.tmp.name)
+        self.repo = open_repositories(self.data)
+        self.server = ReservationServer(self.repo)
+        self.address = ("127.0.0.1", 0)
+        if hasattr(socket, "AF_UNIX"):
+            self.address = str(self.data / "server.sock")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_repository_operations(self):
+        with self.server.running(self.address) as address, ReservationClient(address) as client:
+            customer = client.create_customer("C1", "María García")
+            self.assertEqual(customer, Customer("C1", "María García"))
+            client.create_hotel("H1", "Uno", 2)
+            reservation = client.create_reservation(None, "C1", "H1")
+            self.assertIsInstance(reservation, Reservation)
+            dated = client.create_reservation("R2", "C1", "H1", check_in="2030-01-01",
+                                              check_out="2030-01-02")
+
+            self.assertEqual(client.get_hotel("H1").rooms_available, 1)
+            self.assertEqual(client.count_active("H1"), 2)
+            self.assertEqual(
+                [r.reservation_id for r in client.find_by_customer("C1")],
+                [reservation.reservation_id, "R2"],
+            )
+            [(hotel, free)] = client.search_availability(["2030-01-01", "2030-01-02"], 0)
+            self.assertEqual((hotel.hotel_id, free), ("H1", 0))
+            self.assertEqual(client.search_by_name("maria")[0].customer_id, "C1")
+
+            results = client.cancel_reservations_bulk([dated.reservation_id, "missing"])
+            self.assertTrue(results[0].ok)
+            self.assertIsInstance(results[1].error, KeyError)
+            self.assertIsNone(client.get_customer("missing"))
+
+            with self.assertRaises(ValueError):
+                client.create_customer("C1", "Otro")
+            with self.assertRaises(KeyError):
+                client.cancel_reservation("missing")
+            with self.assertRaises(TypeError):
+                client.call("get_hotel")
+            with self.assertRaises(AttributeError):
+                client.drop_everything()
+
+        # El servidor escribió los archivos: un proceso nuevo ve los cambios.
+        fresh = ReservationRepository(
+            path=self.data / "reservations.json",
+            customer_repo=self.repo.customer_repo,
+            hotel_repo=self.repo.hotel_repo,
+        )
+        self.assertEqual(fresh.count_active("H1"), 1)
+
+    def test_concurrent_creates_are_batched(self):
+        with self.server.running(self.address) as address, \
+                ReservationClient(address, pool_size=8) as client:
+            client.create_hotel("H1", "Uno", 100)
+            client.create_customers_bulk({"customer_id": f"C{i}", "name": "x"} for i in range(40))
+            bulk = ReservationRepository.create_reservations_bulk
+            with mock.patch.object(ReservationRepository, "create_reservations_bulk",
+                                   autospec=True, side_effect=bulk) as calls:
+                threads = [
+                    threading.Thread(target=client.create_reservation, args=(None, f"C{i}", "H1"))
+                    for i in range(40)
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            self.assertEqual(client.count_active("H1"), 40)
+            self.assertEqual(client.get_hotel("H1").rooms_available, 60)
+            self.assertLess(calls.call_count, 40)
+            self.assertLessEqual(len(client.pool._idle.queue), 8)
+
+    def test_connections_are_reused(self):
+        with self.server.running(self.address) as address, ReservationClient(address) as client:
+            with mock.patch("src.client._Connection", wraps=_Connection) as opened:
+                for _ in range(20):
+                    client.list_hotels()
+            self.assertEqual(opened.call_count, 1)
+
+    def test_pipelined_requests_and_bad_lines(self):
+        async def talk(address):
+            if isinstance(address, str):
+                reader, writer = await asyncio.open_unix_connection(address)
+            else:
+                reader, writer = await asyncio.open_connection(*address)
+            writer.write(b"not json\n")
+            writer.write(b'{"id": 7, "op": "nope"}\n')
+            writer.write(b'{"id": 8, "op": "list_hotels"}\n')
+            await writer.drain()
+            responses = [json.loads(await reader.readline()) for _ in range(3)]
+            writer.close()
+            await writer.wait_closed()
+            return responses
+
+        with self.server.running(self.address) as address:
+            responses = asyncio.run(talk(address))
+        by_id = {r["id"]: r for r in responses}
+        self.assertEqual(by_id[None]["error"]["type"], "JSONDecodeError")
+        self.assertEqual(by_id[7]["error"], {"type": "ValueError",
+                                             "message": "unknown operation 'nope'"})
+        self.assertEqual(by_id[8], {"id": 8, "ok": True, "result": []})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,28 @@
 """Tests for JSON storage helpers."""
 
+import threading
 import unittest
 from pathlib import Path
 import tempfile
+from unittest import mock
 
-from src.storage import load_json, save_json
+import src.storage
+from src.storage import (
+    Bounds,
+    FileCache,
+    JournalBackend,
+    JsonFileBackend,
+    ShardedJsonBackend,
+    SnapshotReader,
+    SqliteBackend,
+    encode_snapshot,
+    file_signature,
+    iter_json_array,
+    reshard,
+    shard_index,
+    load_json,
+    save_json,
+)
 
 
 class TestStorage(unittest.TestCase):
@@ -39,5 +57,381 @@ class TestStorage(unittest.TestCase):
             self.assertEqual(load_json(f, default=123), 123)
 
 
+class TestFileCache(unittest.TestCase):
+    """Unit tests for signature-validated FileCache."""
+
+    def test_signature_missing_file_is_none(self):
+        """Missing files have no signature."""
+        with tempfile.TemporaryDirectory() as d:
+            self.assertIsNone(file_signature(Path(d) / "nope.json"))
+
+    def test_cache_hit_until_file_changes(self):
+        """Cached value is returned until the file is rewritten."""
+        with tempfile.TemporaryDirectory() as d:
+            f = Path(d) / "data.json"
+            save_json(f, [1])
+            cache = FileCache(f)
+            value = {"parsed": True}
+            cache.put(value)
+            self.assertIs(cache.get(), value)
+
+            save_json(f, [1, 2, 3])
+            self.assertIsNone(cache.get())
+
+    def test_missing_file_cache_expires_when_created(self):
+        """A value cached for a missing file is dropped once it appears."""
+        with tempfile.TemporaryDirectory() as d:
+            f = Path(d) / "later.json"
+            cache = FileCache(f)
+            cache.put({})
+            self.assertEqual(cache.get(), {})
+            save_json(f, [1])
+            self.assertIsNone(cache.get())
+
+
+class TestJsonFileBackend(unittest.TestCase):
+    """Unit tests for the whole-file JSON backend."""
+
+    def test_put_get_delete(self):
+        """Keyed operations round-trip through the JSON list file."""
+        with tempfile.TemporaryDirectory() as d:
+            f = Path(d) / "items.json"
+            backend = JsonFileBackend(f, "id")
+            backend.put("a", {"id": "a", "v": 1})
+            backend.put("b", {"id": "b", "v": 2})
+            backend.delete("a")
+            self.assertIsNone(backend.get("a"))
+            self.assertEqual(load_json(f, default=None), [{"id": "b", "v": 2}])
+
+    def test_invalid_format_yields_no_records(self):
+        """A non-list payload is reported and treated as empty."""
+        with tempfile.TemporaryDirectory() as d:
+            f = Path(d) / "items.json"
+            save_json(f, {"id": "a"})
+            self.assertEqual(list(JsonFileBackend(f, "id").scan()), [])
+
+    def test_uncached_backend_keeps_records_only_while_held(self):
+        """With cache=False parsed records live only until the outermost hold ends."""
+        with tempfile.TemporaryDirectory() as d:
+            f = Path(d) / "items.json"
+            save_json(f, [{"id": "a"}, {"id": "b"}])
+            backend = JsonFileBackend(f, "id", cache=False)
+            with mock.patch(
+                "src.storage.json_file.read_file", wraps=src.storage.read_file
+            ) as read_file:
+                self.assertTrue(backend.exists("a"))
+                self.assertIsNotNone(backend.get("b"))
+                self.assertEqual(read_file.call_count, 2)
+                with backend.hold():
+                    backend.get("a")
+                    backend.put("c", {"id": "c"})
+                    self.assertTrue(backend.exists("c"))
+                self.assertEqual(read_file.call_count, 3)
+            self.assertIsNone(backend._cache.get())  # pylint: disable=protected-access
+
+
+class TestJournalBackend(unittest.TestCase):
+    """Unit tests for the snapshot + append-only journal backend."""
+
+    def test_mutations_append_instead_of_rewriting_snapshot(self):
+        """Puts and deletes go to the journal and replay on reopen."""
+        with tempfile.TemporaryDirectory() as d:
+            f = Path(d) / "items.json"
+            save_json(f, [{"id": "a", "v": 0}])
+            backend = JournalBackend(f, "id")
+            backend.put("a", {"id": "a", "v": 1})
+            backend.put("b", {"id": "b", "v": 2})
+            backend.delete("b")
+
+            self.assertEqual(load_json(f, default=None), [{"id": "a", "v": 0}])
+            reopened = JournalBackend(f, "id")
+            self.assertEqual(dict(reopened.scan()), {"a": {"id": "a", "v": 1}})
+
+    def test_checkpoint_folds_journal_into_snapshot(self):
+        """Crossing the size threshold writes a snapshot and empties the log."""
+        with tempfile.TemporaryDirectory() as d:
+            f = Path(d) / "items.json"
+            backend = JournalBackend(f, "id", checkpoint_bytes=200)
+            for i in range(10):
+                backend.put(f"k{i}", {"id": f"k{i}"})
+
+            self.assertLess(backend.log_path.stat().st_size, 200)
+            self.assertEqual(len(load_json(f, default=[])), len(list(backend.scan())))
+            self.assertEqual(len(list(JournalBackend(f, "id").scan())), 10)
+
+    def test_torn_last_entry_is_ignored_and_cut(self):
+        """A partial trailing line from a crash is skipped and overwritten."""
+        with tempfile.TemporaryDirectory() as d:
+            f = Path(d) / "items.json"
+            JournalBackend(f, "id").put("a", {"id": "a"})
+            with open(f.with_name("items.json.journal"), "ab") as fh:
+                fh.write(b'{"op":"put","key":"b","rec')
+
+            backend = JournalBackend(f, "id")
+            self.assertEqual([k for k, _ in backend.scan()], ["a"])
+            backend.put("c", {"id": "c"})
+            self.assertEqual([k for k, _ in JournalBackend(f, "id").scan()], ["a", "c"])
+
+
+class TestSqliteBackend(unittest.TestCase):
+    """Unit tests for the SQLite backend."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.backend = SqliteBackend(Path(self.tmp.name) / "db.sqlite", "items", "id")
+
+    def tearDown(self):
+        self.backend.close()
+        self.tmp.cleanup()
+
+    def test_put_get_scan_delete(self):
+        """Keyed operations round-trip through the table."""
+        self.backend.put("b", {"id": "b"})
+        self.backend.put("a", {"id": "a"})
+        self.backend.delete("b")
+        self.assertEqual(self.backend.get("a"), {"id": "a"})
+        self.assertIsNone(self.backend.get("b"))
+        self.assertEqual([k for k, _ in self.backend.scan()], ["a"])
+
+    def test_adjust_respects_bounds(self):
+        """Conditional update applies only while bounds hold."""
+        self.backend.put("h", {"id": "h", "free": 1, "total": 1})
+        self.assertEqual(self.backend.adjust("h", "free", -1, Bounds(minimum=0))["free"], 0)
+        self.assertIsNone(self.backend.adjust("h", "free", -1, Bounds(minimum=0)))
+        ceiling = Bounds(maximum_field="total")
+        self.assertEqual(self.backend.adjust("h", "free", 1, ceiling)["free"], 1)
+        self.assertIsNone(self.backend.adjust("h", "free", 1, ceiling))
+
+    def test_adjust_non_integer_field_raises(self):
+        """Adjusting a missing or non-integer field raises KeyError and changes nothing."""
+        self.backend.put("h", {"id": "h", "flag": True})
+        for field in ("free", "flag"):
+            with self.assertRaises(KeyError):
+                self.backend.adjust("h", field, 1)
+        self.assertEqual(self.backend.get("h"), {"id": "h", "flag": True})
+
+    def test_reader_threads_do_not_see_open_transactions(self):
+        """Another thread's uncommitted write is invisible to readers."""
+        started, release = threading.Event(), threading.Event()
+
+        def writer():
+            with self.backend._transaction() as conn:  # pylint: disable=protected-access
+                conn.execute("INSERT INTO items (key, data) VALUES ('x', '{}')")
+                started.set()
+                release.wait(5)
+                raise RuntimeError("roll back")
+
+        thread = threading.Thread(target=lambda: self.assertRaises(RuntimeError, writer))
+        thread.start()
+        started.wait(5)
+        try:
+            self.assertIsNone(self.backend.get("x"))
+        finally:
+            release.set()
+            thread.join()
+        self.assertIsNone(self.backend.get("x"))
+
+    def test_adjust_missing_key_raises(self):
+        """Adjusting a missing key raises KeyError."""
+        with self.assertRaises(KeyError):
+            self.backend.adjust("nope", "free", -1, Bounds(minimum=0))
+
+    def test_uses_wal_mode(self):
+        """The database runs in write-ahead-log mode."""
+        # pylint: disable=protected-access
+        mode = self.backend._conn.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+
+
+class TestIterJsonArray(unittest.TestCase):
+    """Unit tests for the streaming JSON array reader."""
+
+    def test_streams_items_across_chunk_boundaries(self):
+        """Items split between tiny chunks are decoded intact."""
+        with tempfile.TemporaryDirectory() as d:
+            f = Path(d) / "data.json"
+            items = [12345, "texto, con ]", {"a": [1, 2, {"b": None}]}, 0.5, True]
+            save_json(f, items)
+            for chunk_size in (1, 2, 3, 7, 64):
+                self.assertEqual(list(iter_json_array(f, chunk_size=chunk_size)), items)
+
+    def test_missing_empty_and_empty_array(self):
+        """Missing files, empty files and [] yield nothing."""
+        with tempfile.TemporaryDirectory() as d:
+            empty = Path(d) / "empty.json"
+            empty.write_text("  ", encoding="utf-8")
+            blank = Path(d) / "blank.json"
+            blank.write_text(" [ ] ", encoding="utf-8")
+            self.assertEqual(list(iter_json_array(Path(d) / "nope.json")), [])
+            self.assertEqual(list(iter_json_array(empty)), [])
+            self.assertEqual(list(iter_json_array(blank)), [])
+
+    def test_invalid_content_stops_iteration(self):
+        """Corrupt content ends the stream after the valid prefix."""
+        with tempfile.TemporaryDirectory() as d:
+            f = Path(d) / "bad.json"
+            f.write_text('[1, 2, {"x": ', encoding="utf-8")
+            self.assertEqual(list(iter_json_array(f, chunk_size=4)), [1, 2])
+            f.write_text('{"not": "a list"}', encoding="utf-8")
+            self.assertEqual(list(iter_json_array(f)), [])
+
+
+class TestSnapshot(unittest.TestCase):
+    """Unit tests for the binary snapshot format and its use by JsonFileBackend."""
+
+    def test_reader_looks_up_and_iterates(self):
+        """Lookups binary-search the index; iteration keeps file order."""
+        records = {f"k{i}": {"id": f"k{i}", "n": i, "name": "é"} for i in (5, 1, 30, 2)}
+        with tempfile.TemporaryDirectory() as d:
+            f = Path(d) / "items.snap"
+            f.write_bytes(encode_snapshot(records, (1, 2, 3)))
+            with SnapshotReader(f) as reader:
+                self.assertEqual(len(reader), 4)
+                self.assertEqual(reader.source, (1, 2, 3))
+                for key, record in records.items():
+                    self.assertEqual(reader.get(key), record)
+                self.assertIsNone(reader.get("k3"))
+                self.assertIsNone(reader.get("zz"))
+                self.assertEqual(list(reader), list(records.items()))
+
+    def test_rejects_invalid_files(self):
+        """Foreign and truncated files raise ValueError."""
+        with tempfile.TemporaryDirectory() as d:
+            f = Path(d) / "items.snap"
+            f.write_bytes(b"[]")
+            with self.assertRaises(ValueError):
+                SnapshotReader(f)
+            f.write_bytes(encode_snapshot({"a": {"id": "a"}}, (1, 2, 3))[:-1])
+            with self.assertRaises(ValueError):
+                SnapshotReader(f)
+
+    def test_backend_prefers_fresh_snapshot(self):
+        """Point reads use the snapshot without parsing the JSON file."""
+        with tempfile.TemporaryDirectory() as d:
+            f = Path(d) / "items.json"
+            JsonFileBackend(f, "id", snapshot=True).apply(
+                {"a": {"id": "a", "v": 1}, "b": {"id": "b", "v": 2}}, ()
+            )
+            self.assertTrue((Path(d) / "items.snap").exists())
+
+            backend = JsonFileBackend(f, "id")
+            with mock.patch("src.storage.json_file.read_file") as load:
+                self.assertEqual(backend.get("b"), {"id": "b", "v": 2})
+                self.assertIsNone(backend.get("c"))
+                self.assertEqual([k for k, _ in backend.scan()], ["a", "b"])
+            load.assert_not_called()
+
+    def test_existing_snapshot_is_kept_fresh(self):
+        """Writes refresh an existing snapshot; external edits make it stale."""
+        with tempfile.TemporaryDirectory() as d:
+            f = Path(d) / "items.json"
+            backend = JsonFileBackend(f, "id")
+            backend.put("a", {"id": "a", "v": 1})
+            backend.write_snapshot()
+            backend.put("a", {"id": "a", "v": 2})
+            self.assertEqual(JsonFileBackend(f, "id").get("a"), {"id": "a", "v": 2})
+
+            save_json(f, [{"id": "a", "v": 3}])
+            self.assertEqual(JsonFileBackend(f, "id").get("a"), {"id": "a", "v": 3})
+
+
+class TestStamp(unittest.TestCase):
+    """Unit tests for the schema/checksum stamp of JsonFileBackend."""
+
+    def test_stamp_tracks_own_writes_only(self):
+        """Own writes are stamped; edits, other schemas and untrusted merges are not."""
+        with tempfile.TemporaryDirectory() as d:
+            f = Path(d) / "items.json"
+            backend = JsonFileBackend(f, "id", schema="item/1")
+            backend.put("a", {"id": "a"})
+            self.assertTrue((Path(d) / "items.stamp").exists())
+            self.assertTrue(JsonFileBackend(f, "id", schema="item/1").trusted())
+            self.assertFalse(JsonFileBackend(f, "id", schema="item/2").trusted())
+            self.assertFalse(JsonFileBackend(f, "id").trusted())
+
+            save_json(f, [{"id": "a"}, {"id": "b", "x": 1}])
+            edited = JsonFileBackend(f, "id", schema="item/1")
+            self.assertFalse(edited.trusted())
+            edited.put("c", {"id": "c"})
+            self.assertFalse((Path(d) / "items.stamp").exists())
+            self.assertFalse(JsonFileBackend(f, "id", schema="item/1").trusted())
+
+    def test_cold_trust_check_streams_the_file(self):
+        """A cold trusted() and scan() checksum the file in chunks, never reading it whole."""
+        with tempfile.TemporaryDirectory() as d:
+            f = Path(d) / "items.json"
+            JsonFileBackend(f, "id", schema="item/1").apply(
+                {str(i): {"id": str(i)} for i in range(100)}, ()
+            )
+            backend = JsonFileBackend(f, "id", schema="item/1")
+            with mock.patch("src.storage.json_file.read_file") as read_file:
+                self.assertTrue(backend.trusted())
+                self.assertEqual(next(backend.scan())[0], "0")
+            read_file.assert_not_called()
+
+
+class TestShardedJsonBackend(unittest.TestCase):
+    """Unit tests for hash-sharded JSON collections."""
+
+    def records(self, count):
+        return {
+            f"R{i}": {"reservation_id": f"R{i}", "hotel_id": f"H{i % 3}"} for i in range(count)
+        }
+
+    def test_writes_touch_only_affected_shards(self):
+        """A single put rewrites one shard; reads merge every shard."""
+        with tempfile.TemporaryDirectory() as d:
+            backend = ShardedJsonBackend(d, "reservation_id", shards=4)
+            backend.apply(self.records(40), ())
+            self.assertEqual(load_json(Path(d) / "manifest.json", None)["shards"], 4)
+
+            with mock.patch("src.storage.sharded.commit_files") as commit:
+                backend.apply({"R99": {"reservation_id": "R99", "hotel_id": "H0"}}, ())
+            written = list(commit.call_args.args[0])
+            self.assertEqual(
+                [p.name for p in written],
+                [f"shard-{shard_index('R99', 4):04d}-of-0004.json"],
+            )
+
+            backend.put("R99", {"reservation_id": "R99", "hotel_id": "H0"})
+            backend.delete("R3")
+            fresh = ShardedJsonBackend(d, "reservation_id", shards=1)
+            self.assertEqual(len(dict(fresh.scan())), 40)
+            self.assertIsNone(fresh.get("R3"))
+            self.assertEqual(fresh.get("R99")["hotel_id"], "H0")
+
+    def test_shard_by_other_field(self):
+        """Records sharded by hotel_id stay findable by key and can move."""
+        with tempfile.TemporaryDirectory() as d:
+            backend = ShardedJsonBackend(d, "reservation_id", shards=3, shard_field="hotel_id")
+            backend.apply(self.records(9), ())
+            shards_of = {}
+            for shard_file in Path(d).glob("shard-*.json"):
+                for record in load_json(shard_file, []):
+                    shards_of.setdefault(record["hotel_id"], set()).add(shard_file.name)
+            self.assertTrue(all(len(names) == 1 for names in shards_of.values()))
+
+            backend.put("R1", {"reservation_id": "R1", "hotel_id": "H2"})
+            fresh = ShardedJsonBackend(d, "reservation_id")
+            self.assertEqual(fresh.get("R1")["hotel_id"], "H2")
+            self.assertEqual(sorted(k for k, _ in fresh.scan()), sorted(self.records(9)))
+            with self.assertRaises(ValueError):
+                fresh.put("R50", {"reservation_id": "R50"})
+
+    def test_reshard(self):
+        """Resharding keeps every record and removes the old layout."""
+        with tempfile.TemporaryDirectory() as d:
+            ShardedJsonBackend(d, "reservation_id", shards=4).apply(self.records(30), ())
+            self.assertEqual(reshard(d, "reservation_id", 2, shard_field="hotel_id"), 30)
+
+            names = sorted(p.name for p in Path(d).iterdir())
+            self.assertEqual(
+                names, ["manifest.json", "shard-0000-of-0002.json", "shard-0001-of-0002.json"]
+            )
+            backend = ShardedJsonBackend(d, "reservation_id")
+            self.assertEqual(dict(backend.scan()), self.records(30))
+            self.assertEqual(backend.layout().field, "hotel_id")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,128 @@
+import gzip
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src.server import open_repositories
+from src.trace import ReplayOptions, TraceRecorder, main, read_trace, replay
+
+
+class TestTrace(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name)
+        self.trace = self.base / "traffic.trace.gz"
+        self.repo = open_repositories(self.base / "prod")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def record_workload(self):
+        with TraceRecorder(self.trace) as recorder:
+            customers = recorder.wrap(self.repo.customer_repo)
+            hotels = recorder.wrap(self.repo.hotel_repo)
+            reservations = recorder.wrap(self.repo)
+
+            customers.create_customers_bulk(
+                {"customer_id": None, "name": f"Cliente {i}"} for i in range(3)
+            )
+            hotels.create_hotel("H1", "Uno", 2)
+            customer_id = customers.list_customers()[0].customer_id
+            first = reservations.create_reservation(None, customer_id, "H1")
+            reservations.create_reservation(None, customer_id, "H1", "2030-01-01", "2030-01-02")
+            hotels.get_hotel("H1")
+            with self.assertRaises(KeyError):
+                reservations.cancel_reservation("missing")
+            reservations.cancel_reservation(first.reservation_id)
+            hotels.get_hotel("H1")
+            self.assertEqual(hotels.path, self.repo.hotel_repo.path)
+        return first
+
+    def test_recorded_calls(self):
+        first = self.record_workload()
+        calls = list(read_trace(self.trace))
+        self.assertEqual(
+            [c["op"] for c in calls],
+            ["create_customers_bulk", "create_hotel", "list_customers", "create_reservation",
+             "create_reservation", "get_hotel", "cancel_reservation", "cancel_reservation",
+             "get_hotel"],
+        )
+        self.assertEqual(calls[6]["s"], "KeyError")
+        self.assertTrue(all(c["s"] == "ok" for i, c in enumerate(calls) if i != 6))
+        # Los IDs asignados quedan grabados para reproducir las mismas entidades.
+        self.assertEqual(calls[3]["a"][0], first.reservation_id)
+        self.assertTrue(all(item["customer_id"] for item in calls[0]["a"][0]))
+        self.assertEqual(calls[4]["a"][3:], ["2030-01-01", "2030-01-02"])
+        self.assertGreaterEqual(calls[1]["us"], 0)
+
+    def test_replay_reproduces_results(self):
+        self.record_workload()
+        report = replay(self.trace, self.base / "run")
+        self.assertEqual(report.calls, 9)
+        self.assertEqual(report.mismatches, 0)
+        self.assertEqual(report.operations["cancel_reservation"].errors, 1)
+        summary = report.to_dict()["operations"]["create_reservation"]
+        self.assertEqual(summary["count"], 2)
+        self.assertGreater(summary["p50_ms"], 0)
+        self.assertIn("get_hotel", report.format())
+
+        run = open_repositories(self.base / "run")
+        self.assertEqual(run.hotel_repo.get_hotel("H1").rooms_available, 2)
+        self.assertEqual(run.count_active("H1"), 1)
+
+        with self.assertRaises(ValueError):
+            replay(self.trace, self.base / "run")
+
+    def test_replay_from_seed_detects_changed_results(self):
+        self.record_workload()
+        # Sin el estado inicial el hotel no existe y `reserve_room` falla.
+        with TraceRecorder(self.trace) as recorder:
+            recorder.wrap(self.repo.hotel_repo).get_hotel("H1")
+            recorder.wrap(self.repo.hotel_repo).reserve_room("H1")
+        self.assertEqual(replay(self.trace, self.base / "empty").mismatches, 1)
+        options = ReplayOptions(seed=self.base / "prod", speed=100)
+        seeded = replay(self.trace, self.base / "seeded", options)
+        self.assertEqual(seeded.mismatches, 0)
+
+    def test_replay_on_a_copy_of_the_database(self):
+        db = self.base / "seed.db"
+        open_repositories(self.base / "empty", db)
+        self.record_workload()
+        for run in ("a", "b"):
+            report = replay(self.trace, self.base / run, ReplayOptions(db=db))
+            self.assertEqual(report.mismatches, 0)
+        self.assertEqual(open_repositories(self.base / "check", db).hotel_repo.list_hotels(), [])
+        with self.assertRaises(ValueError):
+            replay(self.trace, self.base / "c", ReplayOptions(db=self.base / "missing.db"))
+
+    def test_bulk_tuples_and_interrupts(self):
+        with TraceRecorder(self.trace) as recorder:
+            customers = recorder.wrap(self.repo.customer_repo)
+            customers.create_customers_bulk(({"customer_id": None, "name": "Ana"},))
+            customers.create_customers_bulk(items=({"name": "Eva"},))
+            with mock.patch.object(self.repo.customer_repo, "get_customer",
+                                   side_effect=KeyboardInterrupt):
+                with self.assertRaises(KeyboardInterrupt):
+                    customers.get_customer("C1")
+        calls = list(read_trace(self.trace))
+        self.assertTrue(calls[0]["a"][0][0]["customer_id"].startswith("C"))
+        self.assertTrue(calls[1]["k"]["items"][0]["customer_id"].startswith("C"))
+        self.assertEqual(calls[2]["s"], "KeyboardInterrupt")
+
+    def test_cli_writes_json_report(self):
+        self.record_workload()
+        out = self.base / "report.json"
+        self.assertEqual(main(["replay", str(self.trace), "--no-cache", "--json", str(out)]), 0)
+        self.assertEqual(json.loads(out.read_text(encoding="utf-8"))["calls"], 9)
+
+    def test_rejects_unknown_files(self):
+        with gzip.open(self.trace, "wt", encoding="utf-8") as trace:
+            trace.write('{"something": "else"}\n')
+        with self.assertRaises(ValueError):
+            list(read_trace(self.trace))
+
+
+if __name__ == "__main__":
+    unittest.main()
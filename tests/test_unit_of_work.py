@@ -0,0 +1,135 @@
+import json
+import unittest
+from pathlib import Path
+import tempfile
+from unittest import mock
+
+import src.storage.json_file
+from src.customer import CustomerRepository
+from src.hotel import HotelRepository
+from src.reservation import ReservationRepository
+from src.storage import Bounds, SqliteBackend, recover_commits
+from src.unit_of_work import UnitOfWork
+
+
+class TestUnitOfWork(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name)
+        self.customer_repo = CustomerRepository(path=self.base / "customers.json")
+        self.hotel_repo = HotelRepository(path=self.base / "hotels.json")
+        self.repo = ReservationRepository(
+            path=self.base / "reservations.json",
+            customer_repo=self.customer_repo,
+            hotel_repo=self.hotel_repo,
+        )
+        self.customer_repo.create_customer("C1", "Cesar")
+        self.hotel_repo.create_hotel("H1", "Hotel WYNY", 2)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_changes_are_discarded_on_error(self):
+        with self.assertRaises(RuntimeError):
+            with UnitOfWork(self.hotel_repo) as uow:
+                uow.adjust(self.hotel_repo, "H1", "rooms_available", -1, Bounds(minimum=0))
+                raise RuntimeError("boom")
+        self.assertEqual(self.hotel_repo.get_hotel("H1").rooms_available, 2)
+
+    def test_staged_reads_do_not_leak_before_commit(self):
+        with UnitOfWork(self.hotel_repo) as uow:
+            uow.adjust(self.hotel_repo, "H1", "rooms_available", -1, Bounds(minimum=0))
+            self.assertEqual(self.hotel_repo.get_hotel("H1").rooms_available, 2)
+        self.assertEqual(self.hotel_repo.get_hotel("H1").rooms_available, 1)
+
+    def test_create_reservation_reads_each_file_once(self):
+        self.repo.create_reservation("R1", "C1", "H1")
+        repo = ReservationRepository(
+            path=self.base / "reservations.json",
+            customer_repo=CustomerRepository(path=self.base / "customers.json"),
+            hotel_repo=HotelRepository(path=self.base / "hotels.json"),
+        )
+        with mock.patch.object(
+            src.storage.json_file, "read_file", wraps=src.storage.read_file
+        ) as load:
+            repo.create_reservation("R2", "C1", "H1")
+        loaded = [Path(call.args[0]).name for call in load.call_args_list]
+        self.assertEqual(sorted(loaded), ["customers.json", "hotels.json", "reservations.json"])
+
+    def test_failed_booking_leaves_files_untouched(self):
+        self.repo.create_reservation("R1", "C1", "H1")
+        self.repo.create_reservation("R2", "C1", "H1")
+        with self.assertRaises(ValueError):
+            self.repo.create_reservation("R3", "C1", "H1")
+        self.assertIsNone(self.repo.get_reservation("R3"))
+        self.assertEqual(self.hotel_repo.get_hotel("H1").rooms_available, 0)
+
+    def test_recover_completes_interrupted_commit(self):
+        hotels = self.base / "hotels.json"
+        reservations = self.base / "reservations.json"
+        tmp_h = self.base / ".hotels.json.x.tmp"
+        tmp_r = self.base / ".reservations.json.x.tmp"
+        tmp_h.write_text(json.dumps([
+            {"hotel_id": "H1", "name": "Hotel WYNY", "rooms_total": 2, "rooms_available": 1}
+        ]), encoding="utf-8")
+        tmp_r.write_text(json.dumps([
+            {"reservation_id": "R1", "customer_id": "C1", "hotel_id": "H1", "active": True}
+        ]), encoding="utf-8")
+        (self.base / ".commit-x.json").write_text(
+            json.dumps([[str(tmp_h), str(hotels)], [str(tmp_r), str(reservations)]]),
+            encoding="utf-8",
+        )
+
+        self.assertEqual(recover_commits(self.base), 1)
+        self.assertEqual(self.hotel_repo.get_hotel("H1").rooms_available, 1)
+        self.assertTrue(self.repo.get_reservation("R1").active)
+        self.assertFalse(tmp_h.exists())
+
+
+class TestUnitOfWorkSqlite(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        db = Path(self.tmp.name) / "hotel.db"
+        self.backend = SqliteBackend(db, "hotels", "hotel_id")
+        self.hotel_repo = HotelRepository(path=db, backend=self.backend)
+        self.hotel_repo.create_hotel("H1", "Hotel WYNY", 1)
+
+    def tearDown(self):
+        self.backend.close()
+        self.tmp.cleanup()
+
+    def test_adjustment_is_rechecked_at_commit(self):
+        with self.assertRaises(ValueError):
+            with UnitOfWork(self.hotel_repo) as uow:
+                uow.adjust(self.hotel_repo, "H1", "rooms_available", -1, Bounds(minimum=0))
+                self.hotel_repo.reserve_room("H1")
+        self.assertEqual(self.hotel_repo.get_hotel("H1").rooms_available, 0)
+
+    def test_failed_file_commit_reverts_adjustments(self):
+        repo = ReservationRepository(
+            path=Path(self.tmp.name) / "reservations.json",
+            customer_repo=CustomerRepository(path=Path(self.tmp.name) / "customers.json"),
+            hotel_repo=self.hotel_repo,
+        )
+        repo.customer_repo.create_customer("C1", "Cesar")
+        with mock.patch("src.unit_of_work.commit_files", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                repo.create_reservation("R1", "C1", "H1")
+        self.assertEqual(self.hotel_repo.get_hotel("H1").rooms_available, 1)
+        self.assertIsNone(repo.get_reservation("R1"))
+
+        repo.create_reservation("R1", "C1", "H1")
+        self.assertEqual(self.hotel_repo.get_hotel("H1").rooms_available, 0)
+
+    def test_conflict_is_detected_before_adjusting(self):
+        self.hotel_repo.create_hotel("H2", "Hotel Dos", 1)
+        with self.assertRaises(ValueError):
+            with UnitOfWork(self.hotel_repo) as uow:
+                uow.adjust(self.hotel_repo, "H1", "rooms_available", -1, Bounds(minimum=0))
+                uow.adjust(self.hotel_repo, "H2", "rooms_available", -1, Bounds(minimum=0))
+                self.hotel_repo.reserve_room("H2")
+        self.assertEqual(self.hotel_repo.get_hotel("H1").rooms_available, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
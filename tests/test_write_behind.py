@@ -0,0 +1,212 @@
+import threading
+import time
+import unittest
+from pathlib import Path
+import tempfile
+from unittest import mock
+
+import src.storage
+from src.customer import CustomerRepository
+from src.hotel import HotelRepository
+from src.locking import file_lock
+from src.repository import ConflictError
+from src.reservation import ReservationRepository
+from src.storage import JsonFileBackend, load_json
+from src.write_behind import WriteBehind
+
+
+class TestWriteBehind(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name)
+        self.hotels_path = self.base / "hotels.json"
+        self.customer_repo = CustomerRepository(path=self.base / "customers.json")
+        self.hotel_repo = HotelRepository(path=self.hotels_path)
+        self.customer_repo.create_customer("C1", "Cesar")
+        self.hotel_repo.create_hotel("H1", "Hotel WYNY", 10)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def rooms_on_disk(self):
+        return load_json(self.hotels_path, [])[0]["rooms_available"]
+
+    def test_mutations_are_visible_before_flush(self):
+        with WriteBehind(max_pending=100, max_delay=60) as wb:
+            wb.attach(self.hotel_repo)
+            for _ in range(3):
+                self.hotel_repo.reserve_room("H1")
+            self.assertEqual(self.hotel_repo.get_hotel("H1").rooms_available, 7)
+            self.assertEqual(self.hotel_repo.list_hotels()[0].rooms_available, 7)
+            self.assertEqual(self.rooms_on_disk(), 10)
+            wb.flush()
+            self.assertEqual(self.rooms_on_disk(), 7)
+            self.hotel_repo.release_room("H1")
+        self.assertEqual(self.rooms_on_disk(), 8)
+        with self.assertRaises(ValueError):
+            self.hotel_repo.reserve_room("H1")
+
+    def test_count_and_time_thresholds(self):
+        with WriteBehind(max_pending=2, max_delay=60) as wb:
+            wb.attach(self.hotel_repo)
+            self.hotel_repo.reserve_room("H1")
+            self.assertEqual(self.rooms_on_disk(), 10)
+            self.hotel_repo.reserve_room("H1")
+            self.assertEqual(self.rooms_on_disk(), 8)
+
+        repo = HotelRepository(path=self.hotels_path)
+        with WriteBehind(max_pending=100, max_delay=0.01) as wb:
+            wb.attach(repo)
+            repo.reserve_room("H1")
+            deadline = time.monotonic() + 5
+            while self.rooms_on_disk() != 7 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(self.rooms_on_disk(), 7)
+
+    def test_group_commit_spans_repositories(self):
+        reservations = ReservationRepository(
+            path=self.base / "reservations.json",
+            customer_repo=self.customer_repo,
+            hotel_repo=self.hotel_repo,
+        )
+        with WriteBehind(max_pending=100, max_delay=60) as wb:
+            wb.attach(self.hotel_repo, reservations)
+            reservations.create_reservation("R1", "C1", "H1")
+            reservations.create_reservation("R2", "C1", "H1")
+            reservations.cancel_reservation("R1")
+            with mock.patch(
+                "src.write_behind.commit_files", wraps=src.storage.commit_files
+            ) as commit:
+                wb.flush()
+        commit.assert_called_once()
+        self.assertEqual(
+            sorted(p.name for p in commit.call_args.args[0]), ["hotels.json", "reservations.json"]
+        )
+        self.assertEqual(self.rooms_on_disk(), 9)
+        saved = load_json(self.base / "reservations.json", [])
+        self.assertEqual([(r["reservation_id"], r["active"]) for r in saved],
+                         [("R1", False), ("R2", True)])
+
+    def test_backend_overlay(self):
+        wb = WriteBehind(max_pending=100, max_delay=60)
+        backend = wb.wrap(JsonFileBackend(self.base / "items.json", "id"))
+        backend.apply({"a": {"id": "a"}, "b": {"id": "b"}}, ())
+        wb.flush()
+        backend.apply({"c": {"id": "c"}}, ("a",))
+        self.assertEqual([k for k, _ in backend.scan()], ["b", "c"])
+        self.assertEqual([k for k, _ in backend.page("b", 5)], ["c"])
+        self.assertIsNone(backend.get("a"))
+        backend.close()
+        self.assertEqual([r["id"] for r in load_json(self.base / "items.json", [])], ["b", "c"])
+
+    def test_fsync_policies(self):
+        with self.assertRaises(ValueError):
+            WriteBehind(fsync="sometimes")
+        for policy, expect_sync, expect_written in (
+            ("none", False, False), ("flush", False, False), ("always", True, True)
+        ):
+            with self.subTest(policy=policy):
+                wb = WriteBehind(max_pending=100, max_delay=60, fsync=policy)
+                backend = wb.wrap(JsonFileBackend(self.base / f"{policy}.json", "id"))
+                with mock.patch("src.storage.files.os.fsync") as fsync:
+                    backend.put("a", {"id": "a"})
+                    self.assertEqual(fsync.called, expect_sync)
+                    self.assertEqual((self.base / f"{policy}.json").exists(), expect_written)
+                    wb.close()
+                    self.assertEqual(fsync.called, policy != "none")
+
+    def test_failed_threshold_flush_is_retried(self):
+        with WriteBehind(max_pending=1, max_delay=60) as wb:
+            wb.attach(self.hotel_repo)
+            with mock.patch("src.write_behind.commit_files", side_effect=OSError("disk full")), \
+                    mock.patch("builtins.print") as printed:
+                self.hotel_repo.reserve_room("H1")
+            self.assertIn("disk full", printed.call_args.args[0])
+            self.assertEqual(self.hotel_repo.get_hotel("H1").rooms_available, 9)
+            self.assertEqual(self.rooms_on_disk(), 10)
+        self.assertEqual(self.rooms_on_disk(), 9)
+
+    def test_flush_waits_for_file_locks(self):
+        with WriteBehind(max_pending=100, max_delay=60) as wb:
+            wb.attach(self.hotel_repo)
+            self.hotel_repo.reserve_room("H1")
+            flusher = threading.Thread(target=wb.flush)
+            with file_lock(self.hotels_path):
+                flusher.start()
+                flusher.join(0.1)
+                self.assertTrue(flusher.is_alive())
+                self.assertEqual(self.rooms_on_disk(), 10)
+            flusher.join()
+            self.assertEqual(self.rooms_on_disk(), 9)
+
+    def test_concurrent_writers_and_timer_flushes(self):
+        reservations = ReservationRepository(
+            path=self.base / "reservations.json",
+            customer_repo=self.customer_repo,
+            hotel_repo=self.hotel_repo,
+        )
+        with WriteBehind(max_pending=3, max_delay=0.001) as wb:
+            wb.attach(self.hotel_repo, reservations)
+            book = reservations.create_reservation
+            threads = [
+                threading.Thread(target=book, args=(f"R{i}", "C1", "H1")) for i in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(10)
+            self.assertFalse(any(thread.is_alive() for thread in threads))
+        self.assertEqual(self.rooms_on_disk(), 2)
+        self.assertEqual(len(load_json(self.base / "reservations.json", [])), 8)
+
+    def test_outside_writes_are_not_overwritten(self):
+        with WriteBehind(max_pending=100, max_delay=60) as wb:
+            wb.attach(self.hotel_repo)
+            self.hotel_repo.reserve_room("H1")
+            HotelRepository(path=self.hotels_path).create_hotel("H2", "Otro", 5)
+            with self.assertRaises(ConflictError):
+                wb.flush()
+            self.assertEqual(self.rooms_on_disk(), 10)
+            self.assertEqual(self.hotel_repo.get_hotel("H1").rooms_available, 10)
+            self.assertIsNotNone(self.hotel_repo.get_hotel("H2"))
+            # Lo pendiente se descartó: las mutaciones siguientes se escriben.
+            self.hotel_repo.reserve_room("H2")
+        self.assertEqual(load_json(self.hotels_path, [])[1]["rooms_available"], 4)
+
+    def test_background_conflict_is_raised_to_the_next_caller(self):
+        with WriteBehind(max_pending=100, max_delay=0.001) as wb:
+            wb.attach(self.hotel_repo)
+            with file_lock(self.hotels_path), mock.patch("builtins.print"):
+                self.hotel_repo.reserve_room("H1")
+                # Otro escritor cambia el archivo antes de la escritura de fondo.
+                src.storage.save_json(self.hotels_path, load_json(self.hotels_path, []))
+            deadline = time.time() + 5
+            while wb.failure is None and time.time() < deadline:
+                time.sleep(0.01)
+            with self.assertRaises(ConflictError):
+                self.hotel_repo.reserve_room("H1")
+            # Se informa una sola vez; las mutaciones siguientes se escriben.
+            self.hotel_repo.reserve_room("H1")
+        self.assertEqual(self.rooms_on_disk(), 9)
+
+    def test_failed_close_still_closes(self):
+        wb = WriteBehind(max_pending=100, max_delay=60)
+        wb.attach(self.hotel_repo)
+        self.hotel_repo.reserve_room("H1")
+        with mock.patch("src.write_behind.commit_files", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                wb.close()
+        self.assertTrue(wb.closed)
+        with self.assertRaises(ValueError):
+            self.hotel_repo.reserve_room("H1")
+
+    def test_close_is_registered_at_exit(self):
+        with mock.patch("src.write_behind.atexit") as at_exit:
+            wb = WriteBehind()
+            at_exit.register.assert_called_once_with(wb.close)
+            wb.close()
+            at_exit.unregister.assert_called_once_with(wb.close)
+
+
+if __name__ == "__main__":
+    unittest.main()